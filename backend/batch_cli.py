@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+import asyncio
+import logging
+import argparse
+from dotenv import load_dotenv
+from services.registry import service_registry
+from services.batch import BatchScheduler, collect_sources
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Batch-обработка архива записей встреч")
+    parser.add_argument("source", nargs="?", help="Директория с аудиофайлами или файл-манифест")
+    parser.add_argument("--resume", metavar="BATCH_ID", help="Продолжить прерванный batch")
+    parser.add_argument("--status", metavar="BATCH_ID", help="Показать прогресс batch-а и выйти")
+    parser.add_argument("--transcribe-workers", type=int, default=1)
+    parser.add_argument("--analyze-workers", type=int, default=1)
+    return parser.parse_args()
+
+
+async def run(args) -> int:
+    orchestrator = service_registry.get("orchestrator")
+    scheduler = BatchScheduler(
+        orchestrator,
+        batches_dir=os.path.join(orchestrator.results_dir, "batches"),
+        transcribe_workers=args.transcribe_workers,
+        analyze_workers=args.analyze_workers
+    )
+
+    if args.status:
+        batch = scheduler.load_batch(args.status)
+        if batch is None:
+            logger.error(f"Batch not found: {args.status}")
+            return 1
+        print(json.dumps(scheduler.summary(batch), indent=2, ensure_ascii=False))
+        return 0
+
+    if args.resume:
+        batch_id = args.resume
+        if scheduler.load_batch(batch_id) is None:
+            logger.error(f"Batch not found: {batch_id}")
+            return 1
+    else:
+        if not args.source:
+            logger.error("Source directory or manifest is required")
+            return 1
+        if os.path.isdir(args.source):
+            sources = collect_sources(directory=args.source)
+        else:
+            sources = collect_sources(manifest=args.source)
+        batch_id = scheduler.create_batch(sources)["id"]
+        logger.info(f"Created batch {batch_id} (resume with --resume {batch_id})")
+
+    try:
+        summary = await scheduler.run_batch(batch_id)
+    except RuntimeError as e:
+        # Batch уже выполняет воркер API или другой запуск CLI
+        logger.error(str(e))
+        return 1
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    return 0 if summary["counts"]["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    sys.exit(asyncio.run(run(parse_args())))
@@ -0,0 +1,287 @@
+"""
+Генератор синтетического корпуса записей встреч для нагрузочных тестов
+
+Каждая запись - чередование реплик нескольких "голосов" (гармонический
+сигнал с индивидуальной частотой основного тона, формантами и слоговой
+модуляцией) и пауз заданной доли. Рядом с аудио пишется ground truth:
+точные границы реплик и спикеры (для проверки VAD, нарезки и диаризации),
+а в transcripts/ - ответы распознавания в формате ReplaySpeechService.
+
+Синтез векторизован (numpy) и идёт блоками, поэтому часовые записи
+генерируются за секунды и не требуют памяти на весь файл.
+
+Запуск (из backend/):
+    python -m benchmarks.corpus --out corpus --count 20 --minutes 5-60 --speakers 2-6
+    python -m benchmarks.corpus --out corpus --codec opus --sample-rate 48000 --silence-ratio 0.4
+    python -m benchmarks.run_pipeline --audio-dir corpus --speech-replay-dir corpus/transcripts
+"""
+import os
+import sys
+import json
+import time
+import wave
+import random
+import shutil
+import argparse
+import subprocess
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.replay_speech import synthetic_sentences  # noqa: E402
+
+# Кодек -> (расширение, аргументы ffmpeg); wav пишется без ffmpeg
+CODECS = {
+    "wav": ("wav", None),
+    "flac": ("flac", ["-c:a", "flac"]),
+    "mp3": ("mp3", ["-c:a", "libmp3lame", "-b:a", "64k"]),
+    "opus": ("opus", ["-c:a", "libopus", "-b:a", "32k"]),
+    "ogg": ("ogg", ["-c:a", "libvorbis", "-q:a", "3"]),
+    "aac": ("m4a", ["-c:a", "aac", "-b:a", "64k"]),
+}
+
+BLOCK_SECONDS = 30.0
+HARMONICS = 8
+WORDS_PER_SECOND = 2.5
+
+
+def _parse_range(value: str, cast=float) -> Tuple[Any, Any]:
+    low, _, high = value.partition("-")
+    return cast(low), cast(high or low)
+
+
+# ---------------------------------------------------------------------- #
+# Разметка
+# ---------------------------------------------------------------------- #
+
+def plan_segments(rng: np.random.Generator, duration: float, speakers: int,
+                  silence_ratio: float, mean_turn: float = 4.0) -> List[Dict[str, Any]]:
+    """
+    Разметка записи: реплики логнормальной длины со сменой спикера и паузы,
+    суммарно занимающие silence_ratio длительности
+    """
+    speech_total = duration * (1.0 - silence_ratio)
+    # С запасом генерируем длины реплик и обрезаем по суммарной длительности речи
+    estimate = int(speech_total / mean_turn * 1.5) + 8
+    sigma = 0.6
+    turns = rng.lognormal(np.log(mean_turn) - sigma ** 2 / 2, sigma, estimate).clip(0.4, mean_turn * 6)
+    ends = np.cumsum(turns)
+    count = int(np.searchsorted(ends, speech_total)) + 1
+    turns = turns[:count]
+    turns[-1] -= ends[count - 1] - speech_total
+    if turns[-1] < 0.2 and count > 1:
+        turns = turns[:-1]
+        turns[-1] += speech_total - turns.sum()
+
+    # Паузы: перед каждой репликой и после последней, доли - по Дирихле
+    gaps = rng.dirichlet(np.full(len(turns) + 1, 1.5)) * (duration - turns.sum())
+    starts = np.cumsum(np.concatenate(([gaps[0]], turns[:-1] + gaps[1:-1])))
+
+    # Следующий спикер всегда отличается от предыдущего
+    if speakers > 1:
+        labels = np.cumsum(rng.integers(1, speakers, len(turns))) % speakers
+    else:
+        labels = np.zeros(len(turns), dtype=int)
+
+    return [
+        {"speaker": int(label), "start": round(float(start), 3), "end": round(float(start + turn), 3)}
+        for label, start, turn in zip(labels, starts, turns)
+    ]
+
+
+def make_voices(rng: np.random.Generator, speakers: int) -> Dict[str, np.ndarray]:
+    """Параметры голосов: основной тон, амплитуды гармоник (форманты), темп слогов"""
+    f0 = rng.uniform(95, 240, speakers)
+    harmonic = np.arange(1, HARMONICS + 1)
+    formant = rng.uniform(400, 900, (speakers, 1))
+    # Огибающая гармоник: пик около форманты, спад ~1/h
+    amplitudes = np.exp(-((harmonic * f0[:, None] - formant) / 600.0) ** 2) + 0.3 / harmonic
+    amplitudes /= amplitudes.sum(axis=1, keepdims=True)
+    return {
+        "f0": f0,
+        "amplitudes": amplitudes.astype(np.float32),
+        "syllable_rate": rng.uniform(3.5, 5.5, speakers),
+        "level": rng.uniform(0.35, 0.6, speakers)
+    }
+
+
+# ---------------------------------------------------------------------- #
+# Синтез
+# ---------------------------------------------------------------------- #
+
+def synthesize_blocks(segments: List[Dict[str, Any]], voices: Dict[str, np.ndarray], duration: float,
+                      sample_rate: int, noise_level: float, rng: np.random.Generator):
+    """
+    Генерирует PCM int16 блоками по BLOCK_SECONDS; фаза основного тона
+    непрерывна между блоками
+    """
+    total = int(round(duration * sample_rate))
+    block = int(BLOCK_SECONDS * sample_rate)
+    seg_starts = np.array([int(s["start"] * sample_rate) for s in segments])
+    seg_ends = np.array([int(s["end"] * sample_rate) for s in segments])
+    seg_speakers = np.array([s["speaker"] for s in segments])
+    harmonic = np.arange(1, HARMONICS + 1, dtype=np.float32)
+    phase = 0.0
+
+    for offset in range(0, total, block):
+        n = min(block, total - offset)
+        index = np.arange(offset, offset + n)
+        t = index / sample_rate
+
+        # Спикер каждого сэмпла (-1 - пауза)
+        seg = np.searchsorted(seg_starts, index, side="right") - 1
+        active = (seg >= 0) & (index < seg_ends[np.maximum(seg, 0)])
+        speaker = np.where(active, seg_speakers[np.maximum(seg, 0)], 0)
+
+        # Интонация: медленное колебание основного тона
+        f0 = voices["f0"][speaker] * (1.0 + 0.06 * np.sin(2 * np.pi * 0.3 * t + speaker))
+        phases = phase + 2 * np.pi * np.cumsum(f0) / sample_rate
+        phase = float(phases[-1] % (2 * np.pi))
+
+        voiced = (np.sin(phases[:, None] * harmonic) * voices["amplitudes"][speaker]).sum(axis=1)
+        # Слоговая модуляция и плавные края реплик
+        syllables = 0.5 * (1.0 + np.sin(2 * np.pi * voices["syllable_rate"][speaker] * t)) ** 2
+        since_start = (index - seg_starts[np.maximum(seg, 0)]) / sample_rate
+        until_end = (seg_ends[np.maximum(seg, 0)] - index) / sample_rate
+        edges = np.clip(np.minimum(since_start, until_end) / 0.02, 0.0, 1.0)
+
+        signal = np.where(active, voiced * syllables * edges * voices["level"][speaker], 0.0)
+        signal = signal + rng.normal(0.0, noise_level, n)
+        yield (np.clip(signal, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def write_audio(path: str, blocks, sample_rate: int, codec: str) -> None:
+    extension, codec_args = CODECS[codec]
+    if codec_args is None:
+        with wave.open(path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            for chunk in blocks:
+                wav.writeframes(chunk)
+        return
+
+    if shutil.which("ffmpeg") is None:
+        raise SystemExit(f"ffmpeg is required for codec {codec!r}; use --codec wav")
+    process = subprocess.Popen(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+         "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0", *codec_args, path],
+        stdin=subprocess.PIPE
+    )
+    for chunk in blocks:
+        process.stdin.write(chunk)
+    process.stdin.close()
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed to encode {path}")
+
+
+# ---------------------------------------------------------------------- #
+# Корпус
+# ---------------------------------------------------------------------- #
+
+def transcript_for(segments: List[Dict[str, Any]], seed: int) -> str:
+    """Текст транскрипции по разметке: фразы пропорционально длине реплик"""
+    rng = random.Random(seed)
+    lines = []
+    for segment in segments:
+        count = int(round((segment["end"] - segment["start"]) * WORDS_PER_SECOND / 6))
+        lines.append(f"Спикер {segment['speaker'] + 1}: " + " ".join(synthetic_sentences(rng, count)))
+    return "\n".join(lines)
+
+
+def generate_meeting(out_dir: str, name: str, duration: float, speakers: int, silence_ratio: float,
+                     sample_rate: int, codec: str, noise_db: float, seed: int) -> Dict[str, Any]:
+    rng = np.random.default_rng(seed)
+    segments = plan_segments(rng, duration, speakers, silence_ratio)
+    voices = make_voices(rng, speakers)
+    noise_level = 10 ** (noise_db / 20.0)
+
+    extension = CODECS[codec][0]
+    audio_path = os.path.join(out_dir, f"{name}.{extension}")
+    write_audio(audio_path, synthesize_blocks(segments, voices, duration, sample_rate, noise_level, rng),
+                sample_rate, codec)
+
+    speech = sum(s["end"] - s["start"] for s in segments)
+    truth = {
+        "file": os.path.basename(audio_path),
+        "duration": round(duration, 3),
+        "sample_rate": sample_rate,
+        "codec": codec,
+        "speakers": speakers,
+        "silence_ratio": round(1.0 - speech / duration, 4),
+        "noise_db": noise_db,
+        "seed": seed,
+        "segments": segments
+    }
+    with open(os.path.join(out_dir, f"{name}.truth.json"), "w", encoding="utf-8") as f:
+        json.dump(truth, f, ensure_ascii=False)
+
+    # Ответ распознавания для ReplaySpeechService (--speech-replay-dir)
+    replay = {
+        "text": transcript_for(segments, seed),
+        "duration": round(duration),
+        "language": "ru-RU",
+        "participant_count": speakers,
+        "speaker_info": [],
+        "confidence": 0.95
+    }
+    with open(os.path.join(out_dir, "transcripts", f"{name}.json"), "w", encoding="utf-8") as f:
+        json.dump(replay, f, ensure_ascii=False)
+    return truth
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Генератор синтетического корпуса записей встреч")
+    parser.add_argument("--out", required=True, help="Директория корпуса")
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--minutes", default="5", help="Длительность в минутах: число или диапазон 5-90")
+    parser.add_argument("--speakers", default="2-4", help="Число спикеров: число или диапазон")
+    parser.add_argument("--silence-ratio", type=float, default=0.2, help="Доля тишины (0..0.95)")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--codec", choices=sorted(CODECS), default="wav")
+    parser.add_argument("--noise-db", type=float, default=-50.0, help="Уровень фонового шума, dBFS")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if not 0.0 <= args.silence_ratio < 0.95:
+        raise SystemExit("--silence-ratio must be in [0, 0.95)")
+    minutes = _parse_range(args.minutes)
+    speakers = _parse_range(args.speakers, int)
+    os.makedirs(os.path.join(args.out, "transcripts"), exist_ok=True)
+
+    picker = random.Random(args.seed)
+    manifest = []
+    started = time.perf_counter()
+    for i in range(args.count):
+        truth = generate_meeting(
+            args.out,
+            name=f"meeting_{i:04d}",
+            duration=picker.uniform(*minutes) * 60.0,
+            speakers=picker.randint(*speakers),
+            silence_ratio=args.silence_ratio,
+            sample_rate=args.sample_rate,
+            codec=args.codec,
+            noise_db=args.noise_db,
+            seed=args.seed * 100003 + i
+        )
+        manifest.append({key: truth[key] for key in ("file", "duration", "speakers", "silence_ratio")})
+        print(f"{truth['file']}: {truth['duration'] / 60:.1f} min, {truth['speakers']} speakers, "
+              f"{len(truth['segments'])} segments")
+
+    with open(os.path.join(args.out, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    audio_minutes = sum(item["duration"] for item in manifest) / 60
+    elapsed = time.perf_counter() - started
+    print(f"Generated {len(manifest)} files, {audio_minutes:.1f} min of audio in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
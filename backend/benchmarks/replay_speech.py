@@ -0,0 +1,126 @@
+import os
+import json
+import random
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# LINEAR16 16 kHz mono после decode_audio
+BYTES_PER_SECOND = 16000 * 2
+
+_SUBJECTS = "мы команда клиент менеджер разработчики тестировщики дизайнер аналитик маркетинг руководитель".split()
+_VERBS = ("обсудили перенесли согласовали проверили подготовили отложили оценили запустили "
+          "утвердили доработали отправили назначили").split()
+_OBJECTS = ("релиз бюджет сроки тестирование дизайн сервер базу интеграцию документацию ревью "
+            "метрики риски спринт демо отчёт приоритеты контракт презентацию миграцию план").split()
+_DETAILS = ["до пятницы", "на следующей неделе", "к концу месяца", "после встречи", "вместе с клиентом",
+            "без изменений", "с новыми требованиями", "в первую очередь", "по итогам ревью"]
+
+
+def synthetic_sentences(rng: random.Random, count: int) -> List[str]:
+    """Правдоподобные деловые фразы (~6 слов) для синтетических транскрипций"""
+    sentences = []
+    for _ in range(max(1, count)):
+        sentence = f"{rng.choice(_SUBJECTS)} {rng.choice(_VERBS)} {rng.choice(_OBJECTS)} {rng.choice(_DETAILS)}"
+        sentences.append(sentence.capitalize() + ".")
+    return sentences
+
+
+class ReplaySpeechService:
+    """
+    Замена GoogleSpeechService для бенчмарков
+
+    Декодирование выполняет настоящий сервис (стадия измеряется как есть),
+    а распознавание воспроизводит записанные ответы из replay_dir
+    (<имя файла без расширения>.json в формате transcribe_content) или
+    синтетический текст длиной по длительности аудио. Задержка и доля
+    ошибок настраиваются.
+    """
+
+    def __init__(
+        self,
+        decoder=None,
+        replay_dir: Optional[str] = None,
+        base_latency: float = 0.2,
+        realtime_factor: float = 0.05,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            decoder: Сервис с decode_audio (обычно настоящий GoogleSpeechService)
+            replay_dir: Директория с записанными ответами распознавания
+            base_latency: Фиксированная задержка запроса (сек)
+            realtime_factor: Задержка на секунду аудио (0.05 - 1 минута за 3 сек)
+            error_rate: Доля запросов, завершающихся ошибкой
+            seed: Seed для воспроизводимых задержек и ошибок
+        """
+        self.decoder = decoder
+        self.replay_dir = replay_dir
+        self.base_latency = base_latency
+        self.realtime_factor = realtime_factor
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "errors": 0, "audio_seconds": 0.0}
+
+    async def decode_audio(self, file_path: str) -> bytes:
+        if self.decoder is not None:
+            return await self.decoder.decode_audio(file_path)
+        return await asyncio.to_thread(_read_file, file_path)
+
+    def _recorded(self, source_name: str) -> Optional[Dict[str, Any]]:
+        if not self.replay_dir:
+            return None
+        path = os.path.join(self.replay_dir, os.path.splitext(os.path.basename(source_name))[0] + ".json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _synthetic(self, source_name: str, duration: float, language_code: Optional[str] = None) -> Dict[str, Any]:
+        # ~2.5 слова в секунду, детерминировано по имени файла
+        rng = random.Random(f"{source_name}:{int(duration)}")
+        return {
+            "text": " ".join(synthetic_sentences(rng, int(duration * 2.5 / 6))),
+            "duration": round(duration),
+            "language": language_code or "ru-RU",
+            "participant_count": 2,
+            "speaker_info": [],
+            "confidence": 0.9
+        }
+
+    async def transcribe_content(self, content: bytes, source_name: str,
+                                 language_code: Optional[str] = None) -> Dict[str, Any]:
+        duration = len(content) / BYTES_PER_SECOND
+        self.stats["requests"] += 1
+        self.stats["audio_seconds"] += duration
+        await asyncio.sleep(self.base_latency + duration * self.realtime_factor)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            raise RuntimeError(f"Replay speech error for {source_name}")
+        recorded = await asyncio.to_thread(self._recorded, source_name)
+        return recorded if recorded is not None else self._synthetic(source_name, duration, language_code)
+
+    async def transcribe_segment(self, pcm: bytes, offset: float = 0.0,
+                                 language_code: Optional[str] = None) -> Dict[str, Any]:
+        duration = len(pcm) / BYTES_PER_SECOND
+        self.stats["requests"] += 1
+        self.stats["audio_seconds"] += duration
+        await asyncio.sleep(self.base_latency + duration * self.realtime_factor)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            raise RuntimeError(f"Replay speech error for segment at {offset:.1f}s")
+        synthetic = self._synthetic(f"segment-{offset:.0f}", duration)
+        return {"text": synthetic["text"], "offset": offset, "duration": duration, "language": language_code or "ru-RU",
+                "speaker_info": [], "confidence": synthetic["confidence"]}
+
+    async def transcribe_audio(self, file_path: str) -> Dict[str, Any]:
+        content = await self.decode_audio(file_path) if os.path.exists(file_path) else b""
+        return await self.transcribe_content(content, file_path)
+
+
+def _read_file(file_path: str) -> bytes:
+    with open(file_path, "rb") as f:
+        return f.read()
@@ -0,0 +1,304 @@
+"""
+Бенчмарк конвейера обработки встреч
+
+Поднимает локальный stand-in Claude (stub_llm_server, через
+ANTHROPIC_BASE_URL) и подменяет распознавание речи на ReplaySpeechService,
+после чего прогоняет встречи через MeetingOrchestrator.process_meeting или
+через HTTP API с заданным параллелизмом. Отчёт: p50/p95/p99 по стадиям и
+end-to-end, задержка event loop, встречи в минуту, пиковый RSS.
+
+Запуск (из backend/):
+    python -m benchmarks.run_pipeline --meetings 50 --concurrency 8
+    python -m benchmarks.run_pipeline --mode http --llm-latency 0.8 --llm-error-rate 0.05
+    python -m benchmarks.run_pipeline --output new.json --baseline old.json --max-regression 0.2
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import asyncio
+import logging
+import argparse
+import resource
+import tempfile
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.replay_speech import ReplaySpeechService  # noqa: E402
+
+logger = logging.getLogger("benchmarks")
+
+STAGES = ("decode_stage", "transcribe_stage", "analyze_stage")
+MIN_LATENCY_DELTA = 0.05
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".webm")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарк конвейера обработки встреч")
+    parser.add_argument("--mode", choices=["orchestrator", "http"], default="orchestrator")
+    parser.add_argument("--audio-dir", default=os.path.join(BACKEND_DIR, "demo_data"),
+                        help="Аудиофайлы для прогона (используются по кругу)")
+    parser.add_argument("--meetings", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Задержка до первого токена (сек)")
+    parser.add_argument("--llm-tps", type=float, default=200.0, help="Скорость выдачи токенов")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-replay-dir", help="Записанные ответы Claude (см. stub_llm_server.py)")
+    parser.add_argument("--speech-latency", type=float, default=0.2)
+    parser.add_argument("--speech-rtf", type=float, default=0.05, help="Задержка распознавания на секунду аудио")
+    parser.add_argument("--speech-error-rate", type=float, default=0.0)
+    parser.add_argument("--speech-replay-dir", help="Записанные ответы распознавания (<имя>.json)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Сохранить отчёт в JSON")
+    parser.add_argument("--baseline", help="Отчёт предыдущего прогона для сравнения")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Допустимое ухудшение p95 и пропускной способности (доля)")
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args()
+
+
+# ---------------------------------------------------------------------- #
+# Окружение
+# ---------------------------------------------------------------------- #
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_llm_stub(args) -> Any:
+    """Запускает stand-in Claude в отдельном потоке и возвращает его приложение"""
+    import uvicorn
+    from stub_llm_server import create_app
+
+    app = create_app(args.llm_latency, args.llm_tps, args.llm_error_rate, args.llm_replay_dir, args.seed)
+    port = _free_port()
+    # loop="asyncio": uvloop-политика, установленная из потока, ломает subprocess в основном loop
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", loop="asyncio"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{port}"
+    return app
+
+
+def collect_audio(audio_dir: str) -> List[str]:
+    files = sorted(
+        os.path.join(audio_dir, name) for name in os.listdir(audio_dir)
+        if name.lower().endswith(AUDIO_EXTENSIONS)
+    )
+    if not files:
+        raise SystemExit(f"No audio files in {audio_dir}")
+    return files
+
+
+class StageTimer:
+    """Оборачивает стадии оркестратора и собирает их длительность"""
+
+    def __init__(self, orchestrator):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        for stage in STAGES:
+            setattr(orchestrator, stage, self._wrap(stage, getattr(orchestrator, stage)))
+
+    def _wrap(self, stage: str, method):
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                self.samples[stage].append(time.perf_counter() - started)
+        return timed
+
+
+# ---------------------------------------------------------------------- #
+# Прогон
+# ---------------------------------------------------------------------- #
+
+async def run_orchestrator(orchestrator, files: List[str], args) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    durations, errors = [], []
+
+    async def one(index: int) -> None:
+        path = files[index % len(files)]
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await orchestrator.process_meeting(f"bench-{index}", path, os.path.basename(path))
+                durations.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(str(e))
+
+    await asyncio.gather(*(one(i) for i in range(args.meetings)))
+    return {"durations": durations, "errors": errors}
+
+
+async def run_http(app, files: List[str], args) -> Dict[str, Any]:
+    import httpx
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    durations, errors = [], []
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60.0) as client:
+        async def one(index: int) -> None:
+            path = files[index % len(files)]
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    with open(path, "rb") as f:
+                        response = await client.post(
+                            "/api/meetings/upload", files={"file": (os.path.basename(path), f.read())}
+                        )
+                    response.raise_for_status()
+                    meeting_id = response.json()["id"]
+                    while True:
+                        await asyncio.sleep(0.05)
+                        status = (await client.get(f"/api/meetings/{meeting_id}")).json().get("status")
+                        if status in ("completed", "failed", "error"):
+                            break
+                    if status != "completed":
+                        raise RuntimeError(f"meeting {meeting_id} finished with status {status}")
+                    durations.append(time.perf_counter() - started)
+                except Exception as e:
+                    errors.append(str(e))
+
+        await asyncio.gather(*(one(i) for i in range(args.meetings)))
+    return {"durations": durations, "errors": errors}
+
+
+# ---------------------------------------------------------------------- #
+# Отчёт
+# ---------------------------------------------------------------------- #
+
+def percentiles(samples: List[float]) -> Dict[str, Any]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 4),
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": round(ordered[-1], 4)
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Возвращает список регрессий относительно baseline"""
+    regressions = []
+    for name, stats in report["latency"].items():
+        old = baseline.get("latency", {}).get(name, {})
+        if not stats.get("p95") or not old.get("p95"):
+            continue
+        # Разница в единицы миллисекунд - шум, а не регрессия
+        if stats["p95"] > old["p95"] * (1 + threshold) and stats["p95"] - old["p95"] > MIN_LATENCY_DELTA:
+            regressions.append(f"{name} p95 {old['p95']}s -> {stats['p95']}s")
+    old_rate = baseline.get("meetings_per_minute")
+    if old_rate and report["meetings_per_minute"] < old_rate * (1 - threshold):
+        regressions.append(f"throughput {old_rate} -> {report['meetings_per_minute']} meetings/min")
+    return regressions
+
+
+async def main(args) -> int:
+    files = collect_audio(os.path.abspath(args.audio_dir))
+    workdir = tempfile.mkdtemp(prefix="audioinsight-bench-")
+    # main.py пишет в относительные results/ и temp_uploads/ - работаем в отдельной директории
+    os.chdir(workdir)
+    os.makedirs("results", exist_ok=True)
+    os.makedirs("temp_uploads", exist_ok=True)
+    os.environ.update(RESULTS_DIR="./results", ANALYSIS_BACKEND="anthropic", ANTHROPIC_API_KEY="bench")
+    llm_stub = start_llm_stub(args)
+
+    if args.mode == "http":
+        import main as app_module
+        orchestrator = app_module.orchestrator
+    else:
+        from services.orchestrator import MeetingOrchestrator
+        orchestrator = MeetingOrchestrator()
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    orchestrator.speech_service = ReplaySpeechService(
+        decoder=orchestrator.speech_service,
+        replay_dir=args.speech_replay_dir,
+        base_latency=args.speech_latency,
+        realtime_factor=args.speech_rtf,
+        error_rate=args.speech_error_rate,
+        seed=args.seed
+    )
+    timer = StageTimer(orchestrator)
+    from services.loop_monitor import LoopMonitor
+    monitor = LoopMonitor(window=100000)
+    monitor.start()
+
+    started = time.perf_counter()
+    if args.mode == "http":
+        outcome = await run_http(app_module.app, files, args)
+    else:
+        outcome = await run_orchestrator(orchestrator, files, args)
+    wall = time.perf_counter() - started
+    monitor.stop()
+
+    report = {
+        "mode": args.mode,
+        "meetings": args.meetings,
+        "concurrency": args.concurrency,
+        "completed": len(outcome["durations"]),
+        "failed": len(outcome["errors"]),
+        "wall_seconds": round(wall, 3),
+        "meetings_per_minute": round(len(outcome["durations"]) / wall * 60, 2) if wall else 0.0,
+        # ru_maxrss в килобайтах на Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "latency": {
+            "end_to_end": percentiles(outcome["durations"]),
+            **{stage.replace("_stage", ""): percentiles(timer.samples[stage]) for stage in STAGES},
+            # Блокирующие вызовы в loop - регрессия так же, как рост задержки стадий
+            "event_loop_lag": percentiles(list(monitor.samples))
+        },
+        "event_loop": monitor.get_metrics(),
+        "speech": orchestrator.speech_service.stats,
+        "llm": {
+            "stub": llm_stub.state.stats,
+            "scheduler": orchestrator.analysis_worker.scheduler.get_metrics(),
+            "usage": orchestrator.analysis_worker.get_usage_stats()
+        },
+        "errors": outcome["errors"][:10]
+    }
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        exit_code = 1 if regressions else 0
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    return exit_code
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    # Пути из аргументов - относительно исходной директории
+    for name in ("audio_dir", "output", "baseline", "llm_replay_dir", "speech_replay_dir"):
+        if getattr(arguments, name):
+            setattr(arguments, name, os.path.abspath(getattr(arguments, name)))
+    sys.exit(asyncio.run(main(arguments)))
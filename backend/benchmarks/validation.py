@@ -0,0 +1,230 @@
+"""
+Микробенчмарк проверки результата встречи перед ответом API
+
+Сравнивает прежний путь (validate_and_clean_result из main.py на
+safe_get и isinstance + json.dumps) со схемой models.meeting_result
+(скомпилированный валидатор pydantic + сериализация в JSON ядром
+pydantic-core) на синтетических результатах в двух сохраняемых форматах:
+оркестратора и демо/старом (вложенный transcript).
+
+Запуск (из backend/):
+    python -m benchmarks.validation
+    python -m benchmarks.validation --items 40 --transcript-chars 200000 --iterations 2000
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from models.meeting_result import meeting_result_adapter  # noqa: E402
+
+logger = logging.getLogger("legacy")
+
+
+def orchestrator_result(items: int, transcript_chars: int) -> Dict[str, Any]:
+    """Результат в формате MeetingOrchestrator (после _apply_analysis)"""
+    text = ("Мы обсудили план релиза и распределили задачи по команде. " * (transcript_chars // 58 + 1))[:transcript_chars]
+    return {
+        "id": "bench", "filename": "bench.mp3", "tenant": "default", "status": "completed",
+        "analysis_timestamp": datetime.utcnow().isoformat(),
+        "transcription": text, "meeting_duration_estimate": 3600, "participant_count_estimate": 4,
+        "tasks": [], "decisions": [], "topics": [], "insights": [], "effectiveness_score": 0.0, "risks": [],
+        "content": {
+            "topics": [{"title": f"Тема {i}", "description": "Обсуждение сроков и рисков", "time_discussed": i}
+                       for i in range(items)],
+            "decisions": [{"decision": f"Решение {i}", "context": "Релиз", "impact": "Сроки"} for i in range(items)],
+            "meetingType": "planning", "effectivenessScore": 7
+        },
+        "actionItems": [{"id": str(i), "task": f"Задача {i}", "assignee": "Анна", "deadline": "пятница",
+                         "priority": "high", "status": "pending", "context": ""} for i in range(items)],
+        "insights": {
+            "teamDynamics": "Команда вовлечена",
+            "processRecommendations": [f"Рекомендация {i}" for i in range(items)],
+            "riskFlags": [f"Риск {i}" for i in range(items)],
+            "followUpSuggestions": [f"Следующий шаг {i}" for i in range(items)]
+        },
+        "llm_usage": {"input_tokens": 12000, "output_tokens": 1500}
+    }
+
+
+def legacy_result(items: int, transcript_chars: int) -> Dict[str, Any]:
+    """Результат в демо/старом формате: вложенный transcript, snake_case insights"""
+    result = orchestrator_result(items, transcript_chars)
+    result["transcript"] = {"text": result.pop("transcription"), "duration": 3600, "language": "ru-RU",
+                            "participantCount": 4}
+    insights = result["insights"]
+    result["insights"] = {
+        "team_dynamics": insights["teamDynamics"],
+        "process_recommendations": insights["processRecommendations"],
+        "risk_flags": insights["riskFlags"],
+        "follow_up_suggestions": insights["followUpSuggestions"]
+    }
+    return result
+
+
+# --------------------------------------------------------------------------- #
+# Прежняя реализация (main.py до перехода на схему) - эталон для сравнения
+# --------------------------------------------------------------------------- #
+
+def safe_get(obj, key, default=None):
+    try:
+        if isinstance(obj, dict):
+            return obj.get(key, default)
+        elif isinstance(obj, list):
+            logger.warning(f"Попытка вызвать .get() на списке для ключа '{key}'")
+            return default
+        else:
+            return default
+    except Exception as e:
+        logger.error(f"Ошибка в safe_get для ключа '{key}': {str(e)}")
+        return default
+
+
+def validate_and_clean_result(result):
+    clean_result = {}
+    clean_result["id"] = safe_get(result, "id", "unknown")
+    clean_result["filename"] = safe_get(result, "filename", "unknown.mp3")
+    clean_result["status"] = safe_get(result, "status", "completed")
+    clean_result["uploadedAt"] = safe_get(result, "uploadedAt",
+                                        safe_get(result, "uploaded_at", datetime.utcnow().isoformat()))
+    clean_result["processedAt"] = safe_get(result, "processedAt",
+                                         safe_get(result, "processed_at", datetime.utcnow().isoformat()))
+    transcript_data = safe_get(result, "transcript", {})
+    if not isinstance(transcript_data, dict):
+        transcript_data = {}
+    clean_result["transcription"] = safe_get(transcript_data, "text", "No transcript available")
+    clean_result["transcript"] = {
+        "text": safe_get(transcript_data, "text", "No transcript available"),
+        "duration": safe_get(transcript_data, "duration", 0),
+        "language": safe_get(transcript_data, "language", "en-US"),
+        "participantCount": safe_get(transcript_data, "participantCount",
+                                     safe_get(transcript_data, "participant_count", 1))
+    }
+    content_data = safe_get(result, "content", {})
+    if not isinstance(content_data, dict):
+        content_data = {}
+    topics = safe_get(content_data, "topics", [])
+    if not isinstance(topics, list):
+        topics = []
+    decisions = safe_get(content_data, "decisions", [])
+    if not isinstance(decisions, list):
+        decisions = []
+    transformed_topics = []
+    for topic in topics:
+        if isinstance(topic, dict):
+            transformed_topics.append({
+                "topic": safe_get(topic, "title", safe_get(topic, "topic", "Unknown Topic")),
+                "summary": safe_get(topic, "description", safe_get(topic, "summary", "")),
+                "duration_estimate": str(safe_get(topic, "time_discussed", safe_get(topic, "timeDiscussed", 0)))
+            })
+    transformed_decisions = []
+    for decision in decisions:
+        if isinstance(decision, dict):
+            transformed_decisions.append({
+                "decision": safe_get(decision, "decision", "Unknown Decision"),
+                "context": safe_get(decision, "context", ""),
+                "impact": safe_get(decision, "impact", "")
+            })
+    clean_result["content"] = {
+        "topics": transformed_topics,
+        "decisions": transformed_decisions,
+        "meetingType": safe_get(content_data, "meetingType", safe_get(content_data, "meeting_type", "general")),
+        "effectivenessScore": safe_get(content_data, "effectivenessScore",
+                                       safe_get(content_data, "effectiveness_score", 5))
+    }
+    action_items = safe_get(result, "actionItems", safe_get(result, "action_items", []))
+    if not isinstance(action_items, list):
+        action_items = []
+    clean_action_items = []
+    for item in action_items:
+        if isinstance(item, dict):
+            clean_action_items.append({
+                "id": safe_get(item, "id", str(len(clean_action_items) + 1)),
+                "task": safe_get(item, "task", "No task description"),
+                "assignee": safe_get(item, "assignee", "Unassigned"),
+                "deadline": safe_get(item, "deadline", None),
+                "priority": safe_get(item, "priority", "medium"),
+                "status": safe_get(item, "status", "pending"),
+                "context": safe_get(item, "context", "")
+            })
+    clean_result["actionItems"] = clean_action_items
+    insights_data = safe_get(result, "insights", {})
+    if not isinstance(insights_data, dict):
+        insights_data = {}
+    team_dynamics = safe_get(insights_data, "team_dynamics", "")
+    process_recs = safe_get(insights_data, "process_recommendations", [])
+    risk_flags = safe_get(insights_data, "risk_flags", [])
+    follow_up = safe_get(insights_data, "follow_up_suggestions", [])
+    transformed_insights = []
+    if team_dynamics:
+        transformed_insights.append({"insight": team_dynamics, "category": "teamwork", "recommendation": ""})
+    for rec in process_recs:
+        if isinstance(rec, str):
+            transformed_insights.append({"insight": rec, "category": "process", "recommendation": rec})
+    for suggestion in follow_up:
+        if isinstance(suggestion, str):
+            transformed_insights.append({"insight": suggestion, "category": "followup", "recommendation": suggestion})
+    clean_result["insights"] = transformed_insights
+    clean_result["risks"] = [risk for risk in risk_flags if isinstance(risk, str)]
+    partial = safe_get(result, "partial")
+    if clean_result["status"] == "processing" and isinstance(partial, dict):
+        clean_result["partial"] = partial
+    logger.info("✅ Result validation completed successfully")
+    return clean_result
+
+
+# --------------------------------------------------------------------------- #
+
+
+def before(result: Dict[str, Any]) -> bytes:
+    return json.dumps(validate_and_clean_result(result), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def after(result: Dict[str, Any]) -> bytes:
+    return meeting_result_adapter.dump_json(meeting_result_adapter.validate_python(result))
+
+
+def measure(fn: Callable[[Dict[str, Any]], Any], result: Dict[str, Any], iterations: int) -> float:
+    """Медиана из 5 серий, микросекунды на вызов"""
+    fn(result)
+    runs = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn(result)
+        runs.append((time.perf_counter() - started) / iterations * 1e6)
+    return sorted(runs)[2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Микробенчмарк проверки результата встречи")
+    parser.add_argument("--items", type=int, default=10, help="Тем, решений, задач и инсайтов в результате")
+    parser.add_argument("--transcript-chars", type=int, default=50000, help="Длина транскрипции (символов)")
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+    # INFO-лог прежней реализации не пишется: сравнивается только сама проверка
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"{'format':<14}{'stage':<22}{'before, us':>12}{'after, us':>12}{'speedup':>10}")
+    for name, factory in (("orchestrator", orchestrator_result), ("legacy", legacy_result)):
+        result = factory(args.items, args.transcript_chars)
+        stages = (
+            ("validate", lambda r: validate_and_clean_result(r), lambda r: meeting_result_adapter.validate_python(r)),
+            ("validate+serialize", before, after)
+        )
+        for stage, old, new in stages:
+            old_us = measure(old, result, args.iterations)
+            new_us = measure(new, result, args.iterations)
+            print(f"{name:<14}{stage:<22}{old_us:>12.1f}{new_us:>12.1f}{old_us / new_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
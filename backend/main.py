@@ -1,16 +1,28 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Request
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, WebSocket, Depends, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
-from datetime import datetime
+from typing import List, Optional
+from datetime import datetime, timezone
 import os
+import time
 import uuid
 import json
 import asyncio
 import logging
 import traceback
 from dotenv import load_dotenv
-from services.orchestrator import MeetingOrchestrator
+from services.registry import service_registry
+from services.batch import BatchScheduler, collect_sources
+from services.tracing import tracer, span
+from services.loop_monitor import loop_monitor
+from services.uploads import ResumableUploadStore, UploadError
+from services.admission import AdmissionController, AdmissionRejected
+from services.tenants import DEFAULT_TENANT, Tenant, TenantError, current_tenant, tenant_registry
+from services.status_store import worker_id
+from services.compression import PrecompressedCache, negotiate
+from services.meeting_index import DEFAULT_FIELDS
+from models.meeting_result import fallback_meeting_result, meeting_result_adapter
 
 # Настройка логирования
 logging.basicConfig(
@@ -50,12 +62,56 @@ class MeetingResponse(BaseModel):
     filename: str
     status: str
 
-# Глобальное хранилище
-meeting_results = {}
-processing_status = {}
+class TaskStatusUpdate(BaseModel):
+    status: str
+
+class ReanalyzeRequest(BaseModel):
+    meeting_ids: Optional[List[str]] = None
+    force: bool = False
+
+class UploadSessionRequest(BaseModel):
+    filename: str
+    size: int
+    part_size: Optional[int] = None
+
+class BatchRequest(BaseModel):
+    directory: Optional[str] = None
+    manifest: Optional[str] = None
+    files: Optional[List[str]] = None
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Общее состояние встреч (статусы обработки, результаты вне файлов, аренды) -
+# одно на все воркеры uvicorn, см. services.status_store
+status_store = service_registry.get("status_store")
+WORKER_ID = worker_id()
+LEASE_TTL = float(os.getenv("STATUS_LEASE_TTL", "30"))
+
+# Возобновляемые загрузки больших записей
+upload_store = ResumableUploadStore("temp_uploads")
+
+# Контроль допуска: при перегрузке новые записи получают 429, а не замедляют принятые
+admission = AdmissionController(disk_path="temp_uploads")
+
+# Сжатые тела ответов завершённых встреч
+response_cache = PrecompressedCache()
+
+# Глобальный экземпляр оркестратора (клиенты API создаются лениво, см. warm_up)
+orchestrator = service_registry.get("orchestrator")
+
+# Планировщик batch-обработки архивов
+batch_scheduler = BatchScheduler(
+    orchestrator,
+    batches_dir=os.path.join(orchestrator.results_dir, "batches"),
+    transcribe_workers=int(os.getenv("BATCH_TRANSCRIBE_WORKERS", "1")),
+    analyze_workers=int(os.getenv("BATCH_ANALYZE_WORKERS", "1"))
+)
+# Batch читает файлы только из этой директории (относительные пути - от неё же)
+BATCH_ROOT = os.path.realpath(os.getenv("BATCH_ROOT", "batch_inbox"))
+os.makedirs(BATCH_ROOT, exist_ok=True)
 
-# Глобальный экземпляр оркестратора
-orchestrator = MeetingOrchestrator()
+# Задачи массового повторного анализа хранятся в status_store - видны всем воркерам
+REANALYZE_CONCURRENCY = int(os.getenv("REANALYZE_CONCURRENCY", "4"))
 
 def safe_get(obj, key, default=None):
     """Безопасное получение значения из объекта"""
@@ -72,47 +128,215 @@ def safe_get(obj, key, default=None):
         logger.error(f"Ошибка в safe_get для ключа '{key}': {str(e)}")
         return default
 
+@app.on_event("startup")
+async def start_loop_monitor():
+    if os.getenv("LOOP_MONITOR_ENABLED", "true").lower() != "false":
+        loop_monitor.start()
+
+@app.on_event("startup")
+async def start_warm_up():
+    # Прогрев клиентов в фоне: порт открывается, не дожидаясь SDK и моделей
+    if os.getenv("STARTUP_WARMUP", "true").lower() != "false":
+        asyncio.create_task(service_registry.warm_up(["orchestrator"]))
+
+@app.on_event("startup")
+async def start_lease_keeper():
+    asyncio.create_task(keep_leases())
+
+async def keep_leases():
+    """Продлевает аренды встреч этого воркера и подбирает встречи воркеров, которые пропали"""
+    while True:
+        await asyncio.sleep(LEASE_TTL / 3)
+        try:
+            await asyncio.to_thread(status_store.renew_leases, WORKER_ID, LEASE_TTL)
+            for meeting_id, job in await asyncio.to_thread(status_store.claim_expired, WORKER_ID, LEASE_TTL):
+                await recover_meeting(meeting_id, job or {})
+        except Exception as e:
+            logger.warning(f"⚠️ Lease keeper error: {str(e)}")
+
+async def recover_meeting(meeting_id: str, job: dict) -> None:
+    """Встреча, аренду которой не продлил владелец: обработка перезапускается или завершается ошибкой"""
+    kind = job.get("kind")
+    filename = job.get("filename") or "unknown.mp3"
+    logger.warning(f"♻️ Recovering meeting {meeting_id} ({kind}) from a lost worker")
+    current_tenant.set(job.get("tenant") or DEFAULT_TENANT)
+    if kind == "upload" and job.get("file_path") and os.path.exists(job["file_path"]):
+        await start_processing(meeting_id, job["file_path"], filename)
+    elif kind == "demo":
+        await start_demo(meeting_id, job["demo_id"], filename)
+    elif kind == "batch":
+        # Batch продолжается по журналу прогресса; аренда уже у этого воркера
+        await batch_scheduler.start(meeting_id.split(":", 1)[1])
+    elif kind == "reanalysis":
+        # Сохранённый результат остаётся прежним - повторный анализ можно запросить снова
+        await end_processing(meeting_id)
+    else:
+        # Аудио потоковой и живой записи было только у пропавшего воркера
+        await remember_result(meeting_id, create_error_result(meeting_id, filename, "Processing worker was lost"))
+        await end_processing(meeting_id)
+
 @app.get("/")
 async def root():
+    counts = await asyncio.to_thread(status_store.counts)
     return {
         "message": "AudioInsight API", 
         "version": "1.0.0",
         "status": "running",
-        "active_meetings": len(processing_status),
-        "completed_meetings": len(meeting_results)
+        "active_meetings": counts["processing"],
+        "completed_meetings": counts["completed"]
     }
 
 @app.get("/health")
 async def health():
     return HealthResponse(status="healthy", message="AudioInsight API is running")
 
+# Встречи в работе в этом процессе: профайлер трассы снимает стеки всего процесса
+local_jobs = set()
+
+def start_trace(meeting_id: str, mode: Optional[str]) -> None:
+    """Трасса встречи; профайлер (trace=profile) - только если других обработок в процессе нет"""
+    tracer.start(meeting_id, mode, other_jobs=len(local_jobs - {meeting_id}) + batch_scheduler.running())
+
+# Записи в status_store идут в потоке: BEGIN IMMEDIATE может ждать
+# блокировку другого воркера до STATUS_STORE_BUSY_TIMEOUT
+async def register_processing(meeting_id: str, filename: str, step: str = "Starting processing",
+                              job: Optional[dict] = None) -> None:
+    """
+    Статус встречи в общем хранилище и аренда этого воркера на неё;
+    job - чем перезапустить обработку, если воркер пропадёт
+    """
+    job = {"filename": filename, **(job or {}), "tenant": current_tenant.get()}
+    await asyncio.to_thread(status_store.acquire_lease, meeting_id, WORKER_ID, LEASE_TTL, job)
+    await asyncio.to_thread(status_store.set_status, meeting_id, {
+        "status": "processing",
+        "filename": filename,
+        "tenant": job["tenant"],
+        "started_at": datetime.utcnow().isoformat(),
+        "progress": 0,
+        "current_step": step
+    })
+    local_jobs.add(meeting_id)
+
+async def end_processing(meeting_id: str) -> None:
+    """Встреча больше не в работе: статус снят, аренда освобождена"""
+    local_jobs.discard(meeting_id)
+    await asyncio.to_thread(status_store.delete_status, meeting_id)
+    await asyncio.to_thread(status_store.release_lease, meeting_id, WORKER_ID)
+
+async def start_processing(meeting_id: str, file_path: str, filename: str) -> None:
+    """Регистрирует статус и запускает обработку загруженной записи в фоне"""
+    await register_processing(meeting_id, filename, job={"kind": "upload", "file_path": file_path})
+    job = asyncio.create_task(orchestrator.process_meeting(meeting_id, file_path, filename))
+    job.add_done_callback(lambda _: finish_job(meeting_id))
+
+def finish_job(meeting_id: str) -> None:
+    """Обработка завершена: освобождает допуск и аренду и готовит сжатый ответ"""
+    loop = asyncio.get_running_loop()
+    loop.create_task(release(meeting_id))
+    loop.create_task(end_processing(meeting_id))
+    loop.create_task(precompress_result(meeting_id))
+
+# Допуск и квоты - резервы в status_store, общие для всех воркеров
+async def admit(meeting_id: str, audio_seconds: float = 0.0, size_bytes: int = 0) -> None:
+    """Допуск записи в обработку и резерв квоты текущего арендатора"""
+    tenant_id = current_tenant.get()
+    await asyncio.to_thread(admission.admit, meeting_id, audio_seconds, size_bytes)
+    await asyncio.to_thread(tenant_registry.reserve, tenant_id, meeting_id, audio_seconds)
+    await asyncio.to_thread(tenant_registry.record, tenant_id, jobs=1)
+
+async def release(meeting_id: str) -> None:
+    await asyncio.to_thread(admission.release, meeting_id)
+    await asyncio.to_thread(tenant_registry.release, meeting_id)
+
+def admission_response(error: AdmissionRejected) -> JSONResponse:
+    return JSONResponse(error.to_dict(), status_code=429, headers=error.headers())
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return admission_response(exc)
+
+def request_size(request: Request) -> int:
+    try:
+        return int(request.headers.get("content-length") or 0)
+    except ValueError:
+        return 0
+
+def resolve_tenant(api_key: Optional[str], team_id: Optional[str]) -> Tenant:
+    try:
+        return tenant_registry.resolve(api_key, team_id)
+    except TenantError as e:
+        raise HTTPException(e.status, str(e))
+
+async def get_tenant(
+    request: Request,
+    x_api_key: Optional[str] = Header(None),
+    x_team_id: Optional[str] = Header(None)
+) -> Tenant:
+    """
+    Арендатор запроса; проверяет дневную квоту и делает арендатора текущим -
+    задачи обработки, запущенные обработчиком, наследуют его
+    """
+    tenant = resolve_tenant(x_api_key, x_team_id)
+    await asyncio.to_thread(tenant_registry.check_quota, tenant, admission.estimate_audio_seconds(request_size(request)))
+    current_tenant.set(tenant.id)
+    return tenant
+
+async def get_reader_tenant(
+    x_api_key: Optional[str] = Header(None),
+    x_team_id: Optional[str] = Header(None)
+) -> Tenant:
+    """Арендатор запроса на чтение (без проверки квоты)"""
+    return resolve_tenant(x_api_key, x_team_id)
+
+@app.middleware("http")
+async def admission_precheck(request: Request, call_next):
+    # FastAPI разбирает multipart-форму до вызова обработчика - отказываем
+    # при перегрузке раньше, чем тело загрузки будет прочитано
+    if request.method == "POST" and request.url.path == "/api/meetings/upload":
+        size = request_size(request)
+        try:
+            await asyncio.to_thread(admission.check, admission.estimate_audio_seconds(size), size)
+        except AdmissionRejected as e:
+            return admission_response(e)
+    return await call_next(request)
+
 @app.post("/api/meetings/upload")
-async def upload_meeting(file: UploadFile = File(...)):
+async def upload_meeting(request: Request, file: UploadFile = File(...), trace: Optional[str] = None,
+                         tenant: Tenant = Depends(get_tenant)):
+    """
+    Загрузка записи встречи
+    
+    trace=1 включает трассировку обработки этой встречи, trace=profile -
+    трассировку с сэмплирующим профайлером (см. /api/debug/traces/{id})
+    """
     logger.info(f"📤 Upload request received for file: {file.filename}")
     
+    # Генерируем уникальный ID для встречи
+    meeting_id = str(uuid.uuid4())
+    size = request_size(request)
     try:
-        # Генерируем уникальный ID для встречи
-        meeting_id = str(uuid.uuid4())
+        await admit(meeting_id, admission.estimate_audio_seconds(size), size)
+    except AdmissionRejected as e:
+        return admission_response(e)
+    
+    try:
+        # Трасса наследуется задачей обработки через контекст
+        start_trace(meeting_id, trace)
         
         # Сохраняем файл во временную директорию
         temp_path = f"temp_uploads/{meeting_id}_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        with span("upload_meeting", filename=file.filename) as upload:
+            # Запись частями в потоке, чтобы большие файлы не блокировали event loop
+            size = 0
+            with open(temp_path, "wb") as buffer:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    await asyncio.to_thread(buffer.write, chunk)
+                    size += len(chunk)
+            upload.set(bytes=size)
         
         logger.info(f"💾 File saved to: {temp_path}")
         
-        # Инициализируем статус обработки
-        processing_status[meeting_id] = {
-            "status": "processing",
-            "filename": file.filename,
-            "started_at": datetime.utcnow().isoformat(),
-            "progress": 0,
-            "current_step": "Starting processing"
-        }
-        
-        # Запускаем обработку в фоне
-        asyncio.create_task(orchestrator.process_meeting(meeting_id, temp_path, file.filename))
+        await start_processing(meeting_id, temp_path, file.filename)
         
         return JSONResponse({
             "id": meeting_id,
@@ -121,18 +345,350 @@ async def upload_meeting(file: UploadFile = File(...)):
         })
         
     except Exception as e:
+        await release(meeting_id)
         logger.error(f"💥 Upload error: {str(e)}")
         logger.error(f"💥 Upload traceback: {traceback.format_exc()}")
         raise HTTPException(500, f"Upload failed: {str(e)}")
 
+@app.post("/api/meetings/stream")
+async def stream_meeting(request: Request, filename: str, trace: Optional[str] = None,
+                         tenant: Tenant = Depends(get_tenant)):
+    """
+    Загрузка с распознаванием во время приёма: тело запроса - сами байты
+    файла (не multipart). Ответ приходит, когда файл принят; к этому
+    моменту большая часть записи уже распознана.
+    """
+    filename = os.path.basename(filename)
+    if not filename:
+        raise HTTPException(400, "filename is required")
+    logger.info(f"📤 Streaming upload received for file: {filename}")
+    
+    meeting_id = str(uuid.uuid4())
+    size = request_size(request)
+    try:
+        await admit(meeting_id, admission.estimate_audio_seconds(size), size)
+    except AdmissionRejected as e:
+        return admission_response(e)
+    start_trace(meeting_id, trace)
+    temp_path = f"temp_uploads/{meeting_id}_{filename}"
+    await register_processing(meeting_id, filename, "Receiving and transcribing", {"kind": "stream"})
+    
+    uploaded = asyncio.get_running_loop().create_future()
+    
+    def on_uploaded(size: int) -> None:
+        if not uploaded.done():
+            uploaded.set_result(size)
+    
+    job = asyncio.create_task(
+        orchestrator.process_stream(meeting_id, request.stream(), temp_path, filename, on_uploaded)
+    )
+    job.add_done_callback(lambda _: finish_job(meeting_id))
+    # Тело запроса читает задача обработки - ждём, пока она примет его целиком
+    await asyncio.wait({uploaded, job}, return_when=asyncio.FIRST_COMPLETED)
+    if not uploaded.done():
+        error = job.exception() if not job.cancelled() else None
+        logger.error(f"💥 Streaming upload failed: {str(error)}")
+        raise HTTPException(400, f"Upload failed: {str(error)}")
+    
+    logger.info(f"💾 Streamed {uploaded.result()} bytes to: {temp_path}")
+    return JSONResponse({
+        "id": meeting_id,
+        "filename": filename,
+        "status": "processing",
+        "bytes": uploaded.result()
+    })
+
+@app.websocket("/api/live")
+async def live_meeting(
+    websocket: WebSocket,
+    filename: str = "live-meeting",
+    encoding: str = "pcm16",
+    sample_rate: int = 16000,
+    channels: int = 1,
+    language: Optional[str] = None,
+    trace: Optional[str] = None
+):
+    """
+    Распознавание и анализ встречи в реальном времени
+    
+    Клиент шлёт бинарные сообщения с аудио (encoding=pcm16 - LINEAR16
+    little-endian с частотой sample_rate, encoding=opus - поток WebM/Ogg
+    Opus из MediaRecorder) и текстовое {"type": "stop"} в конце встречи.
+    Сервер отвечает JSON-событиями: started, interim, final, analysis
+    (обновлённая сводка) и completed, после чего закрывает соединение.
+    """
+    await websocket.accept()
+    try:
+        tenant = tenant_registry.resolve(websocket.headers.get("x-api-key"), websocket.headers.get("x-team-id"))
+        await asyncio.to_thread(tenant_registry.check_quota, tenant)
+    except (TenantError, AdmissionRejected) as e:
+        await websocket.send_json({"type": "error", "message": str(e)})
+        await websocket.close(code=1008)
+        return
+    current_tenant.set(tenant.id)
+    if encoding not in ("pcm16", "opus"):
+        await websocket.send_json({"type": "error", "message": f"Unsupported encoding: {encoding}"})
+        await websocket.close(code=1003)
+        return
+    
+    filename = os.path.basename(filename) or "live-meeting"
+    meeting_id = str(uuid.uuid4())
+    await asyncio.to_thread(tenant_registry.record, tenant.id, jobs=1)
+    start_trace(meeting_id, trace)
+    await register_processing(meeting_id, filename, "Live transcription", {"kind": "live"})
+    logger.info(f"🎙️ Live meeting started: {meeting_id} ({encoding}, {sample_rate} Hz)")
+    
+    frames: asyncio.Queue = asyncio.Queue()
+    finished = asyncio.Event()
+    
+    async def audio():
+        while (frame := await frames.get()) is not None:
+            yield frame
+    
+    async def emit(event: dict) -> None:
+        if event["type"] in ("completed", "error"):
+            finished.set()
+        await websocket.send_json(event)
+    
+    job = asyncio.create_task(orchestrator.process_live(
+        meeting_id, audio(), filename, emit, encoding, sample_rate, channels, language
+    ))
+    job.add_done_callback(lambda _: asyncio.get_running_loop().create_task(end_processing(meeting_id)))
+    await websocket.send_json({"type": "started", "id": meeting_id, "filename": filename})
+    
+    try:
+        while not job.done():
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                frames.put_nowait(message["bytes"])
+            elif message.get("text"):
+                try:
+                    command = json.loads(message["text"])
+                except ValueError:
+                    command = {}
+                if command.get("type") == "stop":
+                    break
+    finally:
+        # Конец аудио: распознавание дописывает хвост, анализ - последний фрагмент
+        frames.put_nowait(None)
+    
+    # Ждём итоговую сводку; полный анализ продолжается в фоне
+    waiter = asyncio.create_task(finished.wait())
+    await asyncio.wait({job, waiter}, return_when=asyncio.FIRST_COMPLETED)
+    waiter.cancel()
+    logger.info(f"🎙️ Live meeting finished: {meeting_id}")
+    try:
+        await websocket.close()
+    except RuntimeError:
+        pass  # клиент уже отключился
+
+# Возобновляемая загрузка: сессия -> части (параллельно, PUT) -> complete
+@app.post("/api/uploads")
+async def create_upload(request: UploadSessionRequest, tenant: Tenant = Depends(get_tenant)):
+    """Создаёт сессию загрузки файла размера size; ответ содержит part_size и число частей"""
+    # Файл выделяется на диске сразу - проверяем место и лимиты до этого
+    audio_seconds = admission.estimate_audio_seconds(request.size)
+    try:
+        await asyncio.to_thread(admission.check, audio_seconds, request.size)
+        await asyncio.to_thread(tenant_registry.check_quota, tenant, audio_seconds)
+    except AdmissionRejected as e:
+        return admission_response(e)
+    try:
+        return JSONResponse(await upload_store.create(request.filename, request.size, request.part_size, tenant.id))
+    except UploadError as e:
+        raise HTTPException(e.status, str(e))
+
+@app.put("/api/uploads/{upload_id}/parts/{part_number}")
+async def upload_part(upload_id: str, part_number: int, request: Request,
+                      tenant: Tenant = Depends(get_reader_tenant)):
+    """Тело запроса - байты части; повтор части перезаписывает её"""
+    try:
+        return JSONResponse(await upload_store.write_part(upload_id, part_number, request.stream(), tenant.id))
+    except UploadError as e:
+        raise HTTPException(e.status, str(e))
+
+@app.get("/api/uploads/{upload_id}")
+async def get_upload(upload_id: str, tenant: Tenant = Depends(get_reader_tenant)):
+    """Принятые и недостающие части - с них клиент продолжает загрузку"""
+    try:
+        return JSONResponse(await upload_store.status(upload_id, tenant.id))
+    except UploadError as e:
+        raise HTTPException(e.status, str(e))
+
+@app.post("/api/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str, trace: Optional[str] = None, tenant: Tenant = Depends(get_tenant)):
+    """Завершает загрузку и запускает обработку, как /api/meetings/upload"""
+    # Сессию завершает только создавший её арендатор - на него и записывается встреча
+    try:
+        pending = await upload_store.status(upload_id, tenant.id)
+    except UploadError as e:
+        raise HTTPException(e.status, str(e))
+    
+    # Файл уже на диске: при отказе сессия остаётся открытой, complete можно повторить
+    meeting_id = pending["meeting_id"]
+    try:
+        await admit(meeting_id, admission.estimate_audio_seconds(pending["size"]), pending["size"])
+    except AdmissionRejected as e:
+        return admission_response(e)
+    try:
+        session = await upload_store.complete(upload_id, tenant.id)
+    except UploadError as e:
+        await release(meeting_id)
+        raise HTTPException(e.status, str(e))
+    
+    start_trace(meeting_id, trace)
+    logger.info(f"💾 Resumable upload assembled: {session['path']}")
+    await start_processing(meeting_id, session["path"], session["filename"])
+    return JSONResponse({
+        "id": meeting_id,
+        "filename": session["filename"],
+        "status": "processing"
+    })
+
+@app.delete("/api/uploads/{upload_id}")
+async def abort_upload(upload_id: str, tenant: Tenant = Depends(get_reader_tenant)):
+    try:
+        await upload_store.abort(upload_id, tenant.id)
+    except UploadError as e:
+        raise HTTPException(e.status, str(e))
+    return {"upload_id": upload_id, "status": "aborted"}
+
+def meeting_result_body(result) -> bytes:
+    """JSON ответа с результатом встречи: проверка и сериализация по схеме MeetingResult"""
+    try:
+        return meeting_result_adapter.dump_json(meeting_result_adapter.validate_python(result))
+    except Exception as e:
+        logger.error(f"❌ Validation error: {str(e)}")
+        fallback = fallback_meeting_result(safe_get(result, "id"), safe_get(result, "filename"), str(e))
+        return meeting_result_adapter.dump_json(fallback)
+
+async def encoded_response(request: Request, entry: dict) -> Response:
+    """Ответ из кэша тел: кодировка по Accept-Encoding, ETag и 304"""
+    headers = {"ETag": entry["etag"], "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == entry["etag"]:
+        return Response(status_code=304, headers=headers)
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if encoding in entry["bodies"] or encoding is None:
+        body, encoding = response_cache.body(entry, encoding)
+    else:
+        body, encoding = await asyncio.to_thread(response_cache.body, entry, encoding)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
+
+def meeting_tenant(record) -> str:
+    """Арендатор встречи по её результату или статусу обработки"""
+    return safe_get(record, "tenant") or DEFAULT_TENANT
+
+async def meeting_response(request: Request, meeting_id: str, result: dict, version: Optional[str]) -> Response:
+    """
+    Ответ с результатом встречи; для финального результата (version
+    задана) тело и его сжатые варианты кэшируются до следующего сохранения
+    """
+    entry = response_cache.put(meeting_id, version, meeting_result_body(result), owner=meeting_tenant(result))
+    return await encoded_response(request, entry)
+
+async def precompress_result(meeting_id: str) -> None:
+    """Заранее сериализует и сжимает ответ завершённой встречи"""
+    try:
+        version = await asyncio.to_thread(orchestrator.result_version, meeting_id)
+        result = await asyncio.to_thread(orchestrator.load_result, meeting_id)
+        if not result or result.get("status") != "completed":
+            return
+        body = await asyncio.to_thread(meeting_result_body, result)
+        entry = response_cache.put(meeting_id, version, body, owner=meeting_tenant(result))
+        await asyncio.to_thread(response_cache.encode_all, entry)
+    except Exception as e:
+        logger.warning(f"Could not precompress response for {meeting_id}: {str(e)}")
+
+def parse_date_filter(name: str, value: Optional[str]) -> Optional[str]:
+    """ISO-дата или дата-время фильтра -> наивное UTC в формате дат индекса"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(400, f"Invalid {name}: expected ISO date or datetime")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat()
+
+@app.get("/api/meetings")
+async def list_meetings(
+    status: Optional[str] = None,
+    created_after: Optional[str] = None,
+    created_before: Optional[str] = None,
+    filename: Optional[str] = None,
+    fields: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    tenant: Tenant = Depends(get_reader_tenant)
+):
+    """
+    Список встреч арендатора, новые первыми
+
+    Отдаётся из индекса встреч: транскрипции и полные результаты не
+    читаются. status - один или несколько через запятую; fields - поля
+    проекции через запятую (id, filename, status, score, duration,
+    meeting_type, tenant, created_at, updated_at); следующая страница -
+    по next_cursor.
+    """
+    await orchestrator.sync_meeting_index()
+    try:
+        items, next_cursor = await asyncio.to_thread(
+            orchestrator.meeting_index.query,
+            tenant.id,
+            statuses=[s.strip() for s in status.split(",") if s.strip()] if status else None,
+            created_after=parse_date_filter("created_after", created_after),
+            created_before=parse_date_filter("created_before", created_before),
+            filename=filename,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else DEFAULT_FIELDS,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/api/meetings/{meeting_id}/changes")
+async def wait_meeting_change(meeting_id: str, since: int = 0, timeout: float = Query(25.0, ge=0, le=60)):
+    """
+    Долгий опрос изменений встречи
+
+    Отвечает, как только встреча изменится после номера since (статус,
+    прогресс, сохранённый результат - в любом воркере), или через timeout
+    секунд. version из ответа - since следующего запроса; при changed=true
+    клиент перечитывает /api/meetings/{id}.
+    """
+    version = await status_store.wait_for_change(meeting_id, since, timeout)
+    return {"id": meeting_id, "version": version, "changed": version > since}
+
 @app.get("/api/meetings/{meeting_id}")
-async def get_meeting_analysis(meeting_id: str):
+async def get_meeting_analysis(meeting_id: str, request: Request, tenant: Tenant = Depends(get_reader_tenant)):
     logger.info(f"📊 Request for meeting: {meeting_id}")
     
+    # Встреча другого арендатора для запроса не существует
+    def not_found() -> HTTPException:
+        logger.error(f"❌ Meeting not found: {meeting_id}")
+        return HTTPException(404, f"Meeting not found: {meeting_id}")
+    
     try:
-        # Проверяем завершенные результаты
-        if meeting_id in meeting_results:
-            result = meeting_results[meeting_id]
+        # Готовое сжатое тело завершённой встречи - без чтения, валидации и сериализации
+        version = await asyncio.to_thread(orchestrator.result_version, meeting_id)
+        cached = response_cache.get(meeting_id, version)
+        if cached is not None:
+            if cached["owner"] != tenant.id:
+                raise not_found()
+            logger.info(f"✅ Returning precompressed result for: {meeting_id}")
+            return await encoded_response(request, cached)
+        
+        # Результаты, которые не пишутся в файлы (демо, ошибки), - в общем хранилище
+        result = await asyncio.to_thread(status_store.get_result, meeting_id)
+        if result is not None:
+            if meeting_tenant(result) != tenant.id:
+                raise not_found()
             logger.info(f"✅ Found completed result for: {meeting_id}")
             
             # Проверяем что result это словарь
@@ -140,94 +696,24 @@ async def get_meeting_analysis(meeting_id: str):
                 logger.error(f"❌ Result is not a dict, type: {type(result)}")
                 raise HTTPException(500, f"Invalid result format for meeting {meeting_id}")
             
-            # Валидируем и очищаем структуру
-            try:
-                validated_result = validate_and_clean_result(result)
-                logger.info(f"✅ Returning validated result for: {meeting_id}")
-                return JSONResponse(validated_result)
-            except Exception as validation_error:
-                logger.error(f"❌ Validation error: {str(validation_error)}")
-                logger.error(f"❌ Validation traceback: {traceback.format_exc()}")
-                
-                # Return a fallback response instead of raising an exception
-                fallback_result = {
-                    "id": meeting_id,
-                    "filename": safe_get(result, "filename", "unknown.mp3"),
-                    "status": "completed",
-                    "uploadedAt": datetime.utcnow().isoformat(),
-                    "processedAt": datetime.utcnow().isoformat(),
-                    "transcript": {
-                        "text": "Error validating meeting data",
-                        "duration": 0,
-                        "language": "en-US",
-                        "participantCount": 0
-                    },
-                    "content": {
-                        "topics": [],
-                        "decisions": [],
-                        "meetingType": "error",
-                        "effectivenessScore": 0
-                    },
-                    "actionItems": [],
-                    "insights": {
-                        "teamDynamics": "Validation error occurred",
-                        "processRecommendations": [],
-                        "riskFlags": [f"Data validation failed: {str(validation_error)}"],
-                        "followUpSuggestions": []
-                    }
-                }
-                logger.info(f"⚠️ Returning fallback result due to validation error")
-                return JSONResponse(fallback_result)
-        
-        # Если нет в памяти, пробуем загрузить из файла
-        result_file = os.path.join("results", f"{meeting_id}.json")
-        if os.path.exists(result_file):
-            with open(result_file, "r", encoding="utf-8") as f:
-                result = json.load(f)
-            meeting_results[meeting_id] = result  # Кэшируем в память
+            logger.info(f"✅ Returning validated result for: {meeting_id}")
+            return await meeting_response(request, meeting_id, result, version)
+        
+        # Если нет в памяти, пробуем загрузить из файла (сжатого или нет)
+        result = await asyncio.to_thread(orchestrator.load_result, meeting_id) if version else None
+        if result is not None:
+            if meeting_tenant(result) != tenant.id:
+                raise not_found()
+            # Кэшируется только тело финального результата - промежуточные ещё обновляются
+            final = safe_get(result, "status") in ("completed", "failed", "error")
             logger.info(f"✅ Loaded result from file for: {meeting_id}")
-            try:
-                validated_result = validate_and_clean_result(result)
-                logger.info(f"✅ Returning validated result for: {meeting_id} (from file)")
-                return JSONResponse(validated_result)
-            except Exception as validation_error:
-                logger.error(f"❌ Validation error: {str(validation_error)}")
-                logger.error(f"❌ Validation traceback: {traceback.format_exc()}")
-                
-                # Return a fallback response instead of raising an exception
-                fallback_result = {
-                    "id": meeting_id,
-                    "filename": safe_get(result, "filename", "unknown.mp3"),
-                    "status": "completed",
-                    "uploadedAt": datetime.utcnow().isoformat(),
-                    "processedAt": datetime.utcnow().isoformat(),
-                    "transcript": {
-                        "text": "Error validating meeting data",
-                        "duration": 0,
-                        "language": "en-US",
-                        "participantCount": 0
-                    },
-                    "content": {
-                        "topics": [],
-                        "decisions": [],
-                        "meetingType": "error",
-                        "effectivenessScore": 0
-                    },
-                    "actionItems": [],
-                    "insights": {
-                        "teamDynamics": "Validation error occurred",
-                        "processRecommendations": [],
-                        "riskFlags": [f"Data validation failed: {str(validation_error)}"],
-                        "followUpSuggestions": []
-                    }
-                }
-                logger.info(f"⚠️ Returning fallback result due to validation error")
-                return JSONResponse(fallback_result)
+            return await meeting_response(request, meeting_id, result, version if final else None)
         
         # Проверяем статус обработки
-        if meeting_id in processing_status:
-            status_info = processing_status[meeting_id]
-            
+        status_info = await asyncio.to_thread(status_store.get_status, meeting_id)
+        if status_info is not None:
+            if meeting_tenant(status_info) != tenant.id:
+                raise not_found()
             if not isinstance(status_info, dict):
                 logger.error(f"❌ Processing status is not a dict, type: {type(status_info)}")
                 status_info = {"status": "processing", "progress": 0, "current_step": "Unknown"}
@@ -247,8 +733,7 @@ async def get_meeting_analysis(meeting_id: str):
             })
         
         # Если не найден нигде
-        logger.error(f"❌ Meeting not found: {meeting_id}")
-        raise HTTPException(404, f"Meeting not found: {meeting_id}")
+        raise not_found()
     
     except HTTPException:
         raise
@@ -265,19 +750,223 @@ async def get_meeting_analysis(meeting_id: str):
         }
         return JSONResponse(status_code=500, content=error_response)
 
+async def reanalyze_and_refresh(meeting_id: str, force: bool, priority: str = "interactive") -> dict:
+    """Повторный анализ встречи со сбросом закэшированного результата"""
+    # Встречу, которую обрабатывает другой воркер (или этот), повторно не анализируем
+    lease = await asyncio.to_thread(status_store.lease, meeting_id)
+    if lease is not None and lease["expires_at"] > time.time():
+        return {"id": meeting_id, "status": "skipped", "error": "Meeting is being processed"}
+    if not await asyncio.to_thread(status_store.acquire_lease, meeting_id, WORKER_ID, LEASE_TTL, {"kind": "reanalysis"}):
+        return {"id": meeting_id, "status": "skipped", "error": "Meeting is being processed"}
+    local_jobs.add(meeting_id)
+    try:
+        status = await orchestrator.reanalyze_meeting(meeting_id, force=force, priority=priority)
+    except KeyError:
+        status = {"id": meeting_id, "status": "error", "error": "Meeting not found"}
+    except ValueError as e:
+        status = {"id": meeting_id, "status": "error", "error": str(e)}
+    finally:
+        local_jobs.discard(meeting_id)
+        await asyncio.to_thread(status_store.release_lease, meeting_id, WORKER_ID)
+    await asyncio.to_thread(status_store.delete_result, meeting_id)
+    return status
+
+async def run_reanalysis_job(job_id: str, meeting_ids: List[str], force: bool):
+    """Фоновый массовый повторный анализ с ограничением параллелизма"""
+    job = await asyncio.to_thread(status_store.get_job, job_id)
+    semaphore = asyncio.Semaphore(REANALYZE_CONCURRENCY)
+
+    async def save() -> None:
+        # Снимок: задача меняется, пока запись идёт в потоке
+        await asyncio.to_thread(status_store.put_job, job_id, {**job, "errors": list(job["errors"])})
+
+    async def reanalyze_one(meeting_id: str):
+        async with semaphore:
+            status = await reanalyze_and_refresh(meeting_id, force, priority="batch")
+        job[status["status"]] = job.get(status["status"], 0) + 1
+        if status["status"] == "error":
+            job["errors"].append(status)
+        await save()
+
+    await asyncio.gather(*(reanalyze_one(meeting_id) for meeting_id in meeting_ids))
+    job["status"] = "completed"
+    job["finished_at"] = datetime.utcnow().isoformat()
+    await save()
+    logger.info(f"🔁 Reanalysis job {job_id} finished")
+
+@app.post("/api/meetings/reanalyze")
+async def reanalyze_meetings_bulk(request: ReanalyzeRequest, tenant: Tenant = Depends(get_tenant)):
+    # Повторно анализируются только встречи арендатора с сохранённым результатом
+    await orchestrator.sync_meeting_index()
+    owned = await asyncio.to_thread(orchestrator.meeting_index.ids, tenant.id)
+    stored = [m for m in await asyncio.to_thread(orchestrator.list_result_ids) if m in owned]
+    meeting_ids = stored if request.meeting_ids is None else [m for m in request.meeting_ids if m in owned]
+    foreign = [] if request.meeting_ids is None else [m for m in request.meeting_ids if m not in owned]
+    logger.info(f"🔁 Bulk reanalysis request for {len(meeting_ids)} meetings (force={request.force})")
+
+    job_id = f"reanalyze_{uuid.uuid4().hex[:12]}"
+    job = {
+        "id": job_id,
+        "tenant": tenant.id,
+        "status": "processing",
+        "prompt_version": orchestrator.analysis_version,
+        "total": len(meeting_ids) + len(foreign),
+        "completed": 0,
+        "skipped": 0,
+        "error": len(foreign),
+        "errors": [{"id": m, "status": "error", "error": "Meeting not found"} for m in foreign],
+        "started_at": datetime.utcnow().isoformat()
+    }
+    await asyncio.to_thread(status_store.put_job, job_id, job)
+    asyncio.create_task(run_reanalysis_job(job_id, meeting_ids, request.force))
+    return JSONResponse(job)
+
+@app.get("/api/meetings/reanalyze/{job_id}")
+async def get_reanalysis_job(job_id: str, tenant: Tenant = Depends(get_reader_tenant)):
+    job = await asyncio.to_thread(status_store.get_job, job_id)
+    if job is None or job.get("tenant", DEFAULT_TENANT) != tenant.id:
+        raise HTTPException(404, f"Reanalysis job not found: {job_id}")
+    return JSONResponse(job)
+
+@app.post("/api/meetings/{meeting_id}/reanalyze")
+async def reanalyze_meeting(meeting_id: str, force: bool = False, tenant: Tenant = Depends(get_tenant)):
+    logger.info(f"🔁 Reanalysis request: {meeting_id} (force={force})")
+
+    result = await asyncio.to_thread(orchestrator.load_result, meeting_id)
+    if result is None or meeting_tenant(result) != tenant.id:
+        raise HTTPException(404, f"Meeting not found: {meeting_id}")
+    if not result.get("transcription"):
+        raise HTTPException(409, f"Meeting has no stored transcription: {meeting_id}")
+
+    prompt_version = orchestrator.analysis_version
+    if not force and await asyncio.to_thread(orchestrator.has_analysis_version, meeting_id, result["transcription"]):
+        return JSONResponse({"id": meeting_id, "status": "skipped", "prompt_version": prompt_version})
+
+    asyncio.create_task(reanalyze_and_refresh(meeting_id, force))
+    return JSONResponse({"id": meeting_id, "status": "processing", "prompt_version": prompt_version})
+
+@app.get("/api/meetings/{meeting_id}/similar")
+async def get_similar_meetings(meeting_id: str, limit: int = 5):
+    logger.info(f"🔎 Similar meetings request: {meeting_id}")
+
+    similar = await orchestrator.semantic_search.similar_meetings(meeting_id, limit=min(limit, 50))
+    if similar is None:
+        raise HTTPException(404, f"Meeting not indexed: {meeting_id}")
+
+    return JSONResponse({"id": meeting_id, "similar": similar})
+
+@app.get("/api/search")
+async def semantic_search(q: str, limit: int = 10, kind: str = None, min_score: float = None):
+    logger.info(f"🔎 Semantic search: '{q}' (kind={kind})")
+
+    if not q.strip():
+        raise HTTPException(400, "Query must not be empty")
+    if kind not in (None, "topic", "decision", "meeting"):
+        raise HTTPException(400, f"Invalid kind: {kind}")
+
+    results = await orchestrator.semantic_search.search(q, limit=min(limit, 100), kind=kind, min_score=min_score)
+    return JSONResponse({"query": q, "results": results})
+
+def _batch_path(path: Optional[str]) -> Optional[str]:
+    """Путь внутри BATCH_ROOT (после раскрытия ссылок); всё вне неё - 403"""
+    if not path:
+        return path
+    resolved = os.path.realpath(os.path.join(BATCH_ROOT, path))
+    if os.path.commonpath([BATCH_ROOT, resolved]) != BATCH_ROOT:
+        raise HTTPException(403, f"Path is outside of BATCH_ROOT: {path}")
+    return resolved
+
+@app.post("/api/batches")
+async def create_batch(request: BatchRequest, tenant: Tenant = Depends(get_tenant)):
+    logger.info(f"📦 Batch request: directory={request.directory}, manifest={request.manifest}")
+
+    directory, manifest = _batch_path(request.directory), _batch_path(request.manifest)
+    files = [_batch_path(path) for path in request.files or []]
+
+    try:
+        sources = await asyncio.to_thread(collect_sources, directory, manifest, files)
+        # Пути из манифеста тоже не должны выходить за BATCH_ROOT
+        for source in sources:
+            source["path"] = _batch_path(source["path"])
+        batch = await asyncio.to_thread(batch_scheduler.create_batch, sources)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    await asyncio.to_thread(tenant_registry.record, tenant.id, jobs=len(sources))
+
+    await batch_scheduler.start(batch["id"])
+    return JSONResponse(batch_scheduler.summary(batch))
+
+@app.get("/api/batches/{batch_id}")
+async def get_batch(batch_id: str):
+    batch = await asyncio.to_thread(batch_scheduler.load_batch, batch_id)
+    if batch is None:
+        raise HTTPException(404, f"Batch not found: {batch_id}")
+    return JSONResponse(batch_scheduler.summary(batch))
+
+@app.post("/api/batches/{batch_id}/resume")
+async def resume_batch(batch_id: str):
+    logger.info(f"📦 Resuming batch: {batch_id}")
+
+    batch = await asyncio.to_thread(batch_scheduler.load_batch, batch_id)
+    if batch is None:
+        raise HTTPException(404, f"Batch not found: {batch_id}")
+    if not await batch_scheduler.start(batch_id):
+        raise HTTPException(409, f"Batch is already running: {batch_id}")
+    return JSONResponse(batch_scheduler.summary(batch))
+
+@app.get("/api/tasks")
+async def get_tracked_tasks(
+    assignee: str = None,
+    status: str = "open",
+    due_before: str = None,
+    due_after: str = None,
+    limit: int = 100,
+    tenant: Tenant = Depends(get_reader_tenant)
+):
+    logger.info(f"📋 Tracked tasks request: assignee={assignee}, status={status}")
+
+    items = await asyncio.to_thread(
+        orchestrator.task_tracker.query,
+        tenant.id,
+        assignee=assignee,
+        status=status or None,
+        due_before=due_before,
+        due_after=due_after,
+        limit=min(limit, 1000)
+    )
+    return JSONResponse({"items": items, "count": len(items)})
+
+@app.get("/api/tasks/assignees")
+async def get_task_assignees(tenant: Tenant = Depends(get_reader_tenant)):
+    return JSONResponse(await asyncio.to_thread(orchestrator.task_tracker.assignee_summary, tenant.id))
+
+@app.patch("/api/tasks/{task_id}")
+async def update_tracked_task(task_id: str, update: TaskStatusUpdate, tenant: Tenant = Depends(get_reader_tenant)):
+    logger.info(f"📋 Task status update: {task_id} -> {update.status}")
+
+    if update.status not in ("open", "pending", "in_progress", "done", "cancelled"):
+        raise HTTPException(400, f"Invalid status: {update.status}")
+
+    item = await asyncio.to_thread(orchestrator.task_tracker.update_status, task_id, update.status, tenant.id)
+    if item is None:
+        raise HTTPException(404, f"Task not found: {task_id}")
+    return JSONResponse(item)
+
+DEMO_FILES = [
+    {
+        "id": "standup",
+        "name": "Daily Standup Meeting",
+        "description": "5-minute team standup",
+        "duration": "4:32"
+    }
+]
+
 @app.get("/api/demo/files")
 async def get_demo_files():
-    return JSONResponse([
-        {
-            "id": "standup",
-            "name": "Daily Standup Meeting",
-            "description": "5-minute team standup",
-            "duration": "4:32"
-        }
-    ])
+    return JSONResponse(DEMO_FILES)
 
 @app.post("/api/demo/{demo_id}/analyze")
-async def analyze_demo_file(demo_id: str):
+async def analyze_demo_file(demo_id: str, tenant: Tenant = Depends(get_tenant)):
     logger.info(f"🎬 Demo request: {demo_id}")
     try:
         # Универсальная поддержка demo_id с префиксом demo_ и без
@@ -286,205 +975,44 @@ async def analyze_demo_file(demo_id: str):
             raise HTTPException(400, f"Invalid demo ID: {demo_id}")
         meeting_id = f"demo_{normalized_id}_{uuid.uuid4().hex[:8]}"
         filename = f"{normalized_id}.mp3"
+        # Demo не распознаётся и не занимает диск - учитывается только как запись в работе
+        try:
+            await admit(meeting_id)
+        except AdmissionRejected as e:
+            return admission_response(e)
         logger.info(f"🆔 Demo meeting ID: {meeting_id}")
-        processing_status[meeting_id] = {
-            "status": "processing",
-            "filename": filename,
-            "started_at": datetime.utcnow().isoformat(),
-            "progress": 0,
-            "current_step": "Initializing demo"
-        }
-        asyncio.create_task(process_demo_safe(meeting_id, normalized_id))
+        try:
+            await start_demo(meeting_id, normalized_id, filename)
+        except Exception:
+            # Обработка не запустилась - допуск и резерв квоты освобождаем сразу
+            await release(meeting_id)
+            raise
         return JSONResponse({
             "id": meeting_id,
             "filename": filename,
             "status": "processing"
         })
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"💥 Demo error: {str(e)}")
         logger.error(f"💥 Demo traceback: {traceback.format_exc()}")
         raise HTTPException(500, f"Demo failed: {str(e)}")
 
-def validate_and_clean_result(result):
-    """Валидирует и очищает структуру результата с безопасной обработкой"""
-    
+async def start_demo(meeting_id: str, demo_id: str, filename: str) -> None:
+    await register_processing(meeting_id, filename, "Initializing demo", {"kind": "demo", "demo_id": demo_id})
+    job = asyncio.create_task(process_demo_safe(meeting_id, demo_id))
+    job.add_done_callback(lambda _: asyncio.get_running_loop().create_task(release(meeting_id)))
+    job.add_done_callback(lambda _: asyncio.get_running_loop().create_task(end_processing(meeting_id)))
+
+async def remember_result(meeting_id: str, result: dict) -> None:
+    """Результат, который не пишется в файл (демо, ошибки), - в общем хранилище и в индексе списков"""
+    result = {"tenant": current_tenant.get(), **result}
+    await asyncio.to_thread(status_store.put_result, meeting_id, result)
     try:
-        # Проверяем что result это словарь
-        if not isinstance(result, dict):
-            logger.error(f"Result is not a dict: {type(result)}")
-            raise ValueError(f"Expected dict, got {type(result)}")
-        
-        # Создаем чистую структуру
-        clean_result = {}
-        
-        # Основные поля
-        clean_result["id"] = safe_get(result, "id", "unknown")
-        clean_result["filename"] = safe_get(result, "filename", "unknown.mp3")
-        clean_result["status"] = safe_get(result, "status", "completed")
-        clean_result["uploadedAt"] = safe_get(result, "uploadedAt", 
-                                            safe_get(result, "uploaded_at", datetime.utcnow().isoformat()))
-        clean_result["processedAt"] = safe_get(result, "processedAt", 
-                                             safe_get(result, "processed_at", datetime.utcnow().isoformat()))
-        
-        # Transcript/Transcription
-        transcript_data = safe_get(result, "transcript", {})
-        if not isinstance(transcript_data, dict):
-            logger.warning(f"Transcript is not a dict: {type(transcript_data)}")
-            transcript_data = {}
-        
-        # Add transcription field for frontend compatibility
-        clean_result["transcription"] = safe_get(transcript_data, "text", "No transcript available")
-        
-        clean_result["transcript"] = {
-            "text": safe_get(transcript_data, "text", "No transcript available"),
-            "duration": safe_get(transcript_data, "duration", 0),
-            "language": safe_get(transcript_data, "language", "en-US"),
-            "participantCount": safe_get(transcript_data, "participantCount", 
-                                       safe_get(transcript_data, "participant_count", 1))
-        }
-        
-        # Content
-        content_data = safe_get(result, "content", {})
-        if not isinstance(content_data, dict):
-            logger.warning(f"Content is not a dict: {type(content_data)}")
-            content_data = {}
-        
-        topics = safe_get(content_data, "topics", [])
-        if not isinstance(topics, list):
-            logger.warning(f"Topics is not a list: {type(topics)}")
-            topics = []
-        
-        decisions = safe_get(content_data, "decisions", [])
-        if not isinstance(decisions, list):
-            logger.warning(f"Decisions is not a list: {type(decisions)}")
-            decisions = []
-        
-        # Transform topics to match frontend expectations
-        transformed_topics = []
-        for topic in topics:
-            if isinstance(topic, dict):
-                transformed_topics.append({
-                    "topic": safe_get(topic, "title", safe_get(topic, "topic", "Unknown Topic")),
-                    "summary": safe_get(topic, "description", safe_get(topic, "summary", "")),
-                    "duration_estimate": str(safe_get(topic, "time_discussed", safe_get(topic, "timeDiscussed", 0)))
-                })
-        
-        # Transform decisions to match frontend expectations
-        transformed_decisions = []
-        for decision in decisions:
-            if isinstance(decision, dict):
-                transformed_decisions.append({
-                    "decision": safe_get(decision, "decision", "Unknown Decision"),
-                    "context": safe_get(decision, "context", ""),
-                    "impact": safe_get(decision, "impact", "")
-                })
-        
-        clean_result["content"] = {
-            "topics": transformed_topics,
-            "decisions": transformed_decisions,
-            "meetingType": safe_get(content_data, "meetingType", 
-                                  safe_get(content_data, "meeting_type", "general")),
-            "effectivenessScore": safe_get(content_data, "effectivenessScore", 
-                                         safe_get(content_data, "effectiveness_score", 5))
-        }
-        
-        # Action Items
-        action_items = safe_get(result, "actionItems", safe_get(result, "action_items", []))
-        if not isinstance(action_items, list):
-            logger.warning(f"ActionItems is not a list: {type(action_items)}")
-            action_items = []
-        
-        clean_action_items = []
-        for item in action_items:
-            if isinstance(item, dict):
-                clean_item = {
-                    "id": safe_get(item, "id", str(len(clean_action_items) + 1)),
-                    "task": safe_get(item, "task", "No task description"),
-                    "assignee": safe_get(item, "assignee", "Unassigned"),
-                    "deadline": safe_get(item, "deadline", None),
-                    "priority": safe_get(item, "priority", "medium"),
-                    "status": safe_get(item, "status", "pending"),
-                    "context": safe_get(item, "context", "")
-                }
-                clean_action_items.append(clean_item)
-        
-        clean_result["actionItems"] = clean_action_items
-        
-        # Insights
-        insights_data = safe_get(result, "insights", {})
-        if not isinstance(insights_data, dict):
-            logger.warning(f"Insights is not a dict: {type(insights_data)}")
-            insights_data = {}
-        
-        # Получаем данные из insights
-        team_dynamics = safe_get(insights_data, "team_dynamics", "")
-        process_recs = safe_get(insights_data, "process_recommendations", [])
-        risk_flags = safe_get(insights_data, "risk_flags", [])
-        follow_up = safe_get(insights_data, "follow_up_suggestions", [])
-        
-        # Преобразуем insights в нужный формат
-        transformed_insights = []
-        
-        # Добавляем team dynamics как отдельный инсайт
-        if team_dynamics:
-            transformed_insights.append({
-                "insight": team_dynamics,
-                "category": "teamwork",
-                "recommendation": ""
-            })
-        
-        # Добавляем process recommendations
-        for rec in process_recs:
-            if isinstance(rec, str):
-                transformed_insights.append({
-                    "insight": rec,
-                    "category": "process",
-                    "recommendation": rec
-                })
-        
-        # Добавляем follow up suggestions
-        for suggestion in follow_up:
-            if isinstance(suggestion, str):
-                transformed_insights.append({
-                    "insight": suggestion,
-                    "category": "followup",
-                    "recommendation": suggestion
-                })
-        
-        clean_result["insights"] = transformed_insights
-        clean_result["risks"] = [risk for risk in risk_flags if isinstance(risk, str)]  # Фильтруем только строковые риски
-        
-        logger.info(f"✅ Result validation completed successfully")
-        return clean_result
-        
+        await asyncio.to_thread(orchestrator.meeting_index.upsert, meeting_id, result)
     except Exception as e:
-        logger.error(f"❌ Validation error: {str(e)}")
-        logger.error(f"❌ Validation traceback: {traceback.format_exc()}")
-        
-        # Возвращаем минимальную структуру при ошибке
-        return {
-            "id": safe_get(result, "id", "unknown") if isinstance(result, dict) else "unknown",
-            "filename": "unknown.mp3",
-            "status": "completed",
-            "uploadedAt": datetime.utcnow().isoformat(),
-            "processedAt": datetime.utcnow().isoformat(),
-            "transcription": "Validation error occurred",
-            "transcript": {
-                "text": "Validation error occurred",
-                "duration": 0,
-                "language": "en-US",
-                "participantCount": 0
-            },
-            "content": {
-                "topics": [],
-                "decisions": [],
-                "meetingType": "error",
-                "effectivenessScore": 0
-            },
-            "actionItems": [],
-            "insights": [],
-            "risks": ["Data validation failed"]
-        }
+        logger.warning(f"⚠️ Could not index meeting {meeting_id}: {str(e)}")
 
 async def process_meeting_safe(meeting_id: str, file_path: str, filename: str):
     """Безопасная обработка meeting с полным error handling"""
@@ -492,35 +1020,19 @@ async def process_meeting_safe(meeting_id: str, file_path: str, filename: str):
     
     try:
         # Шаг 1: Транскрипция
-        if meeting_id in processing_status:
-            processing_status[meeting_id].update({
-                "progress": 25,
-                "current_step": "Transcribing audio"
-            })
+        await asyncio.to_thread(status_store.update_status, meeting_id, progress=25, current_step="Transcribing audio")
         await asyncio.sleep(1)
         
         # Шаг 2: Анализ контента
-        if meeting_id in processing_status:
-            processing_status[meeting_id].update({
-                "progress": 50,
-                "current_step": "Analyzing content"
-            })
+        await asyncio.to_thread(status_store.update_status, meeting_id, progress=50, current_step="Analyzing content")
         await asyncio.sleep(1)
         
         # Шаг 3: Извлечение action items
-        if meeting_id in processing_status:
-            processing_status[meeting_id].update({
-                "progress": 75,
-                "current_step": "Extracting action items"
-            })
+        await asyncio.to_thread(status_store.update_status, meeting_id, progress=75, current_step="Extracting action items")
         await asyncio.sleep(1)
         
         # Шаг 4: Генерация insights
-        if meeting_id in processing_status:
-            processing_status[meeting_id].update({
-                "progress": 100,
-                "current_step": "Generating insights"
-            })
+        await asyncio.to_thread(status_store.update_status, meeting_id, progress=100, current_step="Generating insights")
         await asyncio.sleep(0.5)
         
         # Создаем базовый результат
@@ -531,11 +1043,10 @@ async def process_meeting_safe(meeting_id: str, file_path: str, filename: str):
             raise ValueError(f"Created result is not a dict: {type(result)}")
         
         # Сохраняем результат
-        meeting_results[meeting_id] = result
+        await remember_result(meeting_id, result)
         
         # Удаляем из processing
-        if meeting_id in processing_status:
-            del processing_status[meeting_id]
+        await asyncio.to_thread(status_store.delete_status, meeting_id)
         
         # Чистим файл
         try:
@@ -552,10 +1063,9 @@ async def process_meeting_safe(meeting_id: str, file_path: str, filename: str):
         
         # Создаем error результат
         error_result = create_error_result(meeting_id, filename, str(e))
-        meeting_results[meeting_id] = error_result
+        await remember_result(meeting_id, error_result)
         
-        if meeting_id in processing_status:
-            del processing_status[meeting_id]
+        await asyncio.to_thread(status_store.delete_status, meeting_id)
 
 async def process_demo_safe(meeting_id: str, demo_id: str):
     """Безопасная обработка demo"""
@@ -571,11 +1081,7 @@ async def process_demo_safe(meeting_id: str, demo_id: str):
         ]
         
         for step_name, progress in steps:
-            if meeting_id in processing_status:
-                processing_status[meeting_id].update({
-                    "progress": progress,
-                    "current_step": step_name
-                })
+            await asyncio.to_thread(status_store.update_status, meeting_id, progress=progress, current_step=step_name)
             await asyncio.sleep(0.8)
         
         # Создаем demo результат
@@ -586,11 +1092,10 @@ async def process_demo_safe(meeting_id: str, demo_id: str):
             raise ValueError(f"Created demo result is not a dict: {type(result)}")
         
         # Сохраняем результат
-        meeting_results[meeting_id] = result
+        await remember_result(meeting_id, result)
         
         # Удаляем из processing
-        if meeting_id in processing_status:
-            del processing_status[meeting_id]
+        await asyncio.to_thread(status_store.delete_status, meeting_id)
         
         logger.info(f"✅ Safe demo completed: {meeting_id}")
         
@@ -599,10 +1104,9 @@ async def process_demo_safe(meeting_id: str, demo_id: str):
         logger.error(f"💥 Safe demo traceback: {traceback.format_exc()}")
         
         error_result = create_error_result(meeting_id, f"{demo_id}.mp3", str(e))
-        meeting_results[meeting_id] = error_result
+        await remember_result(meeting_id, error_result)
         
-        if meeting_id in processing_status:
-            del processing_status[meeting_id]
+        await asyncio.to_thread(status_store.delete_status, meeting_id)
 
 def create_basic_meeting_result(meeting_id: str, filename: str) -> dict:
     """Создает базовый результат meeting с гарантированной структурой"""
@@ -794,33 +1298,98 @@ def create_error_result(meeting_id: str, filename: str, error_message: str) -> d
     }
 
 # Debug endpoints
+@app.get("/api/debug/startup")
+async def debug_startup():
+    """Созданные сервисы и состояние фонового прогрева"""
+    return {"services": service_registry.created(), "warm_up": service_registry.warmup_status}
+
+@app.get("/api/debug/loop")
+async def debug_loop(stacks: bool = False):
+    """Задержка event loop (p50/p95/p99) и стеки недавних блокирующих вызовов"""
+    return loop_monitor.get_metrics(include_stacks=stacks)
+
+@app.get("/api/debug/admission")
+async def debug_admission():
+    """Лимиты допуска, записи в работе и число отказов по причинам"""
+    return await asyncio.to_thread(admission.get_metrics)
+
+@app.get("/api/debug/tenants")
+async def debug_tenants():
+    """Веса, квоты и потребление арендаторов; ожидание в справедливых очередях стадий"""
+    return {
+        "tenants": await asyncio.to_thread(tenant_registry.get_metrics),
+        "queues": {
+            "transcribe": orchestrator.transcribe_queue.get_metrics(),
+            "analyze": orchestrator.analyze_queue.get_metrics()
+        }
+    }
+
+@app.get("/api/debug/meeting-index")
+async def debug_meeting_index():
+    """Размер индекса встреч по статусам"""
+    return await asyncio.to_thread(orchestrator.meeting_index.get_metrics)
+
+@app.get("/api/debug/language")
+async def debug_language():
+    """Определение языка: модель, маршруты и выбранные языки"""
+    return orchestrator.language_id.get_metrics()
+
+@app.get("/api/debug/responses")
+async def debug_responses():
+    """Кэш сжатых тел ответов и формат хранения результатов"""
+    return {**response_cache.get_metrics(), "storage_codec": orchestrator.blob_store.codec}
+
+@app.get("/api/debug/traces")
+async def debug_traces():
+    """Сводка последних трасс (включаются через ?trace=1 при загрузке)"""
+    return {"sample_rate": tracer.sample_rate, "trace_dir": tracer.trace_dir, "recent": list(tracer.recent)}
+
+@app.get("/api/debug/traces/{meeting_id}")
+async def debug_trace(meeting_id: str, format: str = "chrome"):
+    """Трасса встречи: format=chrome (chrome://tracing, Perfetto) или otel (OTLP/JSON)"""
+    if format not in ("chrome", "otel"):
+        raise HTTPException(400, "format must be chrome or otel")
+    trace = await asyncio.to_thread(tracer.load, meeting_id, format)
+    if trace is None:
+        raise HTTPException(404, f"No trace for meeting {meeting_id}")
+    return trace
+
+@app.get("/api/debug/llm")
+async def debug_llm():
+    """Метрики LLM-планировщика (очереди, ожидание, повторы) и потребление токенов"""
+    worker = orchestrator.analysis_worker
+    metrics = worker.scheduler.get_metrics() if worker.scheduler is not None else {}
+    metrics["usage"] = worker.get_usage_stats()
+    metrics["prompts"] = {name: t.key for name, t in worker.prompts.active().items()}
+    metrics["event_loop"] = {key: value for key, value in loop_monitor.get_metrics().items() if key != "recent_stalls"}
+    return metrics
+
 @app.get("/api/debug/status")
 async def debug_status():
     """Debug endpoint для проверки статуса"""
     try:
+        processing = await asyncio.to_thread(status_store.statuses)
+        completed = await asyncio.to_thread(status_store.result_summaries)
         return {
-            "processing": processing_status,
-            "completed": {k: {"status": safe_get(v, "status", "unknown"), 
-                             "filename": safe_get(v, "filename", "unknown")} 
-                         for k, v in meeting_results.items()},
-            "total_processing": len(processing_status),
-            "total_completed": len(meeting_results)
+            "worker": WORKER_ID,
+            "processing": processing,
+            "completed": completed,
+            "total_processing": len(processing),
+            "total_completed": len(completed),
+            "store": await asyncio.to_thread(status_store.get_metrics)
         }
     except Exception as e:
         logger.error(f"Debug status error: {str(e)}")
-        return {
-            "error": str(e),
-            "total_processing": len(processing_status),
-            "total_completed": len(meeting_results)
-        }
+        return {"error": str(e), "worker": WORKER_ID}
 
 @app.get("/api/debug/meeting/{meeting_id}")
 async def debug_meeting(meeting_id: str):
     """Debug конкретного meeting"""
     try:
         result_info = None
-        if meeting_id in meeting_results:
-            result = meeting_results[meeting_id]
+        result = await asyncio.to_thread(status_store.get_result, meeting_id)
+        status_info = await asyncio.to_thread(status_store.get_status, meeting_id)
+        if result is not None:
             result_info = {
                 "type": str(type(result)),
                 "is_dict": isinstance(result, dict),
@@ -832,10 +1401,12 @@ async def debug_meeting(meeting_id: str):
         
         return {
             "meeting_id": meeting_id,
-            "in_processing": meeting_id in processing_status,
-            "in_results": meeting_id in meeting_results,
-            "processing_info": processing_status.get(meeting_id, None),
-            "result_info": result_info
+            "in_processing": status_info is not None,
+            "in_results": result is not None,
+            "processing_info": status_info,
+            "result_info": result_info,
+            "lease": await asyncio.to_thread(status_store.lease, meeting_id),
+            "version": await asyncio.to_thread(status_store.version, meeting_id)
         }
     except Exception as e:
         logger.error(f"Debug meeting error: {str(e)}")
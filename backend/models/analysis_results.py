@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
+from typing import Annotated, List, Optional
+from typing_extensions import NotRequired, TypedDict
 from datetime import datetime
 
 
@@ -11,25 +12,40 @@ class Task(BaseModel):
     priority: Optional[str] = Field("medium", description="Приоритет: low, medium, high")
 
 
-class Decision(BaseModel):
+class Decision(TypedDict):
     """Модель для представления принятого решения"""
-    decision: str = Field(..., description="Описание решения")
-    context: Optional[str] = Field(None, description="Контекст принятия решения")
-    impact: Optional[str] = Field(None, description="Ожидаемое влияние решения")
+    __pydantic_config__ = ConfigDict(coerce_numbers_to_str=True)
 
+    decision: NotRequired[Annotated[Optional[str], Field("Unknown Decision", description="Описание решения")]]
+    context: NotRequired[Annotated[Optional[str], Field("", description="Контекст принятия решения")]]
+    impact: NotRequired[Annotated[Optional[str], Field("", description="Ожидаемое влияние решения")]]
 
-class Topic(BaseModel):
-    """Модель для представления обсуждаемой темы"""
-    topic: str = Field(..., description="Название темы")
-    summary: Optional[str] = Field(None, description="Краткое резюме обсуждения")
-    duration_estimate: Optional[str] = Field(None, description="Приблизительное время обсуждения")
 
+class Topic(TypedDict):
+    """
+    Модель для представления обсуждаемой темы
 
-class Insight(BaseModel):
+    Читается и из формата анализа (title / description / time_discussed)
+    """
+    __pydantic_config__ = ConfigDict(coerce_numbers_to_str=True)
+
+    topic: NotRequired[Annotated[Optional[str], Field(
+        "Unknown Topic", validation_alias=AliasChoices("title", "topic"), description="Название темы"
+    )]]
+    summary: NotRequired[Annotated[Optional[str], Field(
+        "", validation_alias=AliasChoices("description", "summary"), description="Краткое резюме обсуждения"
+    )]]
+    duration_estimate: NotRequired[Annotated[Optional[str], Field(
+        "0", validation_alias=AliasChoices("time_discussed", "timeDiscussed", "duration_estimate"),
+        description="Приблизительное время обсуждения"
+    )]]
+
+
+class Insight(TypedDict):
     """Модель для представления инсайта или рекомендации"""
-    insight: str = Field(..., description="Описание инсайта")
-    category: Optional[str] = Field(None, description="Категория инсайта")
-    recommendation: Optional[str] = Field(None, description="Рекомендация по действиям")
+    insight: Annotated[str, Field(description="Описание инсайта")]
+    category: NotRequired[Annotated[Optional[str], Field(None, description="Категория инсайта")]]
+    recommendation: NotRequired[Annotated[Optional[str], Field(None, description="Рекомендация по действиям")]]
 
 
 class MeetingAnalysisResults(BaseModel):
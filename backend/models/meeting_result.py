@@ -0,0 +1,197 @@
+from datetime import datetime
+from typing import Annotated, Any, Dict, List, Optional, Union
+
+from pydantic import AliasChoices, BeforeValidator, ConfigDict, Field, TypeAdapter, ValidationError, WrapValidator
+from typing_extensions import NotRequired, TypedDict
+
+from .analysis_results import Decision, Insight, Topic
+
+
+def _valid_items(value: Any, handler) -> List[Any]:
+    """
+    Список элементов, подходящих под схему
+
+    Обычно весь список проверяется одним вызовом скомпилированного
+    валидатора; только если в нём есть неподходящие элементы (не объекты,
+    вложенные структуры вместо строк), они отбрасываются поштучно.
+    """
+    if not isinstance(value, list):
+        return []
+    try:
+        return handler(value)
+    except ValidationError:
+        items = []
+        for item in value:
+            try:
+                items.extend(handler([item]))
+            except ValidationError:
+                pass
+        return items
+
+
+def _dict_or_empty(value: Any, handler):
+    return handler(value if isinstance(value, dict) else {})
+
+
+def _flatten_insights(value: Any, handler) -> List[Any]:
+    """
+    Инсайты из сохранённого формата (team_dynamics / process_recommendations /
+    follow_up_suggestions, snake_case или camelCase) - плоским списком;
+    элементы строятся уже по схеме Insight и повторно не проверяются
+    """
+    if isinstance(value, list):
+        return _valid_items(value, handler)
+    if not isinstance(value, dict):
+        return []
+    insights = []
+    team_dynamics = _pick(value, "team_dynamics", "teamDynamics")
+    if team_dynamics and isinstance(team_dynamics, str):
+        insights.append({"insight": team_dynamics, "category": "teamwork", "recommendation": ""})
+    for category, keys in (("process", ("process_recommendations", "processRecommendations")),
+                           ("followup", ("follow_up_suggestions", "followUpSuggestions"))):
+        values = _pick(value, *keys)
+        for text in values if isinstance(values, list) else ():
+            if isinstance(text, str):
+                insights.append({"insight": text, "category": category, "recommendation": text})
+    return insights
+
+
+def _pick(data: Dict[str, Any], *keys: str) -> Any:
+    for key in keys:
+        if key in data:
+            return data[key]
+    return None
+
+
+def _number_items(value: Any, handler) -> List[Any]:
+    """Пункты действий без id нумеруются по порядку (фронтенд использует id как ключ)"""
+    items = _valid_items(value, handler)
+    for index, item in enumerate(items, 1):
+        if item["id"] is None:
+            item["id"] = str(index)
+    return items
+
+
+def _decision_from_text(value: Any) -> Any:
+    # Модель может вернуть решение просто строкой
+    return {"decision": value} if isinstance(value, str) else value
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+Items = WrapValidator(_valid_items)
+Section = WrapValidator(_dict_or_empty)
+
+
+class ActionItem(TypedDict):
+    """Пункт действий в ответе API (из задач анализа)"""
+    __pydantic_config__ = ConfigDict(coerce_numbers_to_str=True)
+
+    id: NotRequired[Annotated[Optional[str], Field(None)]]
+    task: NotRequired[Annotated[Optional[str], Field(
+        "No task description", validation_alias=AliasChoices("task", "description")
+    )]]
+    assignee: NotRequired[Annotated[Optional[str], Field("Unassigned")]]
+    deadline: NotRequired[Annotated[Optional[str], Field(None)]]
+    priority: NotRequired[Annotated[Optional[str], Field("medium")]]
+    status: NotRequired[Annotated[Optional[str], Field("pending")]]
+    context: NotRequired[Annotated[Optional[str], Field("")]]
+
+
+class TranscriptInfo(TypedDict):
+    text: NotRequired[Annotated[Optional[str], Field("No transcript available")]]
+    duration: NotRequired[Annotated[Optional[Union[int, float]], Field(0)]]
+    language: NotRequired[Annotated[Optional[str], Field("en-US")]]
+    participantCount: NotRequired[Annotated[Optional[int], Field(
+        1, validation_alias=AliasChoices("participantCount", "participant_count")
+    )]]
+
+
+class ContentInfo(TypedDict):
+    topics: NotRequired[Annotated[List[Topic], Items, Field(default_factory=list)]]
+    decisions: NotRequired[Annotated[
+        List[Annotated[Decision, BeforeValidator(_decision_from_text)]], Items, Field(default_factory=list)
+    ]]
+    meetingType: NotRequired[Annotated[Optional[str], Field(
+        "general", validation_alias=AliasChoices("meetingType", "meeting_type")
+    )]]
+    effectivenessScore: NotRequired[Annotated[Optional[Union[int, float]], Field(
+        5, validation_alias=AliasChoices("effectivenessScore", "effectiveness_score")
+    )]]
+
+
+class MeetingResult(TypedDict):
+    """
+    Результат встречи в формате API
+
+    Единая схема ответа: meeting_result_adapter принимает сохранённый
+    результат как есть - и формат оркестратора (transcription, content,
+    actionItems, insights с teamDynamics / riskFlags...), и старый формат
+    с вложенным transcript и snake_case-полями - и отдаёт формат, который
+    ждёт фронтенд. Элементы - TypedDict, поэтому проверка не создаёт
+    экземпляров моделей, а сериализация в JSON идёт в pydantic-core.
+    """
+    __pydantic_config__ = ConfigDict(coerce_numbers_to_str=True)
+
+    id: NotRequired[Annotated[Optional[str], Field("unknown")]]
+    filename: NotRequired[Annotated[Optional[str], Field("unknown.mp3")]]
+    status: NotRequired[Annotated[Optional[str], Field("completed")]]
+    uploadedAt: NotRequired[Annotated[Optional[str], Field(
+        default_factory=_now, validation_alias=AliasChoices("uploadedAt", "uploaded_at")
+    )]]
+    processedAt: NotRequired[Annotated[Optional[str], Field(
+        default_factory=_now, validation_alias=AliasChoices("processedAt", "processed_at")
+    )]]
+    transcription: NotRequired[Annotated[Optional[str], Field("No transcript available")]]
+    transcript: NotRequired[Annotated[TranscriptInfo, Section, Field(default_factory=dict)]]
+    content: NotRequired[Annotated[ContentInfo, Section, Field(default_factory=dict)]]
+    actionItems: NotRequired[Annotated[List[ActionItem], WrapValidator(_number_items), Field(
+        default_factory=list, validation_alias=AliasChoices("actionItems", "action_items")
+    )]]
+    insights: NotRequired[Annotated[List[Insight], WrapValidator(_flatten_insights), Field(default_factory=list)]]
+    risks: NotRequired[Annotated[List[str], Items, Field(default_factory=list)]]
+    # Элементы, уже полученные из стрима анализа, пока встреча обрабатывается
+    partial: NotRequired[Dict[str, Any]]
+
+
+def _from_stored(data: Any) -> Any:
+    """Поля ответа, которые в сохранённом результате лежат иначе"""
+    if not isinstance(data, dict):
+        return data
+    data = dict(data)
+
+    transcript = data.get("transcript")
+    if not isinstance(transcript, dict):
+        # Результат оркестратора: текст в transcription, без вложенного transcript
+        text = data.get("transcription")
+        transcript = {"text": text} if isinstance(text, str) else {}
+        if isinstance(data.get("language"), str):
+            # Язык, на котором распознана запись (см. services.language_id)
+            transcript["language"] = data["language"]
+        data["transcript"] = transcript
+    data["transcription"] = transcript.get("text", "No transcript available")
+
+    insights = data.get("insights")
+    if isinstance(insights, dict):
+        # Риски хранятся внутри insights, в ответе - отдельным списком
+        data["risks"] = _pick(insights, "risk_flags", "riskFlags")
+
+    if data.get("status") != "processing" or not isinstance(data.get("partial"), dict):
+        data.pop("partial", None)
+    return data
+
+
+meeting_result_adapter = TypeAdapter(Annotated[MeetingResult, BeforeValidator(_from_stored)])
+
+
+def fallback_meeting_result(meeting_id: Optional[str], filename: Optional[str], error: str) -> MeetingResult:
+    """Минимальный ответ, если сохранённый результат не удалось прочитать по схеме"""
+    return meeting_result_adapter.validate_python({
+        "id": meeting_id if isinstance(meeting_id, str) else "unknown",
+        "filename": filename if isinstance(filename, str) else "unknown.mp3",
+        "transcript": {"text": "Validation error occurred", "participantCount": 0},
+        "content": {"meetingType": "error", "effectivenessScore": 0},
+        "insights": {"riskFlags": [f"Data validation failed: {error}"]}
+    })
@@ -0,0 +1,179 @@
+import os
+import math
+import time
+import shutil
+import logging
+from typing import Any, Dict, List, Optional
+
+from .registry import service_registry
+from .status_store import worker_id
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Нет ресурсов для новой записи: ответ 429 с Retry-After"""
+
+    def __init__(self, reason: str, retry_after: float, details: Optional[Dict[str, Any]] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.details = details or {}
+
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(self.retry_after)}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "detail": f"Server is over capacity: {self.reason}",
+            "reason": self.reason,
+            "retry_after": self.retry_after,
+            "estimated_wait_seconds": self.retry_after,
+            **self.details
+        }
+
+
+class AdmissionController:
+    """
+    Контроль допуска новых записей в обработку
+
+    Запись принимается, только если после неё не будут превышены лимиты:
+    число обрабатываемых записей, суммарная длительность аудио в работе и
+    свободное место на диске. Иначе клиент сразу получает 429 с оценкой
+    ожидания - уже принятые записи при перегрузке обрабатываются с прежней
+    задержкой, а не замедляются все вместе.
+
+    Оценка ожидания строится по скорости обработки: скользящее среднее
+    секунд обработки на секунду аудио по завершённым записям.
+
+    Записи в работе - резервы в status_store, общие для всех воркеров:
+    лимиты действуют на сервер целиком, а резервы пропавшего воркера
+    истекают вместе с его арендами. Скорость обработки и счётчики
+    отказов - свои у каждого процесса.
+    """
+
+    KIND = "admission"
+
+
+    def __init__(
+        self,
+        max_jobs: int = None,
+        max_audio_seconds: float = None,
+        min_free_disk_mb: float = None,
+        disk_path: str = "temp_uploads",
+        bytes_per_audio_second: float = None,
+        store=None
+    ):
+        """
+        Args:
+            max_jobs: Максимум записей в обработке одновременно
+            max_audio_seconds: Максимум суммарной длительности аудио в обработке (сек)
+            min_free_disk_mb: Минимум свободного места после приёма файла (МБ)
+            disk_path: Директория, в которую сохраняются загрузки
+            bytes_per_audio_second: Оценка длительности по размеру файла
+                (по умолчанию ~128 kbps, как у типичного mp3)
+            store: StatusStore для резервов (по умолчанию - общий из service_registry)
+        """
+        self.max_jobs = max_jobs or int(os.getenv("ADMISSION_MAX_JOBS", "8"))
+        self.max_audio_seconds = max_audio_seconds or float(os.getenv("ADMISSION_MAX_AUDIO_SECONDS", str(4 * 3600)))
+        self.min_free_disk = (min_free_disk_mb or float(os.getenv("ADMISSION_MIN_FREE_DISK_MB", "1024"))) * 1024 * 1024
+        self.disk_path = disk_path
+        self.bytes_per_audio_second = bytes_per_audio_second or float(
+            os.getenv("ADMISSION_BYTES_PER_AUDIO_SECOND", "16000")
+        )
+        # Начальная оценка скорости: минута аудио за 6 секунд
+        self.processing_ratio = float(os.getenv("ADMISSION_INITIAL_RATIO", "0.1"))
+        self._store = store
+        self.owner = worker_id()
+        self.ttl = float(os.getenv("STATUS_LEASE_TTL", "30"))
+        self.counters = {"admitted": 0, "rejected": 0, "completed": 0}
+        self.rejections: Dict[str, int] = {}
+
+    def estimate_audio_seconds(self, size_bytes: Optional[int]) -> float:
+        """Оценка длительности записи по размеру файла (до декодирования)"""
+        return (size_bytes or 0) / self.bytes_per_audio_second
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = service_registry.get("status_store")
+        return self._store
+
+    def _expected_remaining(self, job: Dict[str, Any], now: float) -> float:
+        expected = job["audio_seconds"] * self.processing_ratio
+        return max(1.0, job["started_at"] + expected - now)
+
+    def _reject(self, reason: str, retry_after: float, **details) -> AdmissionRejected:
+        self.counters["rejected"] += 1
+        self.rejections[reason] = self.rejections.get(reason, 0) + 1
+        logger.warning(f"Admission rejected ({reason}), retry after {retry_after:.0f}s")
+        return AdmissionRejected(reason, retry_after, details)
+
+    def check(self, audio_seconds: float = 0.0, size_bytes: int = 0) -> None:
+        """
+        Проверяет, можно ли принять запись
+
+        Raises:
+            AdmissionRejected: Лимит превышен; retry_after - оценка ожидания
+        """
+        self._check(self.store.reservations(self.KIND), audio_seconds, size_bytes)
+
+    def _check(self, jobs: List[Dict[str, Any]], audio_seconds: float, size_bytes: int) -> None:
+        now = time.time()
+        remaining = sorted(self._expected_remaining(job, now) for job in jobs)
+
+        if len(jobs) >= self.max_jobs:
+            # Место освободится, когда завершится достаточно записей
+            excess = len(jobs) - self.max_jobs
+            raise self._reject("jobs", remaining[min(excess, len(remaining) - 1)],
+                               jobs_in_flight=len(jobs), max_jobs=self.max_jobs)
+
+        in_flight = sum(job["audio_seconds"] for job in jobs)
+        if in_flight and in_flight + audio_seconds > self.max_audio_seconds:
+            # Записи обрабатываются параллельно: за processing_ratio секунд
+            # уходит по секунде аудио каждой записи в работе
+            excess = in_flight + audio_seconds - self.max_audio_seconds
+            wait = excess * self.processing_ratio / max(1, len(jobs))
+            raise self._reject("audio_seconds", max(wait, remaining[0]),
+                               audio_seconds_in_flight=round(in_flight), max_audio_seconds=self.max_audio_seconds)
+
+        free = shutil.disk_usage(self.disk_path).free
+        if free - size_bytes < self.min_free_disk:
+            # Место освобождается по мере удаления обработанных файлов
+            raise self._reject("disk", remaining[0] if remaining else 60,
+                               free_disk_mb=round(free / 1024 / 1024))
+
+    def admit(self, job_id: str, audio_seconds: float = 0.0, size_bytes: int = 0) -> None:
+        """
+        Принимает запись в обработку; после завершения нужно вызвать release()
+
+        Raises:
+            AdmissionRejected: Лимит превышен
+        """
+        # Проверка и резерв - одна транзакция хранилища: воркеры не примут лишнего вместе
+        self.store.reserve(self.KIND, job_id, self.owner, self.ttl, audio_seconds=audio_seconds,
+                           check=lambda jobs: self._check(jobs, audio_seconds, size_bytes))
+        self.counters["admitted"] += 1
+
+    def release(self, job_id: str) -> None:
+        job = self.store.unreserve(self.KIND, job_id)
+        if job is None:
+            return
+        self.counters["completed"] += 1
+        if job["audio_seconds"] >= 1:
+            ratio = (time.time() - job["started_at"]) / job["audio_seconds"]
+            self.processing_ratio = 0.8 * self.processing_ratio + 0.2 * ratio
+
+    def get_metrics(self) -> Dict[str, Any]:
+        jobs = self.store.reservations(self.KIND)
+        return {
+            "jobs_in_flight": len(jobs),
+            "max_jobs": self.max_jobs,
+            "audio_seconds_in_flight": round(sum(job["audio_seconds"] for job in jobs)),
+            "max_audio_seconds": self.max_audio_seconds,
+            "free_disk_mb": round(shutil.disk_usage(self.disk_path).free / 1024 / 1024),
+            "min_free_disk_mb": round(self.min_free_disk / 1024 / 1024),
+            "processing_ratio": round(self.processing_ratio, 4),
+            **self.counters,
+            "rejections": dict(self.rejections)
+        }
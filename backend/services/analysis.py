@@ -1,78 +1,220 @@
+import os
+import copy
 import json
-import anthropic
-from typing import List, Dict, Any, Tuple
-from models.analysis_results import Task, Decision, Topic, Insight
+import time
+from typing import List, Dict, Any, Tuple, Optional, Callable
 import traceback
 import logging
 import asyncio
+from .json_stream import IncrementalJSONParser
+from .prompts import PromptTemplate, SYSTEM_PREAMBLE, registry as prompt_registry
+from .llm_backends import AnalysisBackend, TruncatedResponseError, create_backend
+from .tracing import span
 
 logger = logging.getLogger(__name__)
 
 class AnalysisWorker:
     """Воркер для анализа транскрипции с использованием Claude API"""
     
-    def __init__(self, api_key: str):
+    # Транскрипции короче этого порога (~1024 токена) провайдер не кэширует,
+    # поэтому вызовы не задерживаются ради прогрева кэша
+    CACHE_MIN_PREFIX_CHARS = 4000
+    
+    def __init__(self, api_key: str, backend: Optional[AnalysisBackend] = None):
         """
         Инициализация воркера анализа
         
         Args:
             api_key: Anthropic API ключ
+            backend: Бэкенд модели (по умолчанию выбирается по ANALYSIS_BACKEND)
         """
-        self.client = anthropic.Anthropic(api_key=api_key)
-        self.model = "claude-3-sonnet-20240229"  # Используем Sonnet для баланса качества и скорости
-        print("✅ AnalysisWorker инициализирован")
+        self.backend = backend or create_backend(api_key)
+        self.model = self.backend.model
+        # Быстрая дешёвая модель для триажа и коротких записей
+        fast_model = os.getenv("TRIAGE_MODEL", "claude-3-5-haiku-20241022")
+        if backend is None and self.backend.name == "anthropic" and fast_model != self.model:
+            self.fast_backend = create_backend(api_key, model=fast_model)
+        else:
+            self.fast_backend = self.backend
+        self.prompts = prompt_registry
+        self.scheduler = None  # Глобальный LLMScheduler, задаётся оркестратором
+        self.usage_stats = self._empty_usage()
+        print(f"✅ AnalysisWorker инициализирован (backend: {self.backend.name})")
+    
+    async def warm_up(self) -> None:
+        """Создание клиентов моделей заранее (импорт SDK - в потоке)"""
+        for backend in {id(b): b for b in (self.backend, self.fast_backend)}.values():
+            await asyncio.to_thread(backend.warm_up)
     
-    async def _call_claude(self, prompt: str, system_prompt: str) -> str:
+    @property
+    def prompt_version(self) -> str:
         """
-        Вспомогательный метод для вызова Claude API
+        Версия анализа: активные версии шаблонов плюс хеш промптов и модели
+        
+        Любое изменение промпта или модели даёт новую версию, поэтому
+        повторный анализ не пропускается по ошибке.
+        """
+        return self.prompts.fingerprint(f"{self.model}+{self.fast_backend.model}")
+    
+    @staticmethod
+    def _empty_usage() -> Dict[str, int]:
+        return {
+            "calls": 0,
+            "input_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+            "output_tokens": 0
+        }
+    
+    def _record_usage(self, usage: Dict[str, int], target: Optional[Dict[str, int]]) -> None:
+        for stats in filter(None, (self.usage_stats, target)):
+            stats["calls"] += 1
+            for key, value in usage.items():
+                stats[key] = stats.get(key, 0) + value
+    
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """Суммарное потребление токенов с долей входа, прочитанного из кэша"""
+        stats = dict(self.usage_stats)
+        total_input = (stats["input_tokens"] + stats["cache_creation_input_tokens"]
+                       + stats["cache_read_input_tokens"])
+        stats["cache_hit_ratio"] = round(stats["cache_read_input_tokens"] / total_input, 3) if total_input else 0.0
+        return stats
+    
+    async def _call_claude(
+        self,
+        transcription: str,
+        template: PromptTemplate,
+        priority: str = "interactive",
+        on_text: Optional[Callable[[str], None]] = None,
+        usage: Optional[Dict[str, int]] = None,
+        backend: Optional[AnalysisBackend] = None
+    ) -> str:
+        """
+        Вспомогательный метод для вызова модели в режиме стриминга
         
         Args:
-            prompt: Сообщение пользователя
-            system_prompt: Системный промпт
+            transcription: Текст транскрипции
+            template: Шаблон инструкции из реестра промптов
+            priority: Очередь планировщика: "interactive" или "batch"
+            on_text: Callback для каждого полученного фрагмента текста
+            usage: Словарь, в который добавляется потребление токенов вызова
+            backend: Бэкенд вызова (по умолчанию основной)
             
         Returns:
-            Ответ от Claude
+            Ответ от Claude (при обрыве стрима - полученная часть)
+        """
+        backend = backend or self.backend
+        call_span = span(f"llm.{template.name}", backend=backend.name, model=backend.model,
+                         template=template.key, priority=priority, prompt_chars=len(transcription))
+        started = time.perf_counter()
+        received = []
+        
+        def on_usage(call_usage: Dict[str, int]) -> None:
+            self._record_usage(call_usage, usage)
+            for key, value in call_usage.items():
+                call_span.add(key, value)
+        
+        def on_chunk(chunk: str) -> None:
+            if not received:
+                call_span.set(first_token_ms=round((time.perf_counter() - started) * 1000, 1))
+            received.append(len(chunk))
+            if on_text is not None:
+                on_text(chunk)
+        
+        async def request():
+            return await backend.generate(transcription, template, on_chunk, on_usage)
+        
+        with call_span:
+            try:
+                if self.scheduler is not None and backend.rate_limited:
+                    # Грубая оценка: ~3 символа на токен плюс максимум ответа
+                    estimated_tokens = (
+                        len(SYSTEM_PREAMBLE) + len(transcription) + len(template.instructions)
+                    ) / 3 + template.max_tokens
+                    return await self.scheduler.submit(request, estimated_tokens, priority)
+                return await request()
+            except TruncatedResponseError as e:
+                logger.warning(f"⚠️ Стрим {backend.name} оборвался после {len(e.text)} символов: {str(e.cause)}")
+                call_span.set(truncated=True)
+                return e.text
+            except Exception as e:
+                logger.error(f"❌ Ошибка при вызове {backend.name}: {str(e)}")
+                logger.error(f"Traceback: {traceback.format_exc()}")
+                raise Exception(f"Ошибка анализа с Claude: {str(e)}")
+            finally:
+                call_span.set(response_chars=sum(received))
+    
+    async def _call_claude_json(
+        self,
+        transcription: str,
+        template: PromptTemplate,
+        priority: str = "interactive",
+        on_item: Optional[Callable[[Tuple, Any], None]] = None,
+        usage: Optional[Dict[str, int]] = None,
+        first_token: Optional[asyncio.Event] = None,
+        backend: Optional[AnalysisBackend] = None
+    ) -> Tuple[Any, bool]:
+        """
+        Стримит ответ Claude и разбирает JSON по мере поступления
+        
+        Returns:
+            (разобранное значение, признак полного ответа). Для оборванного
+            или повреждённого ответа значение собрано из завершённых элементов.
         """
+        parser = IncrementalJSONParser(on_item)
+        
+        def on_text(chunk: str) -> None:
+            if first_token is not None:
+                first_token.set()
+            parser.feed(chunk)
+        
         try:
-            response = self.client.completions.create(
-                model="claude-2",
-                prompt=f"{system_prompt}\n\n{prompt}",
-                max_tokens_to_sample=1024,
-                temperature=0.7
-            )
-            return response.completion
-        except Exception as e:
-            logger.error(f"❌ Ошибка при вызове Claude API: {str(e)}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
-            raise Exception(f"Ошибка анализа с Claude: {str(e)}")
+            await self._call_claude(transcription, template, priority, on_text, usage, backend)
+        finally:
+            if first_token is not None:
+                first_token.set()
+        # Фрагменты передаются в loop через call_soon_threadsafe - дожидаемся их обработки
+        await asyncio.sleep(0)
+        value = parser.salvage()
+        if value is None:
+            raise ValueError("В ответе Claude нет JSON")
+        complete = parser.complete and parser.value is not None
+        if not complete:
+            logger.warning("⚠️ Ответ Claude неполный, используются завершённые элементы")
+        return value, complete
     
-    async def analyze_content(self, transcription: str) -> Dict[str, Any]:
+    @staticmethod
+    def _section_callback(on_item, section: str):
+        if on_item is None:
+            return None
+        return lambda path, value: on_item(section, path, value)
+    
+    async def analyze_content(self, transcription: str, priority: str = "interactive", on_item=None,
+                              usage=None, first_token=None) -> Dict[str, Any]:
         """
         Анализирует содержание транскрипции
         """
         print("🔍 Воркер 2: Анализирую содержание для выявления тем и решений...")
         
-        system_prompt = """Ты - эксперт по анализу деловых встреч. Анализируй транскрипцию встречи и выдели:
-
-1. ТЕМЫ (topics) - основные темы обсуждения
-2. РЕШЕНИЯ (decisions) - принятые решения
-3. ТИП ВСТРЕЧИ (meeting_type) - тип встречи (standup, planning, review и т.д.)
-4. ОЦЕНКА ЭФФЕКТИВНОСТИ (effectiveness_score) - от 1 до 10
-
-Верни результат в формате JSON."""
+        template = self.prompts.get("content_analysis")
 
         try:
-            response = await self._call_claude(transcription, system_prompt)
-            
-            # Парсим JSON ответ
-            result = json.loads(response)
+            result, complete = await self._call_claude_json(
+                transcription, template, priority, self._section_callback(on_item, "content"),
+                usage, first_token
+            )
+            if not isinstance(result, dict):
+                raise ValueError(f"Ожидался JSON-объект, получен {type(result).__name__}")
             
-            return {
+            content = {
                 "topics": result.get("topics", []),
                 "decisions": result.get("decisions", []),
                 "meeting_type": result.get("meeting_type", "general"),
                 "effectiveness_score": result.get("effectiveness_score", 5)
             }
+            if not complete:
+                content["truncated"] = True
+            return content
             
         except Exception as e:
             print(f"❌ Ошибка в analyze_content: {str(e)}")
@@ -83,60 +225,61 @@ class AnalysisWorker:
                 "effectiveness_score": 0
             }
 
-    async def extract_tasks(self, transcription: str) -> List[Dict[str, Any]]:
+    async def extract_tasks(self, transcription: str, priority: str = "interactive", on_item=None,
+                            usage=None, first_token=None) -> Tuple[List[Dict[str, Any]], bool]:
         """
         Извлекает задачи и пункты действий
+        
+        Returns:
+            (задачи, complete): complete=False, если список обрезан по
+            max_tokens или не получен из-за ошибки
         """
         print("📋 Воркер 3: Извлекаю задачи и пункты действий...")
         
-        system_prompt = """Ты - эксперт по планированию проектов. Найди в транскрипции встречи все задачи, пункты действий, поручения.
-Для каждой задачи укажи:
-- описание
-- ответственного
-- срок
-- приоритет (high/medium/low)
-
-Верни результат в формате JSON."""
+        template = self.prompts.get("task_extraction")
 
         try:
-            response = await self._call_claude(transcription, system_prompt)
+            tasks, complete = await self._call_claude_json(
+                transcription, template, priority, self._section_callback(on_item, "tasks"),
+                usage, first_token
+            )
             
-            # Парсим JSON ответ
-            tasks = json.loads(response)
+            # Модель может обернуть список в объект: {"tasks": [...]}
+            if isinstance(tasks, dict):
+                tasks = next((value for value in tasks.values() if isinstance(value, list)), [])
             
-            return tasks
+            return tasks, complete
             
         except Exception as e:
             print(f"❌ Ошибка в extract_tasks: {str(e)}")
-            return []
+            return [], False
 
-    async def generate_insights(self, transcription: str) -> Dict[str, Any]:
+    async def generate_insights(self, transcription: str, priority: str = "interactive", on_item=None,
+                                usage=None, first_token=None) -> Dict[str, Any]:
         """
         Генерирует инсайты и рекомендации
         """
         print("💡 Воркер 4: Генерирую инсайты, риски и оценку эффективности...")
         
-        system_prompt = """Ты - консультант по эффективности деловых процессов. Проанализируй транскрипцию встречи и предоставь:
-
-1. ДИНАМИКА КОМАНДЫ (team_dynamics) - оценка взаимодействия участников
-2. РЕКОМЕНДАЦИИ ПО ПРОЦЕССУ (process_recommendations) - как улучшить процесс
-3. РИСКИ (risk_flags) - потенциальные проблемы
-4. ПРЕДЛОЖЕНИЯ ПО ДАЛЬНЕЙШИМ ДЕЙСТВИЯМ (follow_up_suggestions)
-
-Верни результат в формате JSON."""
+        template = self.prompts.get("meeting_insights")
 
         try:
-            response = await self._call_claude(transcription, system_prompt)
-            
-            # Парсим JSON ответ
-            insights = json.loads(response)
+            insights, complete = await self._call_claude_json(
+                transcription, template, priority, self._section_callback(on_item, "insights"),
+                usage, first_token
+            )
+            if not isinstance(insights, dict):
+                raise ValueError(f"Ожидался JSON-объект, получен {type(insights).__name__}")
             
-            return {
+            result = {
                 "team_dynamics": insights.get("team_dynamics", ""),
                 "process_recommendations": insights.get("process_recommendations", []),
                 "risk_flags": insights.get("risk_flags", []),
                 "follow_up_suggestions": insights.get("follow_up_suggestions", [])
             }
+            if not complete:
+                result["truncated"] = True
+            return result
             
         except Exception as e:
             print(f"❌ Ошибка в generate_insights: {str(e)}")
@@ -147,18 +290,173 @@ class AnalysisWorker:
                 "follow_up_suggestions": []
             }
 
-    async def analyze(self, transcription: str) -> Dict[str, Any]:
+    async def classify(self, transcription: str, priority: str = "interactive") -> Optional[Dict[str, Any]]:
+        """
+        Классификация записи быстрой моделью (для пограничных случаев триажа)
+        
+        Returns:
+            {"category", "is_meeting"} или None, если модель не ответила
+        """
+        try:
+            verdict, _ = await self._call_claude_json(
+                transcription, self.prompts.get("triage"), priority, backend=self.fast_backend
+            )
+            return verdict if isinstance(verdict, dict) else None
+        except Exception as e:
+            logger.warning(f"⚠️ Триаж быстрой моделью не удался: {str(e)}")
+            return None
+    
+    @staticmethod
+    def empty_result(meeting_type: str = "empty") -> Dict[str, Any]:
+        """
+        Результат без вызовов модели - для записей без речи
+        """
+        return {
+            "content_analysis": {
+                "topics": [],
+                "decisions": [],
+                "meeting_type": meeting_type,
+                "effectiveness_score": 0
+            },
+            "tasks": [],
+            "insights": {
+                "team_dynamics": "",
+                "process_recommendations": [],
+                "risk_flags": [],
+                "follow_up_suggestions": []
+            },
+            "status": "success",
+            "usage": AnalysisWorker._empty_usage()
+        }
+    
+    async def analyze_quick(self, transcription: str, priority: str = "interactive", on_item=None) -> Dict[str, Any]:
+        """
+        Анализ короткой записи одним вызовом быстрой модели
+        
+        Формат результата совпадает с analyze(); при ошибке выполняется
+        полный анализ.
+        """
+        print("⚡ Короткая запись: анализ одним вызовом быстрой модели...")
+        usage = self._empty_usage()
+        
+        try:
+            summary, complete = await self._call_claude_json(
+                transcription, self.prompts.get("quick_summary"), priority,
+                self._section_callback(on_item, "quick"), usage, backend=self.fast_backend
+            )
+            if not isinstance(summary, dict):
+                raise ValueError(f"Ожидался JSON-объект, получен {type(summary).__name__}")
+        except Exception as e:
+            print(f"❌ Ошибка в analyze_quick: {str(e)}, выполняю полный анализ")
+            return await self.analyze(transcription, priority, on_item)
+        
+        result = self.empty_result(summary.get("meeting_type", "short"))
+        result["content_analysis"].update({
+            "topics": summary.get("topics", []),
+            "decisions": summary.get("decisions", []),
+            "effectiveness_score": summary.get("effectiveness_score", 5),
+            "summary": summary.get("summary", "")
+        })
+        result["tasks"] = summary.get("tasks", [])
+        result["status"] = "success" if complete else "partial"
+        result["usage"] = usage
+        return result
+
+    async def analyze_increment(self, fragment: str, previous: Optional[Dict[str, Any]] = None,
+                                priority: str = "interactive") -> Dict[str, Any]:
+        """
+        Инкрементальный анализ идущей встречи: сводка предыдущей части
+        обновляется по новому фрагменту транскрипции одним вызовом быстрой
+        модели, поэтому стоимость вызова не растёт с длиной встречи
+        
+        Args:
+            fragment: Транскрипция, добавившаяся с прошлого обновления
+            previous: Результат предыдущего вызова (формат analyze())
+            
+        Returns:
+            Результат в формате analyze(); при ошибке - previous со статусом "partial"
+        """
+        print("🔄 Обновляю сводку идущей встречи...")
+        usage = self._empty_usage()
+        state = None
+        if previous is not None:
+            state = {
+                "summary": previous["content_analysis"].get("summary", ""),
+                "topics": previous["content_analysis"]["topics"],
+                "decisions": previous["content_analysis"]["decisions"],
+                "tasks": previous["tasks"],
+                "meeting_type": previous["content_analysis"]["meeting_type"]
+            }
+        prompt_text = (
+            f"Сводка предыдущей части встречи:\n{json.dumps(state, ensure_ascii=False)}\n\n"
+            if state else ""
+        ) + f"Новый фрагмент транскрипции:\n{fragment}"
+        
+        try:
+            summary, complete = await self._call_claude_json(
+                prompt_text, self.prompts.get("rolling_summary"), priority, usage=usage, backend=self.fast_backend
+            )
+            if not isinstance(summary, dict):
+                raise ValueError(f"Ожидался JSON-объект, получен {type(summary).__name__}")
+        except Exception as e:
+            print(f"❌ Ошибка в analyze_increment: {str(e)}, сводка не обновлена")
+            result = copy.deepcopy(previous) if previous is not None else self.empty_result("live")
+            result["status"] = "partial"
+            result["usage"] = usage
+            return result
+        
+        result = self.empty_result(summary.get("meeting_type", "live"))
+        result["content_analysis"].update({
+            "topics": summary.get("topics", []),
+            "decisions": summary.get("decisions", []),
+            "effectiveness_score": summary.get("effectiveness_score", 5),
+            "summary": summary.get("summary", "")
+        })
+        result["tasks"] = summary.get("tasks", [])
+        result["status"] = "success" if complete else "partial"
+        result["usage"] = usage
+        return result
+
+    async def analyze(self, transcription: str, priority: str = "interactive", on_item=None) -> Dict[str, Any]:
         """
         Основной метод анализа транскрипции
+        
+        Args:
+            transcription: Текст транскрипции
+            priority: "interactive" для загрузок пользователей, "batch" для фоновой обработки
+            on_item: Callback (section, path, value) для элементов по мере стриминга
         """
         print("🚀 Начинаю анализ транскрипции...")
         
+        usage = self._empty_usage()
+        
         try:
+            # Первый вызов записывает префикс (system + транскрипция) в кэш
+            # провайдера; остальные стартуют после его первого токена и
+            # читают префикс из кэша. Короткие транскрипции не кэшируются -
+            # их запускаем сразу.
+            first_token = asyncio.Event()
+            if not self.backend.supports_prompt_cache or len(transcription) < self.CACHE_MIN_PREFIX_CHARS:
+                first_token.set()
+            
+            async def after_prefix_cached(coro):
+                await first_token.wait()
+                return await coro
+            
             # Запускаем все анализаторы параллельно
-            content_result, tasks_result, insights_result = await asyncio.gather(
-                self.analyze_content(transcription),
-                self.extract_tasks(transcription),
-                self.generate_insights(transcription)
+            content_result, (tasks_result, tasks_complete), insights_result = await asyncio.gather(
+                self.analyze_content(transcription, priority, on_item, usage, first_token),
+                after_prefix_cached(self.extract_tasks(transcription, priority, on_item, usage)),
+                after_prefix_cached(self.generate_insights(transcription, priority, on_item, usage))
+            )
+            
+            # Воркеры при ошибке возвращают заглушки - такой анализ считаем частичным
+            degraded = (
+                content_result.get("meeting_type") == "error"
+                or not tasks_complete
+                or insights_result.get("risk_flags") == ["Ошибка анализа"]
+                or content_result.get("truncated")
+                or insights_result.get("truncated")
             )
             
             # Формируем итоговый результат
@@ -166,7 +464,8 @@ class AnalysisWorker:
                 "content_analysis": content_result,
                 "tasks": tasks_result,
                 "insights": insights_result,
-                "status": "success"
+                "status": "partial" if degraded else "success",
+                "usage": usage
             }
             
             print("✅ Анализ успешно завершен")
@@ -0,0 +1,368 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+import traceback
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .status_store import worker_id
+from .tenants import DEFAULT_TENANT, current_tenant
+
+logger = logging.getLogger(__name__)
+
+AUDIO_EXTENSIONS = {
+    'mp3', 'mp4', 'mpeg', 'mpga', 'm4a', 'wav', 'webm',
+    'flac', 'ogg', 'opus', 'avi', 'mov', 'wmv', '3gp'
+}
+
+# Стадии элемента batch-а в порядке выполнения
+ITEM_STATUSES = ["pending", "decoded", "transcribed", "completed", "failed"]
+
+
+def collect_sources(directory: Optional[str] = None, manifest: Optional[str] = None,
+                    files: Optional[List[str]] = None) -> List[Dict[str, str]]:
+    """
+    Собирает список аудиофайлов для batch-обработки
+
+    Args:
+        directory: Директория, обходится рекурсивно
+        manifest: Файл-манифест: JSON-список, JSONL или по одному пути в строке
+        files: Явный список путей
+
+    Returns:
+        Список {"path", "filename"} в стабильном порядке
+    """
+    sources: List[Dict[str, str]] = []
+
+    if directory:
+        if not os.path.isdir(directory):
+            raise ValueError(f"Directory not found: {directory}")
+        for root, _, names in os.walk(directory):
+            for name in sorted(names):
+                if name.rsplit('.', 1)[-1].lower() in AUDIO_EXTENSIONS:
+                    sources.append({"path": os.path.join(root, name), "filename": name})
+
+    if manifest:
+        if not os.path.isfile(manifest):
+            raise ValueError(f"Manifest not found: {manifest}")
+        base_dir = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, 'r', encoding='utf-8') as f:
+            raw = f.read()
+        try:
+            entries = json.loads(raw)
+        except json.JSONDecodeError:
+            entries = []
+            for line in raw.splitlines():
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                entries.append(json.loads(line) if line.startswith('{') else line)
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = {"path": entry}
+            path = entry["path"]
+            if not os.path.isabs(path):
+                path = os.path.join(base_dir, path)
+            sources.append({"path": path, "filename": entry.get("filename") or os.path.basename(path)})
+
+    for path in files or []:
+        sources.append({"path": path, "filename": os.path.basename(path)})
+
+    return sources
+
+
+class BatchScheduler:
+    """
+    Планировщик batch-обработки архивов встреч
+
+    Стадии конвейера (декодирование, транскрипция, анализ) работают
+    одновременно и связаны ограниченными очередями: пока файл N
+    транскрибируется, файл N+1 уже декодируется, а N-1 анализируется.
+    Прогресс пишется в журнал, поэтому прерванный batch можно продолжить.
+    Выполняющийся batch закреплён арендой в status_store (ключ batch:<ID>),
+    поэтому его не запустят повторно ни другой воркер API, ни batch_cli.
+    """
+
+    def __init__(self, orchestrator, batches_dir: str, decode_workers: int = 1,
+                 transcribe_workers: int = 1, analyze_workers: int = 1, prefetch: int = 1,
+                 owner: Optional[str] = None, lease_ttl: Optional[float] = None):
+        """
+        Инициализация планировщика
+
+        Args:
+            orchestrator: MeetingOrchestrator со стадиями обработки
+            batches_dir: Директория для манифестов и журналов прогресса
+            decode_workers: Параллелизм стадии декодирования
+            transcribe_workers: Параллелизм стадии транскрипции
+            analyze_workers: Параллелизм стадии анализа
+            prefetch: Ёмкость очередей между стадиями
+            owner: Владелец аренд batch-ей (по умолчанию - этот процесс)
+            lease_ttl: Срок аренды, продлевается, пока batch выполняется
+        """
+        self.orchestrator = orchestrator
+        self.batches_dir = batches_dir
+        self.decode_workers = decode_workers
+        self.transcribe_workers = transcribe_workers
+        self.analyze_workers = analyze_workers
+        self.prefetch = prefetch
+        self.store = orchestrator.status_store
+        self.owner = owner or worker_id()
+        self.lease_ttl = lease_ttl or float(os.getenv("STATUS_LEASE_TTL", "30"))
+        self._running: Dict[str, asyncio.Task] = {}
+        self._file_lock = threading.Lock()
+        os.makedirs(batches_dir, exist_ok=True)
+        logger.info("BatchScheduler initialized")
+
+    # ------------------------------------------------------------------ #
+    # Хранение
+    # ------------------------------------------------------------------ #
+
+    def _manifest_path(self, batch_id: str) -> str:
+        return os.path.join(self.batches_dir, f"{batch_id}.json")
+
+    def _progress_path(self, batch_id: str) -> str:
+        return os.path.join(self.batches_dir, f"{batch_id}.progress.jsonl")
+
+    @staticmethod
+    def lease_key(batch_id: str) -> str:
+        return f"batch:{batch_id}"
+
+    def create_batch(self, sources: List[Dict[str, str]], batch_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Создаёт batch и сохраняет его манифест
+
+        ID встреч детерминированы (uuid5 от batch_id и пути), чтобы при
+        повторном запуске результаты попадали в те же файлы.
+        """
+        if not sources:
+            raise ValueError("No audio files found for batch")
+        batch_id = batch_id or f"batch_{uuid.uuid4().hex[:12]}"
+        batch = {
+            "id": batch_id,
+            "created_at": datetime.utcnow().isoformat(),
+            # Арендатор создавшего запроса - справедливая очередь и квоты при выполнении
+            "tenant": current_tenant.get(),
+            "items": [
+                {
+                    "index": i,
+                    "path": source["path"],
+                    "filename": source["filename"],
+                    "meeting_id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"{batch_id}:{source['path']}"))
+                }
+                for i, source in enumerate(sources)
+            ]
+        }
+        with self._file_lock:
+            with open(self._manifest_path(batch_id), 'w', encoding='utf-8') as f:
+                json.dump(batch, f, ensure_ascii=False)
+        logger.info(f"Batch {batch_id} created with {len(sources)} files")
+        return self.load_batch(batch_id)
+
+    def load_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Загружает batch и восстанавливает статусы элементов из журнала прогресса
+        """
+        if os.path.basename(batch_id) != batch_id or not os.path.exists(self._manifest_path(batch_id)):
+            return None
+        with self._file_lock:
+            with open(self._manifest_path(batch_id), 'r', encoding='utf-8') as f:
+                batch = json.load(f)
+            for item in batch["items"]:
+                item["status"] = "pending"
+            if os.path.exists(self._progress_path(batch_id)):
+                with open(self._progress_path(batch_id), 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            event = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue  # Недописанная строка после сбоя
+                        item = batch["items"][event["index"]]
+                        item["status"] = event["status"]
+                        item["updated_at"] = event["at"]
+                        if event.get("error"):
+                            item["error"] = event["error"]
+                        else:
+                            item.pop("error", None)
+        # Аренда показывает, выполняется ли batch в каком-либо процессе
+        batch["lease"] = self.store.lease(self.lease_key(batch_id))
+        return batch
+
+    def _append_progress(self, batch_id: str, event: Dict[str, Any]) -> None:
+        with self._file_lock:
+            with open(self._progress_path(batch_id), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    async def _record(self, batch_id: str, item: Dict[str, Any], status: str, error: Optional[str] = None) -> None:
+        item["status"] = status
+        event = {"index": item["index"], "status": status, "at": datetime.utcnow().isoformat()}
+        if error:
+            event["error"] = error
+            item["error"] = error
+        # Запись в журнал - в потоке, чтобы не блокировать event loop
+        await asyncio.to_thread(self._append_progress, batch_id, event)
+
+    def summary(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        counts = {status: 0 for status in ITEM_STATUSES}
+        for item in batch["items"]:
+            counts[item["status"]] = counts.get(item["status"], 0) + 1
+        return {
+            "id": batch["id"],
+            "created_at": batch["created_at"],
+            "tenant": batch.get("tenant", DEFAULT_TENANT),
+            "running": self._is_running(batch),
+            "total": len(batch["items"]),
+            "counts": counts,
+            "failed": [
+                {"filename": item["filename"], "meeting_id": item["meeting_id"], "error": item.get("error")}
+                for item in batch["items"] if item["status"] == "failed"
+            ][:50]
+        }
+
+    # ------------------------------------------------------------------ #
+    # Выполнение
+    # ------------------------------------------------------------------ #
+
+    def _is_running(self, batch: Dict[str, Any]) -> bool:
+        task = self._running.get(batch["id"])
+        if task is not None and not task.done():
+            return True
+        lease = batch.get("lease")
+        return lease is not None and lease["expires_at"] > time.time()
+
+    async def _acquire(self, batch_id: str) -> bool:
+        """Аренда batch-а этим владельцем (False - batch выполняется в другом процессе)"""
+        return await asyncio.to_thread(
+            self.store.acquire_lease, self.lease_key(batch_id), self.owner, self.lease_ttl, {"kind": "batch"}
+        )
+
+    async def _keep_lease(self, batch_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                if not await self._acquire(batch_id):
+                    logger.warning(f"Batch {batch_id}: lease was taken over by another process")
+            except Exception as e:
+                logger.warning(f"Batch {batch_id}: lease renewal failed: {str(e)}")
+
+    async def start(self, batch_id: str) -> bool:
+        """
+        Запускает (или продолжает) batch в фоне
+
+        Returns:
+            False, если batch уже выполняется - здесь или в другом процессе
+        """
+        task = self._running.get(batch_id)
+        if task is not None and not task.done():
+            return False
+        if not await self._acquire(batch_id):
+            return False
+        self._running[batch_id] = asyncio.create_task(self._run_leased(batch_id))
+        return True
+
+    def running(self) -> int:
+        """Число batch-ей, которые сейчас выполняются в этом процессе"""
+        return sum(not task.done() for task in self._running.values())
+
+    async def run_batch(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Прогоняет все незавершённые элементы batch-а через конвейер
+
+        Raises:
+            RuntimeError: batch уже выполняется в другом процессе
+        """
+        if not await self._acquire(batch_id):
+            raise RuntimeError(f"Batch is already running: {batch_id}")
+        return await self._run_leased(batch_id)
+
+    async def _run_leased(self, batch_id: str) -> Dict[str, Any]:
+        """Выполнение batch-а под уже взятой арендой; аренда освобождается в конце"""
+        keeper = asyncio.create_task(self._keep_lease(batch_id))
+        try:
+            return await self._run(batch_id)
+        finally:
+            keeper.cancel()
+            await asyncio.to_thread(self.store.release_lease, self.lease_key(batch_id), self.owner)
+
+    async def _run(self, batch_id: str) -> Dict[str, Any]:
+        batch = await asyncio.to_thread(self.load_batch, batch_id)
+        if batch is None:
+            raise ValueError(f"Batch not found: {batch_id}")
+
+        # Задача batch-а выполняется в своём контексте - восстанавливаем арендатора
+        current_tenant.set(batch.get("tenant", DEFAULT_TENANT))
+        pending = [item for item in batch["items"] if item["status"] != "completed"]
+        logger.info(f"Batch {batch_id}: {len(pending)} of {len(batch['items'])} files to process")
+
+        decode_queue: asyncio.Queue = asyncio.Queue()
+        transcribe_queue: asyncio.Queue = asyncio.Queue(maxsize=self.prefetch)
+        analyze_queue: asyncio.Queue = asyncio.Queue(maxsize=self.prefetch)
+
+        for item in pending:
+            await decode_queue.put(item)
+
+        async def decode(item: Dict[str, Any]) -> None:
+            if item["status"] == "transcribed":
+                # Транскрипция уже сохранена - сразу на анализ
+                result = await asyncio.to_thread(self.orchestrator.load_result, item["meeting_id"])
+                if result and result.get("transcription") is not None:
+                    await analyze_queue.put((item, result))
+                    return
+            result = self.orchestrator.new_result(item["meeting_id"], item["filename"])
+            content = await self.orchestrator.decode_stage(item["meeting_id"], item["path"])
+            await self._record(batch_id, item, "decoded")
+            await transcribe_queue.put((item, result, content))
+
+        async def transcribe(payload) -> None:
+            item, result, content = payload
+            await self.orchestrator.transcribe_stage(item["meeting_id"], content, item["filename"], result)
+            await self._record(batch_id, item, "transcribed")
+            await analyze_queue.put((item, result))
+
+        async def analyze(payload) -> None:
+            item, result = payload
+            await self.orchestrator.analyze_stage(item["meeting_id"], result, priority="batch")
+            await self._record(batch_id, item, "completed")
+
+        await asyncio.gather(
+            self._run_stage(batch_id, "decode", self.decode_workers, decode_queue, transcribe_queue,
+                            self.transcribe_workers, decode),
+            self._run_stage(batch_id, "transcribe", self.transcribe_workers, transcribe_queue, analyze_queue,
+                            self.analyze_workers, transcribe),
+            self._run_stage(batch_id, "analyze", self.analyze_workers, analyze_queue, None, 0, analyze)
+        )
+
+        batch = await asyncio.to_thread(self.load_batch, batch_id)
+        batch["lease"] = None  # Аренда ещё не снята, но batch уже завершён
+        summary = self.summary(batch)
+        logger.info(f"Batch {batch_id} finished: {summary['counts']}")
+        return summary
+
+    async def _run_stage(self, batch_id: str, name: str, workers: int, in_queue: asyncio.Queue,
+                         out_queue: Optional[asyncio.Queue], out_workers: int,
+                         handler: Callable[[Any], Awaitable[None]]) -> None:
+        if name == "decode":
+            # Входная очередь заполнена заранее - добавляем по маркеру конца на воркера
+            for _ in range(workers):
+                in_queue.put_nowait(None)
+
+        async def worker() -> None:
+            while True:
+                payload = await in_queue.get()
+                if payload is None:
+                    return
+                item = payload if isinstance(payload, dict) else payload[0]
+                try:
+                    await handler(payload)
+                except Exception as e:
+                    logger.error(f"Batch {batch_id}: {name} failed for {item['filename']}: {str(e)}")
+                    logger.error(f"Traceback: {traceback.format_exc()}")
+                    await self._record(batch_id, item, "failed", f"{name}: {str(e)}")
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        if out_queue is not None:
+            for _ in range(out_workers):
+                await out_queue.put(None)
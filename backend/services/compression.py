@@ -0,0 +1,251 @@
+import os
+import gzip
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Расширения файлов и значения Content-Encoding по кодекам
+EXTENSIONS = {"zstd": ".zst", "br": ".br", "gzip": ".gz"}
+# Порядок предпочтения при согласовании кодировки ответа
+RESPONSE_ENCODINGS = ("zstd", "br", "gzip")
+
+_modules: Dict[str, Any] = {}
+_warned = set()
+
+
+def _module(codec: str):
+    """Ленивый импорт zstandard / brotli (None, если пакет не установлен)"""
+    if codec not in _modules:
+        try:
+            if codec == "zstd":
+                import zstandard
+                _modules[codec] = zstandard
+            elif codec == "br":
+                import brotli
+                _modules[codec] = brotli
+            else:
+                _modules[codec] = gzip
+        except ImportError:
+            _modules[codec] = None
+    return _modules[codec]
+
+
+def available(codec: str) -> bool:
+    return codec == "gzip" or _module(codec) is not None
+
+
+def compress(data: bytes, codec: str, level: Optional[int] = None) -> bytes:
+    if codec == "zstd":
+        return _module("zstd").ZstdCompressor(level=level or 3).compress(data)
+    if codec == "br":
+        return _module("br").compress(data, quality=level or 5)
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=level or 6)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        module = _module("zstd")
+        if module is None:
+            raise RuntimeError("zstandard is not installed: cannot read .zst blob")
+        return module.ZstdDecompressor().decompress(data)
+    if codec == "br":
+        return _module("br").decompress(data)
+    if codec == "gzip":
+        return gzip.decompress(data)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Выбор кодировки ответа по Accept-Encoding (с учётом q)
+
+    Returns:
+        "zstd", "br", "gzip" или None (без сжатия)
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in RESPONSE_ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q and available(encoding):
+            best, best_q = encoding, q
+    return best
+
+
+class BlobStore:
+    """
+    JSON-блобы (результаты встреч с транскрипциями, версии анализа) на
+    диске с прозрачным сжатием
+
+    Блоб <путь>.json пишется как <путь>.json.zst (RESULTS_COMPRESSION:
+    zstd, gzip или none); чтение находит любой из вариантов, в том числе
+    несжатые файлы, записанные до включения сжатия. read_raw() отдаёт
+    сжатые байты без распаковки - их можно сразу отправить клиенту.
+    """
+
+    READ_ORDER = ("zstd", "gzip", None)
+
+    def __init__(self, codec: Optional[str] = None, level: Optional[int] = None):
+        codec = (codec or os.getenv("RESULTS_COMPRESSION", "zstd")).lower()
+        if codec == "none":
+            codec = None
+        elif codec not in ("zstd", "gzip"):
+            raise ValueError(f"Unsupported RESULTS_COMPRESSION: {codec}")
+        elif not available(codec):
+            logger.warning(f"{codec} is not installed, results are stored with gzip")
+            codec = "gzip"
+        self.codec = codec
+        self.level = level or (int(os.getenv("RESULTS_COMPRESSION_LEVEL")) if os.getenv("RESULTS_COMPRESSION_LEVEL") else None)
+
+    @staticmethod
+    def _variant(path: str, codec: Optional[str]) -> str:
+        return path + EXTENSIONS[codec] if codec else path
+
+    def locate(self, path: str) -> Optional[Tuple[str, Optional[str]]]:
+        """Существующий вариант блоба: (путь к файлу, кодек) или None"""
+        for codec in self.READ_ORDER:
+            variant = self._variant(path, codec)
+            if os.path.exists(variant):
+                return variant, codec
+        return None
+
+    def exists(self, path: str) -> bool:
+        return self.locate(path) is not None
+
+    def version(self, path: str) -> Optional[str]:
+        """Версия блоба для кэшей: меняется при каждой перезаписи"""
+        located = self.locate(path)
+        if located is None:
+            return None
+        stat = os.stat(located[0])
+        return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+    def write_json(self, path: str, value: Any) -> None:
+        """Атомарная запись (через временный файл); прочие варианты блоба удаляются"""
+        if self.codec:
+            data = compress(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+                            self.codec, self.level)
+        else:
+            data = json.dumps(value, indent=2, ensure_ascii=False).encode("utf-8")
+        target = self._variant(path, self.codec)
+        tmp_file = f"{target}.tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(data)
+        os.replace(tmp_file, target)
+        for codec in self.READ_ORDER:
+            stale = self._variant(path, codec)
+            if stale != target and os.path.exists(stale):
+                os.remove(stale)
+
+    def read_raw(self, path: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        """Байты блоба как на диске и их кодек (без распаковки)"""
+        located = self.locate(path)
+        if located is None:
+            return None
+        with open(located[0], "rb") as f:
+            return f.read(), located[1]
+
+    def read_json(self, path: str) -> Optional[Any]:
+        raw = self.read_raw(path)
+        if raw is None:
+            return None
+        data, codec = raw
+        return json.loads(decompress(data, codec) if codec else data)
+
+    def list_ids(self, directory: str, suffix: str = ".json") -> List[str]:
+        """Имена блобов в директории без расширений (каждый один раз)"""
+        ids = set()
+        for name in os.listdir(directory):
+            for codec in self.READ_ORDER:
+                ending = suffix + (EXTENSIONS[codec] if codec else "")
+                if name.endswith(ending) and os.path.isfile(os.path.join(directory, name)):
+                    ids.add(name[:-len(ending)])
+                    break
+        return sorted(ids)
+
+
+class PrecompressedCache:
+    """
+    Готовые тела ответов завершённых встреч
+
+    Тело сериализуется один раз для версии результата и сжимается в каждую
+    запрошенную кодировку один раз (лениво или заранее через encode_all),
+    после чего ответ отдаётся без валидации, сериализации и сжатия.
+    """
+
+    def __init__(self, max_entries: int = None, min_size: int = None):
+        self.max_entries = max_entries or int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+        self.min_size = min_size if min_size is not None else int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, version: Optional[str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or version is None or entry["version"] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, version: Optional[str], body: bytes, owner: Optional[str] = None) -> Dict[str, Any]:
+        """owner - чей это ответ: вызывающий сверяет его с запросом до отдачи тела"""
+        entry = {
+            "version": version,
+            "owner": owner,
+            "etag": '"' + hashlib.sha1(body).hexdigest()[:20] + '"',
+            "bodies": {None: body}
+        }
+        if version is not None:
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def body(self, entry: Dict[str, Any], encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """Тело в кодировке encoding (маленькие тела не сжимаются)"""
+        identity = entry["bodies"][None]
+        if encoding is None or len(identity) < self.min_size:
+            return identity, None
+        if encoding not in entry["bodies"]:
+            entry["bodies"][encoding] = compress(identity, encoding)
+        return entry["bodies"][encoding], encoding
+
+    def encode_all(self, entry: Dict[str, Any]) -> None:
+        for encoding in RESPONSE_ENCODINGS:
+            if available(encoding):
+                self.body(entry, encoding)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            "entries": len(entries),
+            "identity_bytes": sum(len(e["bodies"][None]) for e in entries),
+            "encoded_bytes": sum(len(b) for e in entries for k, b in e["bodies"].items() if k),
+            "encodings": [e for e in RESPONSE_ENCODINGS if available(e)]
+        }
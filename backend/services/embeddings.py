@@ -0,0 +1,164 @@
+import os
+import re
+import asyncio
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class EmbeddingWorker:
+    """
+    Воркер для построения эмбеддингов текста на CPU
+
+    Использует небольшую модель sentence-transformers (если установлена),
+    иначе - детерминированный hashing-векторизатор. Запросы от разных
+    встреч собираются в общие батчи и кодируются одним вызовом модели.
+    """
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        batch_size: int = 32,
+        batch_window: float = 0.05,
+        hashing_dim: int = 384
+    ):
+        """
+        Инициализация воркера эмбеддингов
+
+        Args:
+            model_name: Имя модели sentence-transformers
+            batch_size: Максимальный размер батча
+            batch_window: Сколько ждать (сек) дозаполнения батча
+            hashing_dim: Размерность hashing-векторов для fallback-режима
+        """
+        self.model_name = model_name or os.getenv(
+            "EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+        )
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.hashing_dim = hashing_dim
+        self.model = None  # Модель загружается только при первом использовании
+        self._model_loaded = False
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+        logger.info("EmbeddingWorker initialized")
+
+    @property
+    def dim(self) -> int:
+        model = self._get_model()
+        if model is None:
+            return self.hashing_dim
+        return model.get_sentence_embedding_dimension()
+
+    def _get_model(self):
+        if not self._model_loaded:
+            self._model_loaded = True
+            try:
+                from sentence_transformers import SentenceTransformer
+                self.model = SentenceTransformer(self.model_name, device="cpu")
+                logger.info(f"Loaded embedding model: {self.model_name}")
+            except Exception as e:
+                logger.warning(f"Embedding model unavailable ({str(e)}), using hashing vectorizer")
+                self.model = None
+        return self.model
+
+    def encode_sync(self, texts: List[str]) -> np.ndarray:
+        """
+        Синхронно кодирует тексты в L2-нормированные векторы float32
+
+        Args:
+            texts: Список текстов
+
+        Returns:
+            Матрица размера (len(texts), dim)
+        """
+        model = self._get_model()
+        if model is not None:
+            vectors = model.encode(
+                texts,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+            return vectors.astype(np.float32, copy=False)
+        return self._hash_encode(texts)
+
+    def _hash_encode(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.hashing_dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN_RE.findall(text.lower())
+            # Униграммы и биграммы, знак определяется вторым хешем
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            if not features:
+                continue
+            digests = [hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest() for f in features]
+            codes = np.frombuffer(b"".join(digests), dtype=np.uint64)
+            buckets = (codes % np.uint64(self.hashing_dim)).astype(np.int64)
+            signs = np.where((codes >> np.uint64(63)) == 1, -1.0, 1.0).astype(np.float32)
+            np.add.at(vectors[row], buckets, signs)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Кодирует тексты, объединяя одновременные запросы в общие батчи
+
+        Args:
+            texts: Список текстов
+
+        Returns:
+            Матрица эмбеддингов
+        """
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._batch_task is None or self._batch_task.done():
+            self._batch_task = asyncio.create_task(self._batch_loop())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, future))
+        return await future
+
+    async def _batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            requests = [await self._queue.get()]
+            pending = len(requests[0][0])
+            deadline = loop.time() + self.batch_window
+
+            # Добираем запросы, пока батч не заполнится или не истечёт окно
+            while pending < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                requests.append(item)
+                pending += len(item[0])
+
+            all_texts = [text for texts, _ in requests for text in texts]
+            try:
+                vectors = await loop.run_in_executor(self.executor, self.encode_sync, all_texts)
+                offset = 0
+                for texts, future in requests:
+                    if not future.done():
+                        future.set_result(vectors[offset:offset + len(texts)])
+                    offset += len(texts)
+            except Exception as e:
+                logger.error(f"Embedding batch failed: {str(e)}")
+                for _, future in requests:
+                    if not future.done():
+                        future.set_exception(e)
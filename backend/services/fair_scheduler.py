@@ -0,0 +1,166 @@
+import time
+import asyncio
+import logging
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, List, Optional
+
+from .tenants import TenantRegistry, current_tenant, tenant_registry
+
+logger = logging.getLogger(__name__)
+
+
+class FairScheduler:
+    """
+    Взвешенная справедливая очередь (WFQ) арендаторов перед стадией обработки
+
+    У стадии capacity слотов. Каждый запрос получает метку завершения
+    max(V, последняя метка арендатора) + cost / weight, где V - виртуальное
+    время (метка начала последнего выданного слота); свободный слот
+    достаётся запросу с наименьшей меткой. Поэтому арендатор с большой
+    очередью (массовая загрузка архива) получает свою долю пропускной
+    способности, а не всю, и не увеличивает ожидание остальных. Кроме того,
+    у арендатора не больше max_concurrency слотов одновременно.
+    """
+
+    def __init__(self, name: str, capacity: int, tenants: Optional[TenantRegistry] = None, window: int = 200):
+        """
+        Args:
+            name: Имя стадии (для метрик)
+            capacity: Число одновременно выполняемых запросов стадии
+            tenants: Реестр арендаторов (веса и лимиты)
+            window: Сколько последних ожиданий хранить для перцентилей
+        """
+        self.name = name
+        self.capacity = capacity
+        self.tenants = tenants or tenant_registry
+        self.window = window
+        self._virtual_time = 0.0
+        self._finish_tags: Dict[str, float] = {}
+        self._active: Dict[str, int] = {}
+        self._waiting: List[Dict[str, Any]] = []
+        self._seq = itertools.count()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def in_use(self) -> int:
+        return sum(self._active.values())
+
+    def _tenant_stats(self, tenant_id: str) -> Dict[str, Any]:
+        return self._stats.setdefault(tenant_id, {"granted": 0, "cost": 0.0, "waits": deque(maxlen=self.window)})
+
+    def _grant(self, request: Dict[str, Any]) -> None:
+        tenant_id = request["tenant"]
+        self._active[tenant_id] = self._active.get(tenant_id, 0) + 1
+        self._virtual_time = max(self._virtual_time, request["start"])
+        stats = self._tenant_stats(tenant_id)
+        stats["granted"] += 1
+        stats["cost"] += request["cost"]
+        stats["waits"].append(time.monotonic() - request["queued_at"])
+        if not request["future"].done():
+            request["future"].set_result(None)
+
+    def _eligible(self, tenant_id: str) -> bool:
+        return self._active.get(tenant_id, 0) < self.tenants.get(tenant_id).max_concurrency
+
+    def _dispatch(self) -> None:
+        while self.in_use < self.capacity:
+            candidates = [r for r in self._waiting if self._eligible(r["tenant"])]
+            if not candidates:
+                return
+            request = min(candidates, key=lambda r: (r["finish"], r["seq"]))
+            self._waiting.remove(request)
+            self._grant(request)
+
+    def _release(self, tenant_id: str) -> None:
+        self._active[tenant_id] -= 1
+        if not self._active[tenant_id]:
+            del self._active[tenant_id]
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, cost: float = 1.0, tenant_id: Optional[str] = None):
+        """
+        Занимает слот стадии для текущего арендатора
+
+        Args:
+            cost: Стоимость запроса (секунды аудио, тысячи токенов) - чем
+                дороже запрос, тем дальше его метка
+            tenant_id: Арендатор (по умолчанию из контекста обработки)
+        """
+        tenant_id = tenant_id or current_tenant.get()
+        tenant = self.tenants.get(tenant_id)
+        start = max(self._virtual_time, self._finish_tags.get(tenant_id, 0.0))
+        finish = start + max(cost, 0.001) / tenant.weight
+        self._finish_tags[tenant_id] = finish
+        request = {
+            "tenant": tenant_id, "cost": cost, "start": start, "finish": finish, "seq": next(self._seq),
+            "queued_at": time.monotonic(), "future": asyncio.get_running_loop().create_future()
+        }
+        self._waiting.append(request)
+        self._dispatch()
+        try:
+            await request["future"]
+        except asyncio.CancelledError:
+            if request in self._waiting:
+                self._waiting.remove(request)
+            elif request["future"].done() and not request["future"].cancelled():
+                # Слот выдан одновременно с отменой - возвращаем его
+                self._release(tenant_id)
+            raise
+        try:
+            yield
+        finally:
+            self._release(tenant_id)
+
+    def limiter(self, inner=None, cost: float = 1.0) -> "StageLimiter":
+        """Лимитер для PipelinedIngest и живого распознавания: слот стадии, затем inner"""
+        return StageLimiter(self, inner, cost)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        tenants = {}
+        for tenant_id, stats in self._stats.items():
+            waits = sorted(stats["waits"])
+            tenants[tenant_id] = {
+                "active": self._active.get(tenant_id, 0),
+                "queued": sum(1 for r in self._waiting if r["tenant"] == tenant_id),
+                "granted": stats["granted"],
+                "cost": round(stats["cost"], 2),
+                "wait_ms": {
+                    "p50": round(waits[len(waits) // 2] * 1000, 1) if waits else 0.0,
+                    "p95": round(waits[min(len(waits) - 1, int(0.95 * len(waits)))] * 1000, 1) if waits else 0.0
+                }
+            }
+        return {"capacity": self.capacity, "in_use": self.in_use, "queued": len(self._waiting), "tenants": tenants}
+
+
+class StageLimiter:
+    """Async context manager: слот FairScheduler, затем (опционально) внутренний лимитер"""
+
+    def __init__(self, scheduler: FairScheduler, inner=None, cost: float = 1.0):
+        self.scheduler = scheduler
+        self.inner = inner
+        self.cost = cost
+        self._slots: Deque[Any] = deque()
+
+    async def __aenter__(self):
+        slot = self.scheduler.slot(self.cost)
+        await slot.__aenter__()
+        try:
+            if self.inner is not None:
+                await self.inner.__aenter__()
+        except BaseException:
+            await slot.__aexit__(None, None, None)
+            raise
+        self._slots.append(slot)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # Лимитер общий для параллельных сегментов - освобождаем любой из занятых слотов
+        slot = self._slots.popleft()
+        try:
+            if self.inner is not None:
+                await self.inner.__aexit__(exc_type, exc, tb)
+        finally:
+            await slot.__aexit__(exc_type, exc, tb)
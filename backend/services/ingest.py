@@ -0,0 +1,248 @@
+import os
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+# LINEAR16 16 kHz mono
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2
+
+
+def find_cut(pcm: bytes, target: int, search_seconds: float = 3.0, frame_ms: int = 20) -> int:
+    """
+    Точка разреза около target: самый тихий кадр в последних search_seconds,
+    чтобы граница сегмента по возможности не приходилась на слово
+    """
+    import numpy as np
+
+    frame = SAMPLE_RATE * frame_ms // 1000 * 2
+    start = max(0, target - int(search_seconds * BYTES_PER_SECOND))
+    start -= start % 2
+    window = np.frombuffer(pcm[start:target - (target - start) % frame], dtype="<i2")
+    frames = len(window) * 2 // frame
+    if frames < 2:
+        return target
+    energy = (window[:frames * frame // 2].astype(np.float32) ** 2).reshape(frames, -1).mean(axis=1)
+    return start + int(np.argmin(energy)) * frame
+
+
+async def start_decoder(input_args: Optional[List[str]] = None):
+    """
+    ffmpeg, декодирующий поток из stdin в LINEAR16 16 kHz mono на stdout
+
+    Args:
+        input_args: Параметры входа перед "-i" (например, формат сырого PCM);
+            по умолчанию формат определяется по содержимому
+
+    Raises:
+        FileNotFoundError: ffmpeg не установлен
+    """
+    return await asyncio.create_subprocess_exec(
+        "ffmpeg", "-v", "error", *(input_args or []), "-i", "pipe:0",
+        "-ar", str(SAMPLE_RATE), "-ac", "1", "-f", "s16le", "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+
+
+class PipelinedIngest:
+    """
+    Конвейерный приём записи: загрузка, декодирование и распознавание
+    перекрываются по времени
+
+    Байты из тела запроса пишутся на диск и одновременно подаются в stdin
+    ffmpeg; PCM из stdout режется на сегменты (~segment_seconds, по тихим
+    местам), и каждый готовый сегмент сразу уходит в распознавание. К концу
+    загрузки большая часть транскрипции уже готова.
+    """
+
+    def __init__(
+        self,
+        speech_service,
+        segment_seconds: float = None,
+        limiter=None,
+        language_id=None
+    ):
+        """
+        Args:
+            speech_service: Сервис с transcribe_segment(pcm, offset, language_code)
+            segment_seconds: Длина сегмента распознавания (синхронный
+                recognize Google принимает до 60 секунд)
+            limiter: Лимитер запросов к API распознавания (async context manager)
+            language_id: Определение языка (services.language_id); без него -
+                язык распознавателя по умолчанию
+        """
+        self.speech_service = speech_service
+        self.segment_seconds = segment_seconds or float(os.getenv("INGEST_SEGMENT_SECONDS", "50"))
+        self.limiter = limiter
+        self.language_id = language_id
+        self._meeting_language: Optional[asyncio.Future] = None
+
+    async def _language(self, pcm: bytes) -> Optional[str]:
+        """
+        Язык сегмента: язык встречи определяется по первому сегменту, при
+        LANGUAGE_ID_PER_SEGMENT - ещё и для каждого следующего (если язык
+        сегмента не определён уверенно - язык встречи)
+        """
+        if self.language_id is None:
+            return None
+        first = self._meeting_language is None
+        if first:
+            self._meeting_language = asyncio.ensure_future(self.language_id.identify(pcm))
+        meeting = await asyncio.shield(self._meeting_language)
+        if first or not self.language_id.per_segment:
+            return meeting["language"]
+        return (await self.language_id.identify(pcm, fallback=meeting["language"]))["language"]
+
+    async def _recognize(self, pcm: bytes, offset: float) -> Dict[str, Any]:
+        with span("speech.segment", offset=round(offset, 2), bytes_in=len(pcm)) as segment:
+            try:
+                language = await self._language(pcm)
+                segment.set(language=language)
+                if self.limiter is not None:
+                    async with self.limiter:
+                        return await self.speech_service.transcribe_segment(pcm, offset, language_code=language)
+                return await self.speech_service.transcribe_segment(pcm, offset, language_code=language)
+            except Exception as e:
+                logger.warning(f"Segment at {offset:.1f}s failed: {str(e)}")
+                return {"text": "", "offset": offset, "duration": len(pcm) / BYTES_PER_SECOND, "error": str(e)}
+
+    async def run(
+        self,
+        chunks: AsyncIterator[bytes],
+        file_path: str,
+        on_uploaded: Optional[Callable[[int], None]] = None,
+        on_segment: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Принимает запись и распознаёт её по мере поступления
+
+        Args:
+            chunks: Байты исходного файла (тело запроса)
+            file_path: Куда сохранить исходный файл
+            on_uploaded: Вызывается с размером файла, когда тело прочитано целиком
+            on_segment: Вызывается для каждого распознанного сегмента (по порядку)
+
+        Returns:
+            Данные транскрипции в формате transcribe_content или None, если
+            конвейерное декодирование невозможно (нет ffmpeg, формат не
+            читается из потока) - тогда файл уже сохранён и его надо
+            обработать обычным путём
+        """
+        try:
+            decoder = await start_decoder()
+        except FileNotFoundError:
+            logger.warning("ffmpeg not found, pipelined ingest disabled")
+            decoder = None
+
+        segment_bytes = int(self.segment_seconds * BYTES_PER_SECOND)
+        segments: List[asyncio.Task] = []
+        received = 0
+
+        async def feed() -> None:
+            nonlocal received
+            decoder_alive = decoder is not None
+            try:
+                with open(file_path, "wb") as f:
+                    async for chunk in chunks:
+                        received += len(chunk)
+                        await asyncio.to_thread(f.write, chunk)
+                        if decoder_alive:
+                            try:
+                                decoder.stdin.write(chunk)
+                                await decoder.stdin.drain()
+                            except (BrokenPipeError, ConnectionResetError):
+                                # ffmpeg не смог читать формат из потока - дочитываем тело в файл
+                                decoder_alive = False
+            finally:
+                # EOF для ffmpeg и при обрыве загрузки, иначе чтение stdout не завершится
+                if decoder_alive:
+                    decoder.stdin.close()
+            if on_uploaded is not None:
+                on_uploaded(received)
+
+        async def decode() -> int:
+            buffer = bytearray()
+            offset = 0
+            while True:
+                chunk = await decoder.stdout.read(64 * 1024)
+                if chunk:
+                    buffer += chunk
+                if len(buffer) >= segment_bytes or (not chunk and buffer):
+                    cut = find_cut(bytes(buffer), segment_bytes) if len(buffer) >= segment_bytes else len(buffer)
+                    segment, buffer = bytes(buffer[:cut]), buffer[cut:]
+                    segments.append(asyncio.create_task(self._recognize(segment, offset / BYTES_PER_SECOND)))
+                    offset += len(segment)
+                    continue
+                if not chunk:
+                    return offset
+
+        with span("ingest", segment_seconds=self.segment_seconds) as ingest:
+            if decoder is None:
+                await feed()
+                ingest.set(bytes=received, pipelined=False)
+                return None
+
+            feeder = asyncio.create_task(feed())
+            try:
+                decoded = await decode()
+                await feeder
+                await decoder.wait()
+            except BaseException:
+                feeder.cancel()
+                for task in segments:
+                    task.cancel()
+                if decoder.returncode is None:
+                    decoder.kill()
+                raise
+            ingest.set(bytes=received, decoded_seconds=round(decoded / BYTES_PER_SECOND, 2), segments=len(segments))
+
+            if decoder.returncode != 0 or not decoded:
+                error = (await decoder.stderr.read()).decode(errors="ignore")[:200]
+                logger.warning(f"Pipelined decode failed ({error}), falling back to file processing")
+                for task in segments:
+                    task.cancel()
+                ingest.set(pipelined=False)
+                return None
+
+            results = []
+            for task in segments:
+                results.append(await task)
+                if on_segment is not None:
+                    await on_segment(results[-1])
+
+        if all(r.get("error") for r in results):
+            # Распознавание недоступно целиком - пусть обычный путь подставит fallback
+            return None
+        return self._merge(results, decoded / BYTES_PER_SECOND)
+
+    @staticmethod
+    def _merge(results: List[Dict[str, Any]], duration: float) -> Dict[str, Any]:
+        speaker_info = [word for r in results for word in r.get("speaker_info", [])]
+        confidences = [r["confidence"] for r in results if r.get("confidence")]
+        speakers = {word["speaker"] for word in speaker_info if word.get("speaker")}
+        # Язык встречи - тот, на котором распознана большая часть записи
+        languages: Dict[str, float] = {}
+        for r in results:
+            if r.get("language"):
+                languages[r["language"]] = languages.get(r["language"], 0.0) + r.get("duration", 0.0)
+        return {
+            "text": " ".join(r["text"] for r in results if r.get("text")),
+            "duration": round(duration),
+            "language": max(languages, key=languages.get) if languages else "ru-RU",
+            "languages": sorted(languages, key=languages.get, reverse=True),
+            "participant_count": max(len(speakers), 1),
+            "speaker_info": speaker_info[:100],
+            "confidence": sum(confidences) / len(confidences) if confidences else 0.0,
+            "segments": [
+                {"offset": round(r["offset"], 2), "duration": round(r["duration"], 2), "text": r.get("text", ""),
+                 "language": r.get("language")}
+                for r in results
+            ],
+            "failed_segments": sum(1 for r in results if r.get("error"))
+        }
@@ -0,0 +1,182 @@
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """
+    Инкрементальный парсер JSON-ответа LLM
+
+    Получает текст кусками по мере стриминга и сразу отдаёт завершённые
+    значения: поля корневого объекта и элементы массивов первого уровня
+    (например, каждую тему из "topics"). Текст до первой '{' или '['
+    игнорируется. Если ответ оборвался, salvage() собирает результат из
+    всех полностью полученных элементов.
+    """
+
+    def __init__(self, on_item: Optional[Callable[[Tuple, Any], None]] = None):
+        """
+        Args:
+            on_item: Callback (path, value) для каждого завершённого элемента:
+                path = (key,) для поля корня, (key, index) для элемента
+                массива в поле корня, (index,) для элемента корневого массива
+        """
+        self.on_item = on_item
+        self.text = ""
+        self._root_index = 0
+        self.root_kind: Optional[str] = None
+        self.complete = False
+        self.value: Any = None
+
+        self._stack: List[Dict[str, Any]] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._string_is_key = False
+
+        self._fields: Dict[str, Any] = {}
+        self._partial_arrays: Dict[Any, List[Any]] = {}
+        self._root_items: List[Any] = []
+
+    # ------------------------------------------------------------------ #
+    # Разбор
+    # ------------------------------------------------------------------ #
+
+    def _text(self, start: int, end: int) -> str:
+        return self.text[start:end]
+
+    def _begin_value(self, frame: Dict[str, Any], index: int) -> None:
+        if frame["value_start"] is None:
+            frame["value_start"] = index
+
+    def _finish_value(self, frame: Dict[str, Any], end: int) -> None:
+        start = frame["value_start"]
+        frame["value_start"] = None
+        if start is None:
+            return
+        path = frame["path"] + ((frame["key"] if frame["kind"] == "{" else frame["index"]),)
+        # Интересуют только поля корня и элементы массивов первого уровня
+        if len(path) > 2:
+            return
+        try:
+            value = json.loads(self._text(start, end))
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping malformed JSON element at {path}: {str(e)}")
+            return
+        self._store(path, value)
+
+    def _store(self, path: Tuple, value: Any) -> None:
+        if len(path) == 1:
+            if self.root_kind == "{":
+                self._fields[path[0]] = value
+                self._partial_arrays.pop(path[0], None)
+                if isinstance(value, list):
+                    # Элементы уже отданы по одному
+                    return
+            else:
+                self._root_items.append(value)
+        elif self.root_kind == "{":
+            self._partial_arrays.setdefault(path[0], []).append(value)
+        else:
+            return
+        if self.on_item is not None:
+            try:
+                self.on_item(path, value)
+            except Exception as e:
+                logger.warning(f"on_item callback failed: {str(e)}")
+
+    def feed(self, chunk: str) -> None:
+        """Добавляет очередной кусок текста ответа"""
+        if self.complete or not chunk:
+            return
+        base = len(self.text)
+        self.text += chunk
+
+        for offset, char in enumerate(chunk):
+            index = base + offset
+            if self.complete:
+                return
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._stack[-1]["key"] = json.loads(self._text(self._string_start, index + 1))
+                continue
+
+            if not self._stack:
+                # Пропускаем вступительный текст до корня
+                if char in "{[":
+                    self.root_kind = char
+                    self._root_index = index
+                    self._stack.append(self._new_frame(char, ()))
+                continue
+
+            frame = self._stack[-1]
+            if char in _WHITESPACE:
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+                self._string_is_key = frame["kind"] == "{" and frame["expect_key"]
+                if not self._string_is_key:
+                    self._begin_value(frame, index)
+            elif char in "{[":
+                self._begin_value(frame, index)
+                path = frame["path"] + ((frame["key"] if frame["kind"] == "{" else frame["index"]),)
+                self._stack.append(self._new_frame(char, path))
+            elif char in "}]":
+                if frame["kind"] == "[" or not frame["expect_key"]:
+                    self._finish_value(frame, index)
+                self._stack.pop()
+                if not self._stack:
+                    self.complete = True
+                    try:
+                        self.value = json.loads(self._text(self._root_index, index + 1))
+                    except json.JSONDecodeError:
+                        self.value = None
+                    return
+                self._finish_value(self._stack[-1], index + 1)
+            elif char == ",":
+                self._finish_value(frame, index)
+                if frame["kind"] == "{":
+                    frame["expect_key"] = True
+                else:
+                    frame["index"] += 1
+            elif char == ":":
+                frame["expect_key"] = False
+            else:
+                self._begin_value(frame, index)
+
+    @staticmethod
+    def _new_frame(kind: str, path: Tuple) -> Dict[str, Any]:
+        return {"kind": kind, "path": path, "key": None, "index": 0,
+                "expect_key": kind == "{", "value_start": None}
+
+    # ------------------------------------------------------------------ #
+    # Результат
+    # ------------------------------------------------------------------ #
+
+    def salvage(self) -> Any:
+        """
+        Возвращает полный результат, если JSON завершён, иначе - собранный
+        из завершённых элементов (None, если корень так и не начался)
+        """
+        if self.complete and self.value is not None:
+            return self.value
+        if self.root_kind == "{":
+            result = dict(self._fields)
+            for key, items in self._partial_arrays.items():
+                result.setdefault(key, items)
+            return result
+        if self.root_kind == "[":
+            return list(self._root_items)
+        return None
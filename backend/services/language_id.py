@@ -0,0 +1,195 @@
+import os
+import struct
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+# LINEAR16 16 kHz mono
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2
+
+# Язык Whisper -> language_code распознавателя
+DEFAULT_ROUTES = "ru=ru-RU,en=en-US"
+
+
+def parse_routes(value: str) -> Dict[str, str]:
+    """"ru=ru-RU,en=en-US" -> {"ru": "ru-RU", "en": "en-US"}"""
+    routes = {}
+    for part in value.split(","):
+        language, _, code = part.partition("=")
+        if language.strip() and code.strip():
+            routes[language.strip().lower()] = code.strip()
+    return routes
+
+
+def pcm_from_wav(content: bytes) -> Optional[memoryview]:
+    """
+    PCM из WAV (LINEAR16 16 kHz mono, как после decode_audio)
+
+    Returns:
+        Блок data без копирования или None, если это не WAV в этом формате
+        (например, исходный файл, который ffmpeg не смог декодировать)
+    """
+    if len(content) < 12 or content[:4] != b"RIFF" or content[8:12] != b"WAVE":
+        return None
+    offset, fmt = 12, None
+    while offset + 8 <= len(content):
+        chunk_id, size = content[offset:offset + 4], struct.unpack("<I", content[offset + 4:offset + 8])[0]
+        if chunk_id == b"fmt " and size >= 16:
+            fmt = struct.unpack("<HHIIHH", content[offset + 8:offset + 24])
+        elif chunk_id == b"data":
+            # ffmpeg пишет WAV в pipe без размера блока - данные идут до конца
+            if fmt is None or fmt[0] != 1 or fmt[1] != 1 or fmt[2] != SAMPLE_RATE or fmt[5] != 16:
+                return None
+            return memoryview(content)[offset + 8:]
+        offset += 8 + size + size % 2
+    return None
+
+
+class LanguageIdentifier:
+    """
+    Определение языка речи по первым секундам записи
+
+    Язык определяет локальная модель faster-whisper (по умолчанию tiny,
+    int8 на CPU) по окну LANGUAGE_ID_SECONDS, начиная с первой речи, -
+    это доли секунды против полного прохода распознавания на неверном
+    языке. Найденный язык переводится в language_code распознавателя по
+    LANGUAGE_ROUTES; неуверенный результат, язык без маршрута или
+    отсутствие faster-whisper дают язык по умолчанию (SPEECH_LANGUAGE).
+    Модель загружается при первом обращении или в warm_up().
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("LANGUAGE_ID_ENABLED", "true").lower() != "false"
+        self.model_name = os.getenv("LANGUAGE_ID_MODEL", "tiny")
+        self.default_language = os.getenv("SPEECH_LANGUAGE", "ru-RU")
+        self.routes = parse_routes(os.getenv("LANGUAGE_ROUTES", DEFAULT_ROUTES))
+        self.sample_seconds = float(os.getenv("LANGUAGE_ID_SECONDS", "15"))
+        self.min_probability = float(os.getenv("LANGUAGE_ID_MIN_PROBABILITY", "0.6"))
+        # Для встреч на нескольких языках: язык определяется для каждого сегмента распознавания
+        self.per_segment = os.getenv("LANGUAGE_ID_PER_SEGMENT", "false").lower() == "true"
+        self._model = None
+        self._unavailable: Optional[str] = None
+        self._lock = threading.Lock()
+        # Модель не потокобезопасна для параллельных вызовов и нагружает CPU - по одному
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="language-id")
+        self.stats: Dict[str, Any] = {"detections": 0, "defaulted": 0, "languages": {}}
+
+    def _get_model(self):
+        if self._model is None and self._unavailable is None:
+            with self._lock:
+                if self._model is None and self._unavailable is None:
+                    try:
+                        from faster_whisper import WhisperModel
+                        self._model = WhisperModel(
+                            self.model_name,
+                            device=os.getenv("LANGUAGE_ID_DEVICE", "cpu"),
+                            compute_type=os.getenv("LANGUAGE_ID_COMPUTE_TYPE", "int8"),
+                            cpu_threads=int(os.getenv("LANGUAGE_ID_THREADS", "2"))
+                        )
+                        logger.info(f"Language identification model {self.model_name} loaded")
+                    except Exception as e:
+                        self._unavailable = str(e)
+                        logger.warning(f"Language identification unavailable ({str(e)}), "
+                                       f"recognizing in {self.default_language}")
+        return self._model
+
+    @property
+    def available(self) -> bool:
+        return self.enabled and self._get_model() is not None
+
+    def warm_up(self) -> None:
+        if self.enabled:
+            self._get_model()
+
+    def speech_window(self, pcm: bytes, seconds: float = None, frame_ms: int = 30,
+                      threshold: float = 500.0) -> bytes:
+        """
+        Окно для определения языка: seconds секунд от первого кадра с речью
+        (тишина и шум в начале записи не дают определить язык)
+        """
+        import numpy as np
+
+        window = int((seconds or self.sample_seconds) * BYTES_PER_SECOND)
+        frame = SAMPLE_RATE * frame_ms // 1000 * 2
+        # Начало речи ищется в первых четырёх окнах записи
+        head = np.frombuffer(pcm, dtype="<i2", count=min(len(pcm), window * 4) // 2)
+        frames = len(head) * 2 // frame
+        if frames:
+            rms = np.sqrt((head[:frames * frame // 2].astype(np.float32) ** 2).reshape(frames, -1).mean(axis=1))
+            loud = np.flatnonzero(rms > threshold)
+            start = int(loud[0]) * frame if len(loud) else 0
+        else:
+            start = 0
+        return pcm[start:start + window]
+
+    def detect_sync(self, pcm: bytes) -> Optional[Tuple[str, float]]:
+        """(язык Whisper, вероятность) или None, если модель недоступна или речи слишком мало"""
+        import numpy as np
+
+        model = self._get_model() if self.enabled else None
+        window = self.speech_window(pcm)
+        if model is None or len(window) < BYTES_PER_SECOND:
+            return None
+        audio = np.frombuffer(window, dtype="<i2").astype(np.float32) / 32768.0
+        if hasattr(model, "detect_language"):
+            language, probability, _ = model.detect_language(audio)
+        else:
+            # Старые faster-whisper: язык определяется сразу, сегменты - лениво и не нужны
+            _, info = model.transcribe(audio, beam_size=1, without_timestamps=True)
+            language, probability = info.language, info.language_probability
+        return language, float(probability)
+
+    def route(self, detected: Optional[Tuple[str, float]], fallback: Optional[str] = None) -> Dict[str, Any]:
+        """language_code распознавателя для результата detect_sync"""
+        fallback = fallback or self.default_language
+        if detected is None:
+            return {"language": fallback, "detected": None, "probability": None}
+        language, probability = detected
+        code = self.routes.get(language) if probability >= self.min_probability else None
+        return {"language": code or fallback, "detected": language, "probability": round(probability, 3)}
+
+    async def identify(self, pcm: Optional[bytes], fallback: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Язык распознавания для аудио
+
+        Args:
+            pcm: LINEAR16 16 kHz mono (None - определить нельзя)
+            fallback: Язык, если определить не удалось (по умолчанию SPEECH_LANGUAGE)
+
+        Returns:
+            {"language": language_code, "detected": язык Whisper или None,
+            "probability": вероятность или None}
+        """
+        detected = None
+        if pcm and self.enabled and self._unavailable is None:
+            with span("language_id", bytes_in=len(pcm)) as stage:
+                try:
+                    loop = asyncio.get_running_loop()
+                    detected = await loop.run_in_executor(self.executor, self.detect_sync, pcm)
+                except Exception as e:
+                    logger.warning(f"Language identification failed: {str(e)}")
+                stage.set(detected=detected[0] if detected else None)
+        routed = self.route(detected, fallback)
+        self.stats["detections" if routed["detected"] else "defaulted"] += 1
+        languages = self.stats["languages"]
+        languages[routed["language"]] = languages.get(routed["language"], 0) + 1
+        return routed
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "model": self.model_name,
+            "loaded": self._model is not None,
+            "unavailable": self._unavailable,
+            "routes": self.routes,
+            "default_language": self.default_language,
+            "per_segment": self.per_segment,
+            **self.stats
+        }
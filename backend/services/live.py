@@ -0,0 +1,250 @@
+import os
+import queue
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from .ingest import BYTES_PER_SECOND, SAMPLE_RATE, find_cut, start_decoder
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+Emit = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+async def decode_live_audio(
+    frames: AsyncIterator[bytes],
+    encoding: str = "pcm16",
+    sample_rate: int = SAMPLE_RATE,
+    channels: int = 1
+) -> AsyncIterator[bytes]:
+    """
+    Приводит живой аудиопоток к LINEAR16 16 kHz mono
+
+    PCM 16 kHz mono проходит без изменений; PCM другой частоты и Opus
+    (в контейнере WebM/Ogg, как его пишет MediaRecorder браузера)
+    декодируются ffmpeg по мере поступления кадров.
+
+    Raises:
+        ValueError: Неподдерживаемая кодировка
+        FileNotFoundError: Нужно декодирование, а ffmpeg не установлен
+    """
+    if encoding not in ("pcm16", "opus"):
+        raise ValueError(f"Unsupported encoding: {encoding}")
+    if encoding == "pcm16" and sample_rate == SAMPLE_RATE and channels == 1:
+        async for frame in frames:
+            yield frame
+        return
+
+    input_args = ["-f", "s16le", "-ar", str(sample_rate), "-ac", str(channels)] if encoding == "pcm16" else []
+    decoder = await start_decoder(input_args)
+
+    async def feed() -> None:
+        try:
+            async for frame in frames:
+                decoder.stdin.write(frame)
+                await decoder.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            decoder.stdin.close()
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while chunk := await decoder.stdout.read(8 * 1024):
+            yield chunk
+        await feeder
+        if await decoder.wait() != 0:
+            error = (await decoder.stderr.read()).decode(errors="ignore")[:200]
+            logger.warning(f"Live audio decoder exited with {decoder.returncode}: {error}")
+    finally:
+        feeder.cancel()
+        if decoder.returncode is None:
+            decoder.kill()
+
+
+class StreamingRecognizer:
+    """
+    Потоковое распознавание Google (streaming_recognize)
+
+    Вызов SDK блокирующий, поэтому поток распознавания работает в отдельном
+    потоке: аудио передаётся ему через очередь, а результаты возвращаются в
+    event loop через call_soon_threadsafe. Google ограничивает длительность
+    одного потока (~5 минут), поэтому поток перезапускается каждые
+    restart_seconds аудио, а время результатов сдвигается на уже
+    распознанную длительность.
+    """
+
+    def __init__(self, speech_service, language_code: Optional[str] = None, restart_seconds: float = None):
+        """
+        Args:
+            speech_service: Сервис с streaming_recognize_sync
+            language_code: Язык распознавания (по умолчанию из конфигурации сервиса)
+            restart_seconds: Длительность аудио одного потока (сек)
+        """
+        self.speech_service = speech_service
+        self.language_code = language_code
+        self.restart_seconds = restart_seconds or float(os.getenv("LIVE_STREAM_RESTART_SECONDS", "280"))
+
+    def _recognize_sync(self, frames: "queue.Queue", publish: Callable[[Dict[str, Any]], None]) -> None:
+        limit = int(self.restart_seconds * BYTES_PER_SECOND)
+        offset = 0.0
+        finished = False
+        while not finished:
+            # Новый поток открывается только при наличии аудио
+            first = frames.get()
+            if first is None:
+                return
+            sent = len(first)
+            last_end = 0.0
+
+            def chunks():
+                nonlocal sent, finished
+                yield first
+                while sent < limit:
+                    chunk = frames.get()
+                    if chunk is None:
+                        finished = True
+                        return
+                    sent += len(chunk)
+                    yield chunk
+
+            for result in self.speech_service.streaming_recognize_sync(chunks(), SAMPLE_RATE, self.language_code):
+                event = {
+                    "type": "final" if result["is_final"] else "interim",
+                    "text": result["text"].strip(),
+                    "start": round(offset + last_end, 2),
+                    "end": round(offset + result["end_time"], 2)
+                }
+                if result["is_final"]:
+                    last_end = result["end_time"]
+                    event["confidence"] = result.get("confidence")
+                else:
+                    event["stability"] = result.get("stability")
+                publish(event)
+            offset += sent / BYTES_PER_SECOND
+
+    async def run(self, audio: AsyncIterator[bytes], emit: Emit) -> None:
+        """
+        Распознаёт поток PCM и вызывает emit для промежуточных ("interim")
+        и окончательных ("final") сегментов
+        """
+        loop = asyncio.get_running_loop()
+        frames: "queue.Queue" = queue.Queue()
+        events: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def pump() -> None:
+            try:
+                async for chunk in audio:
+                    frames.put(chunk)
+            finally:
+                # Конец аудио (или обрыв) завершает поток распознавания
+                frames.put(None)
+
+        def worker() -> None:
+            try:
+                self._recognize_sync(frames, lambda event: loop.call_soon_threadsafe(events.put_nowait, event))
+            finally:
+                loop.call_soon_threadsafe(events.put_nowait, done)
+
+        pumping = asyncio.create_task(pump())
+        recognizing = loop.run_in_executor(None, worker)
+        try:
+            while (event := await events.get()) is not done:
+                await emit(event)
+            await recognizing
+            await pumping
+        finally:
+            pumping.cancel()
+            frames.put(None)
+
+
+class SegmentRecognizer:
+    """
+    Распознавание живого потока короткими сегментами
+
+    Для сервисов без потокового API (и для бенчмарков с ReplaySpeechService):
+    PCM режется на сегменты ~segment_seconds по тихим местам, каждый
+    распознаётся transcribe_segment. Промежуточных результатов нет,
+    окончательные приходят с задержкой около длины сегмента.
+    """
+
+    def __init__(self, speech_service, segment_seconds: float = None, limiter=None,
+                 language_code: Optional[str] = None):
+        self.speech_service = speech_service
+        self.segment_seconds = segment_seconds or float(os.getenv("LIVE_SEGMENT_SECONDS", "10"))
+        self.limiter = limiter
+        self.language_code = language_code
+
+    async def _recognize(self, pcm: bytes, offset: float) -> Dict[str, Any]:
+        with span("speech.live_segment", offset=round(offset, 2), bytes_in=len(pcm)):
+            try:
+                if self.limiter is not None:
+                    async with self.limiter:
+                        segment = await self.speech_service.transcribe_segment(pcm, offset, self.language_code)
+                else:
+                    segment = await self.speech_service.transcribe_segment(pcm, offset, self.language_code)
+            except Exception as e:
+                logger.warning(f"Live segment at {offset:.1f}s failed: {str(e)}")
+                segment = {"text": "", "error": str(e)}
+        return {
+            "type": "final",
+            "text": (segment.get("text") or "").strip(),
+            "start": round(offset, 2),
+            "end": round(offset + len(pcm) / BYTES_PER_SECOND, 2),
+            "confidence": segment.get("confidence"),
+            **({"error": segment["error"]} if segment.get("error") else {})
+        }
+
+    async def run(self, audio: AsyncIterator[bytes], emit: Emit) -> None:
+        segment_bytes = int(self.segment_seconds * BYTES_PER_SECOND)
+        pending: asyncio.Queue = asyncio.Queue()
+
+        async def emit_in_order() -> None:
+            while (task := await pending.get()) is not None:
+                await emit(await task)
+
+        emitter = asyncio.create_task(emit_in_order())
+        tasks: List[asyncio.Task] = []
+        buffer = bytearray()
+        offset = 0
+
+        def submit(segment: bytes) -> None:
+            nonlocal offset
+            task = asyncio.create_task(self._recognize(segment, offset / BYTES_PER_SECOND))
+            tasks.append(task)
+            pending.put_nowait(task)
+            offset += len(segment)
+
+        try:
+            async for chunk in audio:
+                buffer += chunk
+                if len(buffer) >= segment_bytes:
+                    cut = find_cut(bytes(buffer), segment_bytes)
+                    submit(bytes(buffer[:cut]))
+                    del buffer[:cut]
+            if len(buffer) >= BYTES_PER_SECOND // 10:
+                submit(bytes(buffer))
+            pending.put_nowait(None)
+            await emitter
+        finally:
+            emitter.cancel()
+            for task in tasks:
+                task.cancel()
+
+
+def create_recognizer(speech_service, limiter=None, language_code: Optional[str] = None, kind: Optional[str] = None):
+    """
+    Распознаватель живого потока по LIVE_RECOGNIZER: "streaming" (Google
+    streaming_recognize) или "segments" (короткие сегменты через
+    transcribe_segment). По умолчанию - потоковый, если сервис его поддерживает.
+    """
+    kind = kind or os.getenv("LIVE_RECOGNIZER")
+    if kind is None:
+        kind = "streaming" if hasattr(speech_service, "streaming_recognize_sync") else "segments"
+    if kind == "streaming":
+        return StreamingRecognizer(speech_service, language_code)
+    if kind == "segments":
+        return SegmentRecognizer(speech_service, limiter=limiter, language_code=language_code)
+    raise ValueError(f"Unknown live recognizer: {kind}")
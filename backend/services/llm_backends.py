@@ -0,0 +1,364 @@
+import os
+import re
+import json
+import asyncio
+import logging
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+from .prompts import PromptTemplate, SYSTEM_PREAMBLE, TRANSCRIPT_TEMPLATE
+
+logger = logging.getLogger(__name__)
+
+TextCallback = Optional[Callable[[str], None]]
+UsageCallback = Optional[Callable[[Dict[str, int]], None]]
+
+
+class TruncatedResponseError(Exception):
+    """Стрим ответа оборвался после получения части текста"""
+
+    def __init__(self, text: str, cause: Exception):
+        super().__init__(str(cause))
+        self.text = text
+        self.cause = cause
+
+
+class AnalysisBackend:
+    """
+    Интерфейс бэкенда анализа
+
+    Бэкенд получает транскрипцию и шаблон инструкции и стримит текст ответа.
+    Фрагменты отдаются через on_text в event loop вызывающего, потребление
+    токенов - через on_usage.
+    """
+
+    name = "base"
+    # Запросы идут во внешний API и должны проходить через LLMScheduler
+    rate_limited = False
+    # Провайдер кэширует общий префикс запросов (см. AnalysisWorker.analyze)
+    supports_prompt_cache = False
+
+    def __init__(self, model: str):
+        self.model = model
+
+    def warm_up(self) -> None:
+        """Загрузка клиента или модели заранее (вызывается в потоке)"""
+
+    async def generate(
+        self,
+        transcription: str,
+        template: PromptTemplate,
+        on_text: TextCallback = None,
+        on_usage: UsageCallback = None
+    ) -> str:
+        """
+        Генерирует ответ по шаблону
+
+        Returns:
+            Полный текст ответа
+
+        Raises:
+            TruncatedResponseError: Если стрим оборвался после части ответа
+        """
+        raise NotImplementedError
+
+
+def _empty_usage() -> Dict[str, int]:
+    return {"input_tokens": 0, "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0, "output_tokens": 0}
+
+
+class AnthropicBackend(AnalysisBackend):
+    """Claude через Messages API с кэшированием общего префикса"""
+
+    name = "anthropic"
+    rate_limited = True
+    supports_prompt_cache = True
+
+    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
+        super().__init__(model or os.getenv("ANALYSIS_MODEL", "claude-3-5-sonnet-20241022"))
+        self.api_key = api_key
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        # SDK импортируется и клиент создаётся при первом запросе или прогреве
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import anthropic
+
+                    # ANTHROPIC_BASE_URL позволяет направить запросы на stub_llm_server.py;
+                    # повторы делает LLMScheduler - встроенные повторы SDK их бы умножали
+                    self._client = anthropic.Anthropic(api_key=self.api_key, max_retries=0)
+        return self._client
+
+    def warm_up(self) -> None:
+        self.client
+
+    @staticmethod
+    def _build_messages(transcription: str, template: PromptTemplate) -> List[Dict[str, Any]]:
+        """
+        Сообщение пользователя: сначала транскрипция (общий для всех
+        шаблонов префикс, помечен для кэширования), затем инструкция шаблона
+        """
+        return [{
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": TRANSCRIPT_TEMPLATE.format(transcription=transcription),
+                    "cache_control": {"type": "ephemeral"}
+                },
+                {"type": "text", "text": template.instructions}
+            ]
+        }]
+
+    async def generate(self, transcription, template, on_text=None, on_usage=None) -> str:
+        loop = asyncio.get_running_loop()
+        messages = self._build_messages(transcription, template)
+
+        def stream_sync() -> str:
+            received = []
+            call_usage = {}
+            stream = self.client.messages.create(
+                model=self.model,
+                system=[{"type": "text", "text": SYSTEM_PREAMBLE, "cache_control": {"type": "ephemeral"}}],
+                messages=messages,
+                max_tokens=template.max_tokens,
+                temperature=template.temperature,
+                stream=True
+            )
+            try:
+                for event in stream:
+                    if event.type == "message_start":
+                        start_usage = event.message.usage
+                        call_usage = {
+                            "input_tokens": start_usage.input_tokens or 0,
+                            "cache_creation_input_tokens": getattr(start_usage, "cache_creation_input_tokens", None) or 0,
+                            "cache_read_input_tokens": getattr(start_usage, "cache_read_input_tokens", None) or 0,
+                            "output_tokens": start_usage.output_tokens or 0
+                        }
+                    elif event.type == "content_block_delta" and event.delta.type == "text_delta":
+                        received.append(event.delta.text)
+                        if on_text is not None:
+                            loop.call_soon_threadsafe(on_text, event.delta.text)
+                    elif event.type == "message_delta" and call_usage:
+                        call_usage["output_tokens"] = event.usage.output_tokens or 0
+            except Exception as e:
+                if received:
+                    # Часть ответа уже отдана - повтор задублировал бы элементы
+                    raise TruncatedResponseError("".join(received), e)
+                raise
+            finally:
+                if call_usage and on_usage is not None:
+                    loop.call_soon_threadsafe(on_usage, call_usage)
+            return "".join(received)
+
+        # Синхронный клиент не должен блокировать event loop
+        return await asyncio.to_thread(stream_sync)
+
+
+class LocalLlamaBackend(AnalysisBackend):
+    """
+    Локальная квантованная модель (GGUF) через сервер llama.cpp для
+    изолированных установок без доступа к сети
+
+    Модель обслуживает llama-server на этом же хосте, запущенный с
+    несколькими слотами (непрерывный батчинг включён по умолчанию):
+
+        llama-server -m model.gguf -c 98304 --parallel 6 --port 8091
+
+    (-c - контекст на все слоты вместе, у каждого слота -c / --parallel).
+    На каждом шаге сервер декодирует все занятые слоты одним батчем,
+    поэтому три промпта анализа нескольких встреч, отправленные
+    одновременно, идут общими проходами модели, а не по очереди. Бэкенд
+    держит в работе не больше parallel запросов - по числу слотов сервера
+    (total_slots из /props при прогреве), лишние ждут свободный слот здесь,
+    а не в очереди сервера. cache_prompt оставляет в слоте KV-состояние
+    промпта, и следующий промпт той же встречи в этом слоте не вычисляет
+    общий префикс (system + транскрипция) заново.
+    """
+
+    name = "local"
+
+    def __init__(self, base_url: Optional[str] = None, parallel: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        """
+        Args:
+            base_url: Адрес llama-server (по умолчанию LOCAL_LLM_URL)
+            parallel: Запросов в работе одновременно (по умолчанию
+                LOCAL_LLM_PARALLEL или total_slots сервера)
+            timeout: Таймаут запроса, секунды (по умолчанию LOCAL_LLM_TIMEOUT)
+        """
+        self.base_url = (base_url or os.getenv("LOCAL_LLM_URL", "http://127.0.0.1:8091")).rstrip("/")
+        super().__init__(os.getenv("LOCAL_LLM_MODEL", "local"))
+        self.parallel = parallel or int(os.getenv("LOCAL_LLM_PARALLEL", "0")) or None
+        self.timeout = timeout or float(os.getenv("LOCAL_LLM_TIMEOUT", "600"))
+        self._client = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout)
+        return self._client
+
+    def warm_up(self) -> None:
+        """Проверяет, что сервер запущен, и берёт у него число слотов"""
+        import httpx
+
+        props = httpx.get(f"{self.base_url}/props", timeout=10).raise_for_status().json()
+        if self.parallel is None and props.get("total_slots"):
+            self.parallel = int(props["total_slots"])
+        logger.info(f"llama-server {self.base_url}: {props.get('total_slots', '?')} slots, parallel={self.parallel}")
+
+    @staticmethod
+    def _build_messages(transcription: str, template: PromptTemplate) -> List[Dict[str, Any]]:
+        return [
+            {"role": "system", "content": SYSTEM_PREAMBLE},
+            {"role": "user", "content": [
+                {"type": "text", "text": TRANSCRIPT_TEMPLATE.format(transcription=transcription)},
+                {"type": "text", "text": template.instructions}
+            ]}
+        ]
+
+    async def generate(self, transcription, template, on_text=None, on_usage=None) -> str:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.parallel or 4)
+        payload = {
+            "messages": self._build_messages(transcription, template),
+            "max_tokens": template.max_tokens,
+            "temperature": template.temperature,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+            "cache_prompt": True
+        }
+        received = []
+        usage = None
+        async with self._slots:
+            try:
+                async with self.client.stream("POST", "/v1/chat/completions", json=payload) as response:
+                    if response.status_code != 200:
+                        body = await response.aread()
+                        raise RuntimeError(f"llama-server returned {response.status_code}: {body[:300]!r}")
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        chunk = json.loads(data)
+                        usage = chunk.get("usage") or usage
+                        for choice in chunk.get("choices") or []:
+                            text = (choice.get("delta") or {}).get("content")
+                            if text:
+                                received.append(text)
+                                if on_text is not None:
+                                    on_text(text)
+            except Exception as e:
+                if received:
+                    raise TruncatedResponseError("".join(received), e)
+                raise
+            finally:
+                if on_usage is not None and usage:
+                    on_usage({**_empty_usage(), "input_tokens": usage.get("prompt_tokens", 0),
+                              "output_tokens": usage.get("completion_tokens", 0)})
+        return "".join(received)
+
+
+# ---------------------------------------------------------------------- #
+# Stub: детерминированные ответы без модели и сети
+# ---------------------------------------------------------------------- #
+
+_SENTENCE_RE = re.compile(r"[^.!?…]+[.!?…]*")
+_WORD_RE = re.compile(r"\w{5,}", re.UNICODE)
+_TASK_MARKERS = ("нужно", "надо", "сделать", "подготовить", "отправить", "должен", "должна",
+                 "need to", "will ", "should", "todo", "action")
+
+
+def stub_response(transcription: str, template_name: str) -> Dict[str, Any]:
+    """
+    Правдоподобный ответ заданного формата, построенный эвристиками по
+    тексту транскрипции (частые слова - темы, фразы с "нужно"/"need to" -
+    задачи). Используется для проверки всего конвейера без модели.
+    """
+    if template_name == "rolling_summary":
+        # Сводку предыдущей части stub не пересказывает - только новый фрагмент
+        transcription = transcription.rpartition("Новый фрагмент транскрипции:\n")[2]
+    sentences = [s.strip() for s in _SENTENCE_RE.findall(transcription) if s.strip()]
+    words = Counter(w.lower() for w in _WORD_RE.findall(transcription))
+    top_words = [word for word, _ in words.most_common(5)]
+    task_sentences = [s for s in sentences if any(m in s.lower() for m in _TASK_MARKERS)]
+
+    if template_name == "task_extraction":
+        return {"tasks": [
+            {"description": s[:200], "assignee": "", "deadline": "", "priority": "medium"}
+            for s in task_sentences[:10]
+        ]}
+    if template_name == "triage":
+        return {"category": "standard" if len(sentences) > 5 else "trivial",
+                "is_meeting": len(sentences) > 2}
+    if template_name in ("quick_summary", "rolling_summary"):
+        return {
+            "summary": " ".join(sentences[:2])[:300],
+            "topics": [{"title": word} for word in top_words[:3]],
+            "decisions": [],
+            "tasks": [{"description": s[:200], "assignee": "", "deadline": "", "priority": "medium"}
+                      for s in task_sentences[:3]],
+            "meeting_type": "short"
+        }
+    if template_name == "meeting_insights":
+        return {
+            "team_dynamics": f"Участников обсуждения: не определено, реплик: {len(sentences)}",
+            "process_recommendations": ["Фиксировать ответственных и сроки для каждой задачи"] if task_sentences else [],
+            "risk_flags": [] if sentences else ["Пустая транскрипция"],
+            "follow_up_suggestions": [f"Вернуться к теме: {word}" for word in top_words[:2]]
+        }
+    return {
+        "topics": [{"title": word, "mentions": count} for word, count in words.most_common(5)],
+        "decisions": [s[:200] for s in sentences if "решил" in s.lower() or "decid" in s.lower()][:5],
+        "meeting_type": "general",
+        "effectiveness_score": 5 if sentences else 1
+    }
+
+
+class StubBackend(AnalysisBackend):
+    """Встроенный stub: отвечает stub_response() кусками, как при стриминге"""
+
+    name = "stub"
+
+    def __init__(self, chunk_size: int = 16):
+        super().__init__("stub")
+        self.chunk_size = chunk_size
+
+    async def generate(self, transcription, template, on_text=None, on_usage=None) -> str:
+        text = json.dumps(stub_response(transcription, template.name), ensure_ascii=False)
+        if on_text is not None:
+            for start in range(0, len(text), self.chunk_size):
+                on_text(text[start:start + self.chunk_size])
+                await asyncio.sleep(0)
+        if on_usage is not None:
+            on_usage({**_empty_usage(), "input_tokens": len(transcription) // 3,
+                      "output_tokens": len(text) // 3})
+        return text
+
+
+def create_backend(api_key: Optional[str] = None, name: Optional[str] = None,
+                   model: Optional[str] = None) -> AnalysisBackend:
+    """
+    Создаёт бэкенд анализа по имени (по умолчанию ANALYSIS_BACKEND):
+    "anthropic", "local" (llama-server) или "stub". model задаёт модель Anthropic.
+    """
+    name = (name or os.getenv("ANALYSIS_BACKEND", "anthropic")).lower()
+    if name == "anthropic":
+        return AnthropicBackend(api_key=api_key, model=model)
+    if name == "local":
+        return LocalLlamaBackend()
+    if name == "stub":
+        return StubBackend()
+    raise ValueError(f"Unknown analysis backend: {name}")
@@ -0,0 +1,256 @@
+import time
+import heapq
+import random
+import asyncio
+import logging
+import itertools
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from .rate_limit import AsyncRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Коды ответа, после которых запрос имеет смысл повторить
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class LLMScheduler:
+    """
+    Планировщик запросов к LLM
+
+    Ограничивает запросы и токены в минуту (token bucket), обслуживает
+    интерактивные запросы раньше batch-обработки, повторяет запросы при
+    rate limit с экспоненциальной задержкой и jitter, учитывая retry-after,
+    и адаптивно снижает темп после ответов 429.
+    """
+
+    LANES = {"interactive": 0, "batch": 1}
+
+    def __init__(
+        self,
+        requests_per_minute: float = 50,
+        tokens_per_minute: float = 40000,
+        max_concurrency: int = 6,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        burst_seconds: float = 10.0
+    ):
+        """
+        Инициализация планировщика
+
+        Args:
+            requests_per_minute: Лимит запросов в минуту
+            tokens_per_minute: Лимит токенов (вход + выход) в минуту
+            max_concurrency: Максимум одновременных запросов
+            max_retries: Число повторов при временных ошибках
+            base_delay: Базовая задержка экспоненциального backoff (сек)
+            max_delay: Максимальная задержка между повторами (сек)
+            burst_seconds: Сколько секунд лимита можно израсходовать залпом
+        """
+        # Вёдра без ожидания: очередь с приоритетами ведёт _dispatch_loop
+        self.requests = AsyncRateLimiter("llm_requests", requests_per_minute, burst_seconds=burst_seconds)
+        self.tokens = AsyncRateLimiter("llm_tokens", tokens_per_minute, burst_seconds=burst_seconds)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.rate_factor = 1.0  # Снижается после 429 и постепенно восстанавливается
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+
+        self._waiters: List[list] = []
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._changed: Optional[asyncio.Event] = None
+
+        self._wait_samples: Dict[str, Deque[float]] = {lane: deque(maxlen=1000) for lane in self.LANES}
+        self._counters = {"requests": 0, "retries": 0, "rate_limited": 0, "failed": 0}
+        logger.info("LLMScheduler initialized")
+
+    # ------------------------------------------------------------------ #
+    # Разбор ошибок
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _status_code(error: Exception) -> Optional[int]:
+        return getattr(error, "status_code", None)
+
+    def _is_retryable(self, error: Exception) -> bool:
+        status = self._status_code(error)
+        if status is not None:
+            return status in RETRYABLE_STATUS_CODES
+        return isinstance(error, (asyncio.TimeoutError, ConnectionError)) or \
+            type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+        if not headers:
+            return None
+        value = headers.get("retry-after-ms")
+        if value:
+            try:
+                return float(value) / 1000.0
+            except ValueError:
+                pass
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+
+    # ------------------------------------------------------------------ #
+    # Выдача разрешений
+    # ------------------------------------------------------------------ #
+
+    def _notify(self) -> None:
+        if self._changed is not None:
+            self._changed.set()
+
+    async def _acquire(self, estimated_tokens: float, lane: str) -> None:
+        loop = asyncio.get_running_loop()
+        if self._changed is None:
+            self._changed = asyncio.Event()
+
+        future = loop.create_future()
+        enqueued_at = time.monotonic()
+        heapq.heappush(self._waiters, [self.LANES[lane], next(self._sequence), estimated_tokens, future])
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+        self._notify()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Разрешение могло быть выдано одновременно с отменой - возвращаем слот
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+        self._wait_samples[lane].append(time.monotonic() - enqueued_at)
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._notify()
+
+    async def _dispatch_loop(self) -> None:
+        while self._waiters:
+            self._changed.clear()
+            priority, _, estimated_tokens, future = self._waiters[0]
+            if future.done():
+                # Ожидающий запрос отменён
+                heapq.heappop(self._waiters)
+                continue
+
+            delay = None
+            if self.in_flight < self.max_concurrency:
+                self.requests.refill(self.rate_factor)
+                self.tokens.refill(self.rate_factor)
+                delay = max(
+                    self.cooldown_until - time.monotonic(),
+                    self.requests.time_until(1.0, self.rate_factor),
+                    self.tokens.time_until(estimated_tokens, self.rate_factor)
+                )
+                if delay <= 0:
+                    heapq.heappop(self._waiters)
+                    self.requests.take(1.0)
+                    self.tokens.take(estimated_tokens)
+                    self.in_flight += 1
+                    future.set_result(None)
+                    continue
+
+            # Ждём освобождения слота, пополнения ведра или нового запроса с большим приоритетом
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    # ------------------------------------------------------------------ #
+    # Публичный интерфейс
+    # ------------------------------------------------------------------ #
+
+    async def submit(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        estimated_tokens: float,
+        priority: str = "interactive"
+    ) -> Any:
+        """
+        Выполняет запрос к LLM с учётом лимитов, приоритета и повторов
+
+        Args:
+            call: Фабрика корутины, выполняющей запрос
+            estimated_tokens: Оценка токенов запроса (вход + максимум выхода)
+            priority: Очередь: "interactive" или "batch"
+
+        Returns:
+            Результат call()
+        """
+        lane = priority if priority in self.LANES else "interactive"
+
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(estimated_tokens, lane)
+            try:
+                self._counters["requests"] += 1
+                result = await call()
+                self.rate_factor = min(1.0, self.rate_factor + 0.05)
+                return result
+            except Exception as e:
+                if not self._is_retryable(e) or attempt == self.max_retries:
+                    self._counters["failed"] += 1
+                    raise
+
+                retry_after = self._retry_after(e)
+                backoff = min(self.max_delay, self.base_delay * (2 ** attempt))
+                # Full jitter, но не раньше, чем просит провайдер
+                delay = max(retry_after or 0.0, random.uniform(0.5, 1.0) * backoff)
+                if self._status_code(e) == 429:
+                    self._counters["rate_limited"] += 1
+                    self.rate_factor = max(0.2, self.rate_factor * 0.7)
+                    self.cooldown_until = max(self.cooldown_until, time.monotonic() + delay)
+                self._counters["retries"] += 1
+                logger.warning(
+                    f"LLM request failed ({type(e).__name__}: {str(e)[:200]}), "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+            finally:
+                self._release()
+            await asyncio.sleep(delay)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Метрики очереди: время ожидания по приоритетам, повторы, текущий темп"""
+        queue_wait = {}
+        for lane, samples in self._wait_samples.items():
+            ordered = sorted(samples)
+            if ordered:
+                queue_wait[lane] = {
+                    "samples": len(ordered),
+                    "p50": round(ordered[len(ordered) // 2], 4),
+                    "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+                    "max": round(ordered[-1], 4)
+                }
+            else:
+                queue_wait[lane] = {"samples": 0}
+
+        queued = {lane: 0 for lane in self.LANES}
+        for priority, _, _, future in self._waiters:
+            if not future.done():
+                lane = next(name for name, value in self.LANES.items() if value == priority)
+                queued[lane] += 1
+
+        return {
+            **self._counters,
+            "in_flight": self.in_flight,
+            "queued": queued,
+            "queue_wait_seconds": queue_wait,
+            "rate_factor": round(self.rate_factor, 3),
+            "cooldown_remaining": round(max(0.0, self.cooldown_until - time.monotonic()), 2)
+        }
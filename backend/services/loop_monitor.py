@@ -0,0 +1,134 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """
+    Монитор задержки event loop и детектор блокирующих вызовов
+
+    Heartbeat-задача раз в interval засыпает и измеряет, насколько позже
+    срока её разбудили (задержка планирования). Сторожевой поток следит за
+    последним heartbeat: если loop не отвечает дольше threshold, он снимает
+    стек потока loop через sys._current_frames - это и есть блокирующий
+    вызов. Когда loop оживает, стек сохраняется вместе с фактической
+    длительностью блокировки.
+    """
+
+    def __init__(self, interval: float = None, threshold: float = None, window: int = 1200, history: int = 50):
+        """
+        Args:
+            interval: Период heartbeat (сек)
+            threshold: Блокировка дольше этого порога фиксируется со стеком (сек)
+            window: Сколько последних замеров учитывать в перцентилях
+            history: Сколько последних блокировок хранить
+        """
+        self.interval = interval or float(os.getenv("LOOP_LAG_INTERVAL", "0.05"))
+        self.threshold = threshold or float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.1"))
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self.counters = {"samples": 0, "stalls": 0, "max_lag_ms": 0.0}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._last_beat = 0.0
+        self._pending: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Запускает мониторинг текущего event loop"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Event loop monitor started (interval {self.interval}s, threshold {self.threshold}s)")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._last_beat = time.monotonic()
+            self.samples.append(lag)
+            self.counters["samples"] += 1
+            self.counters["max_lag_ms"] = max(self.counters["max_lag_ms"], round(lag * 1000, 2))
+
+            with self._lock:
+                stall, self._pending = self._pending, None
+            if stall is not None:
+                stall["blocked_ms"] = round((lag + self.interval) * 1000, 1)
+                self.stalls.append(stall)
+                self.counters["stalls"] += 1
+                logger.warning(
+                    f"Event loop blocked for {stall['blocked_ms']}ms in task {stall['task']}:\n"
+                    + "".join(stall["stack"][-8:])
+                )
+
+    def _watch(self) -> None:
+        """Сторожевой поток: снимает стек loop, пока тот заблокирован"""
+        while not self._stop.wait(self.threshold / 2):
+            silent = time.monotonic() - self._last_beat - self.interval
+            if silent < self.threshold or self._pending is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            task = asyncio.current_task(self._loop)
+            stall = {
+                "detected_at": datetime.utcnow().isoformat(),
+                "task": task.get_name() if task is not None else None,
+                "stack": traceback.format_stack(frame)
+            }
+            with self._lock:
+                # Heartbeat мог успеть выполниться - тогда это уже не блокировка
+                if time.monotonic() - self._last_beat - self.interval >= self.threshold:
+                    self._pending = stall
+
+    def get_metrics(self, include_stacks: bool = False) -> Dict[str, Any]:
+        """Перцентили задержки (мс) по последним замерам и недавние блокировки"""
+        ordered = sorted(self.samples)
+
+        def pick(q: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2) if ordered else 0.0
+
+        stalls: List[Dict[str, Any]] = [
+            stall if include_stacks else {**stall, "stack": stall["stack"][-3:]}
+            for stall in reversed(self.stalls)
+        ]
+        return {
+            "running": self.running,
+            "interval_ms": round(self.interval * 1000, 1),
+            "threshold_ms": round(self.threshold * 1000, 1),
+            **self.counters,
+            "lag_ms": {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "window": len(ordered)},
+            "recent_stalls": stalls
+        }
+
+
+loop_monitor = LoopMonitor()
@@ -0,0 +1,274 @@
+import os
+import json
+import base64
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .tenants import DEFAULT_TENANT
+
+logger = logging.getLogger(__name__)
+
+# Поле проекции -> колонка индекса
+FIELDS = {
+    "id": "id",
+    "filename": "filename",
+    "status": "status",
+    "score": "score",
+    "duration": "duration",
+    "meeting_type": "meeting_type",
+    "tenant": "tenant",
+    "created_at": "created_at",
+    "updated_at": "updated_at"
+}
+DEFAULT_FIELDS = ("id", "filename", "status", "score", "duration", "created_at")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meetings (
+    id TEXT PRIMARY KEY,
+    tenant TEXT NOT NULL,
+    filename TEXT,
+    filename_key TEXT,
+    status TEXT,
+    score REAL,
+    duration REAL,
+    meeting_type TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS meetings_by_created ON meetings (tenant, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS meetings_by_status ON meetings (tenant, status, created_at DESC, id DESC);
+"""
+
+# Триграммный полнотекстовый индекс имён файлов: поиск подстроки без полного просмотра
+_NAMES_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS meeting_names USING fts5(
+    filename_key, content='meetings', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS meeting_names_insert AFTER INSERT ON meetings BEGIN
+    INSERT INTO meeting_names (rowid, filename_key) VALUES (new.rowid, new.filename_key);
+END;
+CREATE TRIGGER IF NOT EXISTS meeting_names_delete AFTER DELETE ON meetings BEGIN
+    INSERT INTO meeting_names (meeting_names, rowid, filename_key) VALUES ('delete', old.rowid, old.filename_key);
+END;
+CREATE TRIGGER IF NOT EXISTS meeting_names_update AFTER UPDATE OF filename_key ON meetings BEGIN
+    INSERT INTO meeting_names (meeting_names, rowid, filename_key) VALUES ('delete', old.rowid, old.filename_key);
+    INSERT INTO meeting_names (rowid, filename_key) VALUES (new.rowid, new.filename_key);
+END;
+"""
+
+
+def _number(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+class MeetingIndex:
+    """
+    Индекс встреч для списков (SQLite)
+
+    Для каждой встречи хранится только сводка - имя файла, статус, оценка,
+    длительность, даты, - которая обновляется при каждом сохранении
+    результата. Список строится запросом к индексу с keyset-пагинацией
+    (created_at, id), поэтому ни транскрипции, ни полные результаты не
+    читаются, и время страницы не зависит от размера архива. Поиск по
+    подстроке имени файла идёт по триграммному индексу FTS5 (если SQLite
+    собран без него - простым LIKE).
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Файл базы SQLite (":memory:" - индекс в памяти)
+        """
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Запись идёт из потоков сохранения результатов - одно соединение под блокировкой
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        try:
+            existed = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'meeting_names'"
+            ).fetchone() is not None
+            self._conn.executescript(_NAMES_SCHEMA)
+            if not existed:
+                with self._conn:
+                    self._conn.execute("INSERT INTO meeting_names (meeting_names) VALUES ('rebuild')")
+            self.name_search = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 trigram tokenizer unavailable ({str(e)}), filename filter scans the index")
+            self.name_search = False
+
+    @staticmethod
+    def summarize(meeting_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Сводка результата для индекса (формат оркестратора или демо)"""
+        content = result.get("content") if isinstance(result.get("content"), dict) else {}
+        transcript = result.get("transcript") if isinstance(result.get("transcript"), dict) else {}
+        score = content.get("effectivenessScore", content.get("effectiveness_score"))
+        duration = result.get("meeting_duration_estimate")
+        filename = result.get("filename") if isinstance(result.get("filename"), str) else None
+        return {
+            "id": meeting_id,
+            "tenant": result.get("tenant") or DEFAULT_TENANT,
+            "filename": filename,
+            "filename_key": filename.casefold() if filename else None,
+            "status": result.get("status"),
+            "score": _number(score),
+            "duration": _number(duration) if _number(duration) is not None else _number(transcript.get("duration")),
+            "meeting_type": content.get("meetingType", content.get("meeting_type")),
+            "created_at": result.get("analysis_timestamp") or result.get("uploadedAt") or datetime.utcnow().isoformat(),
+            "updated_at": datetime.utcnow().isoformat()
+        }
+
+    def upsert(self, meeting_id: str, result: Dict[str, Any]) -> None:
+        row = self.summarize(meeting_id, result)
+        columns = ", ".join(row)
+        placeholders = ", ".join(f":{key}" for key in row)
+        updates = ", ".join(f"{key} = excluded.{key}" for key in row if key not in ("id", "created_at"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO meetings ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT(id) DO UPDATE SET {updates}",
+                row
+            )
+
+    def remove(self, meeting_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM meetings WHERE id = ?", (meeting_id,))
+
+    def ids(self, tenant: Optional[str] = None) -> set:
+        """ID встреч в индексе (только арендатора tenant, если он задан)"""
+        with self._lock:
+            if tenant is None:
+                return {row[0] for row in self._conn.execute("SELECT id FROM meetings")}
+            return {row[0] for row in self._conn.execute("SELECT id FROM meetings WHERE tenant = ?", (tenant,))}
+
+    def backfill(self, meeting_ids: Iterable[str], load) -> int:
+        """
+        Индексирует сохранённые результаты, которых ещё нет в индексе
+        (результаты, записанные до появления индекса)
+
+        Args:
+            meeting_ids: ID всех сохранённых результатов
+            load: Функция загрузки результата по ID
+        """
+        known = self.ids()
+        added = 0
+        for meeting_id in meeting_ids:
+            if meeting_id in known:
+                continue
+            try:
+                result = load(meeting_id)
+            except Exception as e:
+                logger.warning(f"Could not index meeting {meeting_id}: {str(e)}")
+                continue
+            if isinstance(result, dict):
+                self.upsert(meeting_id, result)
+                added += 1
+        if added:
+            logger.info(f"MeetingIndex backfilled {added} meetings")
+        return added
+
+    # ------------------------------------------------------------------ #
+    # Запросы
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def encode_cursor(created_at: str, meeting_id: str) -> str:
+        raw = json.dumps([created_at, meeting_id], separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[str, str]:
+        """
+        Raises:
+            ValueError: Курсор повреждён
+        """
+        try:
+            created_at, meeting_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            if not isinstance(created_at, str) or not isinstance(meeting_id, str):
+                raise ValueError
+            return created_at, meeting_id
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    def query(
+        self,
+        tenant: str,
+        statuses: Optional[Sequence[str]] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        filename: Optional[str] = None,
+        fields: Sequence[str] = DEFAULT_FIELDS,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Страница встреч арендатора, новые первыми
+
+        Args:
+            tenant: Арендатор (видит только свои встречи)
+            statuses: Статусы (любой из)
+            created_after: Создана не раньше (ISO-дата или дата-время, UTC)
+            created_before: Создана раньше (ISO-дата или дата-время, UTC)
+            filename: Подстрока имени файла (без учёта регистра)
+            fields: Поля проекции (см. FIELDS)
+            limit: Размер страницы
+            cursor: next_cursor предыдущей страницы
+
+        Returns:
+            (элементы, курсор следующей страницы или None)
+
+        Raises:
+            ValueError: Неизвестное поле или повреждённый курсор
+        """
+        unknown = [name for name in fields if name not in FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+        where = ["tenant = ?"]
+        params: List[Any] = [tenant]
+        if statuses:
+            where.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(statuses)
+        if created_after:
+            where.append("created_at >= ?")
+            params.append(created_after)
+        if created_before:
+            where.append("created_at < ?")
+            params.append(created_before)
+        if filename:
+            needle = filename.casefold()
+            if self.name_search and len(needle) >= 3:
+                # Фраза FTS5: триграммы подстроки подряд
+                where.append("rowid IN (SELECT rowid FROM meeting_names WHERE meeting_names MATCH ?)")
+                params.append('"' + needle.replace('"', '""') + '"')
+            else:
+                escaped = needle.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                where.append("filename_key LIKE ? ESCAPE '\\'")
+                params.append(f"%{escaped}%")
+        if cursor:
+            where.append("(created_at, id) < (?, ?)")
+            params.extend(self.decode_cursor(cursor))
+
+        columns = ["created_at", "id"] + [FIELDS[name] for name in fields]
+        sql = (
+            f"SELECT {', '.join(columns)} FROM meetings WHERE {' AND '.join(where)} "
+            f"ORDER BY created_at DESC, id DESC LIMIT ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, limit + 1)).fetchall()
+
+        items = [dict(zip(fields, row[2:])) for row in rows[:limit]]
+        next_cursor = self.encode_cursor(rows[limit - 1][0], rows[limit - 1][1]) if len(rows) > limit else None
+        return items, next_cursor
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM meetings GROUP BY status").fetchall()
+        return {"path": self.path, "meetings": sum(count for _, count in rows), "by_status": dict(rows)}
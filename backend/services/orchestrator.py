@@ -1,11 +1,26 @@
 import os
-import json
+import copy
 import asyncio
+import hashlib
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import logging
-from .speech_service import speech_service, GoogleSpeechService
 from .analysis import AnalysisWorker
+from .semantic_search import SemanticSearchService
+from .task_tracker import TaskTracker
+from .rate_limit import AsyncRateLimiter
+from .llm_scheduler import LLMScheduler
+from .transcript_compression import TranscriptCompressor
+from .triage import MeetingTriage
+from .tracing import tracer, span
+from .registry import service_registry
+from .ingest import BYTES_PER_SECOND, PipelinedIngest
+from .language_id import pcm_from_wav
+from .live import create_recognizer, decode_live_audio
+from .fair_scheduler import FairScheduler
+from .tenants import DEFAULT_TENANT, current_tenant, tenant_registry
+from .compression import BlobStore
+from .meeting_index import MeetingIndex
 import traceback
 
 # Настройка логирования
@@ -23,74 +38,443 @@ class MeetingOrchestrator:
     def __init__(self):
         self.results_dir = os.getenv("RESULTS_DIR", "./results")
         os.makedirs(self.results_dir, exist_ok=True)
+        # Результаты и версии анализа хранятся сжатыми (RESULTS_COMPRESSION)
+        self.blob_store = BlobStore()
+        # Сводки встреч для списков - без чтения полных результатов
+        self.meeting_index = MeetingIndex(
+            os.getenv("MEETING_INDEX_PATH", os.path.join(self.results_dir, "meetings.db"))
+        )
+        self._index_synced: Optional[asyncio.Task] = None
+        # Номер изменения встречи в общем хранилище будит ожидающих во всех воркерах
+        self.status_store = service_registry.get("status_store")
         logger.info("MeetingOrchestrator initialized with Google Speech")
         
-        self.speech_service = GoogleSpeechService()
+        # Один сервис распознавания на процесс (см. services.registry)
+        self.speech_service = service_registry.get("speech")
+        # Язык встречи определяется локально до распознавания (services.language_id)
+        self.language_id = service_registry.get("language_id")
+        self._save_locks: Dict[str, asyncio.Lock] = {}
         self.analysis_worker = AnalysisWorker(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        
+        # Глобальные лимиты на внешние API (общие для загрузок и batch-обработки)
+        self.speech_limiter = AsyncRateLimiter(
+            "google-speech",
+            requests_per_minute=float(os.getenv("SPEECH_REQUESTS_PER_MINUTE", "60")),
+            max_concurrency=int(os.getenv("SPEECH_MAX_CONCURRENCY", "2"))
+        )
+        # Справедливая очередь арендаторов перед распознаванием и анализом
+        self.transcribe_queue = FairScheduler(
+            "transcribe", int(os.getenv("TENANT_TRANSCRIBE_SLOTS", os.getenv("SPEECH_MAX_CONCURRENCY", "2")))
+        )
+        self.analyze_queue = FairScheduler("analyze", int(os.getenv("TENANT_ANALYZE_SLOTS", "4")))
+        self.analysis_worker.scheduler = LLMScheduler(
+            requests_per_minute=float(os.getenv("CLAUDE_REQUESTS_PER_MINUTE", "50")),
+            tokens_per_minute=float(os.getenv("CLAUDE_TOKENS_PER_MINUTE", "40000")),
+            max_concurrency=int(os.getenv("CLAUDE_MAX_CONCURRENCY", "6")),
+            max_retries=int(os.getenv("CLAUDE_MAX_RETRIES", "5"))
+        )
+        self.transcript_compressor = TranscriptCompressor()
+        self.triage = MeetingTriage(self.analysis_worker)
+        self.semantic_search = SemanticSearchService(
+            os.getenv("SEARCH_INDEX_DIR", os.path.join(self.results_dir, "search_index"))
+        )
+        self.task_tracker = TaskTracker(
+            os.getenv("TASK_TRACKER_PATH", os.path.join(self.results_dir, "tasks", "tracker.db"))
+        )
+    
+    async def warm_up(self) -> None:
+        """
+        Прогрев после старта: клиенты LLM и распознавания, модель эмбеддингов
+        """
+        steps = {
+            "analysis": self.analysis_worker.warm_up,
+            "speech": self.speech_service.warm_up,
+            "language_id": lambda: asyncio.to_thread(self.language_id.warm_up),
+            "embeddings": lambda: asyncio.to_thread(self.semantic_search.warm_up),
+            "meeting_index": self.sync_meeting_index
+        }
+        for name, step in steps.items():
+            try:
+                await step()
+            except Exception as e:
+                # Не фатально: клиент будет создан при первом запросе
+                logger.warning(f"Warm-up step {name} failed: {str(e)}")
+    
+    def new_result(self, meeting_id: str, filename: str) -> Dict[str, Any]:
+        """
+        Инициализация результата в соответствии с моделью MeetingAnalysisResults
+        """
+        return {
+            "id": meeting_id,
+            "filename": filename,
+            "tenant": current_tenant.get(),
+            "status": "processing",
+            "analysis_timestamp": datetime.utcnow().isoformat(),
+            "transcription": None,
+            "tasks": [],
+            "decisions": [],
+            "topics": [],
+            "insights": [],
+            "effectiveness_score": 0.0,
+            "risks": [],
+            "meeting_duration_estimate": None,
+            "participant_count_estimate": None
+        }
+    
+    async def decode_stage(self, meeting_id: str, file_path: str) -> bytes:
+        """
+        Стадия 1: декодирование аудио в LINEAR16 16 kHz
+        """
+        logger.info(f"Step 1: Decoding audio for {meeting_id}")
+        with span("decode_stage") as stage:
+            content = await self.speech_service.decode_audio(file_path)
+            stage.set(bytes_out=len(content))
+            return content
+    
+    async def transcribe_stage(self, meeting_id: str, content: bytes, filename: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Стадия 2: транскрипция с Google Cloud Speech (очередь арендаторов и
+        глобальный лимит запросов) на языке, определённом по началу записи
+        """
+        # PCM из WAV извлекается один раз: для определения языка и длительности
+        pcm = pcm_from_wav(content)
+        language = await self.language_id.identify(pcm)
+        logger.info(f"Step 2: Transcribing audio with Google Speech for {meeting_id} ({language['language']})")
+        with span("transcribe_stage", bytes_in=len(content), tenant=current_tenant.get(), **language) as stage:
+            async with self.transcribe_queue.slot(cost=len(content) / BYTES_PER_SECOND):
+                stage.event("tenant_slot_acquired")
+                async with self.speech_limiter:
+                    stage.event("speech_slot_acquired")
+                    transcript_data = await self.speech_service.transcribe_content(
+                        content, filename, language_code=language["language"]
+                    )
+            stage.set(chars=len(transcript_data.get("text") or ""))
+        # Длительность для квоты и индекса - по декодированному PCM, а не по ответу распознавателя
+        transcript_data = {**transcript_data, "duration": round(len(pcm if pcm is not None else content) / BYTES_PER_SECOND)}
+        await self._apply_transcript(meeting_id, result, transcript_data)
+        return transcript_data
+    
+    async def _apply_transcript(self, meeting_id: str, result: Dict[str, Any], transcript_data: Dict[str, Any]) -> None:
+        result["transcription"] = transcript_data["text"]
+        result["meeting_duration_estimate"] = transcript_data.get("duration", "Unknown")
+        result["participant_count_estimate"] = transcript_data.get("participant_count", 0)
+        result["language"] = transcript_data.get("language")
+        if isinstance(transcript_data.get("duration"), (int, float)):
+            # Фактическая длительность вместо резерва по оценке при приёме
+            await asyncio.to_thread(tenant_registry.record, current_tenant.get(), audio_seconds=transcript_data["duration"])
+            await asyncio.to_thread(tenant_registry.release, meeting_id)
+        await self._save_result(meeting_id, result)
+    
+    async def analyze_stage(self, meeting_id: str, result: Dict[str, Any], priority: str = "interactive") -> Dict[str, Any]:
+        """
+        Стадия 3: анализ транскрипции (Claude), сохранение и пост-обработка
+        """
+        logger.info(f"Step 3: Analyzing content with Claude for {meeting_id}")
+        on_item = self._partial_result_collector(meeting_id, result)
+        
+        # Сжатие транскрипции перед LLM; сохранённая транскрипция не меняется
+        with span("compress_transcript") as stage:
+            compression = await asyncio.to_thread(self.transcript_compressor.compress, result["transcription"] or "")
+            stage.set(original_tokens=compression["original_tokens"], compressed_tokens=compression["compressed_tokens"])
+        result["transcript_compression"] = {k: v for k, v in compression.items() if k != "text"}
+        
+        # Очередь арендаторов: стоимость - тысячи токенов сжатой транскрипции
+        async with self.analyze_queue.slot(cost=max(1.0, compression["compressed_tokens"] / 1000)):
+            # Триаж: пустые записи без вызовов модели, короткие - одним вызовом быстрой модели
+            with span("triage") as stage:
+                triage = await self.triage.classify(compression["text"], compression["original_tokens"], priority)
+                stage.set(category=triage["category"], reason=triage["reason"])
+            result["triage"] = triage
+            with span("analyze", category=triage["category"], priority=priority) as stage:
+                if triage["category"] == "empty":
+                    analysis_result = self.analysis_worker.empty_result()
+                elif triage["category"] == "trivial":
+                    analysis_result = await self.analysis_worker.analyze_quick(compression["text"], priority, on_item)
+                else:
+                    analysis_result = await self.analysis_worker.analyze(compression["text"], priority, on_item)
+                stage.set(status=analysis_result.get("status"), **{
+                    f"llm.{key}": value for key, value in (analysis_result.get("usage") or {}).items()
+                })
+        usage = analysis_result.get("usage") or {}
+        await asyncio.to_thread(tenant_registry.record, current_tenant.get(), llm_tokens=sum(
+            usage.get(key, 0) for key in ("input_tokens", "cache_creation_input_tokens",
+                                          "cache_read_input_tokens", "output_tokens")
+        ))
+        result.pop("partial", None)
+        self._apply_analysis(result, analysis_result)
+        
+        # Финализация
+        result["status"] = "completed"
+        await self._store_analysis_version(meeting_id, result, analysis_result)
+        
+        # Сохраняем финальный результат
+        await self._save_result(meeting_id, result)
+        
+        logger.info(f"Processing completed for meeting {meeting_id}")
+        await self._index_result(meeting_id, result)
+        return result
+    
+    async def _index_result(self, meeting_id: str, result: Dict[str, Any]) -> None:
+        """
+        Пост-обработка готового результата: поиск и трекер задач
+        """
+        # Embedding тем/решений для семантического поиска
+        try:
+            await self.semantic_search.index_meeting(meeting_id, result)
+        except Exception as e:
+            logger.warning(f"Could not index meeting {meeting_id} for search: {str(e)}")
+        
+        # Агрегация задач по всем встречам
+        try:
+            await self.task_tracker.ingest_meeting_async(
+                meeting_id, result["actionItems"], result.get("analysis_timestamp"),
+                result.get("tenant") or DEFAULT_TENANT
+            )
+        except Exception as e:
+            logger.warning(f"Could not aggregate action items for meeting {meeting_id}: {str(e)}")
+    
+    @staticmethod
+    def _apply_analysis(result: Dict[str, Any], analysis_result: Dict[str, Any]) -> None:
+        """
+        Переносит результат AnalysisWorker в формат MeetingAnalysisResults
+        """
+        result.update({
+            "content": {
+                "topics": analysis_result["content_analysis"]["topics"],
+                "decisions": analysis_result["content_analysis"]["decisions"],
+                "meetingType": analysis_result["content_analysis"]["meeting_type"],
+                "effectivenessScore": analysis_result["content_analysis"]["effectiveness_score"]
+            },
+            "actionItems": analysis_result["tasks"],
+            "insights": {
+                "teamDynamics": analysis_result["insights"]["team_dynamics"],
+                "processRecommendations": analysis_result["insights"]["process_recommendations"],
+                "riskFlags": analysis_result["insights"]["risk_flags"],
+                "followUpSuggestions": analysis_result["insights"]["follow_up_suggestions"]
+            }
+        })
+        if analysis_result["content_analysis"].get("summary"):
+            result["content"]["summary"] = analysis_result["content_analysis"]["summary"]
+        if analysis_result.get("usage"):
+            # Потребление токенов, в т.ч. вход, прочитанный из кэша промпта
+            result["llm_usage"] = analysis_result["usage"]
+    
+    def _partial_result_collector(self, meeting_id: str, result: Dict[str, Any], min_interval: float = 1.0):
+        """
+        Callback для стриминга анализа: складывает готовые элементы в
+        result["partial"] и сохраняет промежуточный результат не чаще min_interval
+        """
+        partial = result.setdefault("partial", {"topics": [], "decisions": [], "actionItems": [], "insights": {}})
+        last_saved = [0.0]
+        
+        def on_item(section: str, path: tuple, value: Any) -> None:
+            if section == "content" and len(path) == 2 and path[0] in ("topics", "decisions"):
+                partial[path[0]].append(value)
+            elif section == "tasks":
+                partial["actionItems"].append(value)
+            elif section == "insights":
+                if len(path) == 2:
+                    partial["insights"].setdefault(path[0], []).append(value)
+                else:
+                    partial["insights"][path[0]] = value
+            else:
+                return
+            
+            loop = asyncio.get_running_loop()
+            if loop.time() - last_saved[0] >= min_interval:
+                last_saved[0] = loop.time()
+                loop.create_task(self._save_result(meeting_id, result))
+        
+        return on_item
     
     async def process_meeting(self, meeting_id: str, file_path: str, filename: str) -> Dict[str, Any]:
         """
         Основной метод обработки meeting-а с Google Speech
+        
+        Если для встречи включена трассировка (при загрузке или по
+        TRACE_SAMPLE_RATE), трасса экспортируется по завершении обработки.
+        """
+        trace = tracer.ensure(meeting_id)
+        try:
+            with span("process_meeting", meeting_id=meeting_id, filename=filename):
+                return await self._process_meeting(meeting_id, file_path, filename)
+        finally:
+            await tracer.finish(trace)
+    
+    async def process_stream(self, meeting_id: str, chunks, file_path: str, filename: str,
+                             on_uploaded=None) -> Dict[str, Any]:
         """
+        Обработка записи, которая ещё загружается: декодирование и
+        распознавание идут параллельно с приёмом байтов (см. ingest_stage)
+        
+        Args:
+            chunks: Асинхронный итератор байтов файла (тело запроса)
+            file_path: Куда сохранить исходный файл
+            on_uploaded: Callback(size), когда файл принят целиком
+        """
+        trace = tracer.ensure(meeting_id)
+        try:
+            with span("process_meeting", meeting_id=meeting_id, filename=filename, pipelined=True):
+                return await self._process_meeting(meeting_id, file_path, filename, chunks, on_uploaded)
+        finally:
+            await tracer.finish(trace)
+    
+    async def ingest_stage(self, meeting_id: str, chunks, file_path: str, result: Dict[str, Any],
+                           on_uploaded=None) -> Optional[Dict[str, Any]]:
+        """
+        Стадии 1-2 в конвейерном режиме: приём, декодирование и распознавание
+        сегментов одновременно. Распознанный текст сохраняется по мере готовности.
+        
+        Returns:
+            Данные транскрипции или None, если запись нужно обработать обычным путём
+        """
+        logger.info(f"Steps 1-2: Pipelined ingest for {meeting_id}")
+        texts = []
+        
+        async def on_segment(segment: Dict[str, Any]) -> None:
+            if segment.get("text"):
+                texts.append(segment["text"])
+                result["transcription"] = " ".join(texts)
+                await self._save_result(meeting_id, result)
+        
+        ingest = PipelinedIngest(self.speech_service, language_id=self.language_id)
+        ingest.limiter = self.transcribe_queue.limiter(self.speech_limiter, cost=ingest.segment_seconds)
+        return await ingest.run(chunks, file_path, on_uploaded, on_segment)
+    
+    async def process_live(self, meeting_id: str, frames, filename: str, emit,
+                           encoding: str = "pcm16", sample_rate: int = 16000, channels: int = 1,
+                           language_code: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Обработка встречи в реальном времени
+        
+        Аудио распознаётся по мере поступления; промежуточные и
+        окончательные сегменты передаются в emit. Каждые LIVE_ANALYSIS_INTERVAL
+        секунд записи сводка обновляется по новому фрагменту транскрипции,
+        поэтому после окончания встречи остаётся проанализировать только
+        последний фрагмент. Затем (LIVE_REFINE_ANALYSIS) в фоне выполняется
+        обычный полный анализ всей транскрипции.
+        
+        Args:
+            frames: Асинхронный итератор аудиокадров (PCM 16 бит или Opus)
+            emit: Корутина, получающая события: interim, final, analysis, completed
+        """
+        trace = tracer.ensure(meeting_id)
+        interval = float(os.getenv("LIVE_ANALYSIS_INTERVAL", "120"))
+        result = self.new_result(meeting_id, filename)
+        segments: List[Dict[str, Any]] = []
+        state = {"analyzed": 0, "analyzed_until": 0.0, "updates": 0, "analysis": None, "task": None}
+        
+        async def send(event: Dict[str, Any]) -> None:
+            try:
+                await emit(event)
+            except Exception as e:
+                # Клиент отключился - распознавание и анализ доводим до конца
+                logger.debug(f"Live event for {meeting_id} not delivered: {str(e)}")
+        
+        async def update_analysis() -> None:
+            upto = len(segments)
+            fragment = " ".join(segment["text"] for segment in segments[state["analyzed"]:upto])
+            with span("live.analysis_update", chars=len(fragment), update=state["updates"] + 1):
+                analysis_result = await self.analysis_worker.analyze_increment(fragment, state["analysis"])
+            state.update(analyzed=upto, analysis=analysis_result, updates=state["updates"] + 1)
+            self._apply_analysis(result, analysis_result)
+            await self._save_result(meeting_id, result)
+            await send({
+                "type": "analysis",
+                "until": state["analyzed_until"],
+                "summary": result["content"].get("summary", ""),
+                "topics": result["content"]["topics"],
+                "decisions": result["content"]["decisions"],
+                "actionItems": result["actionItems"]
+            })
+        
+        async def on_event(event: Dict[str, Any]) -> None:
+            if event["type"] == "final" and event["text"]:
+                segments.append(event)
+                result["transcription"] = " ".join(segment["text"] for segment in segments)
+                result["meeting_duration_estimate"] = round(event["end"])
+                await self._save_result(meeting_id, result)
+                running = state["task"] is not None and not state["task"].done()
+                if not running and event["end"] - state["analyzed_until"] >= interval:
+                    state["analyzed_until"] = event["end"]
+                    state["task"] = asyncio.create_task(update_analysis())
+            await send(event)
+        
+        try:
+            with span("process_meeting", meeting_id=meeting_id, filename=filename, live=True):
+                await self._save_result(meeting_id, result)
+                limiter = self.transcribe_queue.limiter(
+                    self.speech_limiter, cost=float(os.getenv("LIVE_SEGMENT_SECONDS", "10"))
+                )
+                recognizer = create_recognizer(self.speech_service, limiter, language_code)
+                with span("live_transcription", recognizer=type(recognizer).__name__) as stage:
+                    audio = decode_live_audio(frames, encoding, sample_rate, channels)
+                    await recognizer.run(audio, on_event)
+                    stage.set(segments=len(segments))
+                
+                # Осталось дописать сводку по последнему фрагменту
+                with span("live_final_analysis") as stage:
+                    if state["task"] is not None:
+                        await state["task"]
+                    if state["analyzed"] < len(segments):
+                        state["analyzed_until"] = segments[-1]["end"]
+                        await update_analysis()
+                    elif state["analysis"] is None:
+                        self._apply_analysis(result, self.analysis_worker.empty_result())
+                    stage.set(updates=state["updates"])
+                
+                result["live"] = {"segments": len(segments), "analysis_updates": state["updates"]}
+                result["status"] = "completed"
+                await self._save_result(meeting_id, result)
+                await send({"type": "completed", "id": meeting_id, "duration": result["meeting_duration_estimate"]})
+                logger.info(f"Live meeting {meeting_id} completed: {len(segments)} segments")
+        except Exception as e:
+            logger.error(f"Error processing live meeting {meeting_id}: {str(e)}")
+            logger.error(f"Traceback: {traceback.format_exc()}")
+            result["status"] = "error"
+            result["error"] = str(e)
+            await self._save_result(meeting_id, result)
+            await send({"type": "error", "message": str(e)})
+            raise
+        finally:
+            if state["task"] is not None:
+                state["task"].cancel()
+            await tracer.finish(trace)
+        
+        if segments and os.getenv("LIVE_REFINE_ANALYSIS", "true").lower() != "false":
+            # Уточнение полным анализом; до его завершения доступна сводка
+            try:
+                await self.analyze_stage(meeting_id, result, priority="batch")
+            except Exception as e:
+                logger.warning(f"Full analysis of live meeting {meeting_id} failed: {str(e)}")
+        else:
+            await self._index_result(meeting_id, result)
+        return result
+    
+    async def _process_meeting(self, meeting_id: str, file_path: str, filename: str,
+                               chunks=None, on_uploaded=None) -> Dict[str, Any]:
         logger.info(f"Starting processing for meeting {meeting_id}: {filename}")
+        result = self.new_result(meeting_id, filename)
         
         try:
-            # Инициализация результата в соответствии с моделью MeetingAnalysisResults
-            result = {
-                "id": meeting_id,
-                "filename": filename,
-                "status": "processing",
-                "analysis_timestamp": datetime.utcnow().isoformat(),
-                "transcription": None,
-                "tasks": [],
-                "decisions": [],
-                "topics": [],
-                "insights": [],
-                "effectiveness_score": 0.0,
-                "risks": [],
-                "meeting_duration_estimate": None,
-                "participant_count_estimate": None
-            }
-            
             # Сохраняем промежуточный результат
             await self._save_result(meeting_id, result)
             
-            # Step 1: Transcription с Google Cloud Speech
-            logger.info(f"Step 1: Transcribing audio with Google Speech for {meeting_id}")
-            transcript_data = await self.speech_service.transcribe_audio(file_path)
-            result["transcription"] = transcript_data["text"]
-            await self._save_result(meeting_id, result)
+            transcript_data = None
+            if chunks is not None:
+                transcript_data = await self.ingest_stage(meeting_id, chunks, file_path, result, on_uploaded)
             
-            # Step 2: Content Analysis (Claude)
-            logger.info(f"Step 2: Analyzing content with Claude for {meeting_id}")
-            analysis_result = await self.analysis_worker.analyze(transcript_data["text"])
+            if transcript_data is not None:
+                await self._apply_transcript(meeting_id, result, transcript_data)
+            elif not os.path.exists(file_path):
+                # Сервис транскрипции сам подставит fallback для отсутствующего файла
+                transcript_data = await self.speech_service.transcribe_audio(file_path)
+                await self._apply_transcript(meeting_id, result, transcript_data)
+            else:
+                content = await self.decode_stage(meeting_id, file_path)
+                await self.transcribe_stage(meeting_id, content, filename, result)
             
-            # Обновляем результат анализа
-            result.update({
-                "content": {
-                    "topics": analysis_result["content_analysis"]["topics"],
-                    "decisions": analysis_result["content_analysis"]["decisions"],
-                    "meetingType": analysis_result["content_analysis"]["meeting_type"],
-                    "effectivenessScore": analysis_result["content_analysis"]["effectiveness_score"]
-                },
-                "actionItems": analysis_result["tasks"],
-                "insights": {
-                    "teamDynamics": analysis_result["insights"]["team_dynamics"],
-                    "processRecommendations": analysis_result["insights"]["process_recommendations"],
-                    "riskFlags": analysis_result["insights"]["risk_flags"],
-                    "followUpSuggestions": analysis_result["insights"]["follow_up_suggestions"]
-                }
-            })
-            
-            # Финализация
-            result["status"] = "completed"
-            result["meeting_duration_estimate"] = transcript_data.get("duration", "Unknown")
-            result["participant_count_estimate"] = transcript_data.get("participant_count", 0)
-            
-            # Сохраняем финальный результат
-            await self._save_result(meeting_id, result)
-            
-            logger.info(f"Processing completed for meeting {meeting_id}")
+            await self.analyze_stage(meeting_id, result)
             
             # Очистка временного файла
             try:
@@ -113,15 +497,162 @@ class MeetingOrchestrator:
             
             raise
     
+    @property
+    def analysis_version(self) -> str:
+        """
+        Версия анализа: версия промптов плюс параметры сжатия транскрипции
+        """
+        return f"{self.analysis_worker.prompt_version}-{self.transcript_compressor.signature}"
+    
+    @staticmethod
+    def transcript_hash(transcription: str) -> str:
+        return hashlib.sha256((transcription or "").encode("utf-8")).hexdigest()[:16]
+    
+    def _analysis_path(self, meeting_id: str, prompt_version: str, transcript_hash: str) -> str:
+        return os.path.join(self.results_dir, "analyses", meeting_id, f"{prompt_version}_{transcript_hash}.json")
+    
+    def has_analysis_version(self, meeting_id: str, transcription: str) -> bool:
+        """
+        Проверяет, есть ли анализ для пары (хеш транскрипции, версия промптов)
+        """
+        return self.blob_store.exists(self._analysis_path(
+            meeting_id, self.analysis_version, self.transcript_hash(transcription)
+        ))
+    
+    async def _store_analysis_version(self, meeting_id: str, result: Dict[str, Any], analysis_result: Dict[str, Any]) -> None:
+        """
+        Сохраняет версионированный вывод анализа рядом с основным результатом
+        """
+        prompt_version = self.analysis_version
+        transcript_hash = self.transcript_hash(result.get("transcription"))
+        path = self._analysis_path(meeting_id, prompt_version, transcript_hash)
+        record = {
+            "prompt_version": prompt_version,
+            "transcript_hash": transcript_hash,
+            "created_at": datetime.utcnow().isoformat(),
+            "status": analysis_result.get("status", "success")
+        }
+        
+        def write():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.blob_store.write_json(path, {**record, "analysis": analysis_result})
+        
+        # Частичный анализ (с ошибками) не фиксируется, чтобы его можно было повторить
+        if record["status"] == "success":
+            await asyncio.to_thread(write)
+        versions = [
+            v for v in result.get("analysis_versions", [])
+            if (v["prompt_version"], v["transcript_hash"]) != (prompt_version, transcript_hash)
+        ]
+        result["analysis_versions"] = versions + [record]
+        result["analysis_version"] = prompt_version
+    
+    async def reanalyze_meeting(self, meeting_id: str, force: bool = False, priority: str = "interactive") -> Dict[str, Any]:
+        """
+        Повторный анализ по сохранённой транскрипции, без повторного распознавания
+        
+        Args:
+            meeting_id: ID встречи
+            force: Анализировать, даже если версия уже существует
+            priority: Очередь LLM-планировщика
+            
+        Returns:
+            Статус: completed, skipped или error
+            
+        Raises:
+            KeyError: Если результат встречи не найден
+            ValueError: Если у встречи нет сохранённой транскрипции
+        """
+        result = await asyncio.to_thread(self.load_result, meeting_id)
+        if result is None:
+            raise KeyError(meeting_id)
+        if not result.get("transcription"):
+            raise ValueError(f"Meeting {meeting_id} has no stored transcription")
+        
+        prompt_version = self.analysis_version
+        status = {
+            "id": meeting_id,
+            "prompt_version": prompt_version,
+            "transcript_hash": self.transcript_hash(result["transcription"])
+        }
+        
+        if not force and await asyncio.to_thread(self.has_analysis_version, meeting_id, result["transcription"]):
+            logger.info(f"Reanalysis skipped for {meeting_id}: version {prompt_version} already exists")
+            return {**status, "status": "skipped"}
+        
+        logger.info(f"Reanalyzing meeting {meeting_id} with prompt version {prompt_version}")
+        try:
+            await self.analyze_stage(meeting_id, result, priority)
+            return {**status, "status": "completed"}
+        except Exception as e:
+            logger.error(f"Reanalysis failed for {meeting_id}: {str(e)}")
+            return {**status, "status": "error", "error": str(e)}
+    
+    def list_result_ids(self) -> List[str]:
+        """
+        ID всех встреч с сохранённым результатом
+        """
+        return self.blob_store.list_ids(self.results_dir)
+    
+    def load_result(self, meeting_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Загрузка сохранённого результата из файла (None, если его нет)
+        """
+        return self.blob_store.read_json(self._result_path(meeting_id))
+    
+    def result_version(self, meeting_id: str) -> Optional[str]:
+        """
+        Версия сохранённого результата (меняется при каждом сохранении) - ключ кэшей ответа
+        """
+        return self.blob_store.version(self._result_path(meeting_id))
+    
+    def _result_path(self, meeting_id: str) -> str:
+        return os.path.join(self.results_dir, f"{meeting_id}.json")
+    
+    def _write_result(self, meeting_id: str, result: Dict[str, Any]) -> None:
+        # Запись через временный файл: читатели не видят недописанный JSON
+        self.blob_store.write_json(self._result_path(meeting_id), result)
+        try:
+            self.meeting_index.upsert(meeting_id, result)
+        except Exception as e:
+            # Индекс списков вторичен: результат уже сохранён
+            logger.warning(f"Could not update meeting index for {meeting_id}: {str(e)}")
+        try:
+            self.status_store.touch(meeting_id)
+        except Exception as e:
+            logger.warning(f"Could not publish change of {meeting_id}: {str(e)}")
+    
+    async def sync_meeting_index(self) -> None:
+        """
+        Однократно добавляет в индекс встреч результаты, сохранённые до его
+        появления; параллельные вызовы ждут одну и ту же синхронизацию
+        """
+        if self._index_synced is None:
+            self._index_synced = asyncio.ensure_future(asyncio.to_thread(
+                lambda: self.meeting_index.backfill(self.list_result_ids(), self.load_result)
+            ))
+        try:
+            await asyncio.shield(self._index_synced)
+        except Exception as e:
+            self._index_synced = None
+            logger.warning(f"Meeting index backfill failed: {str(e)}")
+    
     async def _save_result(self, meeting_id: str, result: Dict[str, Any]) -> None:
         """
         Сохранение результата в файл
+        
+        Сериализация и запись выполняются в потоке; снимок результата
+        берётся сразу, а записи одной встречи идут по очереди, поэтому
+        промежуточное сохранение не перезапишет более позднее.
         """
         try:
-            result_file = os.path.join(self.results_dir, f"{meeting_id}.json")
-            with open(result_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
+            snapshot = copy.deepcopy(result)
+            lock = self._save_locks.setdefault(meeting_id, asyncio.Lock())
+            async with lock:
+                await asyncio.to_thread(self._write_result, meeting_id, snapshot)
+            if not lock.locked() and snapshot.get("status") != "processing":
+                self._save_locks.pop(meeting_id, None)
             logger.info(f"Result saved for meeting {meeting_id}")
         except Exception as e:
             logger.error(f"Failed to save result for meeting {meeting_id}: {str(e)}")
-            raise e
\ No newline at end of file
+            raise e
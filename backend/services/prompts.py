@@ -0,0 +1,178 @@
+import os
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Общий статический префикс всех запросов анализа. Одинаковый текст во
+# всех трёх вызовах позволяет провайдеру кэшировать префикс (system +
+# транскрипция) и не тарифицировать его заново.
+SYSTEM_PREAMBLE = """Ты - ассистент для анализа деловых встреч. Тебе передаётся транскрипция встречи и инструкция, что из неё извлечь.
+
+Правила ответа:
+- отвечай только валидным JSON, без пояснений до или после;
+- используй ключи ровно в том виде, в каком они указаны в инструкции;
+- если данных нет, возвращай пустые списки или пустые строки, а не выдумывай."""
+
+TRANSCRIPT_TEMPLATE = "Транскрипция встречи:\n\n{transcription}"
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """Версионированный шаблон инструкции для одного вызова анализа"""
+    name: str
+    version: int
+    instructions: str
+    max_tokens: int = 1024
+    temperature: float = 0.7
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@v{self.version}"
+
+
+class PromptRegistry:
+    """
+    Реестр шаблонов промптов
+
+    Хранит все версии шаблонов; активная версия каждого шаблона - последняя
+    зарегистрированная, если её не закрепили через PROMPT_VERSIONS
+    (например, "content_analysis=1,task_extraction=2").
+    """
+
+    def __init__(self):
+        self._templates: Dict[str, Dict[int, PromptTemplate]] = {}
+        self._pinned: Dict[str, int] = {}
+        for pair in filter(None, os.getenv("PROMPT_VERSIONS", "").split(",")):
+            name, _, version = pair.partition("=")
+            self._pinned[name.strip()] = int(version)
+
+    def register(self, template: PromptTemplate) -> PromptTemplate:
+        versions = self._templates.setdefault(template.name, {})
+        if template.version in versions:
+            raise ValueError(f"Prompt already registered: {template.key}")
+        versions[template.version] = template
+        return template
+
+    def get(self, name: str, version: Optional[int] = None) -> PromptTemplate:
+        """
+        Возвращает шаблон указанной или активной версии
+
+        Raises:
+            KeyError: Если шаблон или версия не зарегистрированы
+        """
+        versions = self._templates[name]
+        if version is None:
+            version = self._pinned.get(name, max(versions))
+        return versions[version]
+
+    def versions(self, name: str) -> List[int]:
+        return sorted(self._templates.get(name, {}))
+
+    def active(self) -> Dict[str, PromptTemplate]:
+        return {name: self.get(name) for name in self._templates}
+
+    def fingerprint(self, model: str) -> str:
+        """
+        Версия набора промптов: активные версии шаблонов плюс хеш их текста,
+        общего префикса и модели
+        """
+        active = self.active()
+        digest = hashlib.sha256("\x00".join(
+            [model, SYSTEM_PREAMBLE, TRANSCRIPT_TEMPLATE]
+            + [f"{t.key}\x00{t.instructions}\x00{t.max_tokens}" for t in active.values()]
+        ).encode("utf-8")).hexdigest()[:8]
+        versions = ".".join(str(active[name].version) for name in sorted(active))
+        return f"v{versions}-{digest}"
+
+
+registry = PromptRegistry()
+
+CONTENT_ANALYSIS = registry.register(PromptTemplate(
+    name="content_analysis",
+    version=1,
+    instructions="""Ты - эксперт по анализу деловых встреч. Анализируй транскрипцию встречи и выдели:
+
+1. ТЕМЫ (topics) - основные темы обсуждения
+2. РЕШЕНИЯ (decisions) - принятые решения
+3. ТИП ВСТРЕЧИ (meeting_type) - тип встречи (standup, planning, review и т.д.)
+4. ОЦЕНКА ЭФФЕКТИВНОСТИ (effectiveness_score) - от 1 до 10
+
+Верни результат в формате JSON."""
+))
+
+TASK_EXTRACTION = registry.register(PromptTemplate(
+    name="task_extraction",
+    version=1,
+    instructions="""Ты - эксперт по планированию проектов. Найди в транскрипции встречи все задачи, пункты действий, поручения.
+Для каждой задачи укажи:
+- описание
+- ответственного
+- срок
+- приоритет (high/medium/low)
+
+Верни результат в формате JSON."""
+))
+
+MEETING_INSIGHTS = registry.register(PromptTemplate(
+    name="meeting_insights",
+    version=1,
+    instructions="""Ты - консультант по эффективности деловых процессов. Проанализируй транскрипцию встречи и предоставь:
+
+1. ДИНАМИКА КОМАНДЫ (team_dynamics) - оценка взаимодействия участников
+2. РЕКОМЕНДАЦИИ ПО ПРОЦЕССУ (process_recommendations) - как улучшить процесс
+3. РИСКИ (risk_flags) - потенциальные проблемы
+4. ПРЕДЛОЖЕНИЯ ПО ДАЛЬНЕЙШИМ ДЕЙСТВИЯМ (follow_up_suggestions)
+
+Верни результат в формате JSON."""
+))
+
+# Короткие промпты для быстрой модели: классификация и анализ коротких записей
+
+MEETING_TRIAGE = registry.register(PromptTemplate(
+    name="triage",
+    version=1,
+    instructions="""Определи, является ли запись содержательной деловой встречей.
+
+Категории (category):
+- trivial - короткий обмен репликами, тест записи, шум, не встреча
+- standard - встреча с обсуждением, решениями или задачами
+
+Верни JSON: {"category": "trivial" | "standard", "is_meeting": true | false}""",
+    max_tokens=50,
+    temperature=0.0
+))
+
+QUICK_SUMMARY = registry.register(PromptTemplate(
+    name="quick_summary",
+    version=1,
+    instructions="""Это короткая запись. Кратко опиши её одним ответом:
+
+- summary - краткое содержание в 1-2 предложениях
+- topics - темы (список)
+- decisions - решения (список, может быть пустым)
+- tasks - задачи: описание, ответственный, срок, приоритет (high/medium/low)
+- meeting_type - тип записи
+
+Верни результат в формате JSON.""",
+    max_tokens=600,
+    temperature=0.3
+))
+
+ROLLING_SUMMARY = registry.register(PromptTemplate(
+    name="rolling_summary",
+    version=1,
+    instructions="""Встреча ещё идёт. Тебе передана сводка предыдущей части встречи (JSON, может отсутствовать) и новый фрагмент транскрипции. Обнови сводку с учётом нового фрагмента:
+
+- summary - краткое содержание всей встречи на текущий момент в 2-4 предложениях
+- topics - темы (список, включая темы из предыдущей сводки)
+- decisions - решения (список, включая прежние, если их не отменили)
+- tasks - задачи: описание, ответственный, срок, приоритет (high/medium/low); прежние задачи сохраняй
+- meeting_type - тип встречи
+
+Верни полную обновлённую сводку в формате JSON.""",
+    max_tokens=1200,
+    temperature=0.3
+))
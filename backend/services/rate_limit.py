@@ -0,0 +1,98 @@
+import asyncio
+import time
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRateLimiter:
+    """
+    Глобальный лимитер запросов к внешнему API
+
+    Сочетает token bucket (запросов в минуту) и ограничение числа
+    одновременных запросов. Используется как async context manager:
+
+        async with limiter:
+            await call_api()
+
+    Запрос может стоить больше одной единицы (acquire(cost), например
+    токены LLM). Планировщик со своей очередью пользуется ведром без
+    ожидания: refill(), time_until() и take().
+    """
+
+    def __init__(self, name: str, requests_per_minute: float, max_concurrency: Optional[int] = None,
+                 burst_seconds: float = 1.0):
+        """
+        Инициализация лимитера
+
+        Args:
+            name: Имя бэкенда (для логов)
+            requests_per_minute: Допустимое число единиц в минуту (0 - без ограничения)
+            max_concurrency: Максимум одновременных запросов (None - без ограничения)
+            burst_seconds: Сколько секунд лимита можно израсходовать залпом
+        """
+        self.name = name
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds) if requests_per_minute else 0.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def refill(self, factor: float = 1.0) -> None:
+        """Пополняет ведро; factor < 1 временно замедляет темп (после 429)"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate * factor)
+        self.updated_at = now
+
+    def time_until(self, cost: float = 1.0, factor: float = 1.0) -> float:
+        """Секунд до того, как в ведре будет cost единиц (после refill)"""
+        if not self.rate:
+            return 0.0
+        # Запрос больше ёмкости ждёт полного ведра, а не блокирует очередь навсегда
+        cost = min(cost, self.capacity)
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / (self.rate * factor)
+
+    def take(self, cost: float = 1.0) -> None:
+        if self.rate:
+            self.tokens -= min(cost, self.capacity)
+
+    async def acquire(self, cost: float = 1.0) -> None:
+        # Примитивы создаются лениво, внутри работающего event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+            if self.max_concurrency:
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        if self._semaphore is not None:
+            await self._semaphore.acquire()
+
+        if not self.rate:
+            return
+
+        try:
+            async with self._lock:
+                self.refill()
+                while (wait := self.time_until(cost)) > 0:
+                    logger.debug(f"Rate limit {self.name}: waiting {wait:.2f}s")
+                    await asyncio.sleep(wait)
+                    self.refill()
+                self.take(cost)
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self) -> None:
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    async def __aenter__(self) -> "AsyncRateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release()
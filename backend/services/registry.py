@@ -0,0 +1,99 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceRegistry:
+    """
+    Общий реестр сервисов процесса
+
+    Сервис создаётся фабрикой при первом обращении, один раз на процесс,
+    поэтому импорт модулей не тянет за собой тяжёлые SDK и клиенты.
+    warm_up() создаёт сервисы и прогревает их клиенты в фоне, когда
+    приложение уже принимает запросы.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self.warmup_status: Dict[str, Any] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        self._factories[name] = factory
+
+    def set(self, name: str, instance: Any) -> None:
+        """Подменяет экземпляр сервиса (бенчмарки, тесты, внешняя конфигурация)"""
+        with self._lock:
+            self._instances[name] = instance
+
+    def get(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self._instances:
+                if name not in self._factories:
+                    raise KeyError(f"Unknown service: {name}")
+                started = time.perf_counter()
+                self._instances[name] = self._factories[name]()
+                logger.info(f"Service {name} created in {time.perf_counter() - started:.3f}s")
+            return self._instances[name]
+
+    def created(self) -> List[str]:
+        return sorted(self._instances)
+
+    async def warm_up(self, names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Создаёт сервисы и вызывает их warm_up() (импорт SDK, клиенты) в потоке
+
+        Ошибки прогрева не фатальны: сервис доинициализируется при первом запросе.
+        """
+        for name in names or list(self._factories):
+            started = time.perf_counter()
+            try:
+                service = await asyncio.to_thread(self.get, name)
+                warm_up = getattr(service, "warm_up", None)
+                if warm_up is not None:
+                    result = warm_up()
+                    if asyncio.iscoroutine(result):
+                        await result
+                self.warmup_status[name] = {"status": "ready", "seconds": round(time.perf_counter() - started, 3)}
+            except Exception as e:
+                logger.warning(f"Warm-up of {name} failed: {str(e)}")
+                self.warmup_status[name] = {"status": "error", "error": str(e)}
+        return self.warmup_status
+
+
+def _create_speech_service():
+    from .speech_service import GoogleSpeechService
+    return GoogleSpeechService()
+
+
+def _create_status_store():
+    from .status_store import SQLiteStatusStore
+    return SQLiteStatusStore(os.getenv(
+        "STATUS_STORE_PATH", os.path.join(os.getenv("RESULTS_DIR", "./results"), "status.db")
+    ))
+
+
+def _create_language_identifier():
+    from .language_id import LanguageIdentifier
+    return LanguageIdentifier()
+
+
+def _create_orchestrator():
+    from .orchestrator import MeetingOrchestrator
+    return MeetingOrchestrator()
+
+
+service_registry = ServiceRegistry()
+service_registry.register("speech", _create_speech_service)
+service_registry.register("status_store", _create_status_store)
+service_registry.register("language_id", _create_language_identifier)
+service_registry.register("orchestrator", _create_orchestrator)
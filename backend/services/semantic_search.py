@@ -0,0 +1,165 @@
+import os
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from .embeddings import EmbeddingWorker
+    from .vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+
+def _item_text(item: Any, fields: List[str]) -> str:
+    """Собирает текст элемента анализа (тема/решение) из известных полей"""
+    if isinstance(item, str):
+        return item.strip()
+    if isinstance(item, dict):
+        parts = [str(item[field]) for field in fields if item.get(field)]
+        return ". ".join(parts).strip()
+    return ""
+
+
+class SemanticSearchService:
+    """
+    Семантический поиск по встречам
+
+    Индексирует темы и решения, которые выдаёт AnalysisWorker, а также
+    сводный вектор каждой встречи для поиска похожих встреч.
+    """
+
+    TOPIC_FIELDS = ["title", "topic", "description", "summary"]
+    DECISION_FIELDS = ["decision", "context", "impact"]
+
+    def __init__(self, index_dir: str, embedder: Optional["EmbeddingWorker"] = None):
+        """
+        Инициализация сервиса поиска
+
+        Args:
+            index_dir: Директория дискового индекса
+            embedder: Воркер эмбеддингов
+        """
+        self.index_dir = index_dir
+        # Ниже порога - несвязанные элементы (у хэширующего векторизатора - просто 0)
+        self.min_score = float(os.getenv("SEARCH_MIN_SCORE", "0.2"))
+        # numpy и модель эмбеддингов импортируются при первом обращении
+        self._embedder = embedder
+        self._index: Optional["VectorIndex"] = None
+        self._index_lock = asyncio.Lock()
+        logger.info("SemanticSearchService initialized")
+
+    @property
+    def embedder(self) -> "EmbeddingWorker":
+        if self._embedder is None:
+            from .embeddings import EmbeddingWorker
+            self._embedder = EmbeddingWorker()
+        return self._embedder
+
+    def _open_index(self) -> "VectorIndex":
+        from .vector_index import VectorIndex
+        return VectorIndex(self.index_dir, dim=self.embedder.dim)
+
+    def warm_up(self) -> None:
+        """Импорт numpy и загрузка модели эмбеддингов (вызывается в потоке)"""
+        self.embedder.encode_sync(["warm-up"])
+
+    async def _get_index(self) -> "VectorIndex":
+        if self._index is None:
+            async with self._index_lock:
+                if self._index is None:
+                    # Загрузка модели и индекса - блокирующие операции
+                    self._index = await asyncio.to_thread(self._open_index)
+        return self._index
+
+    def _collect_documents(self, meeting_id: str, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        content = result.get("content") or {}
+        filename = result.get("filename", "")
+        topics = content.get("topics") or []
+        decisions = content.get("decisions") or []
+
+        documents = []
+        for i, topic in enumerate(topics):
+            text = _item_text(topic, self.TOPIC_FIELDS)
+            if text:
+                documents.append({"key": f"{meeting_id}:topic:{i}", "kind": "topic", "text": text})
+        for i, decision in enumerate(decisions):
+            text = _item_text(decision, self.DECISION_FIELDS)
+            if text:
+                documents.append({"key": f"{meeting_id}:decision:{i}", "kind": "decision", "text": text})
+
+        summary = "\n".join([filename, str(content.get("meetingType", ""))] + [d["text"] for d in documents])
+        if documents:
+            documents.append({"key": f"{meeting_id}:meeting", "kind": "meeting", "text": summary})
+
+        for document in documents:
+            document["meeting_id"] = meeting_id
+            document["filename"] = filename
+        return documents
+
+    async def index_meeting(self, meeting_id: str, result: Dict[str, Any]) -> int:
+        """
+        Инкрементально добавляет встречу в индекс
+
+        Args:
+            meeting_id: ID встречи
+            result: Результат обработки встречи
+
+        Returns:
+            Количество проиндексированных векторов
+        """
+        documents = self._collect_documents(meeting_id, result)
+        index = await self._get_index()
+        if not documents:
+            # Повторный анализ мог убрать все темы - прежние векторы встречи удаляются
+            await asyncio.to_thread(index.remove_group, meeting_id)
+            return 0
+
+        vectors = await self.embedder.embed([d["text"] for d in documents])
+        payloads = [{
+            "meeting_id": d["meeting_id"],
+            "filename": d["filename"],
+            "kind": d["kind"],
+            "text": d["text"][:500]
+        } for d in documents]
+        # Группа - встреча: векторы прежнего анализа, которых нет в новом, удаляются
+        await asyncio.to_thread(index.add, [d["key"] for d in documents], vectors, payloads, meeting_id)
+        logger.info(f"Indexed {len(documents)} vectors for meeting {meeting_id}")
+        return len(documents)
+
+    async def search(self, query: str, limit: int = 10, kind: Optional[str] = None,
+                     min_score: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Семантический поиск по темам и решениям
+
+        Args:
+            query: Текст запроса
+            limit: Количество результатов
+            kind: Фильтр по типу (topic, decision, meeting)
+            min_score: Минимальная близость (по умолчанию self.min_score)
+
+        Returns:
+            Найденные элементы с оценкой близости не ниже min_score
+        """
+        min_score = self.min_score if min_score is None else min_score
+        vectors = await self.embedder.embed([query])
+        index = await self._get_index()
+        hits = await asyncio.to_thread(index.search, vectors[0], limit, kind)
+        return [{**payload, "score": round(score, 4)} for _, score, payload in hits if score >= min_score]
+
+    async def similar_meetings(self, meeting_id: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
+        """
+        Находит встречи, похожие на заданную
+
+        Returns:
+            Список похожих встреч или None, если встреча не проиндексирована
+        """
+        index = await self._get_index()
+        vector = await asyncio.to_thread(index.get_vector, f"{meeting_id}:meeting")
+        if vector is None:
+            return None
+        hits = await asyncio.to_thread(index.search, vector, limit + 1, "meeting")
+        return [
+            {"meeting_id": payload["meeting_id"], "filename": payload.get("filename"), "score": round(score, 4)}
+            for _, score, payload in hits
+            if payload["meeting_id"] != meeting_id
+        ][:limit]
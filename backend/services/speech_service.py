@@ -1,11 +1,12 @@
 import os
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import tempfile
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import wave
 import struct
+from .tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +19,9 @@ class GoogleSpeechService:
         self.client = None  # Клиент создаётся только при необходимости
         self.executor = ThreadPoolExecutor(max_workers=2)
         self.config = None
+        # Язык по умолчанию; для встречи его выбирает определение языка (services.language_id)
+        self.language_code = os.getenv("SPEECH_LANGUAGE", "ru-RU")
+        self._configs: Dict[str, Any] = {}
         logger.info("GoogleSpeechService initialized")
 
     def _get_client(self):
@@ -26,19 +30,177 @@ class GoogleSpeechService:
             from google.cloud import speech_v1p1beta1 as speech
             self.client = speech.SpeechClient()
             self.speech = speech
-            self.config = speech.RecognitionConfig(
+            self.config = self._recognition_config(self.language_code)
+        return self.client
+
+    def _recognition_config(self, language_code: Optional[str] = None):
+        """Конфигурация распознавания для языка (одна на язык)"""
+        language_code = language_code or self.language_code
+        if language_code not in self._configs:
+            speech = self.speech
+            self._configs[language_code] = speech.RecognitionConfig(
                 encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
                 sample_rate_hertz=16000,
-                language_code="ru-RU",
+                language_code=language_code,
                 enable_automatic_punctuation=True,
                 enable_speaker_diarization=True,
                 diarization_speaker_count=2,
                 model="latest_long",
                 use_enhanced=True
             )
-        return self.client
+        return self._configs[language_code]
+
+    async def warm_up(self) -> None:
+        """Импорт Google SDK и создание клиента заранее, вне первого запроса"""
+        await asyncio.to_thread(self._get_client)
+
+    async def decode_audio(self, file_path: str) -> bytes:
+        """
+        Декодирует аудио в WAV 16 kHz mono (LINEAR16) с помощью ffmpeg
+        
+        Если ffmpeg недоступен или не смог декодировать файл, возвращает
+        исходные байты файла без изменений.
+        """
+        with span("speech.decode_audio", bytes_in=os.path.getsize(file_path)) as decode:
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    "ffmpeg", "-v", "error", "-i", file_path,
+                    "-ar", "16000", "-ac", "1", "-f", "wav", "pipe:1",
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                stdout, stderr = await process.communicate()
+                if process.returncode == 0 and stdout:
+                    decode.set(decoder="ffmpeg", bytes_out=len(stdout))
+                    return stdout
+                logger.warning(f"ffmpeg could not decode {file_path}: {stderr.decode(errors='ignore')[:200]}")
+            except FileNotFoundError:
+                logger.warning("ffmpeg not found, sending raw audio to recognizer")
+            
+            content = await asyncio.to_thread(self._read_file, file_path)
+            decode.set(decoder="raw", bytes_out=len(content))
+            return content
+
+    @staticmethod
+    def _read_file(file_path: str) -> bytes:
+        with open(file_path, 'rb') as audio_file:
+            return audio_file.read()
+
+    async def transcribe_content(self, content: bytes, source_name: str = "audio.wav",
+                                 language_code: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Транскрибирует уже декодированное аудио
+        
+        Args:
+            content: Аудио в формате LINEAR16 16 kHz
+            source_name: Имя исходного файла (для логов и fallback)
+            language_code: Язык распознавания (по умолчанию SPEECH_LANGUAGE)
+        """
+        with span("speech.transcribe_content", bytes_in=len(content),
+                  audio_seconds=round(len(content) / 32000, 2)) as transcribe:
+            try:
+                # Выполняем транскрипцию в отдельном потоке
+                loop = asyncio.get_event_loop()
+                result = await loop.run_in_executor(
+                    self.executor,
+                    self._transcribe_sync,
+                    content,
+                    language_code
+                )
+                
+                logger.info(f"Transcription completed for: {source_name}")
+                transcribe.set(chars=len(result.get("text") or ""), confidence=result.get("confidence"))
+                return result
+                
+            except Exception as e:
+                logger.error(f"Transcription failed for {source_name}: {str(e)}")
+                transcribe.set(fallback=True, error=str(e))
+                return self._get_fallback_transcription(source_name)
+
+    async def transcribe_segment(self, pcm: bytes, offset: float = 0.0,
+                                 language_code: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Распознаёт короткий сегмент (до 60 сек) сырого PCM синхронным recognize
+        
+        Используется конвейерным приёмом (services.ingest): сегменты
+        распознаются по мере декодирования. Время слов сдвигается на offset.
+        Ошибки не подменяются fallback-текстом, а пробрасываются.
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, self._recognize_segment_sync, pcm, offset, language_code)
+
+    def _recognize_segment_sync(self, pcm: bytes, offset: float, language_code: Optional[str] = None) -> Dict[str, Any]:
+        client = self._get_client()
+        config = self._recognition_config(language_code)
+        response = client.recognize(config=config, audio=self.speech.RecognitionAudio(content=pcm))
+        
+        transcript_parts = []
+        speaker_info = []
+        for result in response.results:
+            alternative = result.alternatives[0]
+            transcript_parts.append(alternative.transcript)
+            for word in getattr(alternative, 'words', []):
+                # Метки спикеров независимы в каждом сегменте
+                speaker_info.append({
+                    'word': word.word,
+                    'speaker': getattr(word, 'speaker_tag', 0),
+                    'start_time': offset + word.start_time.total_seconds(),
+                    'end_time': offset + word.end_time.total_seconds()
+                })
+        
+        return {
+            'text': ' '.join(transcript_parts),
+            'offset': offset,
+            'duration': len(pcm) / 32000,
+            'language': config.language_code,
+            'speaker_info': speaker_info,
+            'confidence': self._calculate_average_confidence(response.results)
+        }
+
+    def streaming_recognize_sync(self, audio_chunks, sample_rate: int = 16000, language_code: str = None):
+        """
+        Потоковое распознавание (streaming_recognize) одного потока
+        
+        Args:
+            audio_chunks: Итератор сырого PCM (LINEAR16); поток завершается,
+                когда итератор заканчивается
+            sample_rate: Частота дискретизации PCM
+            language_code: Язык (по умолчанию из конфигурации сервиса)
+            
+        Yields:
+            {"is_final", "text", "end_time", "stability", "speaker_info"};
+            end_time - секунды от начала потока
+        """
+        client = self._get_client()
+        speech = self.speech
+        config = speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=sample_rate,
+            language_code=language_code or self.language_code,
+            enable_automatic_punctuation=True,
+            model="latest_long"
+        )
+        streaming_config = speech.StreamingRecognitionConfig(config=config, interim_results=True)
+        requests = (speech.StreamingRecognizeRequest(audio_content=chunk) for chunk in audio_chunks)
+        
+        for response in client.streaming_recognize(config=streaming_config, requests=requests):
+            for result in response.results:
+                if not result.alternatives:
+                    continue
+                alternative = result.alternatives[0]
+                yield {
+                    'is_final': result.is_final,
+                    'text': alternative.transcript,
+                    'end_time': result.result_end_time.total_seconds(),
+                    'stability': result.stability,
+                    'confidence': alternative.confidence if result.is_final else None
+                }
 
     async def transcribe_audio(self, file_path: str) -> Dict[str, Any]:
+        with span("speech.transcribe_audio", file=os.path.basename(file_path)):
+            return await self._transcribe_audio(file_path)
+
+    async def _transcribe_audio(self, file_path: str) -> Dict[str, Any]:
         try:
             logger.info(f"Starting transcription for: {file_path}")
             
@@ -47,35 +209,24 @@ class GoogleSpeechService:
                 logger.error(f"File not found: {file_path}")
                 return self._get_fallback_transcription(file_path)
             
-            # Читаем аудио файл напрямую
-            with open(file_path, 'rb') as audio_file:
-                content = audio_file.read()
-            
-            # Выполняем транскрипцию в отдельном потоке
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                self.executor,
-                self._transcribe_sync,
-                content
-            )
-            
-            logger.info(f"Transcription completed for: {file_path}")
-            return result
+            content = await self.decode_audio(file_path)
+            return await self.transcribe_content(content, file_path)
             
         except Exception as e:
             logger.error(f"Transcription failed for {file_path}: {str(e)}")
             return self._get_fallback_transcription(file_path)
 
-    def _transcribe_sync(self, audio_content: bytes) -> Dict[str, Any]:
+    def _transcribe_sync(self, audio_content: bytes, language_code: Optional[str] = None) -> Dict[str, Any]:
         try:
             client = self._get_client()
             speech = self.speech
+            config = self._recognition_config(language_code)
             
             # Создаем объект аудио для Google API
             audio = speech.RecognitionAudio(content=audio_content)
             
             # Используем LongRunningRecognize для длинных аудио
-            operation = client.long_running_recognize(config=self.config, audio=audio)
+            operation = client.long_running_recognize(config=config, audio=audio)
             response = operation.result(timeout=90)
             
             # Обрабатываем результат
@@ -104,8 +255,8 @@ class GoogleSpeechService:
             
             return {
                 'text': full_transcript,
-                'duration': 300,  # Примерная длительность
-                'language': self.config.language_code,
+                'duration': round(len(audio_content) / 32000),  # LINEAR16 16 kHz mono
+                'language': config.language_code,
                 'participant_count': max(unique_speakers, 1),
                 'speaker_info': speaker_info[:100],
                 'confidence': self._calculate_average_confidence(response.results)
@@ -161,5 +312,9 @@ Sarah: Sounds good. Let's plan to deploy the auth feature to staging tomorrow if
                 'confidence': 0.80
             }
 
-# Глобальный экземпляр сервиса
-speech_service = GoogleSpeechService()
\ No newline at end of file
+def __getattr__(name: str):
+    # Общий экземпляр создаётся при первом обращении, а не при импорте модуля
+    if name == "speech_service":
+        from .registry import service_registry
+        return service_registry.get("speech")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,546 @@
+import os
+import json
+import time
+import socket
+import asyncio
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def worker_id() -> str:
+    """Идентификатор процесса-владельца аренды (хост и PID)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class StatusStore:
+    """
+    Общее состояние встреч для всех процессов API
+
+    Статусы обработки и результаты, которые не пишутся в файлы (демо,
+    ошибки), хранятся вне процесса, поэтому запрос, попавший на любой
+    воркер uvicorn, видит одно и то же. Встреча в работе закреплена
+    арендой за процессом, который её обрабатывает: владелец продлевает
+    аренду, а аренду умершего процесса забирает другой и перезапускает
+    или завершает обработку. Каждое изменение встречи получает
+    возрастающий номер - по нему wait_for_change() дожидается изменений,
+    не перечитывая статусы. Там же - резервы допуска и квот и суточное
+    потребление арендаторов, поэтому лимиты общие для всех воркеров.
+
+    Реализация по умолчанию - SQLiteStatusStore (один хост); другое
+    хранилище подключается через service_registry.set("status_store", ...).
+    """
+
+    # Как часто ожидание проверяет изменения из других процессов, секунды
+    poll_interval = 0.25
+
+    def __init__(self):
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+        self._waiters_lock = threading.Lock()
+
+    # --- статусы обработки ---
+
+    def set_status(self, meeting_id: str, status: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def update_status(self, meeting_id: str, **fields: Any) -> bool:
+        """Обновляет поля статуса; False, если встреча не в обработке"""
+        raise NotImplementedError
+
+    def get_status(self, meeting_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def delete_status(self, meeting_id: str) -> None:
+        raise NotImplementedError
+
+    def statuses(self) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    # --- результаты ---
+
+    def put_result(self, meeting_id: str, result: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def get_result(self, meeting_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def delete_result(self, meeting_id: str) -> None:
+        raise NotImplementedError
+
+    def result_summaries(self) -> Dict[str, Dict[str, Any]]:
+        """ID результата -> {"status", "filename"}"""
+        raise NotImplementedError
+
+    def counts(self) -> Dict[str, int]:
+        """{"processing": встреч в обработке, "completed": сохранённых результатов}"""
+        raise NotImplementedError
+
+    # --- фоновые задачи API (массовый повторный анализ) ---
+
+    def put_job(self, job_id: str, job: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    # --- аренды ---
+
+    def acquire_lease(self, meeting_id: str, owner: str, ttl: float, job: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Закрепляет встречу за owner на ttl секунд
+
+        Args:
+            job: Чем перезапустить обработку, если владелец пропадёт
+
+        Returns:
+            False, если встречу держит другой живой владелец
+        """
+        raise NotImplementedError
+
+    def renew_leases(self, owner: str, ttl: float) -> int:
+        """Продлевает все аренды и резервы владельца; возвращает число аренд"""
+        raise NotImplementedError
+
+    def release_lease(self, meeting_id: str, owner: str) -> None:
+        raise NotImplementedError
+
+    def lease(self, meeting_id: str) -> Optional[Dict[str, Any]]:
+        """{"owner", "expires_at", "job"} или None"""
+        raise NotImplementedError
+
+    def claim_expired(self, owner: str, ttl: float) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+        """Забирает просроченные аренды: [(ID встречи, job)]"""
+        raise NotImplementedError
+
+    # --- резервы и потребление (допуск записей, квоты арендаторов) ---
+
+    def reserve(self, kind: str, item_id: str, owner: str, ttl: float, tenant: Optional[str] = None,
+                audio_seconds: float = 0.0,
+                check: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> None:
+        """
+        Резерв ресурса за owner на ttl секунд; продлевается вместе с арендами
+        (renew_leases), резервы пропавшего процесса истекают
+
+        Args:
+            check: Проверка по действующим резервам того же kind; исключение
+                из неё отменяет резерв. Проверка и запись идут в одной
+                транзакции, поэтому воркеры не превысят лимит вместе.
+        """
+        raise NotImplementedError
+
+    def unreserve(self, kind: str, item_id: str) -> Optional[Dict[str, Any]]:
+        """Снимает резерв; возвращает его или None"""
+        raise NotImplementedError
+
+    def reservations(self, kind: str, tenant: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Действующие резервы: [{"id", "owner", "tenant", "audio_seconds", "started_at"}]"""
+        raise NotImplementedError
+
+    def add_usage(self, tenant: str, day: int, jobs: int = 0, audio_seconds: float = 0.0,
+                  llm_tokens: int = 0) -> None:
+        """Прибавляет потребление арендатора за сутки day (номер суток UTC)"""
+        raise NotImplementedError
+
+    def usage(self, day: int) -> Dict[str, Dict[str, float]]:
+        """Арендатор -> {"jobs", "audio_seconds", "llm_tokens"} за сутки day"""
+        raise NotImplementedError
+
+    # --- изменения ---
+
+    def touch(self, meeting_id: str) -> int:
+        """Отмечает изменение встречи, хранящейся вне хранилища (файл результата)"""
+        raise NotImplementedError
+
+    def version(self, meeting_id: str) -> int:
+        """Номер последнего изменения встречи (0 - изменений не было)"""
+        raise NotImplementedError
+
+    def changes_since(self, seq: int, limit: int = 1000) -> List[Tuple[str, int]]:
+        """[(ID встречи, номер изменения)] после seq по возрастанию"""
+        raise NotImplementedError
+
+    def change_token(self) -> Optional[int]:
+        """
+        Метка изменений из других процессов: меняется при каждой их записи
+        (None - метки нет, ожидание перечитывает version() на каждом шаге)
+        """
+        return None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, **self.counts()}
+
+    def _notify(self) -> None:
+        # Запись может идти из потока (сохранение результата) - будим ожидающих через их цикл
+        with self._waiters_lock:
+            waiters, self._waiters = self._waiters, []
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # цикл уже закрыт
+
+    async def wait_for_change(self, meeting_id: str, since: int, timeout: float) -> int:
+        """
+        Ждёт изменения встречи после since не дольше timeout секунд
+
+        Изменения этого процесса будят ожидание сразу, изменения других
+        процессов замечаются за poll_interval.
+
+        Returns:
+            Текущий номер изменения (равен since, если изменений не было)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        # Чтение может ждать блокировку записи - не в цикле событий
+        current = await asyncio.to_thread(self.version, meeting_id)
+        # Своя метка у каждого ожидающего: изменение видят все, а не первый проверивший
+        token = await asyncio.to_thread(self.change_token)
+        while current <= since:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            event = asyncio.Event()
+            with self._waiters_lock:
+                self._waiters.append((loop, event))
+            try:
+                await asyncio.wait_for(event.wait(), min(remaining, self.poll_interval))
+                changed = True
+            except asyncio.TimeoutError:
+                latest = await asyncio.to_thread(self.change_token)
+                changed, token = latest is None or latest != token, latest
+            if changed:
+                current = await asyncio.to_thread(self.version, meeting_id)
+        return current
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meeting_state (
+    id TEXT PRIMARY KEY,
+    status TEXT,
+    result TEXT,
+    seq INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS meeting_state_by_seq ON meeting_state (seq);
+CREATE TABLE IF NOT EXISTS leases (
+    id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    job TEXT
+);
+CREATE INDEX IF NOT EXISTS leases_by_expiry ON leases (expires_at);
+CREATE INDEX IF NOT EXISTS leases_by_owner ON leases (owner);
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    job TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reservations (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    tenant TEXT,
+    audio_seconds REAL NOT NULL,
+    started_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+CREATE INDEX IF NOT EXISTS reservations_by_owner ON reservations (owner);
+CREATE TABLE IF NOT EXISTS tenant_usage (
+    tenant TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    jobs INTEGER NOT NULL DEFAULT 0,
+    audio_seconds REAL NOT NULL DEFAULT 0,
+    llm_tokens INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, tenant)
+);
+"""
+
+
+def _loads(value: Optional[str]) -> Optional[Any]:
+    return json.loads(value) if value is not None else None
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class SQLiteStatusStore(StatusStore):
+    """
+    Общее состояние встреч в SQLite (WAL)
+
+    Все воркеры хоста открывают один файл базы; WAL позволяет читать, не
+    дожидаясь записи. Строка встречи хранит статус и результат (JSON) и
+    номер последнего изменения; удалённые статусы остаются строкой без
+    данных, чтобы номер изменения не терялся. Изменения из других
+    процессов определяются по PRAGMA data_version - без чтения таблиц.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Файл базы SQLite (":memory:" - только для одного процесса)
+        """
+        super().__init__()
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Транзакции управляются явно (BEGIN IMMEDIATE) - номер изменения выдаётся под блокировкой записи
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None,
+                                     timeout=float(os.getenv("STATUS_STORE_BUSY_TIMEOUT", "5")))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _write(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _read_data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    @staticmethod
+    def _next_seq(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM meeting_state").fetchone()[0]
+
+    def _set(self, meeting_id: str, column: str, value: Optional[str]) -> int:
+        with self._write() as conn:
+            seq = self._next_seq(conn)
+            conn.execute(
+                f"INSERT INTO meeting_state (id, {column}, seq, updated_at) VALUES (?, ?, ?, ?) "
+                f"ON CONFLICT(id) DO UPDATE SET {column} = excluded.{column}, "
+                f"seq = excluded.seq, updated_at = excluded.updated_at",
+                (meeting_id, value, seq, time.time())
+            )
+        self._notify()
+        return seq
+
+    def _get(self, meeting_id: str, column: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {column} FROM meeting_state WHERE id = ?", (meeting_id,)).fetchone()
+        return _loads(row[0]) if row else None
+
+    # --- статусы обработки ---
+
+    def set_status(self, meeting_id: str, status: Dict[str, Any]) -> None:
+        self._set(meeting_id, "status", _dumps(status))
+
+    def update_status(self, meeting_id: str, **fields: Any) -> bool:
+        with self._write() as conn:
+            row = conn.execute("SELECT status FROM meeting_state WHERE id = ?", (meeting_id,)).fetchone()
+            if row is None or row[0] is None:
+                return False
+            status = {**json.loads(row[0]), **fields}
+            conn.execute(
+                "UPDATE meeting_state SET status = ?, seq = ?, updated_at = ? WHERE id = ?",
+                (_dumps(status), self._next_seq(conn), time.time(), meeting_id)
+            )
+        self._notify()
+        return True
+
+    def get_status(self, meeting_id: str) -> Optional[Dict[str, Any]]:
+        return self._get(meeting_id, "status")
+
+    def delete_status(self, meeting_id: str) -> None:
+        if self.get_status(meeting_id) is not None:
+            self._set(meeting_id, "status", None)
+
+    def statuses(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT id, status FROM meeting_state WHERE status IS NOT NULL").fetchall()
+        return {meeting_id: json.loads(status) for meeting_id, status in rows}
+
+    # --- результаты ---
+
+    def put_result(self, meeting_id: str, result: Dict[str, Any]) -> None:
+        self._set(meeting_id, "result", _dumps(result))
+
+    def get_result(self, meeting_id: str) -> Optional[Dict[str, Any]]:
+        return self._get(meeting_id, "result")
+
+    def delete_result(self, meeting_id: str) -> None:
+        if self.get_result(meeting_id) is not None:
+            self._set(meeting_id, "result", None)
+
+    def result_summaries(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, json_extract(result, '$.status'), json_extract(result, '$.filename') "
+                "FROM meeting_state WHERE result IS NOT NULL"
+            ).fetchall()
+        return {meeting_id: {"status": status or "unknown", "filename": filename or "unknown"}
+                for meeting_id, status, filename in rows}
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            processing, completed = self._conn.execute(
+                "SELECT COUNT(status), COUNT(result) FROM meeting_state"
+            ).fetchone()
+        return {"processing": processing, "completed": completed}
+
+    # --- фоновые задачи API ---
+
+    def put_job(self, job_id: str, job: Dict[str, Any]) -> None:
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, job, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET job = excluded.job, updated_at = excluded.updated_at",
+                (job_id, _dumps(job), time.time())
+            )
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT job FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _loads(row[0]) if row else None
+
+    # --- аренды ---
+
+    def acquire_lease(self, meeting_id: str, owner: str, ttl: float, job: Optional[Dict[str, Any]] = None) -> bool:
+        now = time.time()
+        with self._write() as conn:
+            cursor = conn.execute(
+                "INSERT INTO leases (id, owner, expires_at, job) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at, "
+                "job = excluded.job WHERE leases.owner = excluded.owner OR leases.expires_at < ?",
+                (meeting_id, owner, now + ttl, _dumps(job) if job is not None else None, now)
+            )
+            return cursor.rowcount > 0
+
+    def renew_leases(self, owner: str, ttl: float) -> int:
+        with self._write() as conn:
+            conn.execute("UPDATE reservations SET expires_at = ? WHERE owner = ?", (time.time() + ttl, owner))
+            return conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE owner = ?", (time.time() + ttl, owner)
+            ).rowcount
+
+    def release_lease(self, meeting_id: str, owner: str) -> None:
+        with self._write() as conn:
+            conn.execute("DELETE FROM leases WHERE id = ? AND owner = ?", (meeting_id, owner))
+
+    def lease(self, meeting_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT owner, expires_at, job FROM leases WHERE id = ?", (meeting_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"owner": row[0], "expires_at": row[1], "job": _loads(row[2])}
+
+    def claim_expired(self, owner: str, ttl: float) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+        now = time.time()
+        with self._write() as conn:
+            rows = conn.execute("SELECT id, job FROM leases WHERE expires_at < ?", (now,)).fetchall()
+            conn.execute("UPDATE leases SET owner = ?, expires_at = ? WHERE expires_at < ?", (owner, now + ttl, now))
+        return [(meeting_id, _loads(job)) for meeting_id, job in rows]
+
+    # --- резервы и потребление ---
+
+    _RESERVATION_COLUMNS = ("id", "owner", "tenant", "audio_seconds", "started_at")
+
+    def _reservations(self, conn: sqlite3.Connection, kind: str, tenant: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = "SELECT id, owner, tenant, audio_seconds, started_at FROM reservations WHERE kind = ? AND expires_at >= ?"
+        params: Tuple[Any, ...] = (kind, time.time())
+        if tenant is not None:
+            query += " AND tenant = ?"
+            params += (tenant,)
+        return [dict(zip(self._RESERVATION_COLUMNS, row)) for row in conn.execute(query, params).fetchall()]
+
+    def reserve(self, kind: str, item_id: str, owner: str, ttl: float, tenant: Optional[str] = None,
+                audio_seconds: float = 0.0,
+                check: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> None:
+        now = time.time()
+        with self._write() as conn:
+            # Резервы пропавших процессов больше не учитываются
+            conn.execute("DELETE FROM reservations WHERE kind = ? AND expires_at < ?", (kind, now))
+            if check is not None:
+                check(self._reservations(conn, kind))
+            conn.execute(
+                "INSERT OR REPLACE INTO reservations (kind, id, owner, tenant, audio_seconds, started_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, item_id, owner, tenant, audio_seconds, now, now + ttl)
+            )
+
+    def unreserve(self, kind: str, item_id: str) -> Optional[Dict[str, Any]]:
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT id, owner, tenant, audio_seconds, started_at FROM reservations WHERE kind = ? AND id = ?",
+                (kind, item_id)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM reservations WHERE kind = ? AND id = ?", (kind, item_id))
+        return dict(zip(self._RESERVATION_COLUMNS, row))
+
+    def reservations(self, kind: str, tenant: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._reservations(self._conn, kind, tenant)
+
+    def add_usage(self, tenant: str, day: int, jobs: int = 0, audio_seconds: float = 0.0,
+                  llm_tokens: int = 0) -> None:
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO tenant_usage (tenant, day, jobs, audio_seconds, llm_tokens) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(day, tenant) DO UPDATE SET jobs = jobs + excluded.jobs, "
+                "audio_seconds = audio_seconds + excluded.audio_seconds, llm_tokens = llm_tokens + excluded.llm_tokens",
+                (tenant, day, jobs, audio_seconds, llm_tokens)
+            )
+
+    def usage(self, day: int) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT tenant, jobs, audio_seconds, llm_tokens FROM tenant_usage WHERE day = ?", (day,)
+            ).fetchall()
+        return {tenant: {"jobs": jobs, "audio_seconds": audio, "llm_tokens": tokens}
+                for tenant, jobs, audio, tokens in rows}
+
+    # --- изменения ---
+
+    def touch(self, meeting_id: str) -> int:
+        with self._write() as conn:
+            seq = self._next_seq(conn)
+            conn.execute(
+                "INSERT INTO meeting_state (id, seq, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET seq = excluded.seq, updated_at = excluded.updated_at",
+                (meeting_id, seq, time.time())
+            )
+        self._notify()
+        return seq
+
+    def version(self, meeting_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT seq FROM meeting_state WHERE id = ?", (meeting_id,)).fetchone()
+        return row[0] if row else 0
+
+    def changes_since(self, seq: int, limit: int = 1000) -> List[Tuple[str, int]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, seq FROM meeting_state WHERE seq > ? ORDER BY seq LIMIT ?", (seq, limit)
+            ).fetchall()
+
+    def change_token(self) -> Optional[int]:
+        with self._lock:
+            return self._read_data_version()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = super().get_metrics()
+        with self._lock:
+            leases = self._conn.execute(
+                "SELECT owner, COUNT(*), SUM(expires_at < ?) FROM leases GROUP BY owner", (time.time(),)
+            ).fetchall()
+        metrics.update({
+            "path": self.path,
+            "leases": {owner: {"held": held, "expired": expired} for owner, held, expired in leases}
+        })
+        return metrics
@@ -0,0 +1,459 @@
+import os
+import re
+import json
+import uuid
+import sqlite3
+import asyncio
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .tenants import DEFAULT_TENANT
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Служебные слова, не влияющие на смысл задачи
+_STOP_WORDS = {
+    "и", "в", "на", "с", "по", "для", "к", "до", "от", "о", "об", "а", "не", "то", "это",
+    "the", "a", "an", "to", "of", "for", "and", "on", "in", "by", "with", "from"
+}
+
+_RELATIVE_DEADLINES = {
+    "today": 0, "сегодня": 0, "tonight": 0,
+    "tomorrow": 1, "завтра": 1,
+    "послезавтра": 2,
+    "next week": 7, "следующей неделе": 7, "следующая неделя": 7
+}
+
+OPEN_STATUSES = {"open", "pending", "in_progress"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id TEXT PRIMARY KEY,
+    tenant TEXT NOT NULL,
+    task TEXT NOT NULL,
+    assignee TEXT NOT NULL,
+    assignee_key TEXT NOT NULL,
+    deadline TEXT,
+    due_date TEXT,
+    due_key TEXT NOT NULL,
+    priority TEXT,
+    context TEXT,
+    status TEXT NOT NULL,
+    is_open INTEGER NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    meeting_ids TEXT NOT NULL,
+    occurrences INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_by_open ON items (tenant, is_open, due_key, last_seen);
+CREATE INDEX IF NOT EXISTS items_by_status ON items (tenant, status, due_key, last_seen);
+CREATE INDEX IF NOT EXISTS items_by_assignee ON items (tenant, assignee_key, is_open, due_key, last_seen);
+CREATE INDEX IF NOT EXISTS items_by_due ON items (tenant, due_key, last_seen);
+CREATE TABLE IF NOT EXISTS item_meetings (
+    meeting_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    PRIMARY KEY (meeting_id, item_id)
+);
+CREATE TABLE IF NOT EXISTS item_bands (
+    band TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    PRIMARY KEY (band, item_id)
+);
+CREATE INDEX IF NOT EXISTS item_bands_by_item ON item_bands (item_id);
+"""
+
+_COLUMNS = (
+    "id", "tenant", "task", "assignee", "assignee_key", "deadline", "due_date", "due_key", "priority",
+    "context", "status", "is_open", "first_seen", "last_seen", "meeting_ids", "occurrences"
+)
+_UPSERT = f"INSERT OR REPLACE INTO items ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+_SELECT = f"SELECT {', '.join(_COLUMNS)} FROM items"
+
+# Задачи без срока - в конце списка
+NO_DUE_DATE = "9999-12-31"
+
+
+class TaskTracker:
+    """
+    Сквозной трекер задач по всем встречам
+
+    Задачи из actionItems каждой встречи сливаются в отслеживаемые элементы
+    с поиском почти-дубликатов (MinHash LSH) в пределах арендатора. Элементы, их LSH-корзины и
+    связи со встречами хранятся в SQLite, общей для всех процессов: приём
+    встречи идёт одной транзакцией записи и находит дубликаты среди задач,
+    добавленных любым процессом. Запросы по ответственному, статусу и сроку
+    идут по индексам, уже упорядоченным по (срок, последнее упоминание), и
+    читают не больше limit строк. Повторный анализ встречи заменяет её
+    задачи: элементы, которые остались только за этой встречей и больше в
+    ней не найдены, удаляются.
+    """
+
+    NUM_HASHES = 32
+    BAND_SIZE = 4
+    SIMILARITY_THRESHOLD = 0.6
+
+    def __init__(self, store_path: str):
+        """
+        Инициализация трекера
+
+        Args:
+            store_path: Файл базы SQLite (":memory:" - в памяти одного процесса)
+        """
+        self.store_path = store_path
+        if store_path != ":memory:":
+            os.makedirs(os.path.dirname(store_path) or ".", exist_ok=True)
+        # Транзакции управляются явно (BEGIN IMMEDIATE): поиск дубликатов и
+        # запись встречи не пересекаются с приёмом в других процессах
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(store_path, check_same_thread=False, isolation_level=None,
+                                     timeout=float(os.getenv("TASK_TRACKER_BUSY_TIMEOUT", "5")))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        count = self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        logger.info(f"TaskTracker initialized with {count} tracked items")
+
+    @contextmanager
+    def _write(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # ------------------------------------------------------------------ #
+    # Нормализация
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _normalize_assignee(assignee: Optional[str]) -> str:
+        if not assignee or not str(assignee).strip():
+            return "unassigned"
+        return " ".join(_TOKEN_RE.findall(str(assignee).lower())) or "unassigned"
+
+    @staticmethod
+    def _shingles(text: str) -> Set[str]:
+        # Усечение до 6 символов - грубый стемминг для русских словоформ
+        tokens = [t[:6] for t in _TOKEN_RE.findall(text.lower()) if t not in _STOP_WORDS]
+        return set(tokens)
+
+    def _signature(self, shingles: Set[str]) -> List[int]:
+        signature = []
+        for seed in range(self.NUM_HASHES):
+            salt = seed.to_bytes(2, "little")
+            signature.append(min(
+                int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8, salt=salt).digest(), "little")
+                for s in shingles
+            ) if shingles else 0)
+        return signature
+
+    def _bands(self, scope: str, signature: List[int]) -> List[str]:
+        # Ключ корзины хранится в базе - хеш не должен зависеть от процесса
+        return [
+            f"{scope}|{i}|" + hashlib.blake2b(
+                repr(signature[i:i + self.BAND_SIZE]).encode("ascii"), digest_size=8
+            ).hexdigest()
+            for i in range(0, self.NUM_HASHES, self.BAND_SIZE)
+        ]
+
+    @staticmethod
+    def _resolve_deadline(deadline: Optional[str], meeting_date: date) -> Optional[str]:
+        """Приводит срок к ISO-дате, если его можно однозначно определить"""
+        if not deadline:
+            return None
+        text = str(deadline).strip().lower()
+        match = re.search(r"\d{4}-\d{2}-\d{2}", text)
+        if match:
+            try:
+                return date.fromisoformat(match.group(0)).isoformat()
+            except ValueError:
+                return None
+        match = re.search(r"\b(\d{1,2})\.(\d{1,2})\.(\d{4})\b", text)
+        if match:
+            try:
+                day, month, year = (int(g) for g in match.groups())
+                return date(year, month, day).isoformat()
+            except ValueError:
+                return None
+        for phrase, days in _RELATIVE_DEADLINES.items():
+            if phrase in text:
+                return (meeting_date + timedelta(days=days)).isoformat()
+        return None
+
+    @staticmethod
+    def _extract_fields(raw: Dict[str, Any]) -> Dict[str, Any]:
+        def pick(*keys):
+            for key in keys:
+                if raw.get(key):
+                    return raw[key]
+            return None
+
+        return {
+            "task": pick("task", "description", "описание", "задача"),
+            "assignee": pick("assignee", "ответственный", "owner"),
+            "deadline": pick("deadline", "срок", "due"),
+            "priority": pick("priority", "приоритет") or "medium",
+            "context": pick("context", "контекст") or ""
+        }
+
+    # ------------------------------------------------------------------ #
+    # Поиск дубликатов
+    # ------------------------------------------------------------------ #
+
+    def _index_item(self, conn: sqlite3.Connection, item: Dict[str, Any]) -> None:
+        signature = self._signature(self._shingles(item["task"]))
+        conn.executemany(
+            "INSERT OR IGNORE INTO item_bands (band, item_id) VALUES (?, ?)",
+            [(band, item["id"]) for band in self._bands(f"{item['tenant']}|{item['assignee_key']}", signature)]
+        )
+
+    def _find_duplicate(
+        self,
+        conn: sqlite3.Connection,
+        tenant: str,
+        assignee_key: str,
+        shingles: Set[str],
+        changed: Dict[str, Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Похожая задача того же арендатора и ответственного (changed - ещё не записанные изменения)"""
+        bands = self._bands(f"{tenant}|{assignee_key}", self._signature(shingles))
+        candidate_ids = [row[0] for row in conn.execute(
+            f"SELECT DISTINCT item_id FROM item_bands WHERE band IN ({', '.join('?' * len(bands))})", bands
+        )]
+        stored = [item_id for item_id in candidate_ids if item_id not in changed]
+        candidates = [changed[item_id] for item_id in candidate_ids if item_id in changed]
+        if stored:
+            candidates += [self._item(row) for row in conn.execute(
+                f"{_SELECT} WHERE id IN ({', '.join('?' * len(stored))})", stored
+            )]
+
+        best, best_score = None, 0.0
+        for candidate in candidates:
+            candidate_shingles = self._shingles(candidate["task"])
+            union = shingles | candidate_shingles
+            score = len(shingles & candidate_shingles) / len(union) if union else 0.0
+            if score > best_score:
+                best, best_score = candidate, score
+        return best if best_score >= self.SIMILARITY_THRESHOLD else None
+
+    # ------------------------------------------------------------------ #
+    # Обновление
+    # ------------------------------------------------------------------ #
+
+    def ingest_meeting(
+        self,
+        meeting_id: str,
+        action_items: List[Any],
+        meeting_time: Optional[str] = None,
+        tenant: str = DEFAULT_TENANT
+    ) -> int:
+        """
+        Инкрементально добавляет задачи встречи; задачи прежнего анализа
+        этой встречи заменяются
+
+        Args:
+            meeting_id: ID встречи
+            action_items: Список задач (actionItems) встречи
+            meeting_time: Время встречи в ISO-формате
+            tenant: Арендатор встречи
+
+        Returns:
+            Количество обработанных задач
+        """
+        if isinstance(action_items, dict):
+            action_items = action_items.get("tasks") or action_items.get("action_items") or []
+        if not isinstance(action_items, list):
+            return 0
+
+        try:
+            meeting_date = datetime.fromisoformat(meeting_time).date() if meeting_time else date.today()
+        except ValueError:
+            meeting_date = date.today()
+        seen_at = meeting_time or datetime.utcnow().isoformat()
+
+        processed = 0
+        with self._write() as conn:
+            # Встреча отвязывается от прежних задач; элемент, найденный снова,
+            # привяжется обратно с тем же id и статусом
+            changed: Dict[str, Dict[str, Any]] = {}
+            for row in conn.execute(
+                f"{_SELECT} WHERE id IN (SELECT item_id FROM item_meetings WHERE meeting_id = ?)", (meeting_id,)
+            ).fetchall():
+                item = self._item(row)
+                item["meeting_ids"] = [m for m in item["meeting_ids"] if m != meeting_id]
+                item["occurrences"] = len(item["meeting_ids"])
+                changed[item["id"]] = item
+            conn.execute("DELETE FROM item_meetings WHERE meeting_id = ?", (meeting_id,))
+
+            for raw in action_items:
+                if not isinstance(raw, dict):
+                    continue
+                fields = self._extract_fields(raw)
+                if not fields["task"]:
+                    continue
+
+                task_text = str(fields["task"])
+                assignee_key = self._normalize_assignee(fields["assignee"])
+                shingles = self._shingles(task_text)
+                due_date = self._resolve_deadline(fields["deadline"], meeting_date)
+                item = self._find_duplicate(conn, tenant, assignee_key, shingles, changed) if shingles else None
+
+                if item is not None:
+                    if meeting_id not in item["meeting_ids"]:
+                        item["meeting_ids"].append(meeting_id)
+                        item["occurrences"] = len(item["meeting_ids"])
+                    item["last_seen"] = max(item["last_seen"], seen_at)
+                    # Последняя встреча уточняет срок и приоритет
+                    if fields["deadline"]:
+                        item["deadline"] = str(fields["deadline"])
+                        item["due_date"] = due_date
+                    item["priority"] = str(fields["priority"])
+                else:
+                    item = {
+                        "id": uuid.uuid4().hex[:12],
+                        "tenant": tenant,
+                        "task": task_text,
+                        "assignee": str(fields["assignee"] or "Unassigned"),
+                        "assignee_key": assignee_key,
+                        "deadline": str(fields["deadline"]) if fields["deadline"] else None,
+                        "due_date": due_date,
+                        "priority": str(fields["priority"]),
+                        "context": str(fields["context"]),
+                        "status": "open",
+                        "first_seen": seen_at,
+                        "last_seen": seen_at,
+                        "meeting_ids": [meeting_id],
+                        "occurrences": 1
+                    }
+                    self._index_item(conn, item)
+                changed[item["id"]] = item
+                processed += 1
+
+            removed = [(item_id,) for item_id, item in changed.items() if not item["meeting_ids"]]
+            kept = [item for item in changed.values() if item["meeting_ids"]]
+            conn.executemany("DELETE FROM items WHERE id = ?", removed)
+            conn.executemany("DELETE FROM item_bands WHERE item_id = ?", removed)
+            conn.executemany(_UPSERT, [self._row(item) for item in kept])
+            conn.executemany(
+                "INSERT OR IGNORE INTO item_meetings (meeting_id, item_id) VALUES (?, ?)",
+                [(meeting_id, item["id"]) for item in kept if meeting_id in item["meeting_ids"]]
+            )
+
+        logger.info(f"TaskTracker ingested {processed} action items from meeting {meeting_id}"
+                    + (f", dropped {len(removed)} stale" if removed else ""))
+        return processed
+
+    async def ingest_meeting_async(
+        self,
+        meeting_id: str,
+        action_items: List[Any],
+        meeting_time: Optional[str] = None,
+        tenant: str = DEFAULT_TENANT
+    ) -> int:
+        return await asyncio.to_thread(self.ingest_meeting, meeting_id, action_items, meeting_time, tenant)
+
+    def update_status(self, item_id: str, status: str, tenant: str = DEFAULT_TENANT) -> Optional[Dict[str, Any]]:
+        """
+        Меняет статус отслеживаемой задачи
+
+        Returns:
+            Обновлённая задача или None, если у арендатора такой задачи нет
+        """
+        with self._write() as conn:
+            updated = conn.execute(
+                "UPDATE items SET status = ?, is_open = ? WHERE id = ? AND tenant = ?",
+                (status, int(status in OPEN_STATUSES), item_id, tenant)
+            ).rowcount
+            row = conn.execute(f"{_SELECT} WHERE id = ?", (item_id,)).fetchone() if updated else None
+        return self._public(self._item(row)) if row is not None else None
+
+    # ------------------------------------------------------------------ #
+    # Запросы
+    # ------------------------------------------------------------------ #
+
+    def query(
+        self,
+        tenant: str = DEFAULT_TENANT,
+        assignee: Optional[str] = None,
+        status: Optional[str] = "open",
+        due_before: Optional[str] = None,
+        due_after: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        Возвращает задачи по индексам
+
+        Args:
+            tenant: Арендатор (видит только свои задачи)
+            assignee: Ответственный
+            status: Статус ("open" включает pending/in_progress)
+            due_before: Срок не позже даты (ISO)
+            due_after: Срок не раньше даты (ISO)
+            limit: Максимальное количество задач
+
+        Returns:
+            Задачи, отсортированные по сроку и времени последнего упоминания
+        """
+        conditions, params = ["tenant = ?"], [tenant]
+        if assignee:
+            conditions.append("assignee_key = ?")
+            params.append(self._normalize_assignee(assignee))
+        if status == "open":
+            conditions.append("is_open = 1")
+        elif status:
+            conditions.append("status = ?")
+            params.append(status)
+        if due_before or due_after:
+            conditions.append("due_date IS NOT NULL AND due_key BETWEEN ? AND ?")
+            params += [due_after or "", due_before or NO_DUE_DATE]
+        with self._lock:
+            rows = self._conn.execute(
+                f"{_SELECT} WHERE {' AND '.join(conditions)} ORDER BY due_key, last_seen LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [self._public(self._item(row)) for row in rows]
+
+    def assignee_summary(self, tenant: str = DEFAULT_TENANT) -> List[Dict[str, Any]]:
+        """Количество открытых задач по каждому ответственному арендатора"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT MIN(assignee), SUM(is_open), COUNT(*) FROM items WHERE tenant = ? GROUP BY assignee_key",
+                (tenant,)
+            ).fetchall()
+        summary = [{"assignee": name, "open": open_count, "total": total} for name, open_count, total in rows]
+        summary.sort(key=lambda row: -row["open"])
+        return summary
+
+    # ------------------------------------------------------------------ #
+    # Хранение
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _row(item: Dict[str, Any]) -> Tuple:
+        return (
+            item["id"], item["tenant"], item["task"], item["assignee"], item["assignee_key"], item.get("deadline"),
+            item.get("due_date"), item.get("due_date") or NO_DUE_DATE, item.get("priority"),
+            item.get("context"), item["status"], int(item["status"] in OPEN_STATUSES),
+            item["first_seen"], item["last_seen"], json.dumps(item["meeting_ids"]), item["occurrences"]
+        )
+
+    @staticmethod
+    def _item(row: Tuple) -> Dict[str, Any]:
+        item = dict(zip(_COLUMNS, row))
+        item["meeting_ids"] = json.loads(item["meeting_ids"])
+        return item
+
+    @staticmethod
+    def _public(item: Dict[str, Any]) -> Dict[str, Any]:
+        public = {key: value for key, value in item.items() if key not in ("due_key", "is_open")}
+        public["meeting_ids"] = list(item["meeting_ids"])
+        return public
@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import logging
+import contextvars
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .admission import AdmissionRejected
+from .registry import service_registry
+from .status_store import worker_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+
+# Арендатор текущей обработки; задачи обработки наследуют его из запроса
+current_tenant: contextvars.ContextVar[str] = contextvars.ContextVar("tenant", default=DEFAULT_TENANT)
+
+
+class TenantError(Exception):
+    """Арендатор не опознан; status - HTTP-код для ответа"""
+
+    def __init__(self, message: str, status: int = 401):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass(frozen=True)
+class Tenant:
+    """Арендатор (команда): вес в справедливой очереди, лимиты и квоты"""
+    id: str
+    weight: float = 1.0
+    max_concurrency: int = 2
+    daily_audio_seconds: Optional[float] = None
+    daily_llm_tokens: Optional[int] = None
+    api_keys: List[str] = field(default_factory=list, compare=False, repr=False)
+
+
+class TenantRegistry:
+    """
+    Арендаторы и учёт их потребления
+
+    Конфигурация - JSON-файл TENANTS_CONFIG:
+
+        {
+            "default": {"weight": 1, "max_concurrency": 2},
+            "tenants": {
+                "sales": {"api_keys": ["..."], "weight": 2, "max_concurrency": 4,
+                          "daily_audio_seconds": 36000, "daily_llm_tokens": 2000000}
+            }
+        }
+
+    Арендатор определяется по X-API-Key, а без ключа - по X-Team-Id
+    (если TENANTS_REQUIRE_KEY не включён). По X-Team-Id доступны только
+    команды без API-ключей: команда с ключами требует ключ. Незнакомая
+    команда получает параметры "default"; таких команд не больше
+    TENANTS_MAX_TEAMS, дальше - отказ. Потребление (аудио, токены, записи) считается
+    за текущие сутки UTC в status_store - одно на все воркеры; оценка
+    длительности принятых, но ещё не распознанных записей резервируется
+    там же, чтобы серия загрузок не проходила мимо квоты.
+    """
+
+    KIND = "quota"
+
+    def __init__(self, config_path: Optional[str] = None, require_key: Optional[bool] = None, store=None):
+        self.config_path = config_path or os.getenv("TENANTS_CONFIG")
+        self.require_key = (
+            require_key if require_key is not None
+            else os.getenv("TENANTS_REQUIRE_KEY", "false").lower() == "true"
+        )
+        self.max_teams = int(os.getenv("TENANTS_MAX_TEAMS", "100"))
+        self._defaults: Dict[str, Any] = {}
+        self._tenants: Dict[str, Tenant] = {}
+        self._keys: Dict[str, str] = {}
+        self._configured: set = set()
+        self._store = store
+        self.owner = worker_id()
+        self.ttl = float(os.getenv("STATUS_LEASE_TTL", "30"))
+        self.load()
+
+    @property
+    def store(self):
+        # Хранилище открывается при первом учёте, а не при импорте модуля
+        if self._store is None:
+            self._store = service_registry.get("status_store")
+        return self._store
+
+    def load(self) -> None:
+        """(Пере)читывает конфигурацию арендаторов"""
+        config: Dict[str, Any] = {}
+        if self.config_path:
+            with open(self.config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        self._defaults = config.get("default", {})
+        self._tenants = {DEFAULT_TENANT: self._build(DEFAULT_TENANT, {})}
+        self._keys = {}
+        for tenant_id, options in config.get("tenants", {}).items():
+            tenant = self._build(tenant_id, options)
+            self._tenants[tenant_id] = tenant
+            for key in tenant.api_keys:
+                self._keys[key] = tenant_id
+        self._configured = set(self._tenants)
+        logger.info(f"Tenants loaded: {len(self._tenants) - 1} configured, {len(self._keys)} API keys")
+
+    def _build(self, tenant_id: str, options: Dict[str, Any]) -> Tenant:
+        merged = {**self._defaults, **options}
+        return Tenant(
+            id=tenant_id,
+            weight=float(merged.get("weight", 1.0)),
+            max_concurrency=int(merged.get("max_concurrency", 2)),
+            daily_audio_seconds=merged.get("daily_audio_seconds"),
+            daily_llm_tokens=merged.get("daily_llm_tokens"),
+            api_keys=list(options.get("api_keys", []))
+        )
+
+    def get(self, tenant_id: str) -> Tenant:
+        """Арендатор по id; незнакомый id получает параметры "default" и не запоминается"""
+        tenant = self._tenants.get(tenant_id)
+        return tenant if tenant is not None else self._build(tenant_id, {})
+
+    def resolve(self, api_key: Optional[str] = None, team_id: Optional[str] = None) -> Tenant:
+        """
+        Арендатор запроса по заголовкам X-API-Key / X-Team-Id
+
+        Raises:
+            TenantError: Неизвестный ключ или ключ обязателен (401),
+                некорректная (400) или лишняя незнакомая (403) команда
+        """
+        if api_key:
+            tenant_id = self._keys.get(api_key)
+            if tenant_id is None:
+                raise TenantError("Invalid API key")
+            return self._tenants[tenant_id]
+        if self.require_key:
+            raise TenantError("X-API-Key header is required")
+        if team_id:
+            team_id = team_id.strip()
+            if not team_id or len(team_id) > 64 or not team_id.replace("-", "").replace("_", "").isalnum():
+                raise TenantError("Invalid X-Team-Id", 400)
+            tenant = self._tenants.get(team_id)
+            if tenant is not None:
+                if tenant.api_keys:
+                    raise TenantError(f"X-API-Key header is required for team {team_id}")
+                return tenant
+            if len(self._tenants) - len(self._configured) >= self.max_teams:
+                raise TenantError(f"Unknown team {team_id}", 403)
+            return self._tenants.setdefault(team_id, self._build(team_id, {}))
+        return self._tenants[DEFAULT_TENANT]
+
+    # ------------------------------------------------------------------ #
+    # Квоты и учёт
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _today() -> int:
+        return int(time.time() // 86400)
+
+    @staticmethod
+    def _empty_usage() -> Dict[str, float]:
+        return {"jobs": 0, "audio_seconds": 0.0, "llm_tokens": 0}
+
+    def usage(self, tenant_id: str) -> Dict[str, float]:
+        return self.store.usage(self._today()).get(tenant_id) or self._empty_usage()
+
+    def record(self, tenant_id: str, jobs: int = 0, audio_seconds: float = 0.0, llm_tokens: int = 0) -> None:
+        if jobs or audio_seconds or llm_tokens:
+            self.store.add_usage(tenant_id, self._today(), jobs, audio_seconds, llm_tokens)
+
+    def reserve(self, tenant_id: str, job_id: str, audio_seconds: float) -> None:
+        """Резервирует оценку длительности принятой записи до её распознавания"""
+        self.store.reserve(self.KIND, job_id, self.owner, self.ttl, tenant=tenant_id, audio_seconds=audio_seconds)
+
+    def release(self, job_id: str) -> None:
+        """Снимает резерв: фактическая длительность учтена через record()"""
+        self.store.unreserve(self.KIND, job_id)
+
+    def reserved(self, tenant_id: str) -> float:
+        return sum(job["audio_seconds"] for job in self.store.reservations(self.KIND, tenant_id))
+
+    def check_quota(self, tenant: Tenant, audio_seconds: float = 0.0) -> None:
+        """
+        Raises:
+            AdmissionRejected: Дневная квота арендатора исчерпана (повтор - после полуночи UTC)
+        """
+        usage = self.usage(tenant.id)
+        used_audio = usage["audio_seconds"] + self.reserved(tenant.id)
+        exhausted = None
+        if tenant.daily_audio_seconds is not None and used_audio + audio_seconds > tenant.daily_audio_seconds:
+            exhausted = "audio_seconds"
+        elif tenant.daily_llm_tokens is not None and usage["llm_tokens"] >= tenant.daily_llm_tokens:
+            exhausted = "llm_tokens"
+        if exhausted:
+            reset_in = (self._today() + 1) * 86400 - time.time()
+            logger.warning(f"Tenant {tenant.id} quota exhausted: {exhausted}")
+            raise AdmissionRejected("quota", reset_in, {"tenant": tenant.id, "quota": exhausted})
+
+    def get_metrics(self) -> Dict[str, Any]:
+        usage = self.store.usage(self._today())
+        reserved: Dict[str, float] = {}
+        for job in self.store.reservations(self.KIND):
+            reserved[job["tenant"]] = reserved.get(job["tenant"], 0.0) + job["audio_seconds"]
+        return {
+            tenant_id: {
+                "weight": tenant.weight,
+                "max_concurrency": tenant.max_concurrency,
+                "daily_audio_seconds": tenant.daily_audio_seconds,
+                "daily_llm_tokens": tenant.daily_llm_tokens,
+                "usage": usage.get(tenant_id) or self._empty_usage(),
+                "reserved_audio_seconds": round(reserved.get(tenant_id, 0.0))
+            }
+            for tenant_id, tenant in self._tenants.items()
+        }
+
+
+tenant_registry = TenantRegistry()
@@ -0,0 +1,386 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import logging
+import threading
+import contextvars
+import urllib.request
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("span", default=None)
+
+
+class Span:
+    """
+    Интервал трассировки: время, родитель, атрибуты (байты, токены и т.п.)
+
+    Используется как context manager в синхронном и асинхронном коде;
+    вложенные span и задачи, созданные внутри, получают его как родителя.
+    """
+
+    def __init__(self, trace: "Trace", name: str, attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent is not None and parent.trace is trace else None
+        self.attributes = dict(attributes)
+        self.events: List[Dict[str, Any]] = []
+        self.start_ns = 0
+        self.end_ns = 0
+        self.lane = trace.lane()
+        self._token = None
+
+    def set(self, **attributes: Any) -> "Span":
+        self.attributes.update(attributes)
+        return self
+
+    def add(self, key: str, value: float) -> None:
+        """Накопительный атрибут (например, токены нескольких вызовов)"""
+        self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def event(self, name: str, **attributes: Any) -> None:
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.trace.spans.append(self)
+
+
+class _NoopSpan:
+    """Span без трассировки: вызовы ничего не стоят"""
+
+    def set(self, **attributes: Any) -> "_NoopSpan":
+        return self
+
+    def add(self, key: str, value: float) -> None:
+        pass
+
+    def event(self, name: str, **attributes: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SamplingProfiler:
+    """
+    Сэмплирующий профайлер на sys._current_frames
+
+    Пока запущен, раз в interval снимает стеки всех потоков процесса
+    (event loop и пулы to_thread/executor) и считает одинаковые стеки.
+    Результат - collapsed stacks для flamegraph.pl / speedscope.
+
+    Отделить стеки одной встречи нельзя: профиль общий на процесс. Поэтому
+    Tracer запускает профайлер, только если других обработок в процессе
+    нет; встречи, начатые позже, попадут в тот же профиль.
+    """
+
+    # Верхние кадры простаивающих потоков (ожидание задач, select в loop)
+    IDLE_FRAMES = {("_worker", "thread.py"), ("wait", "threading.py"), ("get", "queue.py"), ("select", "selectors.py")}
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="trace-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> List[str]:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        return [f"{stack} {count}" for stack, count in self.samples.most_common()]
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (frame.f_code.co_name, os.path.basename(frame.f_code.co_filename)) in self.IDLE_FRAMES:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+
+class Trace:
+    """Трасса обработки одной встречи"""
+
+    def __init__(self, meeting_id: str, profile: bool = False, lag_interval: float = 0.05):
+        self.trace_id = uuid.uuid4().hex
+        self.meeting_id = meeting_id
+        self.spans: List[Span] = []
+        self.loop_lag: List[tuple] = []  # (time_ns, lag_ms)
+        self.profile: Optional[List[str]] = None
+        self.profile_refused: Optional[str] = None
+        self.started_ns = time.time_ns()
+        self.finished = False
+        self._lanes: Dict[int, int] = {}
+        self._profiler = SamplingProfiler() if profile else None
+        self._lag_interval = lag_interval
+        self._lag_task: Optional[asyncio.Task] = None
+
+    def lane(self) -> int:
+        """Номер дорожки (tid в Chrome trace): своя для каждой asyncio-задачи"""
+        try:
+            key = id(asyncio.current_task())
+        except RuntimeError:
+            key = threading.get_ident()
+        return self._lanes.setdefault(key, len(self._lanes) + 1)
+
+    def start(self) -> None:
+        if self._profiler is not None:
+            self._profiler.start()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # Задача мониторинга не должна наследовать trace, иначе её span попадут в трассу
+        self._lag_task = loop.create_task(self._measure_lag(), context=contextvars.Context())
+
+    async def _measure_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self._lag_interval
+            await asyncio.sleep(self._lag_interval)
+            self.loop_lag.append((time.time_ns(), round(max(0.0, loop.time() - expected) * 1000, 2)))
+
+    def stop(self) -> None:
+        self.finished = True
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+        if self._profiler is not None:
+            self.profile = self._profiler.stop()
+
+    def summary(self) -> Dict[str, Any]:
+        lags = [lag for _, lag in self.loop_lag]
+        return {
+            "trace_id": self.trace_id,
+            "meeting_id": self.meeting_id,
+            "spans": len(self.spans),
+            "duration_ms": round((max((s.end_ns for s in self.spans), default=self.started_ns)
+                                  - self.started_ns) / 1e6, 2),
+            "max_loop_lag_ms": max(lags, default=0.0),
+            "profile_samples": sum(int(line.rsplit(" ", 1)[1]) for line in self.profile) if self.profile else 0,
+            **({"profile_refused": self.profile_refused} if self.profile_refused else {})
+        }
+
+    def to_chrome(self) -> Dict[str, Any]:
+        """Chrome trace event format (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid,
+                   "args": {"name": f"meeting {self.meeting_id}"}}]
+        for span in sorted(self.spans, key=lambda s: s.start_ns):
+            events.append({
+                "name": span.name,
+                "cat": span.name.split(".")[0],
+                "ph": "X",
+                "ts": span.start_ns / 1000,
+                "dur": (span.end_ns - span.start_ns) / 1000,
+                "pid": pid,
+                "tid": span.lane,
+                "args": span.attributes
+            })
+            for event in span.events:
+                events.append({"name": event["name"], "ph": "i", "s": "t", "ts": event["time_ns"] / 1000,
+                               "pid": pid, "tid": span.lane, "args": event["attributes"]})
+        for time_ns, lag in self.loop_lag:
+            events.append({"name": "event_loop_lag_ms", "ph": "C", "ts": time_ns / 1000,
+                           "pid": pid, "args": {"lag": lag}})
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": self.summary()}
+
+    def to_otel(self) -> Dict[str, Any]:
+        """OTLP/JSON (ExportTraceServiceRequest) для OpenTelemetry Collector"""
+        def attributes(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+            result = []
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    typed = {"boolValue": value}
+                elif isinstance(value, int):
+                    typed = {"intValue": str(value)}
+                elif isinstance(value, float):
+                    typed = {"doubleValue": value}
+                else:
+                    typed = {"stringValue": str(value)}
+                result.append({"key": key, "value": typed})
+            return result
+
+        spans = []
+        root = next((span for span in self.spans if span.parent_id is None), None)
+        for span in self.spans:
+            events = [{"timeUnixNano": str(e["time_ns"]), "name": e["name"],
+                       "attributes": attributes(e["attributes"])} for e in span.events]
+            if span is root:
+                # Задержки event loop - событиями первого корневого span
+                events += [{"timeUnixNano": str(t), "name": "event_loop_lag",
+                            "attributes": attributes({"lag_ms": lag})} for t, lag in self.loop_lag]
+            spans.append({
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "parentSpanId": span.parent_id or "",
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": attributes(span.attributes),
+                "events": events,
+                "status": {"code": 2, "message": span.attributes["error"]} if "error" in span.attributes else {}
+            })
+        return {"resourceSpans": [{
+            "resource": {"attributes": attributes({"service.name": "audioinsight",
+                                                   "meeting.id": self.meeting_id})},
+            "scopeSpans": [{"scope": {"name": "audioinsight.tracing"}, "spans": spans}]
+        }]}
+
+
+class Tracer:
+    """
+    Опциональная трассировка обработки отдельных встреч
+
+    Трасса включается на встречу: явно (?trace=1 при загрузке,
+    ?trace=profile - с сэмплирующим профайлером, если встреча в процессе
+    одна) или по доле TRACE_SAMPLE_RATE. Span записываются только внутри активной трассы;
+    без неё span() возвращает no-op. По завершении трасса сохраняется
+    в TRACE_DIR в форматах Chrome trace и OTLP/JSON и, если задан
+    TRACE_EXPORT_URL, отправляется в OTLP/HTTP collector.
+    """
+
+    def __init__(self):
+        self.sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+        self.profile_all = os.getenv("TRACE_PROFILE", "false").lower() == "true"
+        self.trace_dir = os.getenv("TRACE_DIR", os.path.join(os.getenv("RESULTS_DIR", "./results"), "traces"))
+        self.export_url = os.getenv("TRACE_EXPORT_URL")
+        self.formats = set(os.getenv("TRACE_FORMATS", "chrome,otel").split(","))
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=50)
+        self._profiled: Optional[Trace] = None
+
+    def start(self, meeting_id: str, mode: Optional[str] = None, other_jobs: int = 0) -> Optional[Trace]:
+        """
+        Начинает трассу встречи в текущем контексте
+
+        Args:
+            meeting_id: ID встречи
+            mode: "1"/"true" - трассировка, "profile" - с профайлером,
+                None - по TRACE_SAMPLE_RATE
+            other_jobs: Сколько других обработок идёт в процессе; профайлер
+                снимает стеки всего процесса, поэтому при них не запускается
+
+        Returns:
+            Trace или None, если трассировка не включена
+        """
+        mode = (mode or "").lower()
+        if mode in ("", "0", "false"):
+            if not (self.sample_rate and random.random() < self.sample_rate):
+                return None
+        profile = mode == "profile" or self.profile_all
+        refused = None
+        if profile and self._profiled is not None and not self._profiled.finished:
+            refused = f"meeting {self._profiled.meeting_id} is being profiled"
+        elif profile and other_jobs:
+            refused = f"{other_jobs} other jobs are running in this process"
+        trace = Trace(meeting_id, profile=profile and refused is None)
+        if refused:
+            trace.profile_refused = refused
+            logger.warning(f"Profiler not started for meeting {meeting_id}: {refused}")
+        elif profile:
+            self._profiled = trace
+        trace.start()
+        _current_trace.set(trace)
+        _current_span.set(None)
+        logger.info(f"Tracing meeting {meeting_id} (trace {trace.trace_id})")
+        return trace
+
+    def ensure(self, meeting_id: str) -> Optional[Trace]:
+        """Трасса встречи из контекста (начатая при загрузке) или новая по TRACE_SAMPLE_RATE"""
+        trace = _current_trace.get()
+        if trace is not None and trace.meeting_id == meeting_id and not trace.finished:
+            return trace
+        return self.start(meeting_id)
+
+    async def finish(self, trace: Optional[Trace]) -> None:
+        """Останавливает трассу и экспортирует её (вне event loop)"""
+        if trace is None or trace.finished:
+            return
+        trace.stop()
+        self.recent.append(trace.summary())
+        try:
+            await asyncio.to_thread(self.export, trace)
+        except Exception as e:
+            logger.warning(f"Could not export trace for meeting {trace.meeting_id}: {str(e)}")
+
+    def export(self, trace: Trace) -> None:
+        os.makedirs(self.trace_dir, exist_ok=True)
+        base = os.path.join(self.trace_dir, trace.meeting_id)
+        if "chrome" in self.formats:
+            with open(f"{base}.trace.json", "w", encoding="utf-8") as f:
+                json.dump(trace.to_chrome(), f, ensure_ascii=False)
+        if "otel" in self.formats:
+            with open(f"{base}.otel.json", "w", encoding="utf-8") as f:
+                json.dump(trace.to_otel(), f, ensure_ascii=False)
+        if trace.profile:
+            with open(f"{base}.folded", "w", encoding="utf-8") as f:
+                f.write("\n".join(trace.profile) + "\n")
+        if self.export_url:
+            request = urllib.request.Request(
+                self.export_url, data=json.dumps(trace.to_otel()).encode("utf-8"),
+                headers={"Content-Type": "application/json"}, method="POST"
+            )
+            urllib.request.urlopen(request, timeout=5).close()
+        logger.info(f"Trace for meeting {trace.meeting_id} exported to {base}.*")
+
+    def load(self, meeting_id: str, fmt: str = "chrome") -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.trace_dir, f"{meeting_id}.{'trace' if fmt == 'chrome' else 'otel'}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+def span(name: str, **attributes: Any):
+    """Span в активной трассе или no-op"""
+    trace = _current_trace.get()
+    if trace is None or trace.finished:
+        return NOOP_SPAN
+    return Span(trace, name, attributes)
+
+
+def current_span():
+    """Текущий span (для добавления атрибутов) или no-op"""
+    current = _current_span.get()
+    return current if current is not None and not current.trace.finished else NOOP_SPAN
+
+
+tracer = Tracer()
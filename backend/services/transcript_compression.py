@@ -0,0 +1,226 @@
+import re
+import os
+import math
+import logging
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Заполнители пауз (RU + EN) - только звуки без лексического значения.
+# Выражения вроде "как бы", "kind of", "i mean" и "ну" могут менять смысл
+# фразы ("kind of agreed", "ну да") и не удаляются.
+DISFLUENCIES = [
+    "э+(?:-э+)*", "э+м+", "а{2,}", "а-а+", "м{2,}", "м-м+", "хм+",
+    "uh+", "um+", "erm", "hmm+"
+]
+
+_DISFLUENCY_RE = re.compile(
+    r"(?<![\w-])(?:" + "|".join(DISFLUENCIES) + r")(?![\w-])[,]?\s*",
+    re.IGNORECASE
+)
+# Повторы слова подряд: "я я я думаю" -> "я думаю". Двойной повтор бывает
+# осмысленным ("had had", "that that"), поэтому схлопываются три и больше
+# повторов, а двойные - только у слов, которые подряд не стоят ("я я", "the the")
+_STUTTER_RE = re.compile(r"\b(\w+)(?:[\s,]+\1\b){2,}", re.IGNORECASE)
+_DOUBLED_RE = re.compile(r"\b(я|i|the|a|an)[\s,]+\1\b", re.IGNORECASE)
+_SENTENCE_RE = re.compile(r"[^.!?…]+[.!?…]*")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+# Без пунктуации транскрипция режется на окна по столько слов
+WINDOW_WORDS = 25
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Оценка числа токенов без токенизатора модели: ~4 символа на токен для
+    латиницы, ~3 для кириллицы, знак препинания - отдельный токен
+    """
+    total = 0
+    for token in _TOKEN_RE.findall(text):
+        per_token = 4 if token.isascii() else 3
+        total += max(1, math.ceil(len(token) / per_token))
+    return total
+
+
+class TranscriptCompressor:
+    """
+    Сжатие транскрипции перед вызовами LLM
+
+    Этапы: удаление слов-паразитов и повторов слов, удаление повторяющихся
+    сегментов, и - если текст всё ещё превышает бюджет токенов -
+    экстрактивное summary: TextRank по TF-IDF векторам предложений.
+    Порядок выбранных предложений сохраняется.
+    """
+
+    LONG_SEGMENT_WORDS = 6
+
+    def __init__(self, token_budget: int = None, dedupe_window: int = 50):
+        """
+        Args:
+            token_budget: Бюджет токенов транскрипции (по умолчанию
+                TRANSCRIPT_TOKEN_BUDGET, 0 - без экстрактивного сжатия)
+            dedupe_window: Сколько предыдущих сегментов проверять на повтор
+        """
+        if token_budget is None:
+            token_budget = int(os.getenv("TRANSCRIPT_TOKEN_BUDGET", "12000"))
+        self.token_budget = token_budget
+        self.dedupe_window = dedupe_window
+
+    @property
+    def signature(self) -> str:
+        """Параметры сжатия - входят в версию анализа"""
+        return f"tc2-b{self.token_budget}"
+
+    # ------------------------------------------------------------------ #
+    # Этапы
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def remove_disfluencies(text: str) -> str:
+        text = _DISFLUENCY_RE.sub("", text)
+        text = _STUTTER_RE.sub(r"\1", text)
+        text = _DOUBLED_RE.sub(r"\1", text)
+        text = re.sub(r"\s+([,.!?…])", r"\1", text)
+        text = re.sub(r"([,.!?…])(?:\s*,)+", r"\1", text)
+        text = re.sub(r",([.!?…])", r"\1", text)
+        return re.sub(r"\s{2,}", " ", text).strip()
+
+    @staticmethod
+    def split_segments(text: str) -> List[str]:
+        """Предложения по пунктуации; без пунктуации - окна по WINDOW_WORDS слов"""
+        sentences = [s.strip() for s in _SENTENCE_RE.findall(text) if _WORD_RE.search(s)]
+        segments: List[str] = []
+        for sentence in sentences:
+            words = sentence.split()
+            if len(words) <= WINDOW_WORDS * 2:
+                segments.append(sentence)
+                continue
+            for start in range(0, len(words), WINDOW_WORDS):
+                segments.append(" ".join(words[start:start + WINDOW_WORDS]))
+        return segments
+
+    def deduplicate(self, segments: List[str]) -> List[str]:
+        """
+        Убирает повторяющиеся сегменты: длинные - по всей транскрипции,
+        короткие реплики ("Да.", "Хорошо.") - только среди недавних
+        """
+        kept: List[str] = []
+        recent: List[str] = []
+        seen_long = set()
+        for segment in segments:
+            words = _WORD_RE.findall(segment.lower())
+            key = " ".join(words)
+            if not key or key in recent or key in seen_long:
+                continue
+            if len(words) >= self.LONG_SEGMENT_WORDS:
+                seen_long.add(key)
+            kept.append(segment)
+            recent.append(key)
+            if len(recent) > self.dedupe_window:
+                recent.pop(0)
+        return kept
+
+    @staticmethod
+    def _tfidf_matrix(segments: List[str]) -> "np.ndarray":
+        # numpy нужен только для длинных транскрипций - импорт не замедляет старт
+        import numpy as np
+
+        tokenized = [_WORD_RE.findall(segment.lower()) for segment in segments]
+        vocabulary: Dict[str, int] = {}
+        rows, cols, values = [], [], []
+        for row, words in enumerate(tokenized):
+            for word, count in Counter(words).items():
+                rows.append(row)
+                cols.append(vocabulary.setdefault(word, len(vocabulary)))
+                values.append(count)
+
+        tf = np.zeros((len(segments), max(1, len(vocabulary))), dtype=np.float32)
+        tf[rows, cols] = values
+        df = np.count_nonzero(tf, axis=0)
+        idf = np.log((1 + len(segments)) / (1 + df)) + 1.0
+        matrix = np.log1p(tf) * idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    @staticmethod
+    def textrank(matrix: "np.ndarray", damping: float = 0.85, iterations: int = 50) -> "np.ndarray":
+        """PageRank по графу косинусной близости предложений"""
+        import numpy as np
+
+        similarity = matrix @ matrix.T
+        np.fill_diagonal(similarity, 0.0)
+        out_weight = similarity.sum(axis=1, keepdims=True)
+        transition = np.divide(similarity, out_weight, out=np.zeros_like(similarity), where=out_weight > 0)
+        n = len(matrix)
+        scores = np.full(n, 1.0 / n, dtype=np.float32)
+        for _ in range(iterations):
+            updated = (1 - damping) / n + damping * (transition.T @ scores)
+            if np.abs(updated - scores).sum() < 1e-6:
+                return updated
+            scores = updated
+        return scores
+
+    def summarize(self, segments: List[str], budget: int) -> List[str]:
+        """Выбирает самые центральные предложения в пределах бюджета токенов"""
+        if len(segments) < 3:
+            return segments
+        import numpy as np
+
+        scores = self.textrank(self._tfidf_matrix(segments))
+        costs = np.array([estimate_tokens(segment) + 1 for segment in segments])
+
+        selected = np.zeros(len(segments), dtype=bool)
+        used = 0
+        for index in np.argsort(-scores, kind="stable"):
+            if used + costs[index] > budget:
+                continue
+            selected[index] = True
+            used += costs[index]
+        return [segment for segment, keep in zip(segments, selected) if keep]
+
+    # ------------------------------------------------------------------ #
+    # Публичный интерфейс
+    # ------------------------------------------------------------------ #
+
+    def compress(self, text: str) -> Dict[str, Any]:
+        """
+        Сжимает транскрипцию
+
+        Returns:
+            {"text", "original_tokens", "compressed_tokens", "ratio", "steps"}
+        """
+        original_tokens = estimate_tokens(text)
+        steps: List[str] = []
+
+        cleaned = self.remove_disfluencies(text)
+        if cleaned != text:
+            steps.append("disfluencies")
+
+        segments = self.split_segments(cleaned)
+        unique = self.deduplicate(segments)
+        if len(unique) < len(segments):
+            steps.append("dedupe")
+        compressed = " ".join(unique)
+
+        if self.token_budget and estimate_tokens(compressed) > self.token_budget:
+            unique = self.summarize(unique, self.token_budget)
+            compressed = " ".join(unique)
+            steps.append("extractive")
+
+        compressed_tokens = estimate_tokens(compressed)
+        ratio = round(compressed_tokens / original_tokens, 3) if original_tokens else 1.0
+        if steps:
+            logger.info(f"Transcript compressed {original_tokens} -> {compressed_tokens} tokens "
+                        f"(ratio {ratio}, steps: {', '.join(steps)})")
+        return {
+            "text": compressed,
+            "original_tokens": original_tokens,
+            "compressed_tokens": compressed_tokens,
+            "ratio": ratio,
+            "steps": steps
+        }
@@ -0,0 +1,102 @@
+import os
+import re
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Категории записи по возрастанию стоимости анализа
+CATEGORIES = ("empty", "trivial", "standard", "long")
+
+# Признаки заглушки вместо реальной транскрипции (см. GoogleSpeechService._get_fallback_transcription)
+_PLACEHOLDER_MARKERS = ("this is a fallback transcription",)
+
+
+class MeetingTriage:
+    """
+    Триаж записи перед анализом
+
+    Дешёвые эвристики (число слов, разнообразие лексики, длина в токенах)
+    однозначно решают большинство случаев. Пограничные записи
+    классифицирует быстрая модель. По категории оркестратор выбирает путь:
+    empty - без вызовов модели, trivial - один вызов быстрой модели,
+    standard и long - полный анализ.
+    """
+
+    def __init__(
+        self,
+        analysis_worker,
+        empty_words: int = None,
+        trivial_words: int = None,
+        standard_words: int = None,
+        long_tokens: int = None
+    ):
+        """
+        Args:
+            analysis_worker: AnalysisWorker для классификации быстрой моделью
+            empty_words: Меньше стольких слов - запись без речи
+            trivial_words: Меньше стольких слов - короткая запись без вопросов
+            standard_words: Больше стольких слов - встреча без вопросов;
+                между trivial_words и standard_words решает быстрая модель
+            long_tokens: Исходная транскрипция длиннее - длинная встреча
+        """
+        self.analysis_worker = analysis_worker
+        self.enabled = os.getenv("TRIAGE_ENABLED", "true").lower() != "false"
+        self.empty_words = empty_words or int(os.getenv("TRIAGE_EMPTY_WORDS", "5"))
+        self.trivial_words = trivial_words or int(os.getenv("TRIAGE_TRIVIAL_WORDS", "60"))
+        self.standard_words = standard_words or int(os.getenv("TRIAGE_STANDARD_WORDS", "250"))
+        self.long_tokens = long_tokens or int(os.getenv("TRIAGE_LONG_TOKENS", "12000"))
+
+    def _heuristic(self, transcription: str, original_tokens: int) -> Dict[str, Any]:
+        words = [w.lower() for w in _WORD_RE.findall(transcription or "")]
+        lowered = (transcription or "").lower()
+        # Разнообразие лексики считаем по окну: на длинных текстах оно падает само по себе
+        window = words[:200]
+        stats = {"words": len(words), "unique_ratio": round(len(set(window)) / len(window), 3) if window else 0.0}
+
+        if len(words) < self.empty_words:
+            return {**stats, "category": "empty", "reason": "no speech"}
+        if any(marker in lowered for marker in _PLACEHOLDER_MARKERS):
+            return {**stats, "category": "trivial", "reason": "placeholder transcription"}
+        if len(words) >= 30 and stats["unique_ratio"] < 0.2:
+            # Повтор одних и тех же слов: шум, музыка, зацикленное распознавание
+            return {**stats, "category": "trivial", "reason": "repetitive text"}
+        if original_tokens >= self.long_tokens:
+            return {**stats, "category": "long", "reason": "token count"}
+        if len(words) < self.trivial_words:
+            return {**stats, "category": "trivial", "reason": "word count"}
+        if len(words) > self.standard_words:
+            return {**stats, "category": "standard", "reason": "word count"}
+        return {**stats, "category": None, "reason": "borderline"}
+
+    async def classify(self, transcription: str, original_tokens: Optional[int] = None,
+                       priority: str = "interactive") -> Dict[str, Any]:
+        """
+        Определяет категорию записи
+
+        Args:
+            transcription: Текст для анализа (после сжатия)
+            original_tokens: Оценка токенов исходной транскрипции
+            priority: Очередь LLM-планировщика для быстрой модели
+
+        Returns:
+            {"category", "reason", "words", "unique_ratio", "model_used"}
+        """
+        if not self.enabled:
+            return {"category": "standard", "reason": "triage disabled", "model_used": False}
+
+        verdict = self._heuristic(transcription, original_tokens or 0)
+        verdict["model_used"] = False
+        if verdict["category"] is None:
+            answer = await self.analysis_worker.classify(transcription, priority)
+            verdict["model_used"] = answer is not None
+            if answer and (answer.get("category") == "trivial" or answer.get("is_meeting") is False):
+                verdict.update(category="trivial", reason="fast model")
+            else:
+                # Без ответа модели безопаснее сделать полный анализ
+                verdict.update(category="standard", reason="fast model" if answer else "fast model unavailable")
+
+        logger.info(f"Triage: {verdict['category']} ({verdict['reason']}, {verdict['words']} words)")
+        return verdict
@@ -0,0 +1,319 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import asyncio
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class UploadError(Exception):
+    """Ошибка протокола загрузки; status - HTTP-код для ответа"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class ResumableUploadStore:
+    """
+    Возобновляемые загрузки по частям
+
+    Сессия создаётся с известным размером файла: файл сразу выделяется на
+    диске целиком, а каждая часть пишется pwrite по своему смещению
+    ((номер - 1) * part_size), поэтому части можно слать параллельно и в
+    любом порядке, а сборка не требует повторного копирования. Состояние
+    сессии (принятые части) хранится рядом на диске, так что загрузку
+    можно продолжить и после перезапуска сервера.
+
+    Части одной сессии могут приходить в разные воркеры: состояние не
+    кэшируется в процессе, а каждое изменение (принятая часть, завершение,
+    отмена) перечитывает сессию с диска под блокировкой файла (flock) и
+    сохраняет её в той же блокировке.
+    """
+
+    WRITE_BUFFER = 1024 * 1024
+
+    def __init__(
+        self,
+        upload_dir: str = "temp_uploads",
+        part_size: int = None,
+        max_size: int = None,
+        session_ttl: float = None
+    ):
+        """
+        Args:
+            upload_dir: Директория временных файлов загрузки
+            part_size: Размер части по умолчанию (байт)
+            max_size: Максимальный размер файла (байт)
+            session_ttl: Время жизни незавершённой сессии (сек)
+        """
+        self.upload_dir = upload_dir
+        self.sessions_dir = os.path.join(upload_dir, "sessions")
+        self.part_size = part_size or int(os.getenv("UPLOAD_PART_SIZE", str(8 * 1024 * 1024)))
+        self.max_size = max_size or int(os.getenv("UPLOAD_MAX_BYTES", str(4 * 1024 ** 3)))
+        self.session_ttl = session_ttl or float(os.getenv("UPLOAD_SESSION_TTL", str(24 * 3600)))
+        os.makedirs(self.sessions_dir, exist_ok=True)
+
+    # ------------------------------------------------------------------ #
+    # Состояние сессий
+    # ------------------------------------------------------------------ #
+
+    def _session_path(self, upload_id: str) -> str:
+        return os.path.join(self.sessions_dir, f"{upload_id}.json")
+
+    def _persist(self, session: Dict[str, Any]) -> None:
+        path = self._session_path(session["upload_id"])
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(session, f, ensure_ascii=False)
+        os.replace(f"{path}.tmp", path)
+
+    def _load(self, upload_id: str, tenant: Optional[str] = None) -> Dict[str, Any]:
+        # upload_id приходит из URL - не даём выйти за пределы директории
+        if not upload_id.replace("-", "").isalnum():
+            raise UploadError("Upload session not found", 404)
+        try:
+            with open(self._session_path(upload_id), "r", encoding="utf-8") as f:
+                session = json.load(f)
+        except FileNotFoundError:
+            raise UploadError("Upload session not found", 404)
+        # Чужая сессия для арендатора не существует
+        if tenant is not None and session.get("tenant") != tenant:
+            raise UploadError("Upload session not found", 404)
+        return session
+
+    @contextmanager
+    def _locked(self, upload_id: str, tenant: Optional[str] = None):
+        """Блокировка сессии между процессами; внутри - свежая копия сессии с диска"""
+        if not upload_id.replace("-", "").isalnum():
+            raise UploadError("Upload session not found", 404)
+        with open(os.path.join(self.sessions_dir, f"{upload_id}.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield self._load(upload_id, tenant)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _part_range(self, session: Dict[str, Any], part_number: int) -> tuple:
+        if not 1 <= part_number <= session["parts"]:
+            raise UploadError(f"Part number must be between 1 and {session['parts']}")
+        offset = (part_number - 1) * session["part_size"]
+        return offset, min(session["part_size"], session["size"] - offset)
+
+    @staticmethod
+    def _status(session: Dict[str, Any]) -> Dict[str, Any]:
+        received = set(session["received"])
+        missing = [n for n in range(1, session["parts"] + 1) if n not in received]
+        received_bytes = sum(
+            min(session["part_size"], session["size"] - (n - 1) * session["part_size"]) for n in received
+        )
+        return {
+            "upload_id": session["upload_id"],
+            "meeting_id": session["meeting_id"],
+            "filename": session["filename"],
+            "size": session["size"],
+            "part_size": session["part_size"],
+            "parts": session["parts"],
+            "received_parts": sorted(received),
+            "missing_parts": missing,
+            "received_bytes": received_bytes,
+            "state": session["state"],
+            "created_at": session["created_at"]
+        }
+
+    # ------------------------------------------------------------------ #
+    # Протокол
+    # ------------------------------------------------------------------ #
+
+    def _create_sync(self, filename: str, size: int, part_size: int, tenant: Optional[str]) -> Dict[str, Any]:
+        self.cleanup_expired()
+        meeting_id = str(uuid.uuid4())
+        session = {
+            "upload_id": uuid.uuid4().hex,
+            "meeting_id": meeting_id,
+            "tenant": tenant,
+            "filename": filename,
+            "size": size,
+            "part_size": part_size,
+            "parts": max(1, -(-size // part_size)),
+            "received": [],
+            "state": "uploading",
+            "path": os.path.join(self.upload_dir, f"{meeting_id}_{filename}"),
+            "created_at": datetime.utcnow().isoformat(),
+            "expires_at": time.time() + self.session_ttl
+        }
+        fd = os.open(session["path"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            # Выделяем место сразу: нехватка диска - ошибка при создании, а не на 95%
+            if size and hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(fd, 0, size)
+            else:
+                os.ftruncate(fd, size)
+        finally:
+            os.close(fd)
+        self._persist(session)
+        return session
+
+    async def create(
+        self,
+        filename: str,
+        size: int,
+        part_size: Optional[int] = None,
+        tenant: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Создаёт сессию загрузки и выделяет файл размера size
+
+        Остальные операции с сессией, которым передан tenant, доступны
+        только создавшему её арендатору (для других - 404).
+
+        Raises:
+            UploadError: Некорректный размер или имя файла, нет места на диске
+        """
+        filename = os.path.basename(filename or "")
+        if not filename:
+            raise UploadError("Filename is required")
+        if size < 0 or size > self.max_size:
+            raise UploadError(f"File size must be between 0 and {self.max_size} bytes", 413)
+        part_size = part_size or self.part_size
+        if part_size < 64 * 1024:
+            raise UploadError("Part size must be at least 64 KiB")
+        try:
+            session = await asyncio.to_thread(self._create_sync, filename, size, part_size, tenant)
+        except OSError as e:
+            raise UploadError(f"Could not allocate upload file: {str(e)}", 507)
+        logger.info(f"Upload session {session['upload_id']} created: {filename}, {size} bytes, {session['parts']} parts")
+        return self._status(session)
+
+    async def write_part(
+        self,
+        upload_id: str,
+        part_number: int,
+        chunks: AsyncIterator[bytes],
+        tenant: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Пишет часть по её смещению, не буферизуя её целиком в памяти
+
+        Повторная отправка части перезаписывает те же байты, поэтому
+        клиент может безопасно повторять любые части.
+        """
+        session = await asyncio.to_thread(self._load, upload_id, tenant)
+        if session["state"] != "uploading":
+            raise UploadError(f"Upload is {session['state']}", 409)
+        offset, expected = self._part_range(session, part_number)
+
+        fd = await asyncio.to_thread(os.open, session["path"], os.O_WRONLY)
+        written = 0
+        try:
+            buffer = bytearray()
+            async for chunk in chunks:
+                if written + len(buffer) + len(chunk) > expected:
+                    raise UploadError(f"Part {part_number} is larger than {expected} bytes")
+                buffer += chunk
+                if len(buffer) >= self.WRITE_BUFFER:
+                    await asyncio.to_thread(os.pwrite, fd, bytes(buffer), offset + written)
+                    written += len(buffer)
+                    buffer.clear()
+            if buffer:
+                await asyncio.to_thread(os.pwrite, fd, bytes(buffer), offset + written)
+                written += len(buffer)
+        finally:
+            await asyncio.to_thread(os.close, fd)
+
+        if written != expected:
+            raise UploadError(f"Part {part_number} must be {expected} bytes, got {written}")
+
+        await asyncio.to_thread(self._mark_received, upload_id, part_number)
+        return {"upload_id": upload_id, "part": part_number, "offset": offset, "bytes": written}
+
+    def _mark_received(self, upload_id: str, part_number: int) -> None:
+        # Части, принятые другими воркерами, уже в файле сессии - дописываем свою к ним
+        with self._locked(upload_id) as session:
+            if session["state"] != "uploading":
+                raise UploadError(f"Upload is {session['state']}", 409)
+            if part_number not in session["received"]:
+                session["received"].append(part_number)
+                self._persist(session)
+
+    async def status(self, upload_id: str, tenant: Optional[str] = None) -> Dict[str, Any]:
+        session = await asyncio.to_thread(self._load, upload_id, tenant)
+        return self._status(session)
+
+    def _complete_sync(self, upload_id: str, tenant: Optional[str]) -> Dict[str, Any]:
+        with self._locked(upload_id, tenant) as session:
+            # uploading -> completed только один раз, в каком бы воркере ни вызвали complete
+            if session["state"] != "uploading":
+                raise UploadError(f"Upload is already {session['state']}", 409)
+            status = self._status(session)
+            if status["missing_parts"]:
+                raise UploadError(f"Missing parts: {status['missing_parts'][:20]}", 409)
+            session["state"] = "completed"
+            self._persist(session)
+        return session
+
+    async def complete(self, upload_id: str, tenant: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Завершает загрузку: все части должны быть приняты
+
+        Returns:
+            Сессия с путём к собранному файлу (path)
+
+        Raises:
+            UploadError: Не хватает частей (409) или загрузка уже завершена
+        """
+        session = await asyncio.to_thread(self._complete_sync, upload_id, tenant)
+        logger.info(f"Upload {upload_id} completed: {session['path']}")
+        return session
+
+    def _abort_sync(self, upload_id: str, tenant: Optional[str]) -> None:
+        with self._locked(upload_id, tenant) as session:
+            if session["state"] != "uploading":
+                raise UploadError(f"Upload is already {session['state']}", 409)
+            session["state"] = "aborted"
+            self._remove(session)
+
+    async def abort(self, upload_id: str, tenant: Optional[str] = None) -> None:
+        """
+        Отменяет незавершённую загрузку и удаляет её файл
+
+        Raises:
+            UploadError: Загрузка уже завершена или отменена (409)
+        """
+        await asyncio.to_thread(self._abort_sync, upload_id, tenant)
+
+    def _remove(self, session: Dict[str, Any]) -> None:
+        # Файл блокировки остаётся: его может ждать другой воркер (удаляет cleanup_expired)
+        for path in (session["path"], self._session_path(session["upload_id"])):
+            if os.path.exists(path) and (path != session["path"] or session["state"] != "completed"):
+                os.remove(path)
+
+    def cleanup_expired(self) -> List[str]:
+        """Удаляет просроченные сессии и их файлы, а также записи завершённых"""
+        removed = []
+        now = time.time()
+        for name in os.listdir(self.sessions_dir):
+            upload_id, ext = os.path.splitext(name)
+            if ext == ".lock":
+                # Блокировка сессии, которой уже нет: новых владельцев у неё не будет
+                if not os.path.exists(self._session_path(upload_id)):
+                    try:
+                        os.remove(os.path.join(self.sessions_dir, name))
+                    except FileNotFoundError:
+                        pass
+                continue
+            if ext != ".json":
+                continue
+            try:
+                with self._locked(upload_id) as session:
+                    if session["state"] == "completed" or session.get("expires_at", now) < now:
+                        self._remove(session)
+                        removed.append(upload_id)
+            except (OSError, ValueError, UploadError):
+                continue
+        return removed
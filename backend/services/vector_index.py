@@ -0,0 +1,389 @@
+import os
+import json
+import fcntl
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndex:
+    """
+    Дисковый индекс приближённого поиска ближайших соседей (IVF)
+
+    Векторы хранятся в memory-mapped файле и дописываются инкрементально.
+    Ключи объединяются в группы (например, векторы одной встречи): запись
+    группы заменяет её целиком, а ключи, которых в новой записи нет,
+    помечаются удалёнными (tombstone в keys.jsonl). После накопления
+    достаточного числа векторов обучаются центроиды (сферический k-means),
+    и поиск идёт только по nprobe ближайшим спискам вместо полного перебора.
+
+    Индекс могут открыть несколько процессов: запись идёт под
+    эксклюзивной блокировкой файла index.lock, а перед записью и поиском
+    процесс дочитывает чужие изменения (meta.json, хвост keys.jsonl,
+    новые центроиды) под разделяемой или той же блокировкой.
+    """
+
+    def __init__(self, directory: str, dim: int, nprobe: int = 8, train_threshold: int = 256):
+        """
+        Инициализация индекса
+
+        Args:
+            directory: Директория с файлами индекса
+            dim: Размерность векторов
+            nprobe: Сколько IVF-списков просматривать при поиске
+            train_threshold: Минимальное число векторов для обучения центроидов
+        """
+        self.directory = directory
+        self.dim = dim
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._assign_path = os.path.join(directory, "assignments.i32")
+        self._keys_path = os.path.join(directory, "keys.jsonl")
+        self._centroids_path = os.path.join(directory, "centroids.npy")
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._lock_path = os.path.join(directory, "index.lock")
+
+        self.count = 0
+        self.capacity = 0
+        self.trained_count = 0
+        self.centroids: Optional[np.ndarray] = None
+        self._vectors: Optional[np.memmap] = None
+        self._assignments: Optional[np.memmap] = None
+        self._lists: List[List[int]] = []
+        self._key_to_row: Dict[str, int] = {}
+        self._row_keys: List[Optional[str]] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._groups: Dict[str, Set[str]] = {}
+        self._key_group: Dict[str, str] = {}
+        # Докуда прочитаны файлы индекса: позиция в keys.jsonl и метка meta.json
+        self._keys_offset = 0
+        self._stamp: Optional[Tuple[int, int]] = None
+        with self._lock, self._file_lock(exclusive=True):
+            self._sync()
+            if self.capacity == 0:
+                self._grow(1024)
+        logger.info(f"VectorIndex loaded: {len(self._key_to_row)} active vectors in {self.directory}")
+
+    # ------------------------------------------------------------------ #
+    # Загрузка и хранение
+    # ------------------------------------------------------------------ #
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Блокировка индекса между процессами (запись - exclusive, дочитывание - разделяемая)"""
+        with open(self._lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _refresh(self) -> None:
+        """Дочитывает записи других процессов перед чтением"""
+        # Строки векторов после записи не меняются - сам поиск идёт без блокировки файла
+        with self._file_lock(exclusive=False):
+            self._sync()
+
+    def _file_stamp(self) -> Tuple[int, int]:
+        def stat(path: str, field: str) -> int:
+            try:
+                return getattr(os.stat(path), field)
+            except FileNotFoundError:
+                return -1
+        return stat(self._meta_path, "st_mtime_ns"), stat(self._keys_path, "st_size")
+
+    def _sync(self) -> None:
+        """Дочитывает изменения, записанные на диск (в том числе другими процессами)"""
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("dim") != self.dim:
+                raise ValueError(f"Index dim mismatch: {meta.get('dim')} != {self.dim}")
+            if meta["capacity"] != self.capacity:
+                self.capacity = meta["capacity"]
+                self._open_maps()
+            previous_count = self.count
+            self.count = meta["count"]
+            self._row_keys.extend([None] * (self.count - len(self._row_keys)))
+            self._payloads.extend([{}] * (self.count - len(self._payloads)))
+            retrained = meta.get("trained_count", 0) != self.trained_count
+            self.trained_count = meta.get("trained_count", 0)
+            if retrained and os.path.exists(self._centroids_path):
+                self.centroids = np.load(self._centroids_path)
+            self._read_keys()
+            if retrained or not self._lists:
+                self._rebuild_lists()
+            else:
+                # Новые строки из других процессов уже распределены по спискам на диске
+                assignments = np.asarray(self._assignments[previous_count:self.count])
+                for row in np.flatnonzero(assignments >= 0):
+                    self._lists[assignments[row]].append(previous_count + int(row))
+        self._stamp = stamp
+
+    def _read_keys(self) -> None:
+        if not os.path.exists(self._keys_path):
+            return
+        with open(self._keys_path, "rb") as f:
+            f.seek(self._keys_offset)
+            data = f.read()
+        # Только целые строки: недописанный хвост дочитается со следующей записью
+        end = data.rfind(b"\n") + 1
+        self._keys_offset += end
+        for line in data[:end].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("deleted"):
+                self._deactivate(record["key"])
+                continue
+            row = record["row"]
+            if row >= self.count:
+                # Хвост, не попавший в meta.json до сбоя
+                continue
+            # Записи индексов без групп: группа - встреча из payload
+            payload = record.get("payload", {})
+            self._activate(record["key"], row, payload, record.get("group", payload.get("meeting_id")))
+
+    def _open_maps(self) -> None:
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+",
+                                  shape=(self.capacity, self.dim))
+        self._assignments = np.memmap(self._assign_path, dtype=np.int32, mode="r+",
+                                      shape=(self.capacity,))
+
+    def _grow(self, needed: int) -> None:
+        new_capacity = max(needed, self.capacity * 2, 1024)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._assignments.flush()
+        self._vectors = None
+        self._assignments = None
+
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(new_capacity * self.dim * 4)
+        with open(self._assign_path, "ab") as f:
+            f.truncate(new_capacity * 4)
+        old_capacity = self.capacity
+        self.capacity = new_capacity
+        self._open_maps()
+        self._assignments[old_capacity:] = -1
+
+    def _save_meta(self) -> None:
+        self._vectors.flush()
+        self._assignments.flush()
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "dim": self.dim,
+                "count": self.count,
+                "capacity": self.capacity,
+                "trained_count": self.trained_count
+            }, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def _activate(self, key: str, row: int, payload: Dict[str, Any], group: Optional[str] = None) -> None:
+        previous = self._key_to_row.get(key)
+        if previous is not None:
+            self._row_keys[previous] = None
+        self._key_to_row[key] = row
+        self._row_keys[row] = key
+        self._payloads[row] = payload
+        if group is not None:
+            self._groups.setdefault(group, set()).add(key)
+            self._key_group[key] = group
+
+    def _deactivate(self, key: str) -> None:
+        row = self._key_to_row.pop(key, None)
+        if row is not None:
+            self._row_keys[row] = None
+        group = self._key_group.pop(key, None)
+        if group is not None:
+            self._groups[group].discard(key)
+
+    def _rebuild_lists(self) -> None:
+        if self.centroids is None:
+            self._lists = []
+            return
+        self._lists = [[] for _ in range(len(self.centroids))]
+        assignments = np.asarray(self._assignments[:self.count])
+        for row in np.flatnonzero(assignments >= 0):
+            self._lists[assignments[row]].append(int(row))
+
+    # ------------------------------------------------------------------ #
+    # Запись
+    # ------------------------------------------------------------------ #
+
+    def add(self, keys: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]],
+            group: Optional[str] = None) -> None:
+        """
+        Добавляет или заменяет векторы по ключам
+
+        Args:
+            keys: Уникальные ключи векторов
+            vectors: L2-нормированные векторы (len(keys), dim)
+            payloads: Метаданные для каждого вектора
+            group: Группа ключей, заменяемая целиком: её прежние ключи,
+                которых нет в keys, удаляются
+        """
+        with self._lock, self._file_lock(exclusive=True):
+            self._sync()
+            if group is not None:
+                self._remove(sorted(self._groups.get(group, set()) - set(keys)))
+            if len(keys) == 0:
+                return
+            self._append(keys, np.asarray(vectors, dtype=np.float32), payloads, group)
+
+    def remove(self, keys: List[str]) -> None:
+        """Удаляет векторы по ключам (строки остаются в файлах до перестроения)"""
+        with self._lock, self._file_lock(exclusive=True):
+            self._sync()
+            self._remove(keys)
+
+    def remove_group(self, group: str) -> None:
+        """Удаляет все векторы группы"""
+        with self._lock, self._file_lock(exclusive=True):
+            self._sync()
+            self._remove(sorted(self._groups.get(group, set())))
+
+    def _remove(self, keys: List[str]) -> None:
+        keys = [key for key in keys if key in self._key_to_row]
+        if not keys:
+            return
+        with open(self._keys_path, "a", encoding="utf-8") as f:
+            for key in keys:
+                f.write(json.dumps({"key": key, "deleted": True}, ensure_ascii=False) + "\n")
+                self._deactivate(key)
+        self._mark_read()
+        logger.info(f"VectorIndex removed {len(keys)} stale vectors")
+
+    def _mark_read(self) -> None:
+        # Свои записи уже применены в памяти - не перечитываем их при следующей синхронизации
+        self._keys_offset = os.path.getsize(self._keys_path)
+        self._stamp = self._file_stamp()
+
+    def _append(self, keys: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]],
+                group: Optional[str]) -> None:
+        if self.count + len(keys) > self.capacity:
+            self._grow(self.count + len(keys))
+
+        start = self.count
+        rows = np.arange(start, start + len(keys))
+        self._vectors[rows] = vectors
+        if self.centroids is not None:
+            assigned = np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+            self._assignments[rows] = assigned
+            for row, list_id in zip(rows, assigned):
+                self._lists[list_id].append(int(row))
+
+        self._row_keys.extend([None] * len(keys))
+        self._payloads.extend([{}] * len(keys))
+        with open(self._keys_path, "a", encoding="utf-8") as f:
+            for key, row, payload in zip(keys, rows, payloads):
+                record = {"row": int(row), "key": key, "payload": payload}
+                if group is not None:
+                    record["group"] = group
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._activate(key, int(row), payload, group)
+
+        self.count += len(keys)
+        self._maybe_train()
+        self._save_meta()
+        self._mark_read()
+
+    def _maybe_train(self) -> None:
+        active = len(self._key_to_row)
+        if active < self.train_threshold:
+            return
+        # Переобучаем только при кратном росте индекса - амортизированно O(1) на вставку
+        if self.centroids is not None and active < self.trained_count * 4:
+            return
+
+        active_rows = np.fromiter(self._key_to_row.values(), dtype=np.int64)
+        nlist = int(min(1024, max(8, np.sqrt(active))))
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(active_rows, size=min(len(active_rows), nlist * 64), replace=False))
+        sample = np.asarray(self._vectors[sample_rows])
+
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(10):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            sums[empty] = centroids[empty]
+            norms[empty] = 1.0
+            centroids = sums / norms
+
+        self.centroids = centroids.astype(np.float32)
+        chunk = 8192
+        for offset in range(0, self.count, chunk):
+            block = np.asarray(self._vectors[offset:offset + chunk])
+            self._assignments[offset:offset + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        np.save(self._centroids_path, self.centroids)
+        self.trained_count = active
+        self._rebuild_lists()
+        logger.info(f"VectorIndex trained: {nlist} lists over {active} vectors")
+
+    # ------------------------------------------------------------------ #
+    # Чтение
+    # ------------------------------------------------------------------ #
+
+    def get_vector(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            self._refresh()
+            row = self._key_to_row.get(key)
+            if row is None:
+                return None
+            return np.array(self._vectors[row])
+
+    def search(self, query: np.ndarray, k: int = 10, kind: Optional[str] = None) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Ищет k ближайших векторов по косинусной близости
+
+        Args:
+            query: L2-нормированный вектор запроса
+            k: Количество результатов
+            kind: Если задан - учитываются только векторы с payload["kind"] == kind
+
+        Returns:
+            Список (ключ, score, payload) по убыванию score
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        with self._lock:
+            self._refresh()
+            if self.centroids is None:
+                candidates = np.fromiter(self._key_to_row.values(), dtype=np.int64)
+            else:
+                probe = np.argsort(-(self.centroids @ query))[:self.nprobe]
+                candidates = np.fromiter(
+                    (row for list_id in probe for row in self._lists[list_id]),
+                    dtype=np.int64
+                )
+            if kind is not None and len(candidates):
+                candidates = candidates[[self._payloads[row].get("kind") == kind for row in candidates]]
+            # Оставляем только актуальные версии ключей
+            if len(candidates):
+                candidates = candidates[[self._row_keys[row] is not None for row in candidates]]
+            if not len(candidates):
+                return []
+
+            scores = np.asarray(self._vectors[candidates]) @ query
+            top = min(k, len(scores))
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best])]
+            return [
+                (self._row_keys[candidates[i]], float(scores[i]), self._payloads[candidates[i]])
+                for i in best
+            ]
@@ -0,0 +1,225 @@
+"""
+Локальный stub-сервер, совместимый с Anthropic Messages API и с
+/v1/chat/completions сервера llama.cpp
+
+Позволяет прогнать весь конвейер (загрузка -> транскрипция -> анализ) без
+сети и без модели: ответы строятся эвристиками по транскрипции
+(services.llm_backends.stub_response) в формате активных шаблонов промптов.
+
+Запуск:
+    python stub_llm_server.py --port 8089
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8089 ANTHROPIC_API_KEY=stub python main.py
+    ANALYSIS_BACKEND=local LOCAL_LLM_URL=http://127.0.0.1:8089 python main.py
+"""
+import os
+import json
+import uuid
+import random
+import asyncio
+import argparse
+import itertools
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from services.prompts import TRANSCRIPT_TEMPLATE, registry
+from services.llm_backends import stub_response
+
+CHUNK_SIZE = 16
+_TRANSCRIPT_PREFIX = TRANSCRIPT_TEMPLATE.split("{transcription}")[0]
+
+
+def _text_blocks(content: Any) -> List[str]:
+    if isinstance(content, str):
+        return [content]
+    return [block.get("text", "") for block in content if block.get("type") == "text"]
+
+
+def _parse_request(body: Dict[str, Any]):
+    """Выделяет из запроса транскрипцию и имя шаблона по тексту инструкции"""
+    blocks = [text for message in body.get("messages", []) if message.get("role") == "user"
+              for text in _text_blocks(message.get("content", ""))]
+    templates = {t.instructions: name for name, t in registry.active().items()}
+
+    transcription, template_name = "", "content_analysis"
+    for text in blocks:
+        if text in templates:
+            template_name = templates[text]
+        elif text.startswith(_TRANSCRIPT_PREFIX):
+            transcription = text[len(_TRANSCRIPT_PREFIX):]
+        else:
+            transcription = transcription or text
+    return transcription, template_name
+
+
+def _usage(transcription: str, text: str) -> Dict[str, int]:
+    return {"input_tokens": len(transcription) // 3, "output_tokens": len(text) // 3,
+            "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _load_replay(replay_dir: Optional[str]) -> Dict[str, List[str]]:
+    """
+    Записанные ответы: <replay_dir>/<шаблон>.json или <replay_dir>/<шаблон>/*.json,
+    выдаются по кругу
+    """
+    recorded: Dict[str, List[str]] = {}
+    if not replay_dir:
+        return recorded
+    for entry in sorted(os.listdir(replay_dir)):
+        path = os.path.join(replay_dir, entry)
+        name, ext = os.path.splitext(entry)
+        files = [path] if ext == ".json" else (
+            [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith(".json")]
+            if os.path.isdir(path) else []
+        )
+        for file_path in files:
+            with open(file_path, "r", encoding="utf-8") as f:
+                recorded.setdefault(name, []).append(f.read())
+    return recorded
+
+
+def create_app(
+    first_token_latency: float = 0.0,
+    tokens_per_second: float = 0.0,
+    error_rate: float = 0.0,
+    replay_dir: Optional[str] = None,
+    seed: Optional[int] = None,
+    slots: int = 6
+) -> FastAPI:
+    """
+    Создаёт stub-приложение
+
+    Args:
+        first_token_latency: Задержка до первого фрагмента ответа (сек)
+        tokens_per_second: Скорость выдачи ответа (0 - без задержки)
+        error_rate: Доля запросов, на которые отвечаем 529 (overloaded) или 429
+        replay_dir: Директория с записанными ответами вместо эвристик
+        seed: Seed генератора ошибок для воспроизводимых прогонов
+        slots: Число слотов, которое отдаёт /props (как --parallel у llama-server)
+    """
+    stub = FastAPI(title="AudioInsight LLM stub")
+    recorded = _load_replay(replay_dir)
+    counters = {name: itertools.count() for name in recorded}
+    rng = random.Random(seed)
+    stub.state.stats = {"requests": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def response_text(transcription: str, template_name: str) -> str:
+        if template_name in recorded:
+            return recorded[template_name][next(counters[template_name]) % len(recorded[template_name])]
+        return json.dumps(stub_response(transcription, template_name), ensure_ascii=False)
+
+    @stub.post("/v1/messages")
+    async def create_message(request: Request):
+        stub.state.stats["requests"] += 1
+        if error_rate and rng.random() < error_rate:
+            stub.state.stats["errors"] += 1
+            status = rng.choice([429, 529])
+            error_type = "rate_limit_error" if status == 429 else "overloaded_error"
+            return JSONResponse(
+                {"type": "error", "error": {"type": error_type, "message": "stub error"}},
+                status_code=status, headers={"retry-after": "0"}
+            )
+
+        body = await request.json()
+        transcription, template_name = _parse_request(body)
+        text = response_text(transcription, template_name)
+        usage = _usage(transcription, text)
+        message = {
+            "id": f"msg_stub_{uuid.uuid4().hex[:16]}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "stub"),
+            "content": [],
+            "stop_reason": None,
+            "stop_sequence": None,
+            "usage": {**usage, "output_tokens": 1}
+        }
+        chunk_delay = CHUNK_SIZE / 3 / tokens_per_second if tokens_per_second else 0.0
+
+        if not body.get("stream"):
+            await asyncio.sleep(first_token_latency + chunk_delay * len(text) / CHUNK_SIZE)
+            message.update(content=[{"type": "text", "text": text}], stop_reason="end_turn", usage=usage)
+            return JSONResponse(message)
+
+        async def events():
+            yield _sse("message_start", {"type": "message_start", "message": message})
+            await asyncio.sleep(first_token_latency)
+            yield _sse("content_block_start", {"type": "content_block_start", "index": 0,
+                                               "content_block": {"type": "text", "text": ""}})
+            for start in range(0, len(text), CHUNK_SIZE):
+                yield _sse("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                   "delta": {"type": "text_delta", "text": text[start:start + CHUNK_SIZE]}})
+                await asyncio.sleep(chunk_delay)
+            yield _sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+            yield _sse("message_delta", {"type": "message_delta",
+                                         "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                         "usage": {"output_tokens": usage["output_tokens"]}})
+            yield _sse("message_stop", {"type": "message_stop"})
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @stub.get("/props")
+    async def props():
+        # Как у llama-server: сколько запросов сервер декодирует одним батчем
+        return {"total_slots": slots}
+
+    @stub.post("/v1/chat/completions")
+    async def create_chat_completion(request: Request):
+        stub.state.stats["requests"] += 1
+        body = await request.json()
+        transcription, template_name = _parse_request(body)
+        text = response_text(transcription, template_name)
+        usage = _usage(transcription, text)
+        chunk_delay = CHUNK_SIZE / 3 / tokens_per_second if tokens_per_second else 0.0
+        completion_id = f"chatcmpl-stub-{uuid.uuid4().hex[:16]}"
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None, **extra) -> str:
+            data = {"id": completion_id, "object": "chat.completion.chunk", "model": body.get("model", "stub"),
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra}
+            return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+        async def events():
+            # Одновременные запросы - то, что llama-server декодировал бы одним батчем
+            stats = stub.state.stats
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+            try:
+                await asyncio.sleep(first_token_latency)
+                for start in range(0, len(text), CHUNK_SIZE):
+                    yield chunk({"content": text[start:start + CHUNK_SIZE]})
+                    await asyncio.sleep(chunk_delay)
+                yield chunk({}, "stop", usage={"prompt_tokens": usage["input_tokens"],
+                                               "completion_tokens": usage["output_tokens"]})
+                yield "data: [DONE]\n\n"
+            finally:
+                stats["in_flight"] -= 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return stub
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Stub-сервер Anthropic Messages API и llama-server для офлайн-тестов")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--first-token-latency", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--replay-dir", help="Директория с записанными ответами")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--slots", type=int, default=6, help="Слотов llama-server для /props")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.first_token_latency, args.tokens_per_second, args.error_rate,
+                           args.replay_dir, args.seed, args.slots),
+                host=args.host, port=args.port, log_level="warning")
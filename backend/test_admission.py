@@ -0,0 +1,113 @@
+"""
+Тесты контроля допуска (AdmissionController) и квот арендаторов (TenantRegistry)
+
+Контроллеры на одном файле хранилища играют роль разных воркеров.
+
+Запуск (из backend/):
+    python -m pytest -q test_admission.py
+"""
+import json
+import time
+
+import pytest
+
+from services.admission import AdmissionController, AdmissionRejected
+from services.status_store import SQLiteStatusStore
+from services.tenants import TenantRegistry
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteStatusStore(str(tmp_path / "status.db"))
+
+
+def controller(store, tmp_path, **limits) -> AdmissionController:
+    return AdmissionController(min_free_disk_mb=0.001, disk_path=str(tmp_path), store=store, **limits)
+
+
+def test_rejects_over_max_jobs(store, tmp_path):
+    admission = controller(store, tmp_path, max_jobs=2)
+    admission.admit("m1", 60)
+    admission.admit("m2", 60)
+    with pytest.raises(AdmissionRejected) as error:
+        admission.admit("m3", 60)
+    assert error.value.reason == "jobs"
+    assert error.value.retry_after >= 1
+    assert error.value.headers() == {"Retry-After": str(error.value.retry_after)}
+
+    admission.release("m1")
+    admission.admit("m3", 60)
+    assert admission.get_metrics()["jobs_in_flight"] == 2
+
+
+def test_rejects_over_audio_seconds(store, tmp_path):
+    admission = controller(store, tmp_path, max_jobs=10, max_audio_seconds=100)
+    admission.admit("m1", 80)
+    with pytest.raises(AdmissionRejected) as error:
+        admission.check(30)
+    assert error.value.reason == "audio_seconds"
+    admission.check(20)
+
+
+def test_rejects_without_disk_space(store, tmp_path):
+    admission = AdmissionController(min_free_disk_mb=10 ** 12, disk_path=str(tmp_path), store=store)
+    with pytest.raises(AdmissionRejected) as error:
+        admission.check()
+    assert error.value.reason == "disk"
+
+
+def test_limits_are_shared_between_workers(store, tmp_path):
+    """Записи в работе одного воркера учитываются в лимите другого"""
+    worker_a = controller(store, tmp_path, max_jobs=2)
+    worker_b = controller(SQLiteStatusStore(store.path), tmp_path, max_jobs=2)
+    worker_a.admit("m1")
+    worker_b.admit("m2")
+    with pytest.raises(AdmissionRejected):
+        worker_a.admit("m3")
+    # Освободить запись может любой воркер
+    worker_a.release("m2")
+    worker_b.admit("m3")
+
+
+def test_release_updates_processing_ratio(store, tmp_path):
+    admission = controller(store, tmp_path)
+    ratio = admission.processing_ratio
+    admission.admit("m1", 1000)
+    admission.release("m1")
+    assert admission.processing_ratio < ratio
+    admission.release("m1")
+    assert admission.counters["completed"] == 1
+
+
+def registry(store, tmp_path, tenants) -> TenantRegistry:
+    config = tmp_path / "tenants.json"
+    config.write_text(json.dumps({"tenants": tenants}), encoding="utf-8")
+    return TenantRegistry(config_path=str(config), store=store)
+
+
+def test_quota_counts_usage_and_reservations(store, tmp_path):
+    """Квота учитывает потребление и резервы принятых записей во всех воркерах"""
+    worker_a = registry(store, tmp_path, {"sales": {"daily_audio_seconds": 100}})
+    worker_b = registry(SQLiteStatusStore(store.path), tmp_path, {"sales": {"daily_audio_seconds": 100}})
+    sales = worker_a.get("sales")
+
+    worker_a.record("sales", jobs=1, audio_seconds=50)
+    worker_b.reserve("sales", "m1", 40)
+    worker_a.check_quota(sales, 10)
+    with pytest.raises(AdmissionRejected) as error:
+        worker_a.check_quota(sales, 11)
+    assert error.value.reason == "quota"
+    assert error.value.details == {"tenant": "sales", "quota": "audio_seconds"}
+
+    worker_a.release("m1")
+    worker_b.check_quota(sales, 50)
+    assert worker_b.get_metrics()["sales"]["usage"]["jobs"] == 1
+
+
+def test_llm_token_quota(store, tmp_path):
+    tenants = registry(store, tmp_path, {"sales": {"daily_llm_tokens": 1000}})
+    tenants.record("sales", llm_tokens=1000)
+    with pytest.raises(AdmissionRejected) as error:
+        tenants.check_quota(tenants.get("sales"))
+    assert error.value.details["quota"] == "llm_tokens"
+    assert error.value.retry_after <= 86400 - time.time() % 86400 + 1
@@ -0,0 +1,97 @@
+"""
+Тесты справедливой очереди арендаторов (FairScheduler)
+
+Запуск (из backend/):
+    python -m pytest -q test_fair_scheduler.py
+"""
+import json
+import asyncio
+
+from services.fair_scheduler import FairScheduler
+from services.tenants import TenantRegistry
+
+
+def scheduler(tmp_path, capacity: int, tenants: dict) -> FairScheduler:
+    config = tmp_path / "tenants.json"
+    config.write_text(json.dumps({"tenants": tenants}), encoding="utf-8")
+    return FairScheduler("test", capacity, TenantRegistry(config_path=str(config)))
+
+
+async def run_jobs(stage: FairScheduler, jobs: list, hold: float = 0.001) -> list:
+    """Запускает задачи (арендатор, стоимость) разом; возвращает порядок выдачи слотов"""
+    order = []
+    active = {}
+    peak = {}
+
+    async def job(tenant_id: str, cost: float) -> None:
+        async with stage.slot(cost, tenant_id):
+            order.append(tenant_id)
+            active[tenant_id] = active.get(tenant_id, 0) + 1
+            peak[tenant_id] = max(peak.get(tenant_id, 0), active[tenant_id])
+            await asyncio.sleep(hold)
+            active[tenant_id] -= 1
+
+    await asyncio.gather(*(job(tenant_id, cost) for tenant_id, cost in jobs))
+    return order, peak
+
+
+def test_bulk_tenant_does_not_starve_others(tmp_path):
+    """Арендатор с большой очередью не задерживает короткую очередь другого"""
+    stage = scheduler(tmp_path, 1, {"bulk": {}, "small": {}})
+    order, _ = asyncio.run(run_jobs(stage, [("bulk", 1.0)] * 30 + [("small", 1.0)] * 5))
+    last_small = max(i for i, tenant_id in enumerate(order) if tenant_id == "small")
+    assert last_small <= 11
+    assert stage.get_metrics()["tenants"]["bulk"]["granted"] == 30
+
+
+def test_weights_split_throughput(tmp_path):
+    """При общей очереди доля слотов пропорциональна весу"""
+    stage = scheduler(tmp_path, 1, {"gold": {"weight": 3}, "basic": {"weight": 1}})
+    order, _ = asyncio.run(run_jobs(stage, [("gold", 1.0)] * 40 + [("basic", 1.0)] * 40))
+    first = order[:40]
+    assert 28 <= first.count("gold") <= 32
+
+
+def test_expensive_requests_take_bigger_share(tmp_path):
+    stage = scheduler(tmp_path, 1, {"a": {}, "b": {}})
+    order, _ = asyncio.run(run_jobs(stage, [("a", 4.0)] * 10 + [("b", 1.0)] * 40))
+    assert order[:25].count("b") >= 18
+
+
+def test_max_concurrency_per_tenant(tmp_path):
+    """Арендатор не занимает больше max_concurrency слотов; остальные слоты достаются другим"""
+    stage = scheduler(tmp_path, 4, {"bulk": {"max_concurrency": 1}, "other": {"max_concurrency": 3}})
+    _, peak = asyncio.run(run_jobs(stage, [("bulk", 1.0)] * 6 + [("other", 1.0)] * 6, hold=0.01))
+    assert peak == {"bulk": 1, "other": 3}
+    assert stage.in_use == 0
+
+
+def test_cancelled_waiter_leaves_queue(tmp_path):
+    stage = scheduler(tmp_path, 1, {})
+
+    async def scenario():
+        holder_in = asyncio.Event()
+        release = asyncio.Event()
+
+        async def holder():
+            async with stage.slot(1.0, "a"):
+                holder_in.set()
+                await release.wait()
+
+        async def waiter():
+            async with stage.slot(1.0, "b"):
+                pass
+
+        first = asyncio.create_task(holder())
+        await holder_in.wait()
+        second = asyncio.create_task(waiter())
+        await asyncio.sleep(0.01)
+        second.cancel()
+        await asyncio.gather(second, return_exceptions=True)
+        assert stage.get_metrics()["queued"] == 0
+        release.set()
+        await first
+        async with stage.slot(1.0, "c"):
+            assert stage.in_use == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,88 @@
+"""
+Тесты инкрементального парсера JSON-ответа LLM (IncrementalJSONParser)
+
+Запуск (из backend/):
+    python -m pytest -q test_json_stream.py
+"""
+import json
+
+import pytest
+
+from services.json_stream import IncrementalJSONParser
+
+RESPONSE = {
+    "topics": [
+        {"topic": "Релиз", "duration": "10 минут"},
+        {"topic": "Бюджет \"Q3\"", "duration": "5 минут"}
+    ],
+    "decisions": [],
+    "meetingType": "planning",
+    "effectivenessScore": 7
+}
+
+
+def feed_in_chunks(parser: IncrementalJSONParser, text: str, size: int) -> None:
+    for start in range(0, len(text), size):
+        parser.feed(text[start:start + size])
+
+
+@pytest.mark.parametrize("size", [1, 3, 17, 10_000])
+def test_items_are_emitted_as_they_complete(size):
+    """Элементы массивов и поля корня отдаются по одному при любом разбиении на куски"""
+    items = []
+    parser = IncrementalJSONParser(lambda path, value: items.append((path, value)))
+    feed_in_chunks(parser, "Вот анализ:\n```json\n" + json.dumps(RESPONSE, ensure_ascii=False) + "\n```", size)
+
+    assert parser.complete
+    assert parser.salvage() == RESPONSE
+    assert items == [
+        (("topics", 0), RESPONSE["topics"][0]),
+        (("topics", 1), RESPONSE["topics"][1]),
+        (("meetingType",), "planning"),
+        (("effectivenessScore",), 7)
+    ]
+
+
+def test_item_is_emitted_before_response_ends():
+    items = []
+    parser = IncrementalJSONParser(lambda path, value: items.append(path))
+    parser.feed('{"topics": [{"topic": "a"}, {"topic": ')
+    assert items == [("topics", 0)]
+    assert not parser.complete
+
+
+def test_salvage_truncated_object():
+    """Оборванный ответ: остаются завершённые поля и элементы, недописанный элемент отбрасывается"""
+    parser = IncrementalJSONParser()
+    parser.feed('{"meetingType": "standup", "topics": [{"topic": "a"}, {"topic": "b", "dur')
+    assert not parser.complete
+    assert parser.salvage() == {"meetingType": "standup", "topics": [{"topic": "a"}]}
+
+
+def test_salvage_truncated_root_array():
+    parser = IncrementalJSONParser()
+    parser.feed('[{"task": "Написать отчёт"}, {"task": "Созвон, \\"срочно\\""}, {"task": "Не')
+    assert parser.root_kind == "["
+    assert parser.salvage() == [{"task": "Написать отчёт"}, {"task": "Созвон, \"срочно\""}]
+
+
+def test_salvage_without_root():
+    parser = IncrementalJSONParser()
+    parser.feed("Извините, не могу")
+    assert parser.salvage() is None
+
+
+def test_text_after_root_is_ignored():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": 1}\nЕщё текст {"b": 2}')
+    assert parser.complete
+    assert parser.salvage() == {"a": 1}
+
+
+def test_callback_errors_do_not_stop_parsing():
+    def on_item(path, value):
+        raise ValueError("boom")
+
+    parser = IncrementalJSONParser(on_item)
+    parser.feed('{"topics": [1, 2], "score": 3}')
+    assert parser.salvage() == {"topics": [1, 2], "score": 3}
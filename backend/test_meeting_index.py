@@ -0,0 +1,74 @@
+"""
+Тесты индекса встреч (MeetingIndex): keyset-пагинация, фильтры, арендаторы
+
+Запуск (из backend/):
+    python -m pytest -q test_meeting_index.py
+"""
+import pytest
+
+from services.meeting_index import MeetingIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = MeetingIndex(str(tmp_path / "meetings.db"))
+    for i in range(25):
+        index.upsert(f"m{i:02d}", {
+            "tenant": "sales",
+            "filename": f"Weekly-Sync-{i}.mp3" if i % 2 else f"standup-{i}.wav",
+            "status": "completed" if i % 3 else "error",
+            # Встречи попарно с одинаковым временем - порядок внутри пары по id
+            "analysis_timestamp": f"2024-05-{1 + i // 2:02d}T10:00:00",
+            "content": {"effectivenessScore": i % 10}
+        })
+    index.upsert("other", {"tenant": "support", "filename": "standup-x.wav", "status": "completed"})
+    return index
+
+
+def all_pages(index: MeetingIndex, limit: int, **filters) -> list:
+    items, cursor, pages = [], None, 0
+    while True:
+        page, cursor = index.query("sales", limit=limit, cursor=cursor, fields=("id",), **filters)
+        items += [item["id"] for item in page]
+        pages += 1
+        if cursor is None:
+            return items
+        assert pages < 100
+
+
+@pytest.mark.parametrize("limit", [1, 2, 7, 25, 100])
+def test_pages_cover_all_meetings_once(index, limit):
+    """Страницы без пропусков и повторов, новые первыми, при равном created_at - по id"""
+    expected = sorted((f"m{i:02d}" for i in range(25)), key=lambda m: (int(m[1:]) // 2, m), reverse=True)
+    assert all_pages(index, limit) == expected
+
+
+def test_cursor_is_stable_under_inserts(index):
+    """Новые встречи не сдвигают уже выданную страницу"""
+    first, cursor = index.query("sales", limit=5, fields=("id",))
+    index.upsert("newest", {"tenant": "sales", "analysis_timestamp": "2030-01-01T00:00:00"})
+    rest, _ = index.query("sales", limit=100, cursor=cursor, fields=("id",))
+    ids = [item["id"] for item in first + rest]
+    assert len(ids) == len(set(ids)) == 25
+
+
+def test_filters(index):
+    assert len(all_pages(index, 4, statuses=["error"])) == 9
+    assert len(all_pages(index, 4, filename="weekly-sync")) == 12
+    assert all_pages(index, 4, filename="p-1") == ["m18", "m16", "m14", "m12", "m10"]
+    # Подстрока короче триграммы ищется через LIKE
+    assert sorted(all_pages(index, 4, filename="-2")) == ["m02", "m20", "m21", "m22", "m23", "m24"]
+    assert all_pages(index, 4, created_after="2024-05-12", created_before="2024-05-13") == ["m23", "m22"]
+
+
+def test_projection_and_tenants(index):
+    page, _ = index.query("support", fields=("id", "filename", "tenant"))
+    assert page == [{"id": "other", "filename": "standup-x.wav", "tenant": "support"}]
+    assert index.ids("support") == {"other"}
+
+
+def test_invalid_arguments(index):
+    with pytest.raises(ValueError):
+        index.query("sales", cursor="not-a-cursor")
+    with pytest.raises(ValueError):
+        index.query("sales", fields=("transcription",))
@@ -0,0 +1,81 @@
+"""
+Тесты схемы ответа встречи (models.meeting_result): сохранённый формат
+оркестратора и старый snake_case-формат приводятся к формату фронтенда
+
+Запуск (из backend/):
+    python -m pytest -q test_meeting_result.py
+"""
+from models.meeting_result import fallback_meeting_result, meeting_result_adapter
+
+
+def validate(data):
+    return meeting_result_adapter.validate_python(data)
+
+
+def test_snake_case_aliases():
+    result = validate({
+        "id": "m1",
+        "uploaded_at": "2024-05-01T10:00:00",
+        "processed_at": "2024-05-01T10:05:00",
+        "transcript": {"text": "Привет", "participant_count": 3},
+        "content": {"meeting_type": "standup", "effectiveness_score": 8},
+        "action_items": [{"description": "Написать отчёт", "assignee": "Анна"}]
+    })
+    assert result["uploadedAt"] == "2024-05-01T10:00:00"
+    assert result["processedAt"] == "2024-05-01T10:05:00"
+    assert result["transcript"]["participantCount"] == 3
+    assert result["content"]["meetingType"] == "standup"
+    assert result["content"]["effectivenessScore"] == 8
+    assert result["actionItems"][0]["task"] == "Написать отчёт"
+
+
+def test_orchestrator_format():
+    """Формат оркестратора: текст в transcription, риски внутри insights, язык распознавания"""
+    result = validate({
+        "id": "m1",
+        "transcription": "Текст встречи",
+        "language": "ru-RU",
+        "insights": {
+            "teamDynamics": "Хорошая вовлечённость",
+            "processRecommendations": ["Короче стендапы"],
+            "followUpSuggestions": ["Созвон в пятницу", 42],
+            "riskFlags": ["Срыв срока"]
+        },
+        "content": {"decisions": ["Выпускаем в понедельник", {"decision": "Нанять QA"}, 7]}
+    })
+    assert result["transcription"] == "Текст встречи"
+    assert result["transcript"]["text"] == "Текст встречи"
+    assert result["transcript"]["language"] == "ru-RU"
+    assert result["risks"] == ["Срыв срока"]
+    assert [insight["category"] for insight in result["insights"]] == ["teamwork", "process", "followup"]
+    assert [decision["decision"] for decision in result["content"]["decisions"]] == [
+        "Выпускаем в понедельник", "Нанять QA"
+    ]
+
+
+def test_action_items_are_numbered_and_invalid_dropped():
+    result = validate({"actionItems": [{"task": "A"}, "не задача", {"task": "B", "id": 7}, {"task": "C"}]})
+    assert [(item["id"], item["task"]) for item in result["actionItems"]] == [("1", "A"), ("7", "B"), ("3", "C")]
+    assert result["actionItems"][0]["assignee"] == "Unassigned"
+
+
+def test_defaults_for_missing_sections():
+    result = validate({"content": "не объект", "transcript": None})
+    assert result["id"] == "unknown"
+    assert result["transcription"] == "No transcript available"
+    assert result["content"]["topics"] == []
+    assert result["content"]["meetingType"] == "general"
+    assert result["actionItems"] == [] and result["insights"] == [] and result["risks"] == []
+
+
+def test_partial_only_while_processing():
+    partial = {"topics": [{"topic": "Релиз"}]}
+    assert validate({"status": "processing", "partial": partial})["partial"] == partial
+    assert "partial" not in validate({"status": "completed", "partial": partial})
+
+
+def test_fallback_result():
+    result = fallback_meeting_result("m1", None, "bad data")
+    assert result["id"] == "m1" and result["filename"] == "unknown.mp3"
+    assert result["risks"] == ["Data validation failed: bad data"]
+    assert result["content"]["meetingType"] == "error"
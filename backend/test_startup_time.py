@@ -0,0 +1,85 @@
+"""
+Проверка времени старта API
+
+Импортирует main.py в отдельном процессе с -X importtime и падает, если
+импорт дольше бюджета или при старте подгружаются тяжёлые SDK, которые
+должны импортироваться лениво (в фоне после старта или при первом запросе).
+
+Запуск (из backend/):
+    python test_startup_time.py
+    STARTUP_IMPORT_BUDGET_MS=400 python test_startup_time.py --runs 5
+"""
+import os
+import sys
+import argparse
+import logging
+import statistics
+import subprocess
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Модули, которые не должны импортироваться при старте
+LAZY_MODULES = ("anthropic", "numpy", "google.cloud", "sentence_transformers")
+
+
+def measure_import(module: str = "main") -> dict:
+    """Один холодный импорт: суммарное время модуля (мкс) и список импортированных модулей"""
+    env = {**os.environ, "ANTHROPIC_API_KEY": os.getenv("ANTHROPIC_API_KEY", "startup-test"),
+           "STARTUP_WARMUP": "false", "PYTHONDONTWRITEBYTECODE": "1"}
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{process.stderr[-2000:]}")
+
+    cumulative, imported = None, set()
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if not parts[1].isdigit():
+            continue  # заголовок таблицы
+        name = parts[2]
+        imported.add(name)
+        if name == module:
+            cumulative = int(parts[1])
+    return {"microseconds": cumulative or 0, "modules": imported}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Бюджет времени импорта main.py")
+    parser.add_argument("--runs", type=int, default=3, help="Число замеров (берётся медиана)")
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "600")))
+    args = parser.parse_args()
+
+    runs = [measure_import() for _ in range(args.runs)]
+    median_ms = statistics.median(run["microseconds"] for run in runs) / 1000
+    eager = sorted(
+        name for name in runs[-1]["modules"]
+        if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    )
+
+    logger.info(f"import main: median {median_ms:.1f}ms over {args.runs} runs (budget {args.budget_ms:.0f}ms)")
+    failed = False
+    if median_ms > args.budget_ms:
+        logger.error(f"Startup import time {median_ms:.1f}ms exceeds budget {args.budget_ms:.0f}ms")
+        failed = True
+    if eager:
+        logger.error(f"Heavy modules imported at startup: {', '.join(eager[:10])}")
+        failed = True
+
+    if failed:
+        logger.error("Test failed!")
+        return 1
+    logger.info("Test completed successfully!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Тесты общего хранилища состояния встреч (SQLiteStatusStore)
+
+Аренды, подбор просроченных аренд, ожидание изменений, резервы допуска
+и потребление арендаторов. Два экземпляра хранилища на одном файле
+играют роль двух воркеров.
+
+Запуск (из backend/):
+    python -m pytest -q test_status_store.py
+"""
+import time
+import asyncio
+
+import pytest
+
+from services.status_store import SQLiteStatusStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "status.db")
+
+
+def test_lease_held_by_live_owner(db_path):
+    """Живую аренду другой владелец не получает, свою можно взять повторно"""
+    store = SQLiteStatusStore(db_path)
+    assert store.acquire_lease("m1", "worker-a", ttl=30, job={"kind": "upload"})
+    assert not store.acquire_lease("m1", "worker-b", ttl=30)
+    assert store.acquire_lease("m1", "worker-a", ttl=30, job={"kind": "upload", "file_path": "a.mp3"})
+    assert store.lease("m1")["owner"] == "worker-a"
+    assert store.lease("m1")["job"] == {"kind": "upload", "file_path": "a.mp3"}
+
+
+def test_expired_lease_can_be_taken(db_path):
+    """Просроченную аренду забирает другой владелец"""
+    store = SQLiteStatusStore(db_path)
+    assert store.acquire_lease("m1", "worker-a", ttl=0.05)
+    time.sleep(0.1)
+    assert store.acquire_lease("m1", "worker-b", ttl=30)
+    assert store.lease("m1")["owner"] == "worker-b"
+
+
+def test_release_lease_only_by_owner(db_path):
+    store = SQLiteStatusStore(db_path)
+    store.acquire_lease("m1", "worker-a", ttl=30)
+    store.release_lease("m1", "worker-b")
+    assert store.lease("m1") is not None
+    store.release_lease("m1", "worker-a")
+    assert store.lease("m1") is None
+
+
+def test_renew_keeps_lease_alive(db_path):
+    """Продлённая аренда не попадает в claim_expired"""
+    store = SQLiteStatusStore(db_path)
+    store.acquire_lease("m1", "worker-a", ttl=0.2)
+    store.acquire_lease("m2", "worker-a", ttl=0.2)
+    time.sleep(0.1)
+    assert store.renew_leases("worker-a", ttl=30) == 2
+    time.sleep(0.15)
+    assert store.claim_expired("worker-b", ttl=30) == []
+
+
+def test_claim_expired_returns_jobs_once(db_path):
+    """Просроченные аренды переходят к забравшему с job для перезапуска - ровно один раз"""
+    worker_a = SQLiteStatusStore(db_path)
+    worker_b = SQLiteStatusStore(db_path)
+    worker_a.acquire_lease("m1", "worker-a", ttl=0.05, job={"kind": "demo", "demo_id": "sales"})
+    worker_a.acquire_lease("m2", "worker-a", ttl=30)
+    time.sleep(0.1)
+
+    claimed = worker_b.claim_expired("worker-b", ttl=30)
+    assert claimed == [("m1", {"kind": "demo", "demo_id": "sales"})]
+    assert worker_a.lease("m1")["owner"] == "worker-b"
+    assert worker_a.lease("m2")["owner"] == "worker-a"
+    # Аренда уже продлена новым владельцем - повторно её не забирают
+    assert worker_a.claim_expired("worker-a", ttl=30) == []
+
+
+def test_status_changes_bump_version(db_path):
+    store = SQLiteStatusStore(db_path)
+    assert store.version("m1") == 0
+    store.set_status("m1", {"status": "processing", "progress": 0})
+    first = store.version("m1")
+    assert store.update_status("m1", progress=50)
+    assert store.version("m1") > first
+    assert store.get_status("m1")["progress"] == 50
+    assert not store.update_status("missing", progress=1)
+
+
+def test_wait_for_change_wakes_on_local_write(db_path):
+    """Изменение в этом процессе будит ожидание сразу, без опроса"""
+    store = SQLiteStatusStore(db_path)
+    store.poll_interval = 10
+
+    async def scenario():
+        since = store.version("m1")
+        waiter = asyncio.create_task(store.wait_for_change("m1", since, timeout=5))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        await asyncio.to_thread(store.set_status, "m1", {"status": "processing"})
+        current = await waiter
+        return since, current, time.monotonic() - started
+
+    since, current, elapsed = asyncio.run(scenario())
+    assert current > since
+    assert elapsed < 1
+
+
+def test_wait_for_change_sees_other_process(db_path):
+    """Изменение другого воркера замечается опросом"""
+    store = SQLiteStatusStore(db_path)
+    other = SQLiteStatusStore(db_path)
+    store.poll_interval = 0.05
+
+    async def scenario():
+        waiter = asyncio.create_task(store.wait_for_change("m1", 0, timeout=5))
+        await asyncio.sleep(0.1)
+        await asyncio.to_thread(other.set_status, "m1", {"status": "processing"})
+        return await waiter
+
+    assert asyncio.run(scenario()) == other.version("m1")
+
+
+def test_wait_for_change_times_out(db_path):
+    store = SQLiteStatusStore(db_path)
+    store.poll_interval = 0.02
+    store.set_status("m1", {"status": "processing"})
+    since = store.version("m1")
+    assert asyncio.run(store.wait_for_change("m1", since, timeout=0.1)) == since
+
+
+def test_reserve_check_sees_other_workers(db_path):
+    """Проверка резерва видит резервы всех воркеров; отказ в проверке не оставляет резерва"""
+    worker_a = SQLiteStatusStore(db_path)
+    worker_b = SQLiteStatusStore(db_path)
+    worker_a.reserve("admission", "m1", "worker-a", ttl=30, audio_seconds=60)
+
+    def at_most_one(jobs):
+        if jobs:
+            raise RuntimeError("limit")
+
+    with pytest.raises(RuntimeError):
+        worker_b.reserve("admission", "m2", "worker-b", ttl=30, check=at_most_one)
+    assert [job["id"] for job in worker_b.reservations("admission")] == ["m1"]
+
+    released = worker_b.unreserve("admission", "m1")
+    assert released["owner"] == "worker-a" and released["audio_seconds"] == 60
+    assert worker_b.unreserve("admission", "m1") is None
+    worker_b.reserve("admission", "m2", "worker-b", ttl=30, check=at_most_one)
+
+
+def test_reservations_expire_and_renew(db_path):
+    """Резервы пропавшего воркера истекают; renew_leases продлевает резервы владельца"""
+    store = SQLiteStatusStore(db_path)
+    store.reserve("quota", "m1", "worker-a", ttl=0.1, tenant="sales", audio_seconds=10)
+    store.reserve("quota", "m2", "worker-b", ttl=0.1, tenant="sales", audio_seconds=20)
+    store.renew_leases("worker-a", ttl=30)
+    time.sleep(0.15)
+    assert [job["id"] for job in store.reservations("quota", "sales")] == ["m1"]
+    assert store.reservations("quota", "other") == []
+
+
+def test_tenant_usage_accumulates_per_day(db_path):
+    worker_a = SQLiteStatusStore(db_path)
+    worker_b = SQLiteStatusStore(db_path)
+    worker_a.add_usage("sales", 100, jobs=1, audio_seconds=30)
+    worker_b.add_usage("sales", 100, jobs=2, llm_tokens=500)
+    worker_b.add_usage("sales", 101, jobs=1)
+    assert worker_a.usage(100) == {"sales": {"jobs": 3, "audio_seconds": 30.0, "llm_tokens": 500}}
+    assert worker_a.usage(101)["sales"]["jobs"] == 1
+    assert worker_a.usage(99) == {}
@@ -0,0 +1,76 @@
+"""
+Тесты трекера задач (TaskTracker): дедупликация между встречами,
+повторный анализ встречи и изоляция арендаторов
+
+Запуск (из backend/):
+    python -m pytest -q test_task_tracker.py
+"""
+import pytest
+
+from services.task_tracker import TaskTracker
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "tracker.db")
+
+
+def test_same_task_from_two_meetings_is_one_item(db_path):
+    tracker = TaskTracker(db_path)
+    tracker.ingest_meeting("m1", [{"task": "Подготовить отчёт по продажам за квартал", "assignee": "Анна"}],
+                           "2024-05-01T10:00:00")
+    tracker.ingest_meeting("m2", [{"description": "Подготовить отчёт по продажам за квартал",
+                                   "assignee": " анна ", "deadline": "2024-05-10"}], "2024-05-03T10:00:00")
+
+    items = tracker.query()
+    assert len(items) == 1
+    assert items[0]["occurrences"] == 2
+    assert sorted(items[0]["meeting_ids"]) == ["m1", "m2"]
+    assert items[0]["due_date"] == "2024-05-10"
+
+
+def test_different_assignees_are_not_merged(db_path):
+    tracker = TaskTracker(db_path)
+    tracker.ingest_meeting("m1", [
+        {"task": "Подготовить отчёт по продажам за квартал", "assignee": "Анна"},
+        {"task": "Подготовить отчёт по продажам за квартал", "assignee": "Борис"}
+    ])
+    assert len(tracker.query()) == 2
+
+
+def test_reingest_drops_stale_items(db_path):
+    """Повторный анализ встречи заменяет её задачи; статус найденной снова задачи сохраняется"""
+    tracker = TaskTracker(db_path)
+    tracker.ingest_meeting("m1", [
+        {"task": "Обновить документацию API", "assignee": "Анна"},
+        {"task": "Починить сборку на CI", "assignee": "Борис"}
+    ])
+    kept = next(item for item in tracker.query() if item["assignee"] == "Анна")
+    tracker.update_status(kept["id"], "in_progress")
+
+    tracker.ingest_meeting("m1", [{"task": "Обновить документацию API", "assignee": "Анна"}])
+    items = tracker.query(status=None)
+    assert [item["id"] for item in items] == [kept["id"]]
+    assert items[0]["status"] == "in_progress"
+
+
+def test_instances_share_the_database(db_path):
+    """Второй воркер находит дубликат задачи, записанной первым"""
+    TaskTracker(db_path).ingest_meeting("m1", [{"task": "Согласовать бюджет маркетинга", "assignee": "Анна"}])
+    other = TaskTracker(db_path)
+    other.ingest_meeting("m2", [{"task": "Согласовать бюджет маркетинга", "assignee": "Анна"}])
+    assert [item["occurrences"] for item in other.query()] == [2]
+
+
+def test_tenants_are_isolated(db_path):
+    tracker = TaskTracker(db_path)
+    task = [{"task": "Согласовать бюджет маркетинга", "assignee": "Анна"}]
+    tracker.ingest_meeting("m1", task, tenant="sales")
+    tracker.ingest_meeting("m2", task, tenant="support")
+
+    sales = tracker.query("sales")
+    assert len(sales) == 1 and sales[0]["occurrences"] == 1
+    assert tracker.update_status(sales[0]["id"], "done", tenant="support") is None
+    assert tracker.update_status(sales[0]["id"], "done", tenant="sales")["status"] == "done"
+    assert tracker.query("sales") == []
+    assert tracker.assignee_summary("support") == [{"assignee": "Анна", "open": 1, "total": 1}]
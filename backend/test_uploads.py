@@ -0,0 +1,126 @@
+"""
+Тесты возобновляемых загрузок (ResumableUploadStore)
+
+Два экземпляра хранилища на одной директории играют роль двух воркеров.
+
+Запуск (из backend/):
+    python -m pytest -q test_uploads.py
+"""
+import asyncio
+
+import pytest
+
+from services.uploads import ResumableUploadStore, UploadError
+
+PART = 64 * 1024
+
+
+async def body(data: bytes, chunk: int = 10_000):
+    for start in range(0, len(data), chunk):
+        yield data[start:start + chunk]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResumableUploadStore(str(tmp_path), part_size=PART)
+
+
+def test_parts_out_of_order_from_two_workers(store, tmp_path):
+    """Части в любом порядке и в разные воркеры собираются в исходный файл"""
+    other = ResumableUploadStore(str(tmp_path), part_size=PART)
+    data = bytes(range(256)) * 1000  # 256 000 байт - 4 части, последняя неполная
+
+    async def scenario():
+        session = await store.create("meeting.wav", len(data), tenant="sales")
+        upload_id = session["upload_id"]
+        assert session["parts"] == 4
+        for number, worker in ((3, store), (1, other), (4, other), (2, store)):
+            offset = (number - 1) * PART
+            await worker.write_part(upload_id, number, body(data[offset:offset + PART]), "sales")
+        status = await other.status(upload_id, "sales")
+        assert status["missing_parts"] == []
+        assert status["received_bytes"] == len(data)
+        return await store.complete(upload_id, "sales")
+
+    session = asyncio.run(scenario())
+    with open(session["path"], "rb") as f:
+        assert f.read() == data
+
+
+def test_complete_requires_all_parts(store):
+    async def scenario():
+        session = await store.create("a.wav", 2 * PART)
+        await store.write_part(session["upload_id"], 2, body(b"x" * PART))
+        with pytest.raises(UploadError) as error:
+            await store.complete(session["upload_id"])
+        assert error.value.status == 409
+        assert (await store.status(session["upload_id"]))["missing_parts"] == [1]
+
+    asyncio.run(scenario())
+
+
+def test_complete_happens_once(store, tmp_path):
+    """uploading -> completed - только для одного из параллельных complete"""
+    other = ResumableUploadStore(str(tmp_path), part_size=PART)
+
+    async def scenario():
+        session = await store.create("a.wav", 10)
+        await store.write_part(session["upload_id"], 1, body(b"0123456789"))
+        return await asyncio.gather(
+            *(worker.complete(session["upload_id"]) for worker in (store, other, store, other)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert sum(isinstance(result, dict) for result in results) == 1
+    assert all(result.status == 409 for result in results if isinstance(result, UploadError))
+
+
+def test_part_size_is_checked(store):
+    async def scenario():
+        session = await store.create("a.wav", PART + 10)
+        with pytest.raises(UploadError):
+            await store.write_part(session["upload_id"], 2, body(b"x" * 11))
+        with pytest.raises(UploadError):
+            await store.write_part(session["upload_id"], 1, body(b"x" * 10))
+        with pytest.raises(UploadError):
+            await store.write_part(session["upload_id"], 3, body(b"x"))
+        assert (await store.status(session["upload_id"]))["received_parts"] == []
+
+    asyncio.run(scenario())
+
+
+def test_other_tenant_gets_not_found(store):
+    """Сессия арендатора для другого арендатора не существует"""
+    async def scenario():
+        session = await store.create("a.wav", 10, tenant="sales")
+        upload_id = session["upload_id"]
+        for call in (
+            store.status(upload_id, "support"),
+            store.write_part(upload_id, 1, body(b"0123456789"), "support"),
+            store.complete(upload_id, "support"),
+            store.abort(upload_id, "support")
+        ):
+            with pytest.raises(UploadError) as error:
+                await call
+            assert error.value.status == 404
+        assert (await store.status(upload_id, "sales"))["state"] == "uploading"
+
+    asyncio.run(scenario())
+
+
+def test_abort_removes_file(store):
+    async def scenario():
+        session = await store.create("a.wav", 10)
+        await store.abort(session["upload_id"])
+        with pytest.raises(UploadError) as error:
+            await store.status(session["upload_id"])
+        assert error.value.status == 404
+
+    asyncio.run(scenario())
+
+
+def test_invalid_upload_id(store):
+    with pytest.raises(UploadError) as error:
+        asyncio.run(store.status("../sessions/x"))
+    assert error.value.status == 404
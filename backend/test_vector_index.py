@@ -0,0 +1,78 @@
+"""
+Тесты дискового индекса векторов (VectorIndex)
+
+Запуск (из backend/):
+    python -m pytest -q test_vector_index.py
+"""
+import numpy as np
+import pytest
+
+from services.vector_index import VectorIndex
+
+DIM = 16
+
+
+def unit_vectors(count: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(count, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / "index")
+
+
+def test_search_finds_exact_vector(directory):
+    index = VectorIndex(directory, DIM)
+    vectors = unit_vectors(20)
+    index.add([f"k{i}" for i in range(20)], vectors, [{"kind": "topic", "i": i} for i in range(20)])
+    key, score, payload = index.search(vectors[7], k=1)[0]
+    assert key == "k7" and payload["i"] == 7
+    assert score == pytest.approx(1.0, abs=1e-5)
+    assert index.search(vectors[7], k=5, kind="decision") == []
+
+
+def test_group_rewrite_tombstones_missing_keys(directory):
+    """Перезапись группы удаляет её ключи, которых нет в новой записи, - и после переоткрытия"""
+    index = VectorIndex(directory, DIM)
+    vectors = unit_vectors(3)
+    index.add(["m1:a", "m1:b", "m1:c"], vectors, [{}, {}, {}], group="m1")
+    index.add(["m1:a"], vectors[:1], [{"version": 2}], group="m1")
+
+    for current in (index, VectorIndex(directory, DIM)):
+        keys = [key for key, _, _ in current.search(vectors[1], k=10)]
+        assert keys == ["m1:a"]
+        assert current.get_vector("m1:b") is None
+        assert current.search(vectors[0], k=1)[0][2] == {"version": 2}
+
+
+def test_remove_group(directory):
+    index = VectorIndex(directory, DIM)
+    vectors = unit_vectors(4)
+    index.add(["m1:a", "m1:b"], vectors[:2], [{}, {}], group="m1")
+    index.add(["m2:a", "m2:b"], vectors[2:], [{}, {}], group="m2")
+    index.remove_group("m1")
+    assert {key for key, _, _ in index.search(vectors[0], k=10)} == {"m2:a", "m2:b"}
+
+
+def test_other_instance_sees_changes(directory):
+    """Второй процесс (экземпляр) дочитывает чужие добавления и удаления"""
+    writer = VectorIndex(directory, DIM)
+    reader = VectorIndex(directory, DIM)
+    vectors = unit_vectors(2)
+    writer.add(["a", "b"], vectors, [{}, {}])
+    assert reader.search(vectors[1], k=1)[0][0] == "b"
+    writer.remove(["b"])
+    assert [key for key, _, _ in reader.search(vectors[1], k=10)] == ["a"]
+    reader.add(["c"], vectors[1:], [{}])
+    np.testing.assert_allclose(writer.get_vector("c"), vectors[1])
+
+
+def test_trained_index_keeps_recall(directory):
+    """После обучения центроидов поиск идёт по спискам и находит сам вектор"""
+    index = VectorIndex(directory, DIM, nprobe=4, train_threshold=64)
+    vectors = unit_vectors(300, seed=1)
+    index.add([f"k{i}" for i in range(300)], vectors, [{} for _ in range(300)])
+    assert index.centroids is not None
+    hits = sum(index.search(vectors[i], k=1)[0][0] == f"k{i}" for i in range(0, 300, 10))
+    assert hits >= 27